@@ -8,12 +8,14 @@
 # The order of import matters. You need to import module by order of dependency
 from pyincore.client import Client
 from pyincore.client import IncoreClient
+from pyincore.utils.hazardvaluestransport import HazardValuesTransport
 from pyincore.hazardservice import HazardService
 from pyincore.utils.expressioneval import Parser
 from pyincore.utils.cge_ml_file_util import CGEMLFileUtil
 from pyincore.dataservice import DataService
 from pyincore.utils.geoutil import GeoUtil
 from pyincore.utils.networkutil import NetworkUtil
+from pyincore.utils.networkreachability import NetworkReachability
 from pyincore.dataservice import DataService
 from pyincore.fragilityservice import FragilityService
 from pyincore.repairservice import RepairService
@@ -24,10 +26,13 @@ from pyincore.utils.analysisutil import AnalysisUtil
 from pyincore.utils.popdisloutputprocess import PopDislOutputProcess
 from pyincore.utils.cgeoutputprocess import CGEOutputProcess
 from pyincore.utils.hhrsoutputprocess import HHRSOutputProcess
+from pyincore.models.samplestates import SampleStates
+from pyincore.utils.resultsink import ResultSink, MemoryResultSink
 from pyincore.dataset import Dataset, InventoryDataset, DamageRatioDataset
 from pyincore.models.fragilitycurveset import FragilityCurveSet
 from pyincore.models.repaircurveset import RepairCurveSet
 from pyincore.models.restorationcurveset import RestorationCurveSet
+from pyincore.models.restorationtable import RestorationTable, RestorationTableCache
 from pyincore.models.dfr3curve import DFR3Curve
 from pyincore.models.mappingset import MappingSet
 from pyincore.models.mapping import Mapping
@@ -41,6 +46,7 @@ from pyincore.models.hazard.hazarddataset import (
     FloodDataset,
 )
 from pyincore.models.hazard.hazard import Hazard
+from pyincore.models.hazard.hazardvaluecache import HazardValueCache
 from pyincore.models.hazard.hurricane import Hurricane
 from pyincore.models.hazard.flood import Flood
 from pyincore.models.hazard.tsunami import Tsunami
@@ -49,6 +55,7 @@ from pyincore.models.hazard.tornado import Tornado
 from pyincore.models.units import Units
 from pyincore.networkdata import NetworkData
 from pyincore.baseanalysis import BaseAnalysis
+from pyincore.utils.cgebatchrunner import CGEBatchRunner
 import pyincore.globals
 
 __version__ = pyincore.globals.PACKAGE_VERSION
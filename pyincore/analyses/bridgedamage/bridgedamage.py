@@ -5,9 +5,6 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 
-import concurrent.futures
-from itertools import repeat
-
 from pyincore import AnalysisUtil, GeoUtil
 from pyincore import BaseAnalysis, HazardService, FragilityService
 from pyincore.analyses.bridgedamage.bridgeutil import BridgeUtil
@@ -52,57 +49,44 @@ class BridgeDamage(BaseAnalysis):
             self, len(bridge_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(bridge_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(bridge_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, damage_results) = self.bridge_damage_concurrent_future(
-            self.bridge_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
+        inventory_args = self.get_chunks(num_workers, list(bridge_set))
+
+        # Get Fragility key
+        fragility_key = self.get_parameter("fragility_key")
+        if fragility_key is None:
+            fragility_key = (
+                BridgeUtil.DEFAULT_TSUNAMI_HMAX_FRAGILITY_KEY
+                if hazard_type == "tsunami"
+                else BridgeUtil.DEFAULT_FRAGILITY_KEY
+            )
+            self.set_parameter("fragility_key", fragility_key)
 
-        self.set_result_csv_data(
-            "result", ds_results, name=self.get_parameter("result_name")
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), [fragility_key]
         )
-        self.set_result_json_data(
-            "metadata",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
+
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.bridge_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", self.get_parameter("result_name"), result_format),
+                (
+                    "metadata",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
         )
 
         return True
 
-    def bridge_damage_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of ordered dictionaries with bridge damage values and other data/metadata.
-
-        """
-        output_ds = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
-
-        return output_ds, output_dmg
-
     def bridge_damage_analysis_bulk_input(
         self, bridges, hazard, hazard_type, hazard_dataset_id
     ):
@@ -119,15 +103,7 @@ class BridgeDamage(BaseAnalysis):
 
         """
 
-        # Get Fragility key
         fragility_key = self.get_parameter("fragility_key")
-        if fragility_key is None:
-            fragility_key = (
-                BridgeUtil.DEFAULT_TSUNAMI_HMAX_FRAGILITY_KEY
-                if hazard_type == "tsunami"
-                else BridgeUtil.DEFAULT_FRAGILITY_KEY
-            )
-            self.set_parameter("fragility_key", fragility_key)
 
         # Liquefaction
         use_liquefaction = False
@@ -383,6 +359,19 @@ class BridgeDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                    "additional info is written as json.",
+                    "type": str,
+                },
                 {
                     "id": "hazard_id",
                     "required": False,
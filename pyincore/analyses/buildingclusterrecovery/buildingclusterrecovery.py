@@ -10,7 +10,6 @@ import csv
 import numpy as np
 import scipy as sp
 import scipy.stats
-import concurrent.futures
 
 from pyincore.analyses.buildingclusterrecovery.buildingdata import BuildingData
 from pyincore import BaseAnalysis, Dataset
@@ -746,17 +745,6 @@ class BuildingClusterRecovery(BaseAnalysis):
                 sample_total[i][j] = sample[i]
         return sample_total
 
-    def calculate_std_of_mean_concurrent_future(
-        self, function_name, parallelism, *args
-    ):
-        output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for ret in executor.map(function_name, *args):
-                output.extend(ret)
-        return output
-
     def calculate_std_of_mean_bulk_input(
         self,
         time_steps,
@@ -4,6 +4,10 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
+import numpy as np
+
+from pyincore.models.samplestates import SampleStates
+
 
 class BuildingUtil:
     """Utility methods for the building damage analysis."""
@@ -16,3 +20,140 @@ class BuildingUtil:
     PROPERTIES = "properties"
     BLDG_PERIOD = "period"
     GROUND_FAILURE_PROB = "groundFailureProb"
+
+    # upper bound of random draws held in memory at once by the building recovery analyses
+    MAX_BLOCK_DRAWS = 10000000
+
+    @staticmethod
+    def get_block_size(draws_per_building):
+        """Number of buildings sampled at once, so a block holds at most MAX_BLOCK_DRAWS draws.
+
+        Args:
+            draws_per_building (int): Number of draws per building, e.g. samples times delay factors.
+
+        Returns:
+            int: Number of buildings per block.
+
+        """
+        return max(1, BuildingUtil.MAX_BLOCK_DRAWS // max(1, draws_per_building))
+
+    @staticmethod
+    def get_sample_damage_states(sample_damage_states, num_samples, label_value):
+        """Damage state of every building and sample, mapped to a value per damage state label.
+
+        The Monte Carlo damage states can hold more samples than a recovery analysis uses, only the first num_samples
+        of every building are used.
+
+        Args:
+            sample_damage_states (pd.DataFrame): Guid and comma joined sample_damage_states of every building.
+            num_samples (int): Number of samples.
+            label_value (function): Value of a damage state label, e.g. its row index in the delay factors.
+
+        Returns:
+            np.ndarray: (buildings x num_samples) matrix of the values of the damage states.
+
+        """
+        damage_states = SampleStates.from_strings(
+            sample_damage_states["guid"], sample_damage_states["sample_damage_states"]
+        )
+        states = damage_states.states[:, :num_samples]
+        if damage_states.num_samples < num_samples or np.any(
+            states == SampleStates.MISSING
+        ):
+            raise IndexError(
+                "Sample damage states have fewer samples than the number of samples."
+            )
+        values = np.array(
+            [label_value(label) for label in damage_states.labels], dtype=np.intp
+        )
+        return values[states]
+
+    @staticmethod
+    def get_repair_times(repair_sets, damage_states, percent_func, fill_value=0.0):
+        """Repair time in weeks of every building, sample and percent of functionality draw.
+
+        Every repair curve's inverse is evaluated once over the draws of all buildings and samples in its damage
+        state.
+
+        Args:
+            repair_sets (list): Repair curve set of every building, None for a building without one.
+            damage_states (np.ndarray): (buildings x N1) damage state, the index of the repair curve.
+            percent_func (np.ndarray): (buildings x N1 x N2) draws of percent of functionality.
+            fill_value (float): Repair time of the buildings without a repair curve set.
+
+        Returns:
+            np.ndarray: (buildings x N1 x N2) repair times.
+
+        """
+        num_draws = percent_func.shape[2]
+        repair_time = np.full(percent_func.shape, fill_value, dtype=float)
+
+        building_sets = {}
+        for building, repair_set in enumerate(repair_sets):
+            if repair_set is not None:
+                building_sets.setdefault(id(repair_set), (repair_set, []))[1].append(
+                    building
+                )
+
+        for repair_set, buildings in building_sets.values():
+            buildings = np.array(buildings, dtype=np.intp)
+            states = damage_states[buildings]
+            for state in np.unique(states):
+                building_idx, sample_idx = np.nonzero(states == state)
+                building_idx = buildings[building_idx]
+                # NOTE: Even though the kwarg name is "repair_time", it actually takes percent of functionality. DFR3
+                # system currently doesn't have a way to represent the name correctly when calculating the inverse.
+                repair_time[building_idx, sample_idx] = (
+                    np.reshape(
+                        repair_set.repair_curves[state].solve_curve_for_inverse(
+                            hazard_values={},
+                            curve_parameters=repair_set.curve_parameters,
+                            **{
+                                "repair_time": percent_func[
+                                    building_idx, sample_idx
+                                ].ravel()
+                            },
+                        ),
+                        (len(building_idx), num_draws),
+                    )
+                    / 7
+                )
+
+        return repair_time
+
+    @staticmethod
+    def get_recovery_times(repair_sets, damage_states, delay, rng, fill_value=0.0):
+        """Recovery time in weeks of every building, for every pair of an N1 delay sample and an N2 repair draw.
+
+        Buildings are processed in blocks of get_block_size, so only the percent of functionality draws and repair
+        times of one block are held in memory besides the result. The draws are the same as drawing them at once.
+
+        Args:
+            repair_sets (list): Repair curve set of every building, None for a building without one.
+            damage_states (np.ndarray): (buildings x N1) damage state, the index of the repair curve.
+            delay (np.ndarray): (buildings x N1) delay samples in weeks.
+            rng (np.random.Generator): Generator of the N2 percent of functionality draws, N2 equals N1.
+            fill_value (float): Repair time of the buildings without a repair curve set.
+
+        Returns:
+            np.ndarray: (buildings x N1 * N2) recovery times, column i * N2 + j is delay sample i plus repair draw j.
+
+        """
+        num_buildings, num_samples = delay.shape
+        recovery_time = np.empty((num_buildings, num_samples * num_samples))
+
+        block_size = BuildingUtil.get_block_size(num_samples * num_samples)
+        for start in range(0, num_buildings, block_size):
+            end = min(start + block_size, num_buildings)
+            percent_func = rng.random((end - start, num_samples, num_samples))
+            repair_time = BuildingUtil.get_repair_times(
+                repair_sets[start:end],
+                damage_states[start:end],
+                percent_func,
+                fill_value=fill_value,
+            )
+            recovery_time[start:end] = np.round(
+                delay[start:end, :, None] + repair_time, 1
+            ).reshape(end - start, num_samples * num_samples)
+
+        return recovery_time
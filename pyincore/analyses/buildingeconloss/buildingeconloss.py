@@ -36,9 +36,6 @@ class BuildingEconLoss(BaseAnalysis):
         if self.infl_factor is None:
             self.infl_factor = 0.0
 
-        # Building dataset
-        bldg_set = self.get_input_dataset("buildings").get_inventory_reader()
-
         # Occupancy type of the exposure
         occ_multiplier = self.get_input_dataset("occupancy_multiplier")
         if occ_multiplier is not None:
@@ -48,19 +45,17 @@ class BuildingEconLoss(BaseAnalysis):
             occ_mult_df = None
 
         try:
-            prop_select = []
-            for bldg_item in list(bldg_set):
-                guid = bldg_item["properties"]["guid"]
-                appr_bldg = bldg_item["properties"]["appr_bldg"]
-                year_built = bldg_item["properties"]["year_built"]
-                occ_type = bldg_item["properties"]["occ_type"]
-                prop_select.append([guid, year_built, occ_type, appr_bldg])
-
-            bldg_set_df = pd.DataFrame(
-                prop_select, columns=["guid", "year_built", "occ_type", "appr_bldg"]
+            # attributes only, the geometry is not needed for the loss
+            bldg_set_df = self.get_input_dataset(
+                "buildings"
+            ).get_dataframe_from_shapefile(ignore_geometry=True)
+            bldg_set_df = bldg_set_df[["guid", "year_built", "occ_type", "appr_bldg"]]
+
+            bldg_dmg_df = pd.read_csv(
+                self.get_input_dataset("building_mean_dmg").get_file_path("csv"),
+                dtype=str,
+                keep_default_na=False,
             )
-            bldg_dmg_set = self.get_input_dataset("building_mean_dmg").get_csv_reader()
-            bldg_dmg_df = pd.DataFrame(list(bldg_dmg_set))
 
             dmg_set_df = pd.merge(
                 bldg_set_df,
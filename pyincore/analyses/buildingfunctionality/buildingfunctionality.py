@@ -7,7 +7,7 @@
 import numpy as np
 import pandas as pd
 
-from pyincore import BaseAnalysis
+from pyincore import BaseAnalysis, SampleStates
 
 
 class BuildingFunctionality(BaseAnalysis):
@@ -23,6 +23,8 @@ class BuildingFunctionality(BaseAnalysis):
 
     """
 
+    CHUNK_SIZE = 100000
+
     def __init__(self, incore_client):
         super().__init__(incore_client)
 
@@ -94,12 +96,7 @@ class BuildingFunctionality(BaseAnalysis):
     def run(self):
         """Executes building functionality analysis"""
 
-        # enable index on "guid" column
-        buildings_df = (
-            self.get_input_dataset("building_damage_mcs_samples")
-            .get_dataframe_from_csv()
-            .set_index("guid")
-        )
+        buildings_dataset = self.get_input_dataset("building_damage_mcs_samples")
 
         interdependency_dataset = self.get_input_dataset("interdependency_dictionary")
         if interdependency_dataset is not None:
@@ -109,17 +106,15 @@ class BuildingFunctionality(BaseAnalysis):
 
         substations_dataset = self.get_input_dataset("substations_damage_mcs_samples")
         if substations_dataset is not None:
-            substations_df = substations_dataset.get_dataframe_from_csv().set_index(
-                "guid"
-            )
+            substations = substations_dataset.get_sample_states()
         else:
-            substations_df = None
+            substations = None
 
         poles_dataset = self.get_input_dataset("poles_damage_mcs_samples")
         if poles_dataset is not None:
-            poles_df = poles_dataset.get_dataframe_from_csv().set_index("guid")
+            poles = poles_dataset.get_sample_states()
         else:
-            poles_df = None
+            poles = None
 
         if (
             poles_dataset is not None or substations_dataset is not None
@@ -129,23 +124,20 @@ class BuildingFunctionality(BaseAnalysis):
                 "considered in the building functionality calculation."
             )
 
-        functionality_probabilities = []
-        functionality_samples = []
-        for building_guid in buildings_df.index:
-            building_guid, sample, probability = self.functionality(
-                building_guid,
-                buildings_df,
-                substations_df,
-                poles_df,
-                interdependency_dict,
+        # buildings are streamed in chunks, substations and poles are few and read once
+        fp_chunks = []
+        fs_chunks = []
+        for buildings in buildings_dataset.iter_sample_states(
+            BuildingFunctionality.CHUNK_SIZE
+        ):
+            fs_chunk, fp_chunk = self.functionality_batch(
+                buildings, substations, poles, interdependency_dict
             )
-            functionality_probabilities.append([building_guid, probability])
-            functionality_samples.append([building_guid, sample])
+            fs_chunks.append(fs_chunk)
+            fp_chunks.append(fp_chunk)
 
-        fp_results = pd.DataFrame(
-            functionality_probabilities, columns=["guid", "probability"]
-        )
-        fs_results = pd.DataFrame(functionality_samples, columns=["guid", "failure"])
+        fp_results = pd.concat(fp_chunks, ignore_index=True)
+        fs_results = pd.concat(fs_chunks, ignore_index=True)
 
         self.set_result_csv_data(
             "functionality_probability",
@@ -163,6 +155,80 @@ class BuildingFunctionality(BaseAnalysis):
 
         return True
 
+    def functionality_batch(self, buildings, substations, poles, interdependency):
+        """Functionality samples and probability of a chunk of buildings.
+
+        The building, substation and pole samples are compared as matrices. A building sample is functional if the
+        building and, when given, the substation and pole it depends on are functional in that sample.
+
+        Args:
+            buildings (obj): SampleStates of the building failure samples.
+            substations (obj): SampleStates of the substation failure samples, None if not considered.
+            poles (obj): SampleStates of the pole failure samples, None if not considered.
+            interdependency (dict): An interdependency between buildings and substations and poles.
+
+        Returns:
+            pd.DataFrame: Functionality samples, guid and a "0,0,1..." failure string of each building.
+            pd.DataFrame: Functionality probability of each building.
+
+        """
+        guids = buildings.ids
+        functional = buildings.to_values() == 1
+        valid = np.asarray(buildings.states) != SampleStates.MISSING
+
+        if interdependency is not None:
+            defined = np.array([guid in interdependency for guid in guids], dtype=bool)
+            defined_guids = [guid for guid in guids if guid in interdependency]
+            for facilities, guid_key in [
+                (substations, "substations_guid"),
+                (poles, "poles_guid"),
+            ]:
+                if facilities is None:
+                    continue
+                facility_index = {guid: i for i, guid in enumerate(facilities.ids)}
+                rows = np.array(
+                    [
+                        facility_index[interdependency[guid][guid_key]]
+                        for guid in defined_guids
+                    ],
+                    dtype=np.intp,
+                )
+                facility_functional = facilities.to_values() == 1
+                facility_valid = np.asarray(facilities.states) != SampleStates.MISSING
+                num_samples = min(functional.shape[1], facility_functional.shape[1])
+                functional = functional[:, :num_samples]
+                valid = valid[:, :num_samples]
+                functional[defined] &= facility_functional[rows, :num_samples]
+                valid[defined] &= facility_valid[rows, :num_samples]
+        else:
+            defined = np.ones(len(guids), dtype=bool)
+
+        # samples are compared pairwise, so the shortest sample list decides the count
+        num_valid = np.where(valid.all(axis=1), valid.shape[1], valid.argmin(axis=1))
+        samples = np.where(
+            np.arange(valid.shape[1]) < num_valid[:, None],
+            functional.astype(np.uint8),
+            SampleStates.MISSING,
+        )
+        functionality_sum = (samples == 1).sum(axis=1)
+        probability = np.divide(
+            functionality_sum,
+            num_valid,
+            out=np.zeros(len(guids)),
+            where=functionality_sum > 0,
+        )
+
+        sample_strings = np.array(
+            SampleStates(guids, samples).to_strings(), dtype=object
+        )
+        sample_strings[~defined] = "NA"
+        probabilities = probability.astype(object)
+        probabilities[~defined] = "NA"
+
+        fs_results = pd.DataFrame({"guid": guids, "failure": sample_strings})
+        fp_results = pd.DataFrame({"guid": guids, "probability": probabilities})
+        return fs_results, fp_results
+
     def functionality(
         self, building_guid, buildings, substations, poles, interdependency
     ):
@@ -4,9 +4,6 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import concurrent.futures
-from itertools import repeat
-
 from pyincore import AnalysisUtil, GeoUtil
 from pyincore import BaseAnalysis, HazardService, FragilityService
 from pyincore.analyses.buildingnonstructuraldamage.buildingnonstructuralutil import (
@@ -85,57 +82,34 @@ class BuildingNonStructDamage(BaseAnalysis):
             self, len(building_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(building_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(building_set)
-
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, damage_results) = self.building_damage_concurrent_future(
-            self.building_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
+        inventory_args = self.get_chunks(num_workers, list(building_set))
 
-        self.set_result_csv_data(
-            "result", ds_results, name=self.get_parameter("result_name")
-        )
-        self.set_result_json_data(
-            "damage_result",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"),
+            [self.get_parameter("fragility_key")],
         )
-        return True
-
-    def building_damage_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
 
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            dict: An ordered dictionary with building damage values.
-            dict: An ordered dictionary with building data/metadata.
-
-        """
-        output = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output.extend(ret1)
-                output_dmg.extend(ret2)
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.building_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", self.get_parameter("result_name"), result_format),
+                (
+                    "damage_result",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
+        )
 
-        return output, output_dmg
+        return True
 
     def building_damage_analysis_bulk_input(
         self, buildings, hazard, hazard_type, hazard_dataset_id
@@ -397,6 +371,19 @@ class BuildingNonStructDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                    "additional info is written as json.",
+                    "type": str,
+                },
             ],
             "input_hazards": [
                 {
@@ -5,8 +5,7 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 
-import concurrent.futures
-from itertools import repeat
+import numpy
 
 from pyincore import (
     BaseAnalysis,
@@ -106,30 +105,30 @@ class BuildingStructuralDamage(BaseAnalysis):
             self, len(bldg_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(bldg_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(bldg_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, damage_results) = self.building_damage_concurrent_future(
-            self.building_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazards),
-            repeat(hazard_types),
-            repeat(hazard_dataset_ids),
-        )
+        inventory_args = self.get_chunks(num_workers, list(bldg_set))
 
-        self.set_result_csv_data(
-            "ds_result", ds_results, name=self.get_parameter("result_name")
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), [fragility_key]
         )
-        self.set_result_json_data(
-            "damage_result",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
+
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.building_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazards,
+                hazard_types,
+                hazard_dataset_ids,
+            ),
+            [
+                ("ds_result", self.get_parameter("result_name"), result_format),
+                (
+                    "damage_result",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
         )
 
         # clean up temp folder if applicable
@@ -138,29 +137,6 @@ class BuildingStructuralDamage(BaseAnalysis):
 
         return True
 
-    def building_damage_concurrent_future(self, function_name, parallelism, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            parallelism (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of ordered dictionaries with building damage values and other data/metadata.
-
-        """
-        output_ds = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
-
-        return output_ds, output_dmg
-
     def building_damage_analysis_bulk_input(
         self, buildings, hazards, hazard_types, hazard_dataset_ids
     ):
@@ -271,92 +247,93 @@ class BuildingStructuralDamage(BaseAnalysis):
         ds_results = []
         damage_results = []
 
+        # hazard values and liquefaction per building; damage is computed afterwards, either building by building
+        # or grouped by fragility set
+        bldg_hazard_inputs = []
         i = 0
         for b in mapped_buildings:
-            ds_result = dict()
-            damage_result = dict()
-            dmg_probability = dict()
-            dmg_interval = dict()
             b_id = b["id"]
             selected_fragility_set = fragility_sets[b_id]
             ground_failure_prob = None
 
             # TODO: Once all fragilities are migrated to new format, we can remove this condition
-            if isinstance(selected_fragility_set.fragility_curves[0], DFR3Curve):
-                # Supports multiple hazard and multiple demand types in same fragility
-                hval_dict = dict()
-                b_multihaz_vals = dict()
-                b_demands = dict()
-                b_units = dict()
-                for hazard_type in hazard_types:
-                    b_haz_vals = AnalysisUtil.update_precision_of_lists(
-                        multihazard_vals[hazard_type][i]["hazardValues"]
-                    )
-                    b_demands[hazard_type] = multihazard_vals[hazard_type][i]["demands"]
-                    b_units[hazard_type] = multihazard_vals[hazard_type][i]["units"]
-                    b_multihaz_vals[hazard_type] = b_haz_vals
-                    # To calculate damage, use demand type name from fragility that will be used in the expression,
-                    # instead  of using what the hazard service returns. There could be a difference "SA" in DFR3 vs
-                    # "1.07 SA" from hazard
-                    j = 0
-                    for adjusted_demand_type in multihazard_vals[hazard_type][i][
-                        "demands"
-                    ]:
-                        d = adjust_demand_types_mapping[adjusted_demand_type]
-                        hval_dict[d] = b_haz_vals[j]
-                        j += 1
-
-                # catch any of the hazard values error
-                hazard_values_errors = False
-                for hazard_type in hazard_types:
-                    hazard_values_errors = (
-                        hazard_values_errors
-                        or AnalysisUtil.do_hazard_values_have_errors(
-                            b_multihaz_vals[hazard_type]
-                        )
-                    )
-
-                if not hazard_values_errors:
-                    building_args = (
-                        selected_fragility_set.construct_expression_args_from_inventory(
-                            b
-                        )
-                    )
+            if not isinstance(selected_fragility_set.fragility_curves[0], DFR3Curve):
+                raise ValueError(
+                    "One of the fragilities is in deprecated format. This should not happen. If you are "
+                    "seeing this please report the issue."
+                )
 
-                    building_period = selected_fragility_set.fragility_curves[
-                        0
-                    ].get_building_period(
-                        selected_fragility_set.curve_parameters, **building_args
+            # Supports multiple hazard and multiple demand types in same fragility
+            hval_dict = dict()
+            b_multihaz_vals = dict()
+            b_demands = dict()
+            b_units = dict()
+            for hazard_type in hazard_types:
+                b_haz_vals = AnalysisUtil.update_precision_of_lists(
+                    multihazard_vals[hazard_type][i]["hazardValues"]
+                )
+                b_demands[hazard_type] = multihazard_vals[hazard_type][i]["demands"]
+                b_units[hazard_type] = multihazard_vals[hazard_type][i]["units"]
+                b_multihaz_vals[hazard_type] = b_haz_vals
+                # To calculate damage, use demand type name from fragility that will be used in the expression,
+                # instead  of using what the hazard service returns. There could be a difference "SA" in DFR3 vs
+                # "1.07 SA" from hazard
+                j = 0
+                for adjusted_demand_type in multihazard_vals[hazard_type][i]["demands"]:
+                    d = adjust_demand_types_mapping[adjusted_demand_type]
+                    hval_dict[d] = b_haz_vals[j]
+                    j += 1
+
+            # catch any of the hazard values error
+            hazard_values_errors = False
+            for hazard_type in hazard_types:
+                hazard_values_errors = (
+                    hazard_values_errors
+                    or AnalysisUtil.do_hazard_values_have_errors(
+                        b_multihaz_vals[hazard_type]
                     )
+                )
 
-                    dmg_probability = selected_fragility_set.calculate_limit_state(
-                        hval_dict, **building_args, period=building_period
-                    )
+            if (
+                not hazard_values_errors
+                and use_liquefaction
+                and geology_dataset_id is not None
+                and liquefaction_resp is not None
+            ):
+                ground_failure_prob = liquefaction_resp[i][
+                    BuildingUtil.GROUND_FAILURE_PROB
+                ]
 
-                    if (
-                        use_liquefaction
-                        and geology_dataset_id is not None
-                        and liquefaction_resp is not None
-                    ):
-                        ground_failure_prob = liquefaction_resp[i][
-                            BuildingUtil.GROUND_FAILURE_PROB
-                        ]
-                        dmg_probability = AnalysisUtil.update_precision_of_dicts(
-                            AnalysisUtil.adjust_damage_for_liquefaction(
-                                dmg_probability, ground_failure_prob
-                            )
-                        )
+            bldg_hazard_inputs.append(
+                {
+                    "hval_dict": hval_dict,
+                    "multihaz_vals": b_multihaz_vals,
+                    "demands": b_demands,
+                    "units": b_units,
+                    "hazard_values_errors": hazard_values_errors,
+                    "ground_failure_prob": ground_failure_prob,
+                }
+            )
+            i += 1
 
-                    dmg_interval = selected_fragility_set.calculate_damage_interval(
-                        dmg_probability,
-                        hazard_type="+".join(hazard_types),
-                        inventory_type="building",
-                    )
-            else:
-                raise ValueError(
-                    "One of the fragilities is in deprecated format. This should not happen. If you are "
-                    "seeing this please report the issue."
+        if self.get_parameter("use_batch_evaluation"):
+            bldg_damages = self.building_damage_by_fragility_group(
+                mapped_buildings, fragility_sets, bldg_hazard_inputs, hazard_types
+            )
+        else:
+            bldg_damages = [
+                self.building_damage(
+                    b, fragility_sets[b["id"]], bldg_hazard_input, hazard_types
                 )
+                for b, bldg_hazard_input in zip(mapped_buildings, bldg_hazard_inputs)
+            ]
+
+        for b, bldg_hazard_input, (dmg_probability, dmg_interval) in zip(
+            mapped_buildings, bldg_hazard_inputs, bldg_damages
+        ):
+            ds_result = dict()
+            damage_result = dict()
+            b_multihaz_vals = bldg_hazard_input["multihaz_vals"]
 
             ds_result["guid"] = b["properties"]["guid"]
             damage_result["guid"] = b["properties"]["guid"]
@@ -372,17 +349,18 @@ class BuildingStructuralDamage(BaseAnalysis):
                 )
             ds_result["haz_expose"] = haz_expose
 
-            damage_result["fragility_id"] = selected_fragility_set.id
-            damage_result["demandtype"] = b_demands
-            damage_result["demandunits"] = b_units
+            damage_result["fragility_id"] = fragility_sets[b["id"]].id
+            damage_result["demandtype"] = bldg_hazard_input["demands"]
+            damage_result["demandunits"] = bldg_hazard_input["units"]
             damage_result["hazardval"] = b_multihaz_vals
 
             if use_liquefaction and geology_dataset_id is not None:
-                damage_result[BuildingUtil.GROUND_FAILURE_PROB] = ground_failure_prob
+                damage_result[BuildingUtil.GROUND_FAILURE_PROB] = bldg_hazard_input[
+                    "ground_failure_prob"
+                ]
 
             ds_results.append(ds_result)
             damage_results.append(damage_result)
-            i += 1
 
         for b in unmapped_buildings:
             ds_result = dict()
@@ -399,6 +377,209 @@ class BuildingStructuralDamage(BaseAnalysis):
 
         return ds_results, damage_results
 
+    def building_damage(
+        self, building, selected_fragility_set, bldg_hazard_input, hazard_types
+    ):
+        """Calculates limit states and damage states of a single building.
+
+        Args:
+            building (obj): A building from the input inventory set.
+            selected_fragility_set (obj): Fragility set mapped to the building.
+            bldg_hazard_input (dict): Hazard values, errors and ground failure probability of the building.
+            hazard_types (list): List of Hazard type, either earthquake, tornado, or tsunami.
+
+        Returns:
+            dict, dict: Limit state probabilities and damage states; both empty if the hazard values have errors.
+
+        """
+        dmg_probability = dict()
+        dmg_interval = dict()
+
+        if not bldg_hazard_input["hazard_values_errors"]:
+            building_args = (
+                selected_fragility_set.construct_expression_args_from_inventory(
+                    building
+                )
+            )
+
+            building_period = selected_fragility_set.fragility_curves[
+                0
+            ].get_building_period(
+                selected_fragility_set.curve_parameters, **building_args
+            )
+
+            dmg_probability = selected_fragility_set.calculate_limit_state(
+                bldg_hazard_input["hval_dict"], **building_args, period=building_period
+            )
+
+            ground_failure_prob = bldg_hazard_input["ground_failure_prob"]
+            if ground_failure_prob is not None:
+                dmg_probability = AnalysisUtil.update_precision_of_dicts(
+                    AnalysisUtil.adjust_damage_for_liquefaction(
+                        dmg_probability, ground_failure_prob
+                    )
+                )
+
+            dmg_interval = selected_fragility_set.calculate_damage_interval(
+                dmg_probability,
+                hazard_type="+".join(hazard_types),
+                inventory_type="building",
+            )
+
+        return dmg_probability, dmg_interval
+
+    def building_damage_by_fragility_group(
+        self, buildings, fragility_sets, bldg_hazard_inputs, hazard_types
+    ):
+        """Calculates limit states and damage states of many buildings, evaluating each fragility set once over
+        the arrays of all buildings mapped to it. Results are identical to calling building_damage on every
+        building.
+
+        Buildings are grouped by fragility set, by the demand types they have hazard values for and by which
+        inventory attributes the fragility set can use; liquefaction is applied with array arithmetic.
+
+        Args:
+            buildings (list): Buildings from the input inventory set.
+            fragility_sets (dict): Fragility set mapped to each building id.
+            bldg_hazard_inputs (list): Hazard values, errors and ground failure probability of each building.
+            hazard_types (list): List of Hazard type, either earthquake, tornado, or tsunami.
+
+        Returns:
+            list: Limit state probabilities and damage states of each building, in the order of the buildings.
+
+        """
+        bldg_damages = [(dict(), dict()) for _ in buildings]
+
+        groups = {}
+        for index, (building, bldg_hazard_input) in enumerate(
+            zip(buildings, bldg_hazard_inputs)
+        ):
+            if bldg_hazard_input["hazard_values_errors"]:
+                continue
+            selected_fragility_set = fragility_sets[building["id"]]
+            building_args = (
+                selected_fragility_set.construct_expression_args_from_inventory(
+                    building
+                )
+            )
+            group_key = (
+                id(selected_fragility_set),
+                tuple(bldg_hazard_input["hval_dict"].keys()),
+                tuple(building_args.keys()),
+                bldg_hazard_input["ground_failure_prob"] is None,
+            )
+            groups.setdefault(group_key, (selected_fragility_set, [], []))
+            groups[group_key][1].append(index)
+            groups[group_key][2].append(building_args)
+
+        for (
+            _,
+            demand_types,
+            arg_names,
+            no_liquefaction,
+        ), group in groups.items():
+            selected_fragility_set, indices, group_args = group
+            building_args = {
+                name: numpy.array([args[name] for args in group_args])
+                for name in arg_names
+            }
+            hazard_values = {
+                demand_type: numpy.array(
+                    [
+                        bldg_hazard_inputs[index]["hval_dict"][demand_type]
+                        for index in indices
+                    ],
+                    dtype=float,
+                )
+                for demand_type in demand_types
+            }
+
+            # the period only depends on the number of stories
+            periods = {}
+            building_periods = []
+            for args in group_args:
+                num_stories = BuildingStructuralDamage._get_num_stories_arg(args)
+                if num_stories not in periods:
+                    periods[num_stories] = selected_fragility_set.fragility_curves[
+                        0
+                    ].get_building_period(
+                        selected_fragility_set.curve_parameters, **args
+                    )
+                building_periods.append(periods[num_stories])
+
+            dmg_probability = selected_fragility_set.calculate_limit_state_batch(
+                hazard_values, **building_args, period=numpy.array(building_periods)
+            )
+
+            if not no_liquefaction:
+                dmg_probability = (
+                    BuildingStructuralDamage._adjust_damage_for_liquefaction_batch(
+                        dmg_probability,
+                        [
+                            bldg_hazard_inputs[index]["ground_failure_prob"]
+                            for index in indices
+                        ],
+                    )
+                )
+
+            dmg_interval = selected_fragility_set.calculate_damage_interval_batch(
+                dmg_probability,
+                hazard_type="+".join(hazard_types),
+                inventory_type="building",
+            )
+
+            for position, index in enumerate(indices):
+                bldg_damages[index] = (
+                    {
+                        key: values[position].item()
+                        for key, values in dmg_probability.items()
+                    },
+                    {key: values[position] for key, values in dmg_interval.items()},
+                )
+
+        return bldg_damages
+
+    @staticmethod
+    def _get_num_stories_arg(building_args):
+        """The num_stories value get_building_period would use from the building args, if any."""
+        num_stories = None
+        for key, value in building_args.items():
+            if key.lower() == "num_stories" and value is not None and value > 0:
+                num_stories = value
+        return num_stories
+
+    @staticmethod
+    def _adjust_damage_for_liquefaction_batch(
+        limit_state_probabilities, ground_failure_probabilities
+    ):
+        """AnalysisUtil.adjust_damage_for_liquefaction over arrays of limit states, rounded the same way."""
+        ground_failure_probabilities = numpy.array(ground_failure_probabilities)
+        keys = list(limit_state_probabilities.keys())
+        num_ground_failure = ground_failure_probabilities.shape[1]
+
+        adjusted_limit_state_probabilities = {}
+        for i, key in enumerate(keys):
+            if i == len(keys) - 1:
+                # the last of limitStates should match with the last of ground failures
+                prob_ground_failure = ground_failure_probabilities[:, -1]
+            elif i > num_ground_failure - 1:
+                prob_ground_failure = ground_failure_probabilities[
+                    :, num_ground_failure - 2
+                ]
+            else:
+                prob_ground_failure = ground_failure_probabilities[:, i]
+
+            adjusted = (
+                limit_state_probabilities[key]
+                + prob_ground_failure
+                - limit_state_probabilities[key] * prob_ground_failure
+            )
+            adjusted_limit_state_probabilities[key] = numpy.array(
+                [AnalysisUtil.update_precision(value) for value in adjusted.tolist()]
+            )
+
+        return adjusted_limit_state_probabilities
+
     def get_spec(self):
         """Get specifications of the building damage analysis.
 
@@ -465,6 +646,28 @@ class BuildingStructuralDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                    "additional info is written as json.",
+                    "type": str,
+                },
+                {
+                    "id": "use_batch_evaluation",
+                    "required": False,
+                    "description": (
+                        "Group buildings by their fragility set and evaluate each fragility set over arrays of "
+                        "all its buildings, instead of building by building. Results are the same. Default is False."
+                    ),
+                    "type": bool,
+                },
                 {
                     "id": "seed",
                     "required": False,
@@ -4,6 +4,7 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
+import numpy as np
 import pandas as pd
 from pyincore import BaseAnalysis
 from pyincore.utils.dataprocessutil import DataProcessUtil
@@ -169,39 +170,30 @@ class CombinedWindWaveSurgeBuildingDamage(BaseAnalysis):
             pd.merge(wind_dmg, sw_dmg, on="guid"), flood_dmg, on="guid"
         )
 
-        def find_match(row, col_name):
-            max_finder = {
-                row["f_DS_3"]: "f_",
-                row["w_DS_3"]: "w_",
-                row["sw_DS_3"]: "sw_",
-            }
-
-            return row[max_finder[max(max_finder.keys())] + col_name]
-
-        combined_df["LS_0"] = combined_df.apply(
-            lambda x: find_match(x, col_name="LS_0"), axis=1
-        )
-        combined_df["LS_1"] = combined_df.apply(
-            lambda x: find_match(x, col_name="LS_1"), axis=1
-        )
-        combined_df["LS_2"] = combined_df.apply(
-            lambda x: find_match(x, col_name="LS_2"), axis=1
-        )
-        combined_df["DS_0"] = combined_df.apply(
-            lambda x: find_match(x, col_name="DS_0"), axis=1
-        )
-        combined_df["DS_1"] = combined_df.apply(
-            lambda x: find_match(x, col_name="DS_1"), axis=1
-        )
-        combined_df["DS_2"] = combined_df.apply(
-            lambda x: find_match(x, col_name="DS_2"), axis=1
-        )
-        combined_df["DS_3"] = combined_df.apply(
-            lambda x: find_match(x, col_name="DS_3"), axis=1
+        # Take the damage of the hazard with the largest DS_3, a (buildings x hazards x states) selection. On ties
+        # surge-wave wins over wind and wind over flood. A missing flood DS_3 can't be compared and flood is kept.
+        hazards = ["sw_", "w_", "f_"]
+        states = ["LS_0", "LS_1", "LS_2", "DS_0", "DS_1", "DS_2", "DS_3"]
+        damages = np.stack(
+            [
+                combined_df[[hazard + state for state in states]].to_numpy(dtype=float)
+                for hazard in hazards
+            ],
+            axis=1,
         )
-        combined_df["haz_expose"] = combined_df.apply(
-            lambda x: find_match(x, col_name="haz_expose"), axis=1
+        ds_3 = damages[:, :, states.index("DS_3")]
+        dominant = np.argmax(np.where(np.isnan(ds_3), -np.inf, ds_3), axis=1)
+        dominant[np.isnan(ds_3[:, hazards.index("f_")])] = hazards.index("f_")
+
+        buildings = np.arange(len(combined_df))
+        dominant_damage = damages[buildings, dominant]
+        for index, state in enumerate(states):
+            combined_df[state] = dominant_damage[:, index]
+        haz_expose = np.stack(
+            [combined_df[hazard + "haz_expose"].to_numpy() for hazard in hazards],
+            axis=1,
         )
+        combined_df["haz_expose"] = haz_expose[buildings, dominant]
 
         # Remove extra columns that are no longer needed
         combined_df.drop(
@@ -152,88 +152,80 @@ class CombinedWindWaveSurgeBuildingLoss(BaseAnalysis):
         # Create a result data frame for the loss calculations
         loss_df = new_combined_df[["guid"]].copy()
 
+        # Row of each building in the cost tables
+        archetype = new_combined_df["arch_flood"].to_numpy().astype(int) - 1
+
+        def damage(prefix, states):
+            return new_combined_df[
+                [prefix + "DS_" + str(state) for state in states]
+            ].to_numpy(dtype=float)
+
         # Compute content and structural loss
-        loss_df["cont_loss"] = new_combined_df.apply(
-            lambda row: np.dot(
-                row[["f_DS_0", "f_DS_1", "f_DS_2"]],
-                content_cost.iloc[int(row["arch_flood"] - 1), 1:4],
-            ),
-            axis=1,
+        loss_df["cont_loss"] = self.weighted_sum(
+            damage("f_", range(3)),
+            content_cost.iloc[archetype, 1:4].to_numpy(dtype=float),
         )
 
-        loss_df["roof_loss"] = new_combined_df.apply(
-            lambda row: np.dot(
-                row[["w_DS_0", "w_DS_1", "w_DS_2", "w_DS_3"]],
-                np.array([0.15, 0.5, 0.75, 1]),
-            )
-            * structure_cost.loc[int(row["arch_flood"] - 1), "Roofing"],
-            axis=1,
-        )
+        loss_df["roof_loss"] = self.weighted_sum(
+            damage("w_", range(4)), np.array([0.15, 0.5, 0.75, 1])
+        ) * structure_cost.loc[archetype, "Roofing"].to_numpy(dtype=float)
 
-        loss_df["ff_loss"] = new_combined_df.apply(
-            lambda row: np.dot(
-                row[["sw_DS_0", "sw_DS_1", "sw_DS_2", "sw_DS_3"]],
-                np.array([0.1, 0.5, 0.75, 1]),
-            )
-            * structure_cost.loc[int(row["arch_flood"] - 1), "Flooring and Foundation"],
-            axis=1,
+        loss_df["ff_loss"] = self.weighted_sum(
+            damage("sw_", range(4)), np.array([0.1, 0.5, 0.75, 1])
+        ) * structure_cost.loc[archetype, "Flooring and Foundation"].to_numpy(
+            dtype=float
         )
 
         # Computes frame loss from the dominant hazard between wind and surge-wave intensities
-        def compute_frame_loss(row):
-            if row["w_DS_3"] >= row["sw_DS_3"]:
-                return (
-                    np.dot(
-                        row[["w_DS_0", "w_DS_1", "w_DS_2", "w_DS_3"]],
-                        np.array([0.25, 0.5, 0.75, 1]),
-                    )
-                    * structure_cost.loc[int(row["arch_flood"] - 1), "Wood Framing"]
-                )
-            elif row["sw_DS_3"] > row["w_DS_3"]:
-                return (
-                    np.dot(
-                        row[["sw_DS_0", "sw_DS_1", "sw_DS_2", "sw_DS_3"]],
-                        np.array([0.25, 0.5, 0.75, 1]),
-                    )
-                    * structure_cost.loc[int(row["arch_flood"] - 1), "Wood Framing"]
-                )
-            else:
-                # If one or both are nan, they can't be compared
-                if pd.isnull(row["sw_DS_3"]) and pd.isnull(row["w_DS_3"]):
-                    return 0
-                elif not pd.isnull(row["sw_DS_3"]):
-                    return (
-                        np.dot(
-                            row[["sw_DS_0", "sw_DS_1", "sw_DS_2", "sw_DS_3"]],
-                            np.array([0.25, 0.5, 0.75, 1]),
-                        )
-                        * structure_cost.loc[int(row["arch_flood"] - 1), "Wood Framing"]
-                    )
-                else:
-                    return (
-                        np.dot(
-                            row[["w_DS_0", "w_DS_1", "w_DS_2", "w_DS_3"]],
-                            np.array([0.25, 0.5, 0.75, 1]),
-                        )
-                        * structure_cost.loc[int(row["arch_flood"] - 1), "Wood Framing"]
-                    )
-
-        loss_df["frame_loss"] = new_combined_df.apply(
-            lambda row: compute_frame_loss(row), axis=1
+        wood_framing = structure_cost.loc[archetype, "Wood Framing"].to_numpy(
+            dtype=float
+        )
+        wind_frame_loss = (
+            self.weighted_sum(damage("w_", range(4)), np.array([0.25, 0.5, 0.75, 1]))
+            * wood_framing
+        )
+        sw_frame_loss = (
+            self.weighted_sum(damage("sw_", range(4)), np.array([0.25, 0.5, 0.75, 1]))
+            * wood_framing
+        )
+        w_ds_3 = new_combined_df["w_DS_3"].to_numpy(dtype=float)
+        sw_ds_3 = new_combined_df["sw_DS_3"].to_numpy(dtype=float)
+        # If one or both are nan, they can't be compared and the one that is not nan is used
+        use_sw = (sw_ds_3 > w_ds_3) | (np.isnan(w_ds_3) & ~np.isnan(sw_ds_3))
+        loss_df["frame_loss"] = np.where(
+            np.isnan(w_ds_3) & np.isnan(sw_ds_3),
+            0,
+            np.where(use_sw, sw_frame_loss, wind_frame_loss),
         )
 
         # Fill NA values with 0 otherwise we can't compute the total loss since empty are NaN values and won't add
         loss_df.fillna(0, inplace=True)
-        loss_df["total_loss"] = loss_df.apply(
-            lambda row: row["cont_loss"]
-            + row["frame_loss"]
-            + row["roof_loss"]
-            + row["ff_loss"],
-            axis=1,
+        loss_df["total_loss"] = (
+            loss_df["cont_loss"]
+            + loss_df["frame_loss"]
+            + loss_df["roof_loss"]
+            + loss_df["ff_loss"]
         )
 
         return loss_df
 
+    @staticmethod
+    def weighted_sum(values, weights):
+        """Weighted sum of each row, added up in column order like a dot product of python floats.
+
+        Args:
+            values (np.ndarray): (rows x columns) values.
+            weights (np.ndarray): Weights of the columns, or (rows x columns) weights per row.
+
+        Returns:
+            np.ndarray: Weighted sum per row, NaN if a value is NaN.
+
+        """
+        total = values[:, 0] * weights[..., 0]
+        for column in range(1, values.shape[1]):
+            total = total + values[:, column] * weights[..., column]
+        return total
+
     def get_spec(self):
         """Get specifications of the combined wind, wave, and surge building loss analysis.
 
@@ -50,9 +50,6 @@ class CommercialBuildingRecovery(BaseAnalysis):
             bool: True if successful, False otherwise.
 
         """
-        # TODO: Start using seed
-        # seed = self.get_parameter("seed")
-
         num_samples = self.get_parameter("num_samples")
         result_name = self.get_parameter("result_name")
 
@@ -124,6 +121,8 @@ class CommercialBuildingRecovery(BaseAnalysis):
             dict: dictionary with id/guid and commercial recovery for each quarter
 
         """
+        # the delay and repair draws share one generator of the seed parameter
+        rng = np.random.default_rng(self.get_parameter("seed"))
 
         start_total_delay = time.process_time()
         total_delay = CommercialBuildingRecovery.total_delay(
@@ -133,6 +132,7 @@ class CommercialBuildingRecovery(BaseAnalysis):
             redi_delay_factors,
             building_dmg,
             num_samples,
+            rng,
         )
         end_total_delay = time.process_time()
         print(
@@ -141,7 +141,7 @@ class CommercialBuildingRecovery(BaseAnalysis):
             + " secs"
         )
 
-        recovery = self.recovery_rate(buildings, sample_damage_states, total_delay)
+        recovery = self.recovery_rate(buildings, sample_damage_states, total_delay, rng)
         end_recovery = time.process_time()
         print(
             "Finished executing recovery_rate() in "
@@ -172,6 +172,7 @@ class CommercialBuildingRecovery(BaseAnalysis):
         redi_delay_factors,
         damage,
         num_samples,
+        rng=None,
     ):
         """Calculates total delay by combining financial delay and other factors from REDi framework
 
@@ -183,10 +184,13 @@ class CommercialBuildingRecovery(BaseAnalysis):
                 financing, and government permit based on building's damage state.
             damage (pd.DataFrame): Damage states for building structural damage
             num_samples (int): number of sample scenarios to use
+            rng (np.random.Generator): Random number generator, a new unseeded generator if not provided.
 
         Returns:
             pd.DataFrame: Total delay time of all impeding factors from REDi framework.
         """
+        if rng is None:
+            rng = np.random.default_rng()
 
         # Obtain the commercial buildings in damage
         damage = mcs_failure[damage["haz_expose"] == "yes"]
@@ -200,39 +204,33 @@ class CommercialBuildingRecovery(BaseAnalysis):
 
         # Obtain the column names
         colnames = [f"sample_{i}" for i in range(0, num_samples)]
-        samples = np.zeros((len(commercial_damage), num_samples))
-        delay_time = pd.DataFrame(samples, columns=colnames)
-        delay_time.insert(0, "guid", commercial_damage.reset_index(drop=True)["guid"])
 
         # Perform an inner join to ensure only buildings with damage states are processed
-        merged_delay = pd.merge(sample_damage_states, delay_time, on="guid")
+        merged_delay = pd.merge(
+            sample_damage_states, commercial_damage[["guid"]], on="guid"
+        )
 
         # Obtain the guids
         merged_delay_guids = merged_delay["guid"]
 
-        # Obtain the damage states
-        merged_delay_damage_states = merged_delay["sample_damage_states"]
-
-        # Convert to numpy
-        samples_np = merged_delay.drop(
-            columns=["guid", "sample_damage_states"]
-        ).to_numpy()
-
-        # First, we decompose redi_delay_factors into two dictionaries that can be used to compute vector operations
+        # Damage state of every building and sample, as a row index into the delay factors
         redi_idx = dict(
             zip(
                 redi_delay_factors["Building_specific_conditions"],
-                redi_delay_factors.index,
+                range(len(redi_delay_factors)),
             )
         )
+        dmg_state_idx = BuildingUtil.get_sample_damage_states(
+            merged_delay, num_samples, lambda label: redi_idx[label]
+        )
 
         # Next, we produce two intermediate numpy matrices: one for med and one for sdv
         redi_med = redi_delay_factors[
             ["Ins_med", "Enmo_med", "Como_med", "Per_med", "Fin_med"]
-        ].to_numpy()
+        ].to_numpy(dtype=float)
         redi_sdv = redi_delay_factors[
             ["Ins_sdv", "Enmo_sdv", "Como_sdv", "Per_sdv", "Fin_sdv"]
-        ].to_numpy()
+        ].to_numpy(dtype=float)
 
         # Define indices to facilitate interpretation of the code
         inspection_idx = 0
@@ -241,43 +239,41 @@ class CommercialBuildingRecovery(BaseAnalysis):
         permit_idx = 3
         financing_idx = 4
 
-        for i, ds_list in enumerate(list(merged_delay_damage_states)):
-            samples_mcs = ds_list.split(",")
-
-            for j in range(num_samples):
-                # TODO: ask why there are many more damage states than samples
-                # Obtain the index for the corresponding damage state
-                dmg_state_idx = redi_idx[samples_mcs[j]]
-
-                # Use the index to select the appropriate mean and stdev vectors
-                mean_vec = redi_med[dmg_state_idx, :]
-                sdv_vec = redi_sdv[dmg_state_idx, :]
-
-                # Compute the delay vector
-                delay_vec = np.random.lognormal(np.log(mean_vec), sdv_vec)
-
-                if dmg_state_idx == 3 or dmg_state_idx == 2:
-                    delay_vec[4] = np.random.normal(mean_vec[4], sdv_vec[4])
-
-                # Compute the delay using that vector, already computed in the prior step
-                samples_np[i, j] = np.round(
-                    delay_vec[inspection_idx]
-                    + np.max(
-                        [
-                            delay_vec[engineer_idx],
-                            delay_vec[financing_idx],
-                            delay_vec[contractor_idx],
-                        ]
-                    )
-                    + delay_vec[permit_idx]
+        samples_np = np.zeros((len(merged_delay), num_samples))
+
+        # Buildings are processed in blocks so the (buildings x samples x factors) draws stay bounded
+        block_size = BuildingUtil.get_block_size(num_samples * 5)
+        for start in range(0, samples_np.shape[0], block_size):
+            rows = dmg_state_idx[start : start + block_size]
+
+            # Compute the delay vectors of the damage state of every sample. One standard normal draw per block
+            # keeps the random stream independent of the block size
+            z = rng.standard_normal(rows.shape + (redi_med.shape[1],))
+            delay = np.exp(np.log(redi_med[rows]) + redi_sdv[rows] * z)
+
+            # the financing delay of the third and fourth delay factor rows is normal
+            normal = (rows == 2) | (rows == 3)
+            delay[normal, financing_idx] = (
+                redi_med[rows[normal], financing_idx]
+                + redi_sdv[rows[normal], financing_idx] * z[normal, financing_idx]
+            )
+
+            # Compute the delay using that vector, already computed in the prior step
+            samples_np[start : start + block_size] = np.round(
+                delay[..., inspection_idx]
+                + np.maximum(
+                    np.maximum(delay[..., engineer_idx], delay[..., financing_idx]),
+                    delay[..., contractor_idx],
                 )
+                + delay[..., permit_idx]
+            )
 
         total_delay = pd.DataFrame(samples_np, columns=colnames)
         total_delay.insert(0, "guid", merged_delay_guids)
 
         return total_delay
 
-    def recovery_rate(self, buildings, sample_damage_states, total_delay):
+    def recovery_rate(self, buildings, sample_damage_states, total_delay, rng=None):
         """Gets total time required for each commercial building to receive full restoration. Determined by the
         combination of delay time and repair time
 
@@ -285,10 +281,13 @@ class CommercialBuildingRecovery(BaseAnalysis):
             buildings (list): List of buildings
             sample_damage_states (pd.DataFrame): Samples' damage states
             total_delay (pd.DataFrame): Total delay time of financial delay and other factors from REDi framework.
+            rng (np.random.Generator): Random number generator, a new unseeded generator if not provided.
 
         Returns:
             pd.DataFrame: Recovery time of all commercial buildings for each sample
         """
+        if rng is None:
+            rng = np.random.default_rng()
 
         repair_key = self.get_parameter("repair_key")
         repair_sets = self.repairsvc.match_inventory(
@@ -315,56 +314,29 @@ class CommercialBuildingRecovery(BaseAnalysis):
         # Obtain the guids
         merged_delay_guids = merged_delay["guid"]
 
-        # Obtain the damage states
-        merged_delay_damage_states = merged_delay["sample_damage_states"]
-
         # Convert to numpy
-        samples_np = merged_delay.drop(
-            columns=["guid", "sample_damage_states"]
-        ).to_numpy()
+        samples_np = (
+            merged_delay.drop(columns=["guid", "sample_damage_states"])
+            .to_numpy()
+            .astype(float)
+        )
         num_samples = len(colnames)
-        num_buildings = samples_np.shape[0]
-
-        # Generate a long numpy matrix for combined N1, N2 samples
-        samples_n1_n2 = np.zeros((num_buildings, num_samples * num_samples))
-
-        # Now, we define an internal function to take care of the index for the prior case
-        def idx(x, y):
-            return x * num_samples + y
-
-        for build in range(0, num_buildings):
-            # Obtain the damage states
-            mapped_repair = repair_sets_by_guid[merged_delay_guids.iloc[build]]
-            samples_mcs = merged_delay_damage_states.iloc[build].split(",")
-
-            # Use a lambda to obtain the damage state in numeric form. Note that since damage states are single digits,
-            # it suffices to look at the last character and convert into an integer value. Do this computation once
-            # per building only.
-            extract_ds = lambda x: int(x[-1])  # noqa: E731
-            samples_mcs_ds = list(map(extract_ds, samples_mcs))  # noqa: E731
-
-            # Now, perform the two nested loops, using the indexing function to simplify the syntax.
-            for i in range(0, num_samples):
-                state = samples_mcs_ds[i]
-                percent_func = np.random.random(num_samples)
-                # NOTE: Even though the kwarg name is "repair_time", it actually takes  percent of functionality. DFR3
-                # system currently doesn't have a way to represent the name correctly when calculating the inverse.
-                if mapped_repair is not None:
-                    repair_time = (
-                        mapped_repair.repair_curves[state].solve_curve_for_inverse(
-                            hazard_values={},
-                            curve_parameters=mapped_repair.curve_parameters,
-                            **{"repair_time": percent_func},
-                        )
-                        / 7
-                    )
-                else:
-                    repair_time = np.full(num_samples, np.nan)
-
-                for j in range(0, num_samples):
-                    samples_n1_n2[build, idx(i, j)] = round(
-                        samples_np[build, i] + repair_time[j], 1
-                    )
+
+        # Damage state in numeric form. Note that since damage states are single digits, it suffices to look at the
+        # last character of each label and convert it into an integer value.
+        samples_mcs_ds = BuildingUtil.get_sample_damage_states(
+            merged_delay, num_samples, lambda label: int(label[-1])
+        )
+
+        # N1 x N2 outer sum of delay and repair time, sample_{i}_{j} is delay sample i plus repair draw j of percent
+        # of functionality. Buildings without a repair set have no recovery time.
+        samples_n1_n2 = BuildingUtil.get_recovery_times(
+            [repair_sets_by_guid[guid] for guid in merged_delay_guids],
+            samples_mcs_ds,
+            samples_np,
+            rng,
+            fill_value=np.nan,
+        )
 
         # Now, generate all the labels using list comprehension outside the loops
         colnames = [
@@ -407,13 +379,11 @@ class CommercialBuildingRecovery(BaseAnalysis):
         # Generate a numpy to hold the results as desired
         times_np = np.full((num_buildings, num_times), 1111.0)
 
-        for build in range(0, num_buildings):
-            for i in range(len(total_time)):
-                fun_state = (
-                    np.count_nonzero(samples_n1_n2[build, :] < total_time[i])
-                    / num_samples
-                )
-                times_np[build, i] = np.round(fun_state, 2)
+        for i in range(num_times):
+            fun_state = (
+                np.count_nonzero(samples_n1_n2 < total_time[i], axis=1) / num_samples
+            )
+            times_np[:, i] = np.round(fun_state, 2)
 
         colnames = [f"quarter_{i}" for i in range(0, num_times)]
 
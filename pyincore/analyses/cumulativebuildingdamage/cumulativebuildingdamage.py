@@ -5,12 +5,11 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 
+import numpy as np
 import pandas as pd
 import collections
-import concurrent.futures
-from itertools import repeat
 
-from pyincore import BaseAnalysis, AnalysisUtil, FragilityCurveSet
+from pyincore import BaseAnalysis, FragilityCurveSet
 
 
 class CumulativeBuildingDamage(BaseAnalysis):
@@ -20,12 +19,30 @@ class CumulativeBuildingDamage(BaseAnalysis):
     state probabilities for the two hazards.
     """
 
+    CHUNK_SIZE = 100000
+    LIMIT_STATES = ["LS_0", "LS_1", "LS_2"]
+
     def run(self):
         """Executes Cumulative Building Damage Analysis"""
-        eq_damage_set = self.get_input_dataset("eq_bldg_dmg").get_csv_reader()
-        eq_damage_df = pd.DataFrame(list(eq_damage_set))
-        tsunami_damage_set = self.get_input_dataset("tsunami_bldg_dmg").get_csv_reader()
-        tsunami_damage_df = pd.DataFrame(list(tsunami_damage_set))
+        # the earthquake damage is streamed in chunks, each joined on guid with the tsunami limit states
+        tsunami_damage = self.read_limit_states(
+            self.get_input_dataset("tsunami_bldg_dmg")
+        )
+        tsunami_damage = tsunami_damage.drop_duplicates("guid").set_index("guid")
+        eq_damage_chunks = self.read_limit_states(
+            self.get_input_dataset("eq_bldg_dmg"),
+            CumulativeBuildingDamage.CHUNK_SIZE,
+        )
+        building_damage_chunks = (
+            eq_damage.join(
+                tsunami_damage,
+                on="guid",
+                how="inner",
+                lsuffix="_eq",
+                rsuffix="_tsunami",
+            )
+            for eq_damage in eq_damage_chunks
+        )
 
         user_defined_cpu = 1
 
@@ -35,53 +52,80 @@ class CumulativeBuildingDamage(BaseAnalysis):
         ):
             user_defined_cpu = self.get_parameter("num_cpu")
 
-        num_workers = AnalysisUtil.determine_parallelism_locally(
-            self, len(eq_damage_df), user_defined_cpu
+        # a single cpu runs in this process unless a parallel backend is given
+        backend = None
+        if user_defined_cpu <= 1 and self.get_parameter("parallel_backend") is None:
+            backend = "serial"
+
+        # chunks are read as workers become free, at most one chunk in flight per cpu
+        results = self.map_parallel(
+            self.cumulative_building_damage_batch,
+            ((building_damage,) for building_damage in building_damage_chunks),
+            user_defined_cpu,
+            max_pending=user_defined_cpu,
+            backend=backend,
         )
-
-        avg_bulk_input_size = int(len(eq_damage_df) / num_workers)
-        eq_damage_args = []
-        count = 0
-
-        while count < len(eq_damage_df):
-            eq_damage_args.append(eq_damage_df[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        results = self.cumulative_building_damage_concurrent_future(
-            self.cumulative_building_damage_bulk_input,
-            num_workers,
-            eq_damage_args,
-            repeat(tsunami_damage_df),
+        # missing limit and damage states are empty, like the keys missing from cumulative_building_damage
+        batches = (
+            (result.astype(object).where(result.notna(), None).to_dict("records"),)
+            for result in results
         )
-
-        self.set_result_csv_data(
-            "combined-result", results, name=self.get_parameter("result_name")
+        result_format, _ = self.get_result_formats()
+        self.set_result_batches(
+            batches,
+            [("combined-result", self.get_parameter("result_name"), result_format)],
         )
 
         return True
 
-    def cumulative_building_damage_concurrent_future(
-        self, function_name, num_workers, *args
-    ):
-        """Utilizes concurrent.future module.
+    def cumulative_building_damage_batch(self, building_damage):
+        """Run analysis for many buildings at once, the batch counterpart of cumulative_building_damage.
 
         Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
+            building_damage (pd.DataFrame): guid and the earthquake (LS_0_eq, ...) and tsunami (LS_0_tsunami, ...)
+                limit states of each building.
 
         Returns:
-            list: A list of ordered dictionaries with cumulative damage values and other data/metadata.
+            pd.DataFrame: Cumulative limit states, damage states and hazard of each building. Limit and damage
+            states are empty if one of the limit states is missing.
 
         """
-        output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret in executor.map(function_name, *args):
-                output.extend(ret)
+        eq = [
+            building_damage[key + "_eq"].to_numpy(dtype=float)
+            for key in CumulativeBuildingDamage.LIMIT_STATES
+        ]
+        tsunami = [
+            building_damage[key + "_tsunami"].to_numpy(dtype=float)
+            for key in CumulativeBuildingDamage.LIMIT_STATES
+        ]
+
+        limit_states = {
+            "LS_0": eq[0] + tsunami[0] - eq[0] * tsunami[0],
+            "LS_1": eq[1]
+            + tsunami[1]
+            - eq[1] * tsunami[1]
+            + ((eq[0] - eq[1]) * (tsunami[0] - tsunami[1])),
+            "LS_2": eq[2]
+            + tsunami[2]
+            - eq[2] * tsunami[2]
+            + ((eq[1] - eq[2]) * (tsunami[1] - tsunami[2])),
+        }
+        valid = ~(np.isnan(eq).any(axis=0) | np.isnan(tsunami).any(axis=0))
+        damage_states = FragilityCurveSet._ls_to_ds_batch(
+            {key: values[valid] for key, values in limit_states.items()},
+            FragilityCurveSet._3ls_to_4ds,
+        )
 
-        return output
+        result = pd.DataFrame({"guid": building_damage["guid"].to_numpy()})
+        for key, values in limit_states.items():
+            result[key] = np.where(valid, values, np.nan)
+        for key, values in damage_states.items():
+            column = np.full(len(result), None, dtype=object)
+            column[valid] = values
+            result[key] = column
+        result["hazard"] = "Earthquake+Tsunami"
+
+        return result
 
     def cumulative_building_damage_bulk_input(
         self, eq_building_damage_set, tsunami_building_damage_set
@@ -179,6 +223,51 @@ class CumulativeBuildingDamage(BaseAnalysis):
 
             return bldg_results
 
+    @staticmethod
+    def read_limit_states(dataset, chunk_size=None):
+        """Load the guid and limit states of a building damage result, missing or invalid limit states are NaN.
+
+        Args:
+            dataset (obj): Building damage result dataset, csv, newline delimited json, parquet or in memory.
+            chunk_size (int): Number of rows per chunk. The whole result is read if None.
+
+        Returns:
+            pd.DataFrame: The guid and limit states, or an iterator of DataFrame chunks if chunk_size is given.
+
+        """
+        columns = ["guid"] + CumulativeBuildingDamage.LIMIT_STATES
+        if dataset.is_in_memory() or dataset.get_result_format() in [
+            "jsonl",
+            "parquet",
+        ]:
+            if chunk_size is None:
+                return CumulativeBuildingDamage._to_numeric_limit_states(
+                    dataset.get_dataframe_from_csv()[columns].copy()
+                )
+            return (
+                CumulativeBuildingDamage._to_numeric_limit_states(chunk[columns].copy())
+                for chunk in dataset.iter_dataframes_from_results(chunk_size)
+            )
+
+        # round trip parsing gives the same floats as float() of the csv text
+        reader = pd.read_csv(
+            dataset.get_file_path("csv"),
+            usecols=columns,
+            dtype={"guid": str},
+            float_precision="round_trip",
+            chunksize=chunk_size,
+        )
+        if chunk_size is None:
+            return CumulativeBuildingDamage._to_numeric_limit_states(reader)
+        return map(CumulativeBuildingDamage._to_numeric_limit_states, reader)
+
+    @staticmethod
+    def _to_numeric_limit_states(damage):
+        for key in CumulativeBuildingDamage.LIMIT_STATES:
+            if damage[key].dtype == object:
+                damage[key] = pd.to_numeric(damage[key], errors="coerce")
+        return damage
+
     @staticmethod
     def load_csv_file(file_name):
         """Load csv file into Pandas DataFrame.
@@ -215,6 +304,18 @@ class CumulativeBuildingDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result output, csv (default), jsonl or parquet.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
@@ -4,9 +4,6 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import concurrent.futures
-from itertools import repeat
-
 from pyincore import AnalysisUtil, GeoUtil
 from pyincore import BaseAnalysis, HazardService, FragilityService
 from pyincore.models.dfr3curve import DFR3Curve
@@ -66,58 +63,48 @@ class EpfDamage(BaseAnalysis):
             self, len(epf_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(epf_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(epf_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, damage_results) = self.epf_damage_concurrent_future(
-            self.epf_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
+        inventory_args = self.get_chunks(num_workers, list(epf_set))
 
-        self.set_result_csv_data(
-            "result", ds_results, name=self.get_parameter("result_name")
+        fragility_keys = [fragility_key]
+        if (
+            hazard_type == "earthquake"
+            and self.get_parameter("use_liquefaction") is True
+        ):
+            liquefaction_fragility_key = self.get_parameter(
+                "liquefaction_fragility_key"
+            )
+            if liquefaction_fragility_key is None:
+                liquefaction_fragility_key = self.DEFAULT_LIQ_FRAGILITY_KEY
+                self.set_parameter(
+                    "liquefaction_fragility_key", liquefaction_fragility_key
+                )
+            fragility_keys.append(liquefaction_fragility_key)
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), fragility_keys
         )
-        self.set_result_json_data(
-            "metadata",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
+
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.epf_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", self.get_parameter("result_name"), result_format),
+                (
+                    "metadata",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
         )
 
         return True
 
-    def epf_damage_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of ordered dictionaries with epf damage values and other data/metadata.
-
-        """
-
-        output_ds = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
-
-        return output_ds, output_dmg
-
     def epf_damage_analysis_bulk_input(
         self, epfs, hazard, hazard_type, hazard_dataset_id
     ):
@@ -408,6 +395,19 @@ class EpfDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                                   "additional info is written as json.",
+                    "type": str,
+                },
             ],
             "input_hazards": [
                 {
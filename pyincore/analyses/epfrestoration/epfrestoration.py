@@ -12,6 +12,7 @@ import numpy as np
 from typing import List
 from pyincore import BaseAnalysis, RestorationService, AnalysisUtil
 from pyincore.models.restorationcurveset import RestorationCurveSet
+from pyincore.models.restorationtable import RestorationTableCache
 
 
 class EpfRestoration(BaseAnalysis):
@@ -133,6 +134,15 @@ class EpfRestoration(BaseAnalysis):
 
         # Obtain classification for each electric facility, used to lookup discretized functionality
         inventory_class_map = {}
+
+        # each restoration curve set is evaluated once over every time and pf the facilities and mappings look up
+        time = np.arange(0, end_time + time_interval, time_interval)
+        pf = np.arange(0, 1 + pf_interval, pf_interval)
+        restoration_tables = RestorationTableCache(
+            np.concatenate([time, discretized_days]), np.append(pf, 0.99)
+        )
+        discretized_restoration = {}
+
         restoration_sets = self.restorationsvc.match_inventory(
             self.get_input_dataset("dfr3_mapping_set"), inventory_list, restoration_key
         )
@@ -151,13 +161,15 @@ class EpfRestoration(BaseAnalysis):
 
             restoration_curve_set = restoration_sets[inventory["id"]]
 
-            # For each facility, get the discretized restoration from the continuous curve
-            discretized_restoration = AnalysisUtil.get_discretized_restoration(
-                restoration_curve_set, discretized_days
-            )
+            # For each facility, get the discretized restoration from the table of its curve set
+            restoration_table = restoration_tables.get_table(restoration_curve_set)
+            if restoration_table not in discretized_restoration:
+                discretized_restoration[
+                    restoration_table
+                ] = restoration_table.get_discretized_restoration(discretized_days)
             inventory_class_map[
                 inventory["properties"]["guid"]
-            ] = discretized_restoration
+            ] = discretized_restoration[restoration_table]
 
         time_results = []
         pf_results = []
@@ -171,27 +183,25 @@ class EpfRestoration(BaseAnalysis):
                 restoration_curve_set = RestorationCurveSet(
                     self.restorationsvc.get_dfr3_set(restoration_curve_set)
                 )
+            restoration_table = restoration_tables.get_table(restoration_curve_set)
 
             # given time calculate pf
-            time = np.arange(0, end_time + time_interval, time_interval)
-            for t in time:
+            rates = restoration_table.get_restoration_rates(time)
+            for index, t in enumerate(time):
                 pf_results.append(
                     {
                         "restoration_id": restoration_curve_set.id,
                         "time": t,
-                        **restoration_curve_set.calculate_restoration_rates(time=t),
+                        **{key: value[index] for key, value in rates.items()},
                     }
                 )
 
             # given pf calculate time
-            pf = np.arange(0, 1 + pf_interval, pf_interval)
-            for p in pf:
+            inverse_rates = restoration_table.get_inverse_restoration_rates(pf)
+            for index, p in enumerate(pf):
                 new_dict = {}
-                t_res = restoration_curve_set.calculate_inverse_restoration_rates(
-                    time=p
-                )
-                for key, value in t_res.items():
-                    new_dict.update({"time_" + key: value})
+                for key, value in inverse_rates.items():
+                    new_dict.update({"time_" + key: value[index]})
                 time_results.append(
                     {
                         "restoration_id": restoration_curve_set.id,
@@ -200,40 +210,17 @@ class EpfRestoration(BaseAnalysis):
                     }
                 )
 
-            repair_time[
-                restoration_curve_set.id
-            ] = restoration_curve_set.calculate_inverse_restoration_rates(time=0.99)
+            repair_time[restoration_curve_set.id] = {
+                key: value[0]
+                for key, value in restoration_table.get_inverse_restoration_rates(
+                    [0.99]
+                ).items()
+            }
 
         # Compute discretized restoration
-        func_result = []
-        for dmg in damage_result:
-            guid = dmg["guid"]
-
-            # Dictionary of discretized restoration functionality
-            rest_dict = inventory_class_map[guid]
-
-            ds_0, ds_1, ds_2, ds_3, ds_4 = (
-                dmg["DS_0"],
-                dmg["DS_1"],
-                dmg["DS_2"],
-                dmg["DS_3"],
-                dmg["DS_4"],
-            )
-            result_dict = {}
-            for time in discretized_days:
-                key = "day" + str(time)
-                # Only compute if we have damage
-                if ds_0:
-                    functionality = (
-                        rest_dict[key][0] * float(ds_0)
-                        + rest_dict[key][1] * float(ds_1)
-                        + rest_dict[key][2] * float(ds_2)
-                        + rest_dict[key][3] * float(ds_3)
-                        + rest_dict[key][4] * float(ds_4)
-                    )
-                    result_dict.update({str(key): functionality})
-
-            func_result.append({"guid": guid, **result_dict})
+        func_result = AnalysisUtil.get_discretized_functionality(
+            damage_result, inventory_class_map, discretized_days
+        )
 
         repair_times = []
         for inventory in inventory_restoration_map:
@@ -3,14 +3,16 @@
 # This program and the accompanying materials are made available under the
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
-import copy
-
 import numpy as np
 import pandas as pd
-import networkx as nx
 from typing import List
-from pyincore import BaseAnalysis, NetworkDataset
-from pyincore.analyses.epnfunctionality.epnfunctionalityutil import EpnFunctionalityUtil
+from pyincore import (
+    AnalysisUtil,
+    BaseAnalysis,
+    NetworkDataset,
+    NetworkReachability,
+    SampleStates,
+)
 
 
 class EpnFunctionality(BaseAnalysis):
@@ -40,16 +42,8 @@ class EpnFunctionality(BaseAnalysis):
         # get epf sample
         epf_dmg_fs = self.get_input_dataset(
             "epf_sample_failure_state"
-        ).get_dataframe_from_csv()
-        epf_sample_df = pd.DataFrame(
-            np.array(
-                [
-                    np.array(epf_dmg_fs.failure.values[i].split(",")).astype("int")
-                    for i in np.arange(epf_dmg_fs.shape[0])
-                ]
-            ),
-            index=epf_dmg_fs.guid.values,
-        )
+        ).get_sample_states()
+        epf_sample_df = pd.DataFrame(epf_dmg_fs.to_values(), index=epf_dmg_fs.ids)
         # get the sample number
         num_samples = epf_sample_df.shape[1]
         sampcols = ["s" + samp for samp in np.arange(num_samples).astype(str)]
@@ -77,6 +71,16 @@ class EpnFunctionality(BaseAnalysis):
             set(list(G_ep.nodes)) - set(gate_station_node_list)
         )
 
+        user_defined_cpu = 1
+        if (
+            not self.get_parameter("num_cpu") is None
+            and self.get_parameter("num_cpu") > 0
+        ):
+            user_defined_cpu = self.get_parameter("num_cpu")
+        num_workers = AnalysisUtil.determine_parallelism_locally(
+            self, num_samples, user_defined_cpu
+        )
+
         (fs_results, fp_results) = self.epf_functionality(
             distribution_sub_nodes,
             gate_station_node_list,
@@ -84,13 +88,17 @@ class EpnFunctionality(BaseAnalysis):
             sampcols,
             epf_sample_df1,
             G_ep,
+            num_workers,
         )
 
-        self.set_result_csv_data(
+        sample_state_format = self.get_parameter("sample_state_format")
+        if sample_state_format is None:
+            sample_state_format = "csv"
+        self.set_result_sample_states(
             "sample_failure_state",
             fs_results,
             name=self.get_parameter("result_name") + "_failure_state",
-            source="dataframe",
+            sample_format=sample_state_format,
         )
         self.set_result_csv_data(
             "failure_probability",
@@ -109,6 +117,7 @@ class EpnFunctionality(BaseAnalysis):
         sampcols,
         epf_sample_df1,
         G_ep,
+        num_workers=1,
     ):
         """
         Run EPN functionality analysis.
@@ -120,35 +129,30 @@ class EpnFunctionality(BaseAnalysis):
             sampcols (list): list of number samples. e.g. "s0, s1,..."
             epf_sample_df1 (dataframe): epf mcs failure sample dataframe with added field "weight"
             G_ep (networkx object): constructed network
+            num_workers (int): number of processes the samples are split across
 
         Returns:
-            fs_results (list): A list of dictionary with id/guid and failure state for N samples
+            fs_results (obj): SampleStates with the guid and failure state for N samples
             fp_results (list): A list dictionary with failure probability and other data/metadata.
 
         """
 
-        # a distance of M denotes disconnection
-        M = 9999
+        # a distribution node is functional if a gate station reaches it without passing a failed node
+        reachability = NetworkReachability(G_ep)
+        failed_nodes = reachability.node_failure_matrix(
+            epf_sample_df1["nodenwid"].values, epf_sample_df1[sampcols].to_numpy()
+        )
         func_ep_df = pd.DataFrame(
-            np.zeros((len(distribution_sub_nodes), num_samples)),
+            reachability.reachable_samples(
+                gate_station_node_list,
+                distribution_sub_nodes,
+                failed_nodes=failed_nodes,
+                num_workers=num_workers,
+            ),
             index=distribution_sub_nodes,
             columns=sampcols,
         )
 
-        for si, scol in enumerate(sampcols):
-            nodestate_ep = epf_sample_df1.loc[:, ["nodenwid", scol]]
-            linkstate_ep = None
-            badlinks_ep = EpnFunctionalityUtil.get_bad_edges(
-                G_ep, nodestate_ep, linkstate_ep, scol
-            )
-            badlinkdict_ep = {k: {"weight": M} for k in badlinks_ep}
-            G1_ep = copy.deepcopy(G_ep)
-            nx.set_edge_attributes(G1_ep, badlinkdict_ep)
-            res_ep = EpnFunctionalityUtil.network_shortest_paths(
-                G1_ep, gate_station_node_list, distribution_sub_nodes
-            )
-            func_ep_df.loc[distribution_sub_nodes, scol] = (res_ep < M) * 1
-
         # use nodenwid index to get its guid
         fs_temp = pd.merge(
             func_ep_df,
@@ -160,10 +164,9 @@ class EpnFunctionality(BaseAnalysis):
         fp_temp = fs_temp.copy(deep=True)
 
         # shape the dataframe into failure probability and failure samples
-        fs_temp["failure"] = fs_temp.astype(str).apply(",".join, axis=1)
-        fs_results = fs_temp.filter(["failure"])
-        fs_results.reset_index(inplace=True)
-        fs_results = fs_results.rename(columns={"index": "guid"})
+        fs_results = SampleStates(
+            fs_temp.index, fs_temp[sampcols].to_numpy(dtype=np.uint8)
+        )
 
         # calculate failure probability
         # count of 0s divided by sample size
@@ -200,6 +203,19 @@ class EpnFunctionality(BaseAnalysis):
                     "description": "List of gate station nodes.",
                     "type": List[int],
                 },
+                {
+                    "id": "num_cpu",
+                    "required": False,
+                    "description": "If using parallel execution, the number of cpus to request. Default is 1.",
+                    "type": int,
+                },
+                {
+                    "id": "sample_state_format",
+                    "required": False,
+                    "description": "Format of the sample failure state output, csv (default) or npy. npy writes a state matrix "
+                    "with a _index.json file next to it, read them with Dataset.get_sample_states.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
@@ -5,8 +5,6 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 
-import concurrent.futures
-from itertools import repeat
 from pyincore import (
     BaseAnalysis,
     HazardService,
@@ -56,53 +54,62 @@ class GasFacilityDamage(BaseAnalysis):
             self, len(inventory_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(inventory_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(inventory_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, metadata_results) = self.gasfacility_damage_concurrent_futures(
-            self.gasfacility_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
+        inventory_args = self.get_chunks(num_workers, list(inventory_set))
 
-        result_name = self.get_parameter("result_name")
-        self.set_result_csv_data("result", ds_results, name=result_name + "_damage")
-        self.set_result_json_data(
-            "metadata", metadata_results, name=result_name + "_additional_info"
-        )
+        # Obtain the fragility key
+        fragility_key = self.get_parameter("fragility_key")
 
-        return True
+        if fragility_key is None:
+            if hazard_type == "earthquake":
+                fragility_key = GfUtil.DEFAULT_FRAGILITY_KEY
+            else:
+                raise ValueError(
+                    "Hazard type other than Earthquake and Tsunami are not currently supported."
+                )
 
-    def gasfacility_damage_concurrent_futures(self, function_name, parallelism, *args):
-        """Utilizes concurrent.future module.
+            self.set_parameter("fragility_key", fragility_key)
 
-        Args:
-            function_name (function): The function to be parallelized.
-            parallelism (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
+        fragility_keys = [fragility_key]
+        if (
+            hazard_type == "earthquake"
+            and self.get_parameter("use_liquefaction") is True
+        ):
+            liquefaction_fragility_key = self.get_parameter(
+                "liquefaction_fragility_key"
+            )
+            if liquefaction_fragility_key is None:
+                liquefaction_fragility_key = GfUtil.DEFAULT_LIQ_FRAGILITY_KEY
+                self.set_parameter(
+                    "liquefaction_fragility_key", liquefaction_fragility_key
+                )
+            fragility_keys.append(liquefaction_fragility_key)
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), fragility_keys
+        )
 
-        Returns:
-            list: A list of ordered dictionaries with building damage values and other data/metadata.
+        result_format, info_format = self.get_result_formats()
+        result_name = self.get_parameter("result_name")
 
-        """
-        output_ds = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
+        self.set_result_batches(
+            self.map_parallel(
+                self.gasfacility_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", result_name + "_damage", result_format),
+                (
+                    "metadata",
+                    result_name + "_additional_info",
+                    info_format,
+                ),
+            ],
+        )
 
-        return output_ds, output_dmg
+        return True
 
     def gasfacility_damage_analysis_bulk_input(
         self, facilities, hazard, hazard_type, hazard_dataset_id
@@ -132,19 +139,8 @@ class GasFacilityDamage(BaseAnalysis):
         liquefaction_prob = None
         loc = None
 
-        # Obtain the fragility key
         fragility_key = self.get_parameter("fragility_key")
 
-        if fragility_key is None:
-            if hazard_type == "earthquake":
-                fragility_key = GfUtil.DEFAULT_FRAGILITY_KEY
-            else:
-                raise ValueError(
-                    "Hazard type other than Earthquake and Tsunami are not currently supported."
-                )
-
-            self.set_parameter("fragility_key", fragility_key)
-
         # Obtain the fragility set
         fragility_sets = self.fragilitysvc.match_inventory(
             self.get_input_dataset("dfr3_mapping_set"), facilities, fragility_key
@@ -417,6 +413,19 @@ class GasFacilityDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                                   "additional info is written as json.",
+                    "type": str,
+                },
                 {
                     "id": "hazard_id",
                     "required": False,
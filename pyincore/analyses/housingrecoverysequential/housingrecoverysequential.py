@@ -7,8 +7,6 @@ from pyincore import BaseAnalysis, AnalysisUtil
 
 import numpy as np
 import pandas as pd
-import concurrent.futures
-from itertools import repeat
 
 
 class HousingRecoverySequential(BaseAnalysis):
@@ -197,28 +195,24 @@ class HousingRecoverySequential(BaseAnalysis):
             self, len(households_df), user_defined_cpu
         )
 
-        # Chop dataset into `num_size` chunks
+        # Chop dataset into `num_size` chunks, one per worker since every chunk restarts the seeded generator
         max_chunk_size = int(np.ceil(len(households_df) / num_workers))
-
-        households_df_list = list(
-            map(
-                lambda x: households_df[
-                    x * max_chunk_size : x * max_chunk_size + max_chunk_size
-                ],
-                list(range(num_workers)),
-            )
+        households_df_list = self.get_chunks(
+            num_workers, households_df, chunk_size=max_chunk_size
         )
 
         # Run the analysis
-        result = self.hhrs_concurrent_future(
+        result = pd.DataFrame()
+        for ret in self.map_parallel(
             self.housing_serial_recovery_model,
-            num_workers,
             households_df_list,
-            repeat(t_delta),
-            repeat(t_final),
-            repeat(tpm),
-            repeat(initial_prob),
-        )
+            num_workers,
+            t_delta,
+            t_final,
+            tpm,
+            initial_prob,
+        ):
+            result = pd.concat([result, ret], ignore_index=True)
 
         result_name = self.get_parameter("result_name")
         self.set_result_csv_data(
@@ -227,28 +221,6 @@ class HousingRecoverySequential(BaseAnalysis):
 
         return True
 
-    def hhrs_concurrent_future(self, function_name, parallelism, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            parallelism (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            pd.DataFrame: outcome DataFrame containing the results from the concurrent function.
-
-        """
-        output_ds = pd.DataFrame()
-
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for ret in executor.map(function_name, *args):
-                output_ds = pd.concat([output_ds, ret], ignore_index=True)
-
-        return output_ds
-
     def housing_serial_recovery_model(
         self, households_df, t_delta, t_final, tpm, initial_prob
     ):
@@ -300,21 +272,30 @@ class HousingRecoverySequential(BaseAnalysis):
             households_df, num_households, rng, are_zones_from_sv
         )
 
-        # We store Markov states as a list of numpy arrays for convenience and add each one by one
+        # We store Markov states as a (stages x households) matrix and fill it one stage at a time
         markov_stages = np.zeros((stages, num_households))
 
-        for household in range(0, num_households):
-            if households_df["dislocated"].iat[household]:
-                spin = rng.rand()
+        # Dislocated households draw their initial stage in household order, the others start in stage 4
+        dislocated = households_df["dislocated"].to_numpy(dtype=bool)
+        spins = rng.rand(np.count_nonzero(dislocated))
+        markov_stages[0][dislocated] = np.select(
+            [
+                spins < initial_prob["cumulative"][0],
+                spins < initial_prob["cumulative"][1],
+            ],
+            [1.0, 2.0],
+            3.0,
+        )
+        markov_stages[0][~dislocated] = 4.0
+
+        # Cumulative transition probabilities of each household per current stage (households x stages 1-4 x 3),
+        # looked up once from the TPM row matching the household's social vulnerability score
+        markov_vectors = self.compute_markov_vectors(tpm, sv_scores)
+        households = np.arange(num_households)
 
-                if spin < initial_prob["cumulative"][0]:
-                    markov_stages[0][household] = 1.0
-                elif spin < initial_prob["cumulative"][1]:
-                    markov_stages[0][household] = 2.0
-                else:
-                    markov_stages[0][household] = 3.0
-            else:
-                markov_stages[0][household] = 4.0
+        # Running count of regressions up to each stage, so the rolling 12, 24 and all-time windows are
+        # differences of two counters instead of a rescan of the history
+        regression_counts = np.zeros((stages, num_households), dtype=np.int32)
 
         # With all data in place, run the Markov chain (Cell 36 onwards)
 
@@ -323,89 +304,41 @@ class HousingRecoverySequential(BaseAnalysis):
             # Generate a vector with random numbers for all households
             spins = rng.rand(num_households)
 
-            # Iterate over all households
-            for household in range(0, num_households):
-                stage_val = markov_stages[t - 1][household]
-
-                if stage_val == 5:
-                    # If the household has already transitioned to stage 5, the household will remain in stage 5.
-                    markov_stages[t][household] = 5
-                else:
-                    # Obtain the vector used to setup the stage
-                    mv_index = np.where(tpm[:, 0] == sv_scores[household])[0][0]
-                    lower = int((stage_val - 1) * 4 + 1)
-                    upper = int(stage_val * 4 + 1)
-                    mv = tpm[mv_index, lower:upper]
-                    markov_vector = [mv[0], sum(mv[0:2]), sum(mv[0:3])]
-
-                    # Set the new stage using the Markov property
-                    if spins[household] < markov_vector[0]:
-                        markov_stages[t][household] = 1
-                    elif spins[household] < markov_vector[1]:
-                        markov_stages[t][household] = 2
-                    elif spins[household] < markov_vector[2]:
-                        markov_stages[t][household] = 3
-                    else:
-                        markov_stages[t][household] = 4
-
-                    # Alternative method: use deques to simplify the algorithm
-
-                    # We create three sliding windows into the past, one for 12 steps, one for 24 ad one for all stages
-                    # regressions_12 = cl.deque(maxlen=12)
-                    # regressions_24 = cl.deque(maxlen=24)
-                    # regressions_all = cl.deque()
-
-                    # We check if during this step there was a regression
-                    # if markov_stages[t][household] < markov_stages[t - 1][household]:
-                    #    regression_happened = 1
-                    # else:
-                    #    regression_happened = 0
-
-                    # And add the result to both queues
-                    # regressions_12.append(regression_happened)
-                    # regressions_24.append(regression_happened)
-                    # regressions_all.append(regression_happened)
-
-                    # Finally test the stage 5 condition per queue and a special condition when t reaches 85.
-                    # if (sum(regressions_12) > 4) or \
-                    #    (sum(regressions_24) > 7) or \
-                    #    (sum(regressions_all) > 10) or \
-                    #    t == 85:
-                    #    markov_stages[t][household] = 5
-
-                    if t >= 1:
-                        # Check every timestep that occurred prior to the current timestep.
-                        regressions = self.compute_regressions(
-                            markov_stages, household, 1, t
-                        )
-
-                        if regressions > 10:
-                            markov_stages[t][household] = 5
-                    if t >= 12:
-                        # Check the previous 12 timesteps that occurred prior to the current timestep.
-                        regressions = self.compute_regressions(
-                            markov_stages, household, t - 11, t
-                        )
-
-                        # If the number of regressive steps in the household's past 12 timesteps is greater than 4,
-                        # the household transitions to stage 5.
-                        if regressions > 4:
-                            markov_stages[t][household] = 5
-                    if t >= 24:
-                        # Check the previous 24 timesteps that occurred prior to the current timestep.
-                        regressions = self.compute_regressions(
-                            markov_stages, household, t - 23, t
-                        )
-
-                        # If the number of regressive steps in the household's past 24 timesteps is greater than 7,
-                        # the household transitions to stage 5.
-                        if regressions > 7:
-                            markov_stages[t][household] = 5
-                    if t == 85:
-                        # If the household has not reached stage 4 after 85 timesteps, the household transitions to
-                        # stage 5.
-                        if markov_stages[t][household] != 4:
-                            markov_stages[t][household] = 5
+            previous = markov_stages[t - 1]
+            # If the household has already transitioned to stage 5, the household will remain in stage 5.
+            active = previous != 5
+            stage_index = np.where(active, previous - 1, 0).astype(np.intp)
+            markov_vector = markov_vectors[households, stage_index]
+
+            # Set the new stage using the Markov property
+            current = np.select(
+                [
+                    spins < markov_vector[:, 0],
+                    spins < markov_vector[:, 1],
+                    spins < markov_vector[:, 2],
+                ],
+                [1.0, 2.0, 3.0],
+                4.0,
+            )
+
+            # Check every timestep that occurred prior to the current timestep. Too many regressive steps
+            # overall (> 10), in the past 12 timesteps (> 4) or in the past 24 timesteps (> 7) transition the
+            # household to stage 5.
+            to_stage_5 = regression_counts[t - 1] > 10
+            if t >= 12:
+                to_stage_5 |= regression_counts[t - 1] - regression_counts[t - 12] > 4
+            if t >= 24:
+                to_stage_5 |= regression_counts[t - 1] - regression_counts[t - 24] > 7
+            if t == 85:
+                # If the household has not reached stage 4 after 85 timesteps, the household transitions to
+                # stage 5.
+                to_stage_5 |= current != 4
+            current[to_stage_5] = 5
+
+            markov_stages[t] = np.where(active, current, 5)
+            regression_counts[t] = regression_counts[t - 1] + (
+                markov_stages[t] < previous
+            )
 
         # We make a copy to be used for numerical purposes, from which drop some of the columns
         result = pd.DataFrame()
@@ -490,56 +423,39 @@ class HousingRecoverySequential(BaseAnalysis):
             else:
                 zone_def = zone_def.get_json_reader()
 
-        for household in range(0, num_households):
-            spin = rng.rand()
-            zone = zones[household]
-
-            if are_zones_from_sv:
-                if spin < zone_def[zone]["threshold_0"]:
-                    sv_scores[household] = round(
-                        rng.uniform(
-                            zone_def[zone]["below_lower"],
-                            zone_def[zone]["below_upper"],
-                        ),
-                        3,
-                    )
-
-                # for zone 2, 3, 4 there is additional middle range
-                elif (
-                    "threshold_1" in zone_def[zone].keys()
-                    and spin < zone_def[zone]["threshold_1"]
-                ):
-                    sv_scores[household] = round(
-                        rng.uniform(
-                            zone_def[zone]["middle_lower"],
-                            zone_def[zone]["middle_upper"],
-                        ),
-                        3,
-                    )
-                else:
-                    sv_scores[household] = round(
-                        rng.uniform(
-                            zone_def[zone]["above_lower"],
-                            zone_def[zone]["above_upper"],
-                        ),
-                        3,
-                    )
+        # Every household draws a spin and then a uniform score, so the draws are taken as interleaved pairs
+        draws = rng.rand(num_households, 2)
+        spins = draws[:, 0]
 
-            else:
-                if spin < zone_def[zone]["threshold"]:
-                    sv_scores[household] = round(
-                        rng.uniform(
-                            zone_def[zone]["below_lower"], zone_def[zone]["below_upper"]
-                        ),
-                        3,
-                    )
-                else:
-                    sv_scores[household] = round(
-                        rng.uniform(
-                            zone_def[zone]["above_lower"], zone_def[zone]["above_upper"]
-                        ),
-                        3,
-                    )
+        # zone definitions are looked up once per distinct zone
+        unique_zones, zone_index = np.unique(zones, return_inverse=True)
+
+        def zone_values(key, default=np.nan):
+            return np.array(
+                [zone_def[zone].get(key, default) for zone in unique_zones],
+                dtype=float,
+            )[zone_index]
+
+        if are_zones_from_sv:
+            # for zone 2, 3, 4 there is additional middle range
+            below = spins < zone_values("threshold_0")
+            middle = ~below & (spins < zone_values("threshold_1", -np.inf))
+            ranges = ["below", "middle", "above"]
+            conditions = [below, middle]
+        else:
+            ranges = ["below", "above"]
+            conditions = [spins < zone_values("threshold")]
+        lower = np.select(
+            conditions,
+            [zone_values(r + "_lower") for r in ranges[:-1]],
+            zone_values(ranges[-1] + "_lower"),
+        )
+        upper = np.select(
+            conditions,
+            [zone_values(r + "_upper") for r in ranges[:-1]],
+            zone_values(ranges[-1] + "_upper"),
+        )
+        sv_scores[:] = np.round(lower + (upper - lower) * draws[:, 1], 3)
 
         return sv_scores
 
@@ -571,30 +487,40 @@ class HousingRecoverySequential(BaseAnalysis):
         return households_df[households_df["Zone"] != "missing"]
 
     @staticmethod
-    def compute_regressions(markov_stages, household, lower, upper):
+    def compute_markov_vectors(tpm, sv_scores):
         """
-        Compute regressions for a given household in the interval near t using the interval [lower, upper], and
-        adjust for stage inversion at the upper boundary.
+        Look up the cumulative transition probabilities of every household from the TPM row that matches its
+        social vulnerability score.
 
         Args:
-            markov_stages (np.Array): Markov chain stages for all households.
-            household (int): Index of the household.
-            lower (int): Lower index to check past history.
-            upper (int): Upper index to check past history.
+            tpm (np.Array): Transition probability matrix, the first column holds the social vulnerability score.
+            sv_scores (np.Array): Social vulnerability score of each household.
 
         Returns:
-            int: Number of regressions between a given time window.
+            np.Array: (households x 4 x 3) cumulative probabilities of moving to stage 1, 2 and 3 from stages 1-4.
 
         """
-        regressions = 0
-
-        # Check the previous timesteps between [lower, upper] prior to the current timestep.
+        # the first TPM row with a matching score is used
+        scores, first_rows = np.unique(tpm[:, 0], return_index=True)
+        positions = np.searchsorted(scores, sv_scores)
+        positions = np.minimum(positions, len(scores) - 1)
+        missing = scores[positions] != sv_scores
+        if np.any(missing):
+            raise IndexError(
+                "Social vulnerability score {} is not in the transition probability matrix.".format(
+                    sv_scores[missing][0]
+                )
+            )
 
-        for t in range(lower, upper):
-            if markov_stages[t][household] < markov_stages[t - 1][household]:
-                regressions += 1
+        rows = tpm[first_rows[positions]]
+        vectors = np.empty((len(sv_scores), 4, 3))
+        for stage in range(1, 5):
+            mv = rows[:, (stage - 1) * 4 + 1 : stage * 4 + 1]
+            vectors[:, stage - 1, 0] = mv[:, 0]
+            vectors[:, stage - 1, 1] = mv[:, 0] + mv[:, 1]
+            vectors[:, stage - 1, 2] = mv[:, 0] + mv[:, 1] + mv[:, 2]
 
-        return regressions
+        return vectors
 
     def get_spec(self):
         """Get specifications of the housing serial recovery model.
@@ -639,6 +565,12 @@ class HousingRecoverySequential(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
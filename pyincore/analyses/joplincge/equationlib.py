@@ -1,6 +1,7 @@
 from copy import deepcopy
 import pandas as pd
 import operator as op
+from pyomo.environ import ConstraintList, Param, Var
 
 
 class VarContainer:
@@ -14,6 +15,9 @@ class VarContainer:
         namelist: A dictionary with all stored GAMS variables and its information.
         nvars: The length of the array, i.e. the size of all matrix variables summed up.
         initialVals: Stored initial values of all variables.
+        paramlist: A dictionary with all stored parameters and its information.
+        nparams: The length of the parameter array.
+        paramVals: Stored values of all parameters.
 
     """
 
@@ -24,6 +28,9 @@ class VarContainer:
         self.nvars = 0
         self.LO = []
         self.UP = []
+        self.paramlist = {}
+        self.paramVals = []
+        self.nparams = 0
 
     def add(self, name, rows=None, cols=None):
         """
@@ -63,17 +70,73 @@ class VarContainer:
 
         return ExprM(self, name=name, rows=rows, cols=cols)
 
-    def set_value(self, name, values, target):
+    def add_param(self, name, values):
+        """Add a parameter, a constant of the model whose values can be changed between solves
+        without rebuilding the model, e.g. the capital stock that is shocked in the simulations.
+
+        Args:
+            name (str): Name of the parameter in GAMS.
+            values (obj): A pandas DataFrame, pandas Series, int or float with the parameter values.
+
+        Returns:
+            obj: An ExprM of the parameter to be used in the equations.
+
+        """
+        rows = values.index.tolist() if isinstance(values, (pd.DataFrame, pd.Series)) else None
+        cols = values.columns.tolist() if isinstance(values, pd.DataFrame) else None
+        if rows is not None and cols is not None:
+            size = len(rows) * len(cols)
+            self.paramlist[name] = {
+                'nrows': len(rows),
+                'ncols': len(cols),
+                'rows': rows,
+                'cols': cols,
+                'start': self.nparams,
+                'size': size
+            }
+        elif rows is not None:
+            size = len(rows)
+            self.paramlist[name] = {'nrows': len(rows), 'rows': rows, 'start': self.nparams, 'size': size}
+        else:
+            size = 1
+            self.paramlist[name] = {'start': self.nparams, 'size': 1}
+
+        self.paramVals.extend([None] * size)
+        self.nparams += size
+        self.set_param(name, values)
+
+        return ExprM(self, name=name, rows=rows, cols=cols, param=True)
+
+    def set_param(self, name, values, model=None):
+        """Set the values of a parameter, and of its Pyomo Params if the model is given.
+
+        Args:
+            name (str): Name of the parameter in GAMS.
+            values (obj): A pandas DataFrame, pandas Series, int or float with the parameter values.
+            model (obj): A Pyomo model built by to_pyomo.
+
+        """
+        self.set_value(name, values, self.paramVals, self.get_param_index)
+        if model is not None:
+            info = self.paramlist[name]
+            for i in range(info['start'], info['start'] + info['size']):
+                model.p[i] = self.paramVals[i]
+
+    def set_value(self, name, values, target, get_index=None):
         """An internal method for setting the initial values or UPs and LOs for variables.
 
         Args:
             name (str): Name of the variable in GAMS.
             values (obj): a pandas DataFrame, pandas Series, int or float with initial values.
             target (obj): target array to be set.
+            get_index (obj): Index lookup of the target array, get_index by default.
 
         """
+        if get_index is None:
+            get_index = self.get_index
+
         if type(values) == int or type(values) == float:
-            info = self.namelist[name]
+            info = self.namelist[name] if get_index == self.get_index else self.paramlist[name]
             if 'nrows' in info and 'ncols' in info:
                 values = pd.DataFrame(index=info['rows'], columns=info['cols']).fillna(values)
             elif 'nrows' in info and 'ncols' not in info:
@@ -84,13 +147,13 @@ class VarContainer:
             cols = values.columns.tolist()
             for i in rows:
                 for j in cols:
-                    target[self.get_index(name, row=i, col=j)] = float(values.loc[i][j])
+                    target[get_index(name, row=i, col=j)] = float(values.loc[i][j])
         elif type(values) == pd.Series:
             rows = values.index.tolist()
             for i in rows:
-                target[self.get_index(name, row=i)] = float(values.loc[i])
+                target[get_index(name, row=i)] = float(values.loc[i])
         else:
-            target[self.get_index(name)] = values
+            target[get_index(name)] = values
 
     def init(self, name, initial_value):
         """Flatten the table variable and add to the list. Also set the initial variable values array.
@@ -139,7 +202,24 @@ class VarContainer:
             int: The index of the position in the array.
 
         """
-        info = self.namelist[name]
+        return self.get_position(self.namelist[name], row, col)
+
+    def get_param_index(self, name, row=None, col=None):
+        """Look up the index of a parameter by providing the parameter name and label information.
+
+        Args:
+            name (str): Name of the parameter in GAMS.
+            row (obj): A row label of the position you want to look up index for (if it has row labels).
+            col (obj): A column label of the position you want to look up index for (if it has column labels)
+
+        Returns:
+            int: The index of the position in the parameter array.
+
+        """
+        return self.get_position(self.paramlist[name], row, col)
+
+    @staticmethod
+    def get_position(info, row=None, col=None):
         result = info['start']
         if row is not None and col is not None:
             result += info['rows'].index(row) * info['ncols'] + info['cols'].index(col)
@@ -234,6 +314,27 @@ class VarContainer:
                 upper = 1e10 if self.UP[i] is None else self.UP[i]
                 f.write('model.x' + str(i) + ' = Var(bounds=(' + str(lower) + ',' + str(upper) + '),initialize=' + str(
                     self.initialVals[i]) + ')' + '\n')
+            if self.nparams > 0:
+                f.write('model.p = Param(range(' + str(self.nparams) + '), mutable=True, initialize='
+                        + str(dict(enumerate(self.paramVals))) + ')\n')
+
+    def to_pyomo(self, model):
+        """Add the variables and parameters to a Pyomo model as the indexed components model.x and model.p,
+        and an empty constraint list model.equality for the equations.
+
+        Args:
+            model (obj): A Pyomo ConcreteModel.
+
+        """
+        lower = [-1e10 if i is None else i for i in self.LO]
+        upper = [1e10 if i is None else i for i in self.UP]
+        model.x = Var(
+            range(self.nvars),
+            bounds=lambda m, i: (lower[i], upper[i]),
+            initialize=lambda m, i: self.initialVals[i]
+        )
+        model.p = Param(range(self.nparams), mutable=True, initialize=lambda m, i: self.paramVals[i])
+        model.equality = ConstraintList()
 
 
 class Variable:
@@ -260,6 +361,22 @@ class Variable:
         in the array in the container."""
         return 'model.x' + str(self.index) + ''
 
+    def to_pyomo(self, model):
+        return model.x[self.index]
+
+
+class Parameter(Variable):
+    """A single parameter, initialized by given the GAMS parameter and its label."""
+
+    def __init__(self, gams_vars, name, row=None, col=None):
+        self.index = gams_vars.get_param_index(name, row, col)
+
+    def __str__(self):
+        return 'model.p[' + str(self.index) + ']'
+
+    def to_pyomo(self, model):
+        return model.p[self.index]
+
 
 class ExprItem:
     """You can construct it with a variable, a constant or a deepcopy of another ExprItem."""
@@ -267,7 +384,7 @@ class ExprItem:
     def __init__(self, v, const=1):
         self.varList = []
         self.const = const
-        if type(v) == Variable:
+        if isinstance(v, Variable):
             self.varList.append(v)
         elif type(v) == int or type(v) == float:
             self.const = v
@@ -285,7 +402,7 @@ class ExprItem:
         copy = ExprItem(self)
         if type(rhs) == int or type(rhs) == float:
             copy.const = copy.const * rhs
-        elif type(rhs) == Variable:
+        elif isinstance(rhs, Variable):
             copy.varList.append(rhs)
         elif type(rhs) == ExprItem:
             copy.const *= rhs.const
@@ -308,6 +425,12 @@ class ExprItem:
             result += "*" + self.varList[i].__str__()
         return result
 
+    def to_pyomo(self, model):
+        result = self.const
+        for v in self.varList:
+            result = result * v.to_pyomo(model)
+        return result
+
     def is_empty(self):
         if abs(self.const) < 0.00000001:
             return True
@@ -326,7 +449,7 @@ class Expr:
     def __init__(self, item):
         self.itemList = []
         self.isComposite = False
-        if type(item) == ExprItem or type(item) == Variable or type(item) == int or type(item) == float:
+        if type(item) == ExprItem or isinstance(item, Variable) or type(item) == int or type(item) == float:
             self.itemList.append(ExprItem(item))
         elif type(item) == Expr:
             self.itemList = [
@@ -366,7 +489,7 @@ class Expr:
             else:
                 rhscopy = Expr(rhs)
                 copy.itemList = copy.itemList + rhscopy.itemList
-        elif type(rhs) == ExprItem or type(rhs) == int or type(rhs) == float or type(rhs) == Variable:
+        elif type(rhs) == ExprItem or type(rhs) == int or type(rhs) == float or isinstance(rhs, Variable):
             copy.itemList.append(ExprItem(rhs))
         return copy
 
@@ -470,6 +593,19 @@ class Expr:
                 result = "(" + result + ")"
         return result
 
+    def to_pyomo(self, model):
+        """Build the Pyomo expression of the Expr, the same expression as exec-ing its string."""
+        if self.isComposite:
+            if self.operator == '/':
+                return self.first.to_pyomo(model) / self.second.to_pyomo(model)
+            return self.first.to_pyomo(model) ** self.second.to_pyomo(model)
+        if len(self.itemList) == 0:
+            return 0
+        result = self.itemList[0].to_pyomo(model)
+        for i in self.itemList[1:]:
+            result = result + i.to_pyomo(model)
+        return result
+
     def is_empty(self):
         if not self.isComposite and len(self.itemList) == 0:
             return True
@@ -505,15 +641,21 @@ class ExprM:
     with the content in the Series or DataFrame as constants.
     3. Give it a ExprMatrix, will return a deep copy of it.
 
+    With param set to True, the first way creates the Expression matrix from a parameter
+    added by VarContainer.add_param instead.
+
     """
 
-    def __init__(self, vars, name=None, rows=None, cols=None, m=None, em=None):
+    def __init__(self, vars, name=None, rows=None, cols=None, m=None, em=None, param=False):
         self.vars = vars
         self.hasCondition = False
         if em is None:
             # if these are the variables, we need to create an Expression by the variable name
             if name is not None:
-                if self.vars.in_list(name):
+                leaf = Parameter if param else Variable
+                if param:
+                    self.info = deepcopy(self.vars.paramlist[name])
+                elif self.vars.in_list(name):
                     self.info = deepcopy(self.vars.get_info(name))
                 else:
                     print("Can't find this variable in the all variable list")
@@ -528,11 +670,11 @@ class ExprM:
                     self.info['height'] = len(rows)
 
                 if cols is not None:  # if it is a DataFrame
-                    self.m = [[Expr(Variable(self.vars, name, i, j)) for j in cols] for i in rows]
+                    self.m = [[Expr(leaf(self.vars, name, i, j)) for j in cols] for i in rows]
                 elif rows is not None:  # if it is a Series
-                    self.m = [[Expr(Variable(self.vars, name, i))] for i in rows]
+                    self.m = [[Expr(leaf(self.vars, name, i))] for i in rows]
                 else:  # if it is a variable
-                    self.m = [[Expr(Variable(self.vars, name))]]
+                    self.m = [[Expr(leaf(self.vars, name))]]
 
             # otherwise these are just constants
             else:
@@ -777,6 +919,18 @@ class ExprM:
                     count[0] += 1
         f.close()
 
+    def to_pyomo(self, model):
+        """Add the equations to the constraint list model.equality of a model built by VarContainer.to_pyomo.
+
+        Args:
+            model (obj): A Pyomo ConcreteModel.
+
+        """
+        for i in range(self.info['height']):
+            for j in range(self.info['width']):
+                if not self.hasCondition or self.hasCondition and self.mark[i][j]:
+                    model.equality.add(self.m[i][j].to_pyomo(model) == 0)
+
     def test(self, x):
         for i in range(self.info['height']):
             for j in range(self.info['width']):
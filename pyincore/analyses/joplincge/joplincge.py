@@ -1,6 +1,7 @@
 """Joplin CGE model"""
 
 from pyincore import BaseAnalysis
+from pyincore.utils.cgebatchrunner import CGEBatchRunner
 from pyincore import globals as pyglobals
 from pyincore.analyses.joplincge.equationlib import *
 
@@ -58,6 +59,19 @@ class JoplinCGEModel(BaseAnalysis):
                     "path to the package.",
                     "type": str,
                 },
+                {
+                    "id": "num_cpu",
+                    "required": False,
+                    "description": "If using parallel execution, the number of cpus to request when sector_shocks "
+                    "has several shock scenarios.",
+                    "type": int,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the scenario-results output, csv (default), jsonl or parquet.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
@@ -176,10 +190,88 @@ class JoplinCGEModel(BaseAnalysis):
                     "description": "CSV file of household count.",
                     "type": "incore:HouseholdCount",
                 },
+                {
+                    "id": "scenario-results",
+                    "parent_type": "",
+                    "description": "CSV file of the results of every shock scenario in batch mode, one row per "
+                    "scenario, output, row and column.",
+                    "type": "incore:cgeScenarioResults",
+                },
             ],
         }
 
     def run(self):
+        """Executes the Joplin CGE model. If sector_shocks has several shock columns, every column is solved as
+        a scenario and the results are written to the scenario-results output."""
+        data = self.read_input_data()
+        sector_shocks = pd.read_csv(
+            self.get_input_dataset("sector_shocks").get_file_path("csv")
+        )
+
+        scenarios = CGEBatchRunner.get_scenarios(sector_shocks)
+        if len(scenarios) > 1:
+            num_cpu = self.get_parameter("num_cpu")
+            return CGEBatchRunner.run(
+                self,
+                data,
+                scenarios,
+                "scenario-results",
+                "scenario-results",
+                num_cpu if num_cpu is not None else 0,
+                self.get_result_formats()[0],
+            )
+
+        simulate = self.build_simulation(data)
+        for result_id, output in simulate(sector_shocks).items():
+            self.set_result_csv_data(
+                result_id, output, name=result_id, source="dataframe", index=True
+            )
+
+        return True
+
+    def read_input_data(self):
+        """Read the input datasets of the model, except the sector shocks.
+
+        Returns:
+            dict: DataFrames by input dataset id.
+
+        """
+        data = {}
+        for dataset_id in [
+            "SAM",
+            "BB",
+            "IOUT",
+            "MISC",
+            "MISCH",
+            "LANDCAP",
+            "EMPLOY",
+            "IGTD",
+            "TAUFF",
+            "JOBCR",
+            "OUTCR",
+        ]:
+            data[dataset_id] = pd.read_csv(
+                self.get_input_dataset(dataset_id).get_file_path("csv"), index_col=0
+            )
+
+        # Skips whitespace around column and index names from head
+        data["BB"].rename(columns=lambda x: x.strip(), inplace=True)
+        data["BB"].rename(index=lambda x: x.strip(), inplace=True)
+
+        return data
+
+    def build_simulation(self, data, require_optimal=False):
+        """Calibrate the model and build it once.
+
+        Args:
+            data (dict): Input DataFrames from read_input_data.
+            require_optimal (bool): Raise a ValueError for a scenario the solver does not solve to optimality,
+                instead of returning its outputs.
+
+        Returns:
+            function: Solves one capital stock shock scenario, see simulate.
+
+        """
         # ----------------------------------------------------------------
         # define sets
         # ----------------------------------------------------------------
@@ -455,51 +547,17 @@ class JoplinCGEModel(BaseAnalysis):
         # ----------------------------------------------------------------
         # IMPORT ADDITIONAL DATA FILES
         # ----------------------------------------------------------------
-        # SAM
-        SAM = pd.read_csv(
-            self.get_input_dataset("SAM").get_file_path("csv"), index_col=0
-        )
-        # CAPITAL COMP
-        BB = pd.read_csv(self.get_input_dataset("BB").get_file_path("csv"), index_col=0)
-        BB.rename(
-            columns=lambda x: x.strip(), inplace=True
-        )  # Skips whitespace around column name from head
-        BB.rename(
-            index=lambda x: x.strip(), inplace=True
-        )  # Skips whitespace around index name from head
-
-        # MISC TABLES
-        IOUT = pd.read_csv(
-            self.get_input_dataset("IOUT").get_file_path("csv"), index_col=0
-        )
-        MISC = pd.read_csv(
-            self.get_input_dataset("MISC").get_file_path("csv"), index_col=0
-        )
-        MISCH = pd.read_csv(
-            self.get_input_dataset("MISCH").get_file_path("csv"), index_col=0
-        )
-        LANDCAP = pd.read_csv(
-            self.get_input_dataset("LANDCAP").get_file_path("csv"), index_col=0
-        )
-        EMPLOY = pd.read_csv(
-            self.get_input_dataset("EMPLOY").get_file_path("csv"), index_col=0
-        )
-        IGTD = pd.read_csv(
-            self.get_input_dataset("IGTD").get_file_path("csv"), index_col=0
-        )
-        TAUFF = pd.read_csv(
-            self.get_input_dataset("TAUFF").get_file_path("csv"), index_col=0
-        )
-        JOBCR = pd.read_csv(
-            self.get_input_dataset("JOBCR").get_file_path("csv"), index_col=0
-        )
-        OUTCR = pd.read_csv(
-            self.get_input_dataset("OUTCR").get_file_path("csv"), index_col=0
-        )
-        sector_shocks = pd.read_csv(
-            self.get_input_dataset("sector_shocks").get_file_path("csv")
-        )
-
+        SAM = data["SAM"]
+        BB = data["BB"]
+        IOUT = data["IOUT"]
+        MISC = data["MISC"]
+        MISCH = data["MISCH"]
+        LANDCAP = data["LANDCAP"]
+        EMPLOY = data["EMPLOY"]
+        IGTD = data["IGTD"]
+        TAUFF = data["TAUFF"]
+        JOBCR = data["JOBCR"]
+        OUTCR = data["OUTCR"]
         # ----------------------------------------------------------------
         # PARAMETER DECLARATION
         # ----------------------------------------------------------------
@@ -1298,21 +1356,14 @@ class JoplinCGEModel(BaseAnalysis):
         vars.lo("N", 0)
         vars.lo("CN", 0)
 
-        def set_variable(filname):
-            # clear the file before write the variables
-            with open(filename, "w") as f:
-                f.write("")
-
-            vars.write(filename)
+        # the capital stock is shocked in the simulations, keep it a mutable parameter of the model
+        KSP = vars.add_param("KS0", KS0.loc[K, IG])
 
         # -------------------------------------------------------------------------------------------------------------
         # DEFINE EQUATIONS AND SET CONDITIONS
         # -------------------------------------------------------------------------------------------------------------
 
-        def set_equation(filename):
-
-            count = [0]
-
+        def set_equation(model):
             #   CPIEQ(H)..
             #   CPI(H)=E=
             #   SUM(I, P(I) * ( 1 + SUM(GS, TAUC(GS,I) ) ) * CH(I,H) )
@@ -1327,7 +1378,7 @@ class JoplinCGEModel(BaseAnalysis):
 
             CPIEQ = line1 / line2 - ~CPI.loc(H)
             # print(CPIEQ)
-            CPIEQ.write(count, filename)
+            CPIEQ.to_pyomo(model)
 
             # print('YEQ(H)')
             line1 = (
@@ -1356,7 +1407,7 @@ class JoplinCGEModel(BaseAnalysis):
             ).sum(K)
 
             YEQ = (line1 + line2 + line3 + line4) - Y.loc(H)
-            YEQ.write(count, filename)
+            YEQ.to_pyomo(model)
             # print(YEQ)
 
             #  YDEQ(H).. YD(H)          =E=   Y(H) + (PRIVRET(H) * HH(H))
@@ -1370,7 +1421,7 @@ class JoplinCGEModel(BaseAnalysis):
             line4 = ~(ExprM(vars, m=TAUH.loc[G, H]) * HH.loc(H)).sum(G)
 
             YDEQ = (line1 + line2 - line3 - line4) - YD.loc(H)
-            YDEQ.write(count, filename)
+            YDEQ.to_pyomo(model)
             # print(YDEQ)
 
             #  CHEQ(I,H).. CH(I,H)      =E= CH0(I,H)* ((YD(H) / YD0(H)) / ( CPI(H) / CPI0(H)))**(BETA(I,H))
@@ -1392,7 +1443,7 @@ class JoplinCGEModel(BaseAnalysis):
             ).prod(0)
 
             CHEQ = (line1 * line2) - CH.loc(I, H)
-            CHEQ.write(count, filename)
+            CHEQ.to_pyomo(model)
             # print(CHEQ)
 
             #  SHEQ(H).. S(H)           =E= YD(H) - SUM(I, P(I) * CH(I,H) * ( 1 + SUM(GS, TAUC(GS,I))));
@@ -1404,7 +1455,7 @@ class JoplinCGEModel(BaseAnalysis):
             )
 
             SHEQ = line - S.loc(H)
-            SHEQ.write(count, filename)
+            SHEQ.to_pyomo(model)
             # print(SHEQ)
 
             #  PVAEQ(I).. PVA(I)        =E= PD(I) - SUM(J, AD(J,I) * P(J) * (1 + SUM(GS, TAUQ(GS, J))));
@@ -1418,7 +1469,7 @@ class JoplinCGEModel(BaseAnalysis):
             )
 
             PVAEQ = line - PVA.loc(I)
-            PVAEQ.write(count, filename)
+            PVAEQ.to_pyomo(model)
             # print(PVAEQ)
 
             #  PFEQ(I)..DS(I)           =E= DELTA(I)*PROD(F, (FD(F,I))**ALPHA(F,I));
@@ -1428,7 +1479,7 @@ class JoplinCGEModel(BaseAnalysis):
             ).prod(F)
 
             PFEQ = line - DS.loc(I)
-            PFEQ.write(count, filename)
+            PFEQ.to_pyomo(model)
             # print(PFEQ)
 
             # FDEQ(F,I).. R(F,I) * RA(F) * (1 + SUM(GF,TAUFX(GF,F,I) ) )* (FD(F,I))
@@ -1443,7 +1494,7 @@ class JoplinCGEModel(BaseAnalysis):
             right = ~(PVA.loc(I) * DS.loc(I) * ExprM(vars, m=ALPHA.loc[F, I]))
 
             FDEQ = right - left
-            FDEQ.write(count, filename)
+            FDEQ.to_pyomo(model)
             # print(FDEQ)
 
             #   VEQ(I).. V(I) =E= SUM(J, AD(I,J) * DS(J) );
@@ -1451,7 +1502,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = (ExprM(vars, m=AD.loc[I, J]) * ~DS.loc(J)).sum(1)
 
             VEQ = line - V.loc(I)
-            VEQ.write(count, filename)
+            VEQ.to_pyomo(model)
             # print(VEQ)
 
             #   YFEQL(L).. Y(L) =E= SUM(IG, R(L,IG)* RA(L)*FD(L,IG));
@@ -1459,7 +1510,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = (R.loc(L, IG) * RA.loc(L) * FD.loc(L, IG)).sum(IG)
 
             YFEQL = line - Y.loc(L)
-            YFEQL.write(count, filename)
+            YFEQL.to_pyomo(model)
             # print(YFEQL)
 
             # YFEQK(K).. Y('KAP') =E= SUM(IG, R('KAP',IG) * RA('KAP') * FD('KAP',IG));
@@ -1467,7 +1518,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = (R.loc(["KAP"], IG) * RA.loc(["KAP"]) * FD.loc(["KAP"], IG)).sum(IG)
 
             YFEQK = line - Y.loc(["KAP"])
-            YFEQK.write(count, filename)
+            YFEQK.to_pyomo(model)
             # print(YFEQK)
 
             #  YFEQLA(LA).. Y('LAND')   =E= SUM(IG, R('LAND',IG) * RA('LAND') * FD('LAND',IG));
@@ -1477,7 +1528,7 @@ class JoplinCGEModel(BaseAnalysis):
             )
 
             YFEQLA = line - Y.loc(["LAND"])
-            YFEQLA.write(count, filename)
+            YFEQLA.to_pyomo(model)
             # print(YFEQLA)
 
             #  LANFOR(LA).. LNFOR(LA)   =E= LFOR(LA) * Y(LA);
@@ -1485,7 +1536,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = ExprM(vars, m=LFOR.loc[LA]) * Y.loc(LA)
 
             LANFOR = line - LNFOR.loc(LA)
-            LANFOR.write(count, filename)
+            LANFOR.to_pyomo(model)
             # print(LANFOR)
 
             #  KAPFOR(K).. KPFOR(K)     =E= KFOR(K) * Y(K);
@@ -1493,7 +1544,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = ExprM(vars, m=KFOR.loc[K]) * Y.loc(K)
 
             KAPFOR = line - KPFOR.loc(K)
-            KAPFOR.write(count, filename)
+            KAPFOR.to_pyomo(model)
             # print(KAPFOR)
 
             #  XEQ(I).. CX(I)           =E= CX0(I)*((PD(I))/(PWM0(I)))**(ETAE(I));
@@ -1503,7 +1554,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** ExprM(vars, m=ETAE.loc[I])
 
             XEQ = line - CX.loc(I)
-            XEQ.write(count, filename)
+            XEQ.to_pyomo(model)
             # print(XEQ)
 
             #  DEQ(I)$PWM0(I).. D(I)    =E= D0(I) *(PD(I)/PWM0(I))**(ETAD(I));
@@ -1514,7 +1565,7 @@ class JoplinCGEModel(BaseAnalysis):
 
             DEQ = line - D.loc(I)
             #  DEQ.setCondition(PWM0.loc[I])
-            DEQ.write(count, filename)
+            DEQ.to_pyomo(model)
             # print(DEQ)
 
             #  PEQ(I)..  P(I)           =E= D(I) * PD(I) + ( 1 - D(I) ) * PWM0(I);
@@ -1522,7 +1573,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = D.loc(I) * PD.loc(I) + (1 - D.loc(I)) * ExprM(vars, m=PWM0.loc[I])
 
             PEQ = line - P.loc(I)
-            PEQ.write(count, filename)
+            PEQ.to_pyomo(model)
             # print(PEQ)
 
             #  MEQ(I).. M(I)            =E= ( 1 - D(I) ) * DD(I);
@@ -1530,7 +1581,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = (1 - D.loc(I)) * DD.loc(I)
 
             MEQ = line - M.loc(I)
-            MEQ.write(count, filename)
+            MEQ.to_pyomo(model)
             # print(MEQ)
 
             #  NKIEQ.. NKI              =E= SUM(I, M(I) * PWM0(I) )
@@ -1555,7 +1606,7 @@ class JoplinCGEModel(BaseAnalysis):
             NKIEQ = (
                 line1 - line2 - line3 - line4 - line5 - line6 - line7 + line8
             ) - NKI
-            NKIEQ.write(count, filename)
+            NKIEQ.to_pyomo(model)
             # print(NKIEQ)
 
             #  NEQ(K,I).. N(K,I)        =E= N0(K,I)*(R(K,I)/R0(K,I))**(ETAIX(K,I));
@@ -1565,7 +1616,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** ExprM(vars, m=ETAIX.loc[K, I])
 
             NEQ = line - N.loc(K, I)
-            NEQ.write(count, filename)
+            NEQ.to_pyomo(model)
             # print(NEQ)
 
             #  CNEQ(I).. P(I)*(1 + SUM(GS, TAUN(GS,I)))*CN(I)
@@ -1575,15 +1626,15 @@ class JoplinCGEModel(BaseAnalysis):
             right = (ExprM(vars, m=B.loc[I, IG]) * N.loc(K, IG).sum(K)).sum(IG)
 
             CNEQ = right - left
-            CNEQ.write(count, filename)
+            CNEQ.to_pyomo(model)
             # print(CNEQ)
 
             #  KSEQ(K,IG).. KS(K,IG)    =E= KS0(K,IG) * ( 1 - DEPR) + N(K,IG) ;
             # print('KSEQ(K,IG)')
-            line = ExprM(vars, m=KS0.loc[K, IG] * (1 - DEPR)) + N.loc(K, IG)
+            line = KSP.loc(K, IG) * (1 - DEPR) + N.loc(K, IG)
 
             KSEQ = line - KS.loc(K, IG)
-            KSEQ.write(count, filename)
+            KSEQ.to_pyomo(model)
             # print(KSEQ)
 
             # print('LSEQ1(H)')
@@ -1624,7 +1675,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** ExprM(vars, m=ETAPIT.loc[H])
 
             LSEQ1 = (line1 * line2 * line3 * line4) - HW.loc(H) / HH.loc(H)
-            LSEQ1.write(count, filename)
+            LSEQ1.to_pyomo(model)
             # print(LSEQ1)
 
             #    LSEQ2a(CM1).. CMO(CM1)   =E= CMO0(CM1)* (((EXWGEO(CM1) /RA('L1') ))** ECOMO(CM1));
@@ -1634,7 +1685,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** (ExprM(vars, m=ECOMO.loc[CM1]))
 
             LSEQ2a = line - CMO.loc(CM1)
-            LSEQ2a.write(count, filename)
+            LSEQ2a.to_pyomo(model)
             # print(LSEQ2a)
 
             #    LSEQ2b(CM2).. CMO(CM2)   =E= CMO0(CM2)* (((EXWGEO(CM2) /RA('L2') ))** ECOMO(CM2));
@@ -1644,7 +1695,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** (ExprM(vars, m=ECOMO.loc[CM2]))
 
             LSEQ2b = line - CMO.loc(CM2)
-            LSEQ2b.write(count, filename)
+            LSEQ2b.to_pyomo(model)
             # print(LSEQ2b)
 
             #    LSEQ2c(CM3).. CMO(CM3)   =E= CMO0(CM3)* (((EXWGEO(CM3) /RA('L3') ))** ECOMO(CM3));
@@ -1654,7 +1705,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** (ExprM(vars, m=ECOMO.loc[CM3]))
 
             LSEQ2c = line - CMO.loc(CM3)
-            LSEQ2c.write(count, filename)
+            LSEQ2c.to_pyomo(model)
             # print(LSEQ2c)
 
             #    LSEQ3a.. CMI('L1')       =E= CMI0('L1')* (((RA('L1')/(SUM( H, CPI(H))/5)/EXWGEI('L1')))** ECOMI('L1'));
@@ -1666,7 +1717,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** (ExprM(vars, m=ECOMI.loc["L1"]))
 
             LSEQ3a = line - CMI.loc(["L1"])
-            LSEQ3a.write(count, filename)
+            LSEQ3a.to_pyomo(model)
             # print(LSEQ3a)
 
             #    LSEQ3b.. CMI('L2')       =E= CMI0('L2')* (((RA('L2')/(SUM( H, CPI(H))/5)/EXWGEI('L2')))** ECOMI('L2'));
@@ -1678,7 +1729,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** (ExprM(vars, m=ECOMI.loc["L2"]))
 
             LSEQ3b = line - CMI.loc(["L2"])
-            LSEQ3b.write(count, filename)
+            LSEQ3b.to_pyomo(model)
             # print(LSEQ3b)
 
             #    LSEQ3c.. CMI('L3')       =E= CMI0('L3')* (((RA('L3')/(SUM( H, CPI(H))/5)/EXWGEI('L3')))** ECOMI('L3'));
@@ -1690,7 +1741,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** (ExprM(vars, m=ECOMI.loc["L3"]))
 
             LSEQ3c = line - CMI.loc(["L3"])
-            LSEQ3c.write(count, filename)
+            LSEQ3c.to_pyomo(model)
             # print(LSEQ3c)
 
             #  LASEQ1(LA,I).. LAS(LA,I) =E= LAS0(LA,I)*(R(LA, I)/R0(LA, I))**(ETAL(LA,I));
@@ -1700,7 +1751,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** ExprM(vars, m=ETAL.loc[LA, I])
 
             LASEQ1 = line - LAS.loc(LA, I)
-            LASEQ1.write(count, filename)
+            LASEQ1.to_pyomo(model)
             # print(LASEQ1)
 
             #  POPEQ(H).. HH(H)         =E= HH0(H) * NRPG(H)
@@ -1729,7 +1780,7 @@ class JoplinCGEModel(BaseAnalysis):
             ) ** ExprM(vars, m=ETAUO.loc[H])
 
             POPEQ = line1 + line2 * line3 - line4 * line5 - HH.loc(H)
-            POPEQ.write(count, filename)
+            POPEQ.to_pyomo(model)
             # print(POPEQ)
 
             #  ANEQ(H).. HN(H)          =E= HH(H) - HW(H);
@@ -1737,7 +1788,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = HH.loc(H) - HW.loc(H)
 
             ANEQ = line - HN.loc(H)
-            ANEQ.write(count, filename)
+            ANEQ.to_pyomo(model)
             # print(ANEQ)
 
             #  YGEQ(GX).. Y(GX)         =E=   SUM(I, TAUV(GX,I) * V(I) * P(I) )
@@ -1828,7 +1879,7 @@ class JoplinCGEModel(BaseAnalysis):
                 + line10
                 + line11
             ) - Y.loc(GX)
-            YGEQ.write(count, filename)
+            YGEQ.to_pyomo(model)
             # print(YGEQ)
 
             #    YGEQ2(GT).. Y(GT)        =E= SUM(GX, IGT(GT,GX));
@@ -1836,7 +1887,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = IGT.loc(GT, GX).sum(GX)
 
             YGEQ2 = line - Y.loc(GT)
-            YGEQ2.write(count, filename)
+            YGEQ2.to_pyomo(model)
             # print(YGEQ2)
 
             #  YGEQ1(GNL).. Y(GNL)      =E= TAXS1(GNL)*Y('CYGF');
@@ -1844,7 +1895,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = ExprM(vars, m=TAXS1.loc[GNL]) * Y.loc(["CYGF"])
 
             YGEQ1 = line - Y.loc(GNL)
-            YGEQ1.write(count, filename)
+            YGEQ1.to_pyomo(model)
             # print(YGEQ1)
 
             #  GOVFOR(G).. GVFOR(G)     =E= GFOR(G)*Y(G);
@@ -1852,7 +1903,7 @@ class JoplinCGEModel(BaseAnalysis):
             line = ExprM(vars, m=GFOR.loc[G]) * Y.loc(G)
 
             GOVFOR = line - GVFOR.loc(G)
-            GOVFOR.write(count, filename)
+            GOVFOR.to_pyomo(model)
             # print(GOVFOR)
 
             #  CGEQ(I,GN).. P(I)*(1 + SUM(GS, TAUG(GS,I))) * CG(I,GN)
@@ -1864,7 +1915,7 @@ class JoplinCGEModel(BaseAnalysis):
             )
 
             CGEQ = right - left
-            CGEQ.write(count, filename)
+            CGEQ.to_pyomo(model)
             # print(CGEQ)
 
             #  GFEQ(F,GN)..  FD(F,GN) * R(F,GN) * RA(F)*( 1 + SUM(GF, TAUFX(GF,F,GN)))
@@ -1881,7 +1932,7 @@ class JoplinCGEModel(BaseAnalysis):
             )
 
             GFEQ = left - right
-            GFEQ.write(count, filename)
+            GFEQ.to_pyomo(model)
             # print(GFEQ)
 
             #  GSEQL(GN).. S(GN)        =E= (Y(GN)+ GVFOR(GN))
@@ -1900,7 +1951,7 @@ class JoplinCGEModel(BaseAnalysis):
             ).sum(F)
 
             GSEQL = (line1 - ~line2 - ~line3) - S.loc(GN)
-            GSEQL.write(count, filename)
+            GSEQL.to_pyomo(model)
             # print(GSEQL)
 
             #  GSEQ(GX).. S(GX)         =E= (Y(GX) + GFOR(GX)*Y(GX)) - SUM(H, (TP(H,GX)*HH(H))) - SUM(G,IGT(G,GX));
@@ -1910,7 +1961,7 @@ class JoplinCGEModel(BaseAnalysis):
             line3 = IGT.loc(G, GX).sum(G)
 
             GSEQ = (line1 - ~line2 - ~line3) - S.loc(GX)
-            GSEQ.write(count, filename)
+            GSEQ.to_pyomo(model)
             # print(GSEQ)
 
             #  TDEQ(G,GX)$(IGTD(G,GX) EQ 1).. IGT(G,GX)
@@ -1924,7 +1975,7 @@ class JoplinCGEModel(BaseAnalysis):
 
             TDEQ = line - IGT.loc(G, GX)
             TDEQ.set_condition(IGTD.loc[G, GX], "EQ", 1)
-            TDEQ.write(count, filename)
+            TDEQ.to_pyomo(model)
             # print(TDEQ)
 
             #  SPIEQ.. SPI              =E= SUM(H, Y(H)) + SUM((H,G), TP(H,G)*HH(H)) + SUM(H, PRIVRET(H)*HH(H));
@@ -1936,7 +1987,7 @@ class JoplinCGEModel(BaseAnalysis):
             )
 
             SPIEQ = line - SPI
-            SPIEQ.write(count, filename)
+            SPIEQ.to_pyomo(model)
             # print(SPIEQ)
             # print('LMEQ1')
             left = (ExprM(vars, m=JOBCOR.loc[H, "L1"]) * HW.loc(H)).sum(H) + CMI.loc(
@@ -1949,7 +2000,7 @@ class JoplinCGEModel(BaseAnalysis):
             # right = FD.loc(['L1'], Z).sum(Z) + CMO.loc(CM1).sum(CM1)
 
             LMEQ1 = right - left
-            LMEQ1.write(count, filename)
+            LMEQ1.to_pyomo(model)
             # print(LMEQ1)
 
             # print('LMEQ2')
@@ -1963,7 +2014,7 @@ class JoplinCGEModel(BaseAnalysis):
             # right = FD.loc(["L2"], Z).sum(Z) + CMO.loc(CM2).sum(CM2)
 
             LMEQ2 = left - right
-            LMEQ2.write(count, filename)
+            LMEQ2.to_pyomo(model)
             # print(LMEQ2)
 
             # print('LMEQ3')
@@ -1977,25 +2028,25 @@ class JoplinCGEModel(BaseAnalysis):
             # right = FD.loc(["L3"], Z).sum(Z) + CMO.loc(CM3).sum(CM3)
 
             LMEQ3 = left - right
-            LMEQ3.write(count, filename)
+            LMEQ3.to_pyomo(model)
             # print(LMEQ3)
 
             #  KMEQ(K,IG).. KS(K,IG)    =E= FD(K,IG);
             # print('KMEQ(K,IG)')
             KMEQ = FD.loc(K, IG) - KS.loc(K, IG)
-            KMEQ.write(count, filename)
+            KMEQ.to_pyomo(model)
             # print(KMEQ)
 
             #  LAMEQ(LA,IG).. LAS(LA,IG)=E= FD(LA,IG);
             # print('LAMEQ(LA,IG)')
             LAMEQ = FD.loc(LA, IG) - LAS.loc(LA, IG)
-            LAMEQ.write(count, filename)
+            LAMEQ.to_pyomo(model)
             # print(LAMEQ)
 
             #  GMEQ(I).. DS(I)          =E= DD(I) + CX(I) - M(I);
             # print('GMEQ(I)')
             GMEQ = DD.loc(I) + CX.loc(I) - M.loc(I) - DS.loc(I)
-            GMEQ.write(count, filename)
+            GMEQ.to_pyomo(model)
             # print(GMEQ)
 
             #  DDEQ(I).. DD(I)          =E= V(I) + SUM(H, CH(I,H) ) + SUM(G, CG(I,G) ) + CN(I);
@@ -2007,48 +2058,66 @@ class JoplinCGEModel(BaseAnalysis):
                 + CN.loc(I)
                 - DD.loc(I)
             )
-            DDEQ.write(count, filename)
+            DDEQ.to_pyomo(model)
             # print(DDEQ)
 
             # IGT.FX(G,GX)$(NOT IGT0(G,GX))=0;
             # print('IGT.FX(G,GX)$(NOT IGT0(G,GX))=0')
             FX1 = IGT.loc(G, GX)
             FX1.set_condition(IGT0.loc[G, GX], "EQ", 0)
-            FX1.write(count, filename)
+            FX1.to_pyomo(model)
             # print(FX1)
 
             # IGT.FX(G,GX)$(IGTD(G,GX) EQ 2)=IGT0(G,GX);
             # print('IGT.FX(G,GX)$(IGTD(G,GX) EQ 2)=IGT0(G,GX)')
             FX2 = IGT.loc(G, GX) - ExprM(vars, m=IGT0.loc[G, GX])
             FX2.set_condition(IGTD.loc[G, GX], "EQ", 2)
-            FX2.write(count, filename)
+            FX2.to_pyomo(model)
             # print(FX2)
 
             # R.FX(L,Z)=R0(L,Z);
             # print('R.FX(L,Z)=R0(L,Z)')
             FX3 = R.loc(L, Z) - ExprM(vars, m=R0.loc[L, Z])
-            FX3.write(count, filename)
+            FX3.to_pyomo(model)
             # print(FX3)
 
             # RA.FX(LA)=RA0(LA);
             # print('RA.FX(LA)=RA0(LA)')
             FX4 = RA.loc(LA) - ExprM(vars, m=RA0.loc[LA])
-            FX4.write(count, filename)
+            FX4.to_pyomo(model)
             # print(FX4)
 
             # RA.FX(K)=RA0(K);
             # print('RA.FX(K)=RA0(K)')
             FX5 = RA.loc(K) - ExprM(vars, m=RA0.loc[K])
-            FX5.write(count, filename)
+            FX5.to_pyomo(model)
             # print(FX5)
 
             # print("Objective")
             obj = vars.get_index("SPI")
+            model.obj = Objective(expr=-1 * model.x[obj])
+
+        def build_model():
+            model = ConcreteModel()
+            vars.to_pyomo(model)
+            set_equation(model)
 
-            with open(filename, "a") as f:
-                f.write("model.obj = Objective(expr=-1*model.x" + str(obj) + ")")
+            ### Declare all suffixes
 
-        def run_solver(cons_filename, temp_file_name):
+            # Ipopt bound multipliers (obtained from solution)
+            model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
+            model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
+
+            # Ipopt bound multipliers (sent to solver)
+            model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
+            model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
+
+            # Obtain dual solutions from first solve and send to warm start
+            model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
+
+            return model
+
+        def run_solver(model, check_optimal=False):
             solver = "ipopt"
             solver_io = "nl"
             stream_solver = True  # True prints solver output to screen
@@ -2075,29 +2144,10 @@ class JoplinCGEModel(BaseAnalysis):
                 print("")
                 exit(1)
 
-            ### Create the model
-            model = ConcreteModel()
-            set_variable(cons_filename)
-            set_equation(cons_filename)
-            ###
-
-            ### read the model
-            exec(open(cons_filename).read())
+            ### Update the shocked parameters, the variables keep the last solution as initial guess
+            vars.set_param("KS0", KS0.loc[K, IG], model)
             ###
 
-            ### Declare all suffixes
-
-            # Ipopt bound multipliers (obtained from solution)
-            model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
-            model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
-
-            # Ipopt bound multipliers (sent to solver)
-            model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
-            model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
-
-            # Obtain dual solutions from first solve and send to warm start
-            model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
-
             # Send the model to ipopt and collect the solution
             results = opt.solve(model, keepfiles=keepfiles, tee=stream_solver)
 
@@ -2122,16 +2172,10 @@ class JoplinCGEModel(BaseAnalysis):
             # valid for importing, which it will store into the results object
 
             results = opt.solve(model, keepfiles=keepfiles, tee=stream_solver)
+            if check_optimal:
+                CGEBatchRunner.check_solver_results(results)
 
-            x = [None for i in range(vars.nvars)]
-
-            with open(temp_file_name, "w") as f:
-                for i in range(vars.nvars):
-                    f.write("x[" + str(i) + "]=value(model.x" + str(i) + ")\n")
-
-            exec(open(temp_file_name).read())
-
-            soln.append(x[:])
+            soln.append([value(model.x[i]) for i in range(vars.nvars)])
 
             return soln
 
@@ -2141,133 +2185,131 @@ class JoplinCGEModel(BaseAnalysis):
 
         soln = []
 
-        # create CGE tmp folder, solverconstatns
-        # TODO: we need to generate the "solverconstatnt" folder with username since it uses system tmp
-        # TODO: there is a situation that multiple users on system can run this together
-
-        filename = "ipopt_cons.py"
-        tmp = "tmp.py"
+        # the model is built once, the simulations only update its parameters
+        model = build_model()
         print("Calibration: ")
-        run_solver(filename, tmp)
+        run_solver(model)
 
-        """
-        Simulation code below:
-        In each simulation:
-        
-        1. Apply simulation code (like PI(I) = 1.02).
-        2. Rewrite all equations
-        3. Solve the new model with the result from last run as initial guess.
-        
-        """
+        # base capital stock, every scenario applies its shocks to it
+        KS00 = KS0.copy()
 
-        iNum = self.get_parameter("model_iterations")  # dynamic model iterations
-        result = []
-        for ittr in range(iNum):
-            # print("Simulation: ", ittr + 1)
-            if ittr == 0:  # if it is the first simulation, apply the shock
-                # DELTA.loc[I] = 1.02 * DELTA.loc[I]
-                # KS0.loc[K, I] = KS0.loc[K, I]*0.9
-                KS0.loc[K, ["HS1"]] = KS0.loc[K, ["HS1"]] * float(
-                    (sector_shocks.loc[sector_shocks["sector"] == "HS1"])["shock"]
-                )
-                KS0.loc[K, ["HS2"]] = KS0.loc[K, ["HS2"]] * float(
-                    (sector_shocks.loc[sector_shocks["sector"] == "HS2"])["shock"]
-                )
-                KS0.loc[K, ["HS3"]] = KS0.loc[K, ["HS3"]] * float(
-                    (sector_shocks.loc[sector_shocks["sector"] == "HS3"])["shock"]
-                )
-                KS0.loc[K, ["GOODS"]] = KS0.loc[K, ["GOODS"]] * float(
-                    (sector_shocks.loc[sector_shocks["sector"] == "GOODS"])["shock"]
-                )
-                KS0.loc[K, ["TRADE"]] = KS0.loc[K, ["TRADE"]] * float(
-                    (sector_shocks.loc[sector_shocks["sector"] == "TRADE"])["shock"]
-                )
-                KS0.loc[K, ["OTHER"]] = KS0.loc[K, ["OTHER"]] * float(
-                    (sector_shocks.loc[sector_shocks["sector"] == "OTHER"])["shock"]
-                )
-            else:  # other simulations
-                KS0 = KSNEW * (1 - DEPR) + vars.get("N", x=soln[-1])
-            result = run_solver(filename, tmp)
-
-        # Prepare simulations output
-        CH0 = vars.get("CH", x=soln[0])
-        CPI0 = vars.get("CPI", x=soln[0])
-        CX0 = vars.get("CX", x=soln[0])
-        D0 = vars.get("D", x=soln[0])
-        DS0 = vars.get("DS", x=soln[0])
-        IGT0 = vars.get("IGT", x=soln[0])
-        KS0 = vars.get("KS", x=soln[0])
-        LAS0 = vars.get("LAS", x=soln[0])
-        HH0 = vars.get("HH", x=soln[0])
-        HHL = vars.get("HH", x=soln[1])
-        HN0 = vars.get("HN", x=soln[0])
-        HW0 = vars.get("HW", x=soln[0])
-        N0 = vars.get("N", x=soln[0])
-        P0 = vars.get("P", x=soln[0])
-        RA0 = vars.get("RA", x=soln[0])
-        R0 = vars.get("R", x=soln[0])
-        Y0 = vars.get("Y", x=soln[0])
-        YL = vars.get("Y", x=soln[1])
-        YD0 = vars.get("YD", x=soln[0])
-        FD0 = vars.get("FD", x=soln[0])
-        FDL = vars.get("FD", x=soln[1])
-
-        households = ["HH1", "HH2", "HH3", "HH4", "HH5"]
-        labor_groups = ["L1", "L2", "L3", "L4", "L5"]
-        sectors = ["Goods", "Trades", "Others", "HS1", "HS2", "HS3"]
-        # note TRADE vs TRADES, OTHERS vs OTHER in capitalized sectors
-        sectors_cap = ["GOODS", "TRADE", "OTHER", "HS1", "HS2", "HS3"]
-
-        FD0.insert(loc=0, column="Labor Group", value=labor_groups)
-        FDL.insert(loc=0, column="Labor Group", value=labor_groups)
-        gross_income = {
-            "Household Group": households,
-            "Y0": Y0.loc[households].sort_index(),
-            "YL": YL.loc[households].sort_index(),
-        }
-        hh = {
-            "Household Group": households[:5],
-            "HH0": HH0.loc[households].sort_index(),
-            "HHL": HHL.loc[households].sort_index(),
-        }
-        ds = {
-            "Sectors": sectors,
-            "DS0": DS0.loc[sectors_cap].sort_index(),
-            "DSL": vars.get("DS", result[-1]).loc[sectors_cap].sort_index(),
-        }
+        def simulate(sector_shocks):
+            """Solve the simulations of one capital stock shock scenario.
 
-        self.set_result_csv_data(
-            "domestic-supply",
-            pd.DataFrame(ds),
-            name="domestic-supply",
-            source="dataframe",
-        )
-        self.set_result_csv_data(
-            "pre-disaster-factor-demand",
-            FD0.iloc[0:3, 0:4],
-            name="pre-disaster-factor-demand",
-            source="dataframe",
-        )
-        self.set_result_csv_data(
-            "post-disaster-factor-demand",
-            FDL.iloc[0:3, 0:4],
-            name="post-disaster-factor-demand",
-            source="dataframe",
-        )
-        self.set_result_csv_data(
-            "gross-income",
-            pd.DataFrame(gross_income),
-            name="gross-income",
-            source="dataframe",
-        )
-        self.set_result_csv_data(
-            "household-count",
-            pd.DataFrame(hh),
-            name="household-count",
-            source="dataframe",
-        )
+            The simulations start from the calibrated solution, so scenarios can be solved in any order
+            with the same model.
 
-        return True
+            Args:
+                sector_shocks (pd.DataFrame): Capital stock shock (remaining fraction) of each sector.
+
+            Returns:
+                dict: Output DataFrames by result id, with the row labels as index.
+
+            """
+            nonlocal KS0
+            KS0 = KS00.copy()
+            del soln[1:]
+            for i in range(vars.nvars):
+                model.x[i].value = soln[0][i]
+            """
+            Simulation code below:
+            In each simulation:
+        
+            1. Apply simulation code (like PI(I) = 1.02).
+            2. Update the shocked parameters of the model
+            3. Solve the new model with the result from last run as initial guess.
+        
+            """
+
+            iNum = self.get_parameter("model_iterations")  # dynamic model iterations
+            result = []
+            for ittr in range(iNum):
+                # print("Simulation: ", ittr + 1)
+                if ittr == 0:  # if it is the first simulation, apply the shock
+                    # DELTA.loc[I] = 1.02 * DELTA.loc[I]
+                    # KS0.loc[K, I] = KS0.loc[K, I]*0.9
+                    KS0.loc[K, ["HS1"]] = KS0.loc[K, ["HS1"]] * float(
+                        (sector_shocks.loc[sector_shocks["sector"] == "HS1"])["shock"]
+                    )
+                    KS0.loc[K, ["HS2"]] = KS0.loc[K, ["HS2"]] * float(
+                        (sector_shocks.loc[sector_shocks["sector"] == "HS2"])["shock"]
+                    )
+                    KS0.loc[K, ["HS3"]] = KS0.loc[K, ["HS3"]] * float(
+                        (sector_shocks.loc[sector_shocks["sector"] == "HS3"])["shock"]
+                    )
+                    KS0.loc[K, ["GOODS"]] = KS0.loc[K, ["GOODS"]] * float(
+                        (sector_shocks.loc[sector_shocks["sector"] == "GOODS"])["shock"]
+                    )
+                    KS0.loc[K, ["TRADE"]] = KS0.loc[K, ["TRADE"]] * float(
+                        (sector_shocks.loc[sector_shocks["sector"] == "TRADE"])["shock"]
+                    )
+                    KS0.loc[K, ["OTHER"]] = KS0.loc[K, ["OTHER"]] * float(
+                        (sector_shocks.loc[sector_shocks["sector"] == "OTHER"])["shock"]
+                    )
+                else:  # other simulations
+                    KS0 = KSNEW * (1 - DEPR) + vars.get("N", x=soln[-1])
+                result = run_solver(model, require_optimal)
+
+            # Prepare simulations output
+            CH0 = vars.get("CH", x=soln[0])
+            CPI0 = vars.get("CPI", x=soln[0])
+            CX0 = vars.get("CX", x=soln[0])
+            D0 = vars.get("D", x=soln[0])
+            DS0 = vars.get("DS", x=soln[0])
+            IGT0 = vars.get("IGT", x=soln[0])
+            KS0 = vars.get("KS", x=soln[0])
+            LAS0 = vars.get("LAS", x=soln[0])
+            HH0 = vars.get("HH", x=soln[0])
+            HHL = vars.get("HH", x=soln[1])
+            HN0 = vars.get("HN", x=soln[0])
+            HW0 = vars.get("HW", x=soln[0])
+            N0 = vars.get("N", x=soln[0])
+            P0 = vars.get("P", x=soln[0])
+            RA0 = vars.get("RA", x=soln[0])
+            R0 = vars.get("R", x=soln[0])
+            Y0 = vars.get("Y", x=soln[0])
+            YL = vars.get("Y", x=soln[1])
+            YD0 = vars.get("YD", x=soln[0])
+            FD0 = vars.get("FD", x=soln[0])
+            FDL = vars.get("FD", x=soln[1])
+
+            households = ["HH1", "HH2", "HH3", "HH4", "HH5"]
+            labor_groups = ["L1", "L2", "L3", "L4", "L5"]
+            sectors = ["Goods", "Trades", "Others", "HS1", "HS2", "HS3"]
+            # note TRADE vs TRADES, OTHERS vs OTHER in capitalized sectors
+            sectors_cap = ["GOODS", "TRADE", "OTHER", "HS1", "HS2", "HS3"]
+
+            FD0.insert(loc=0, column="Labor Group", value=labor_groups)
+            FDL.insert(loc=0, column="Labor Group", value=labor_groups)
+            gross_income = {
+                "Household Group": households,
+                "Y0": Y0.loc[households].sort_index(),
+                "YL": YL.loc[households].sort_index(),
+            }
+            hh = {
+                "Household Group": households[:5],
+                "HH0": HH0.loc[households].sort_index(),
+                "HHL": HHL.loc[households].sort_index(),
+            }
+            ds = {
+                "Sectors": sectors,
+                "DS0": DS0.loc[sectors_cap].sort_index(),
+                "DSL": vars.get("DS", result[-1]).loc[sectors_cap].sort_index(),
+            }
+
+            return {
+                "domestic-supply": pd.DataFrame(ds).set_index("Sectors"),
+                "pre-disaster-factor-demand": FD0.iloc[0:3, 0:4].set_index(
+                    "Labor Group"
+                ),
+                "post-disaster-factor-demand": FDL.iloc[0:3, 0:4].set_index(
+                    "Labor Group"
+                ),
+                "gross-income": pd.DataFrame(gross_income).set_index("Household Group"),
+                "household-count": pd.DataFrame(hh).set_index("Household Group"),
+            }
+
+        return simulate
 
     @staticmethod
     def _(self, x):
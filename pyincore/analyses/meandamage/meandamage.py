@@ -5,10 +5,12 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 from pyincore import BaseAnalysis, AnalysisUtil
-from itertools import repeat
 from typing import List
-import concurrent.futures
 import collections
+import math
+
+import numpy as np
+import pandas as pd
 
 
 class MeanDamage(BaseAnalysis):
@@ -20,6 +22,8 @@ class MeanDamage(BaseAnalysis):
         incore_client (IncoreClient): Service authentication.
     """
 
+    CHUNK_SIZE = 100000
+
     def __init__(self, incore_client):
         super(MeanDamage, self).__init__(incore_client)
 
@@ -55,6 +59,12 @@ class MeanDamage(BaseAnalysis):
                     "description": "Number of cpus to request, when using parallel execution.",
                     "type": int,
                 },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result output, csv (default), jsonl or parquet.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
@@ -103,64 +113,165 @@ class MeanDamage(BaseAnalysis):
     def run(self):
         """Executes mean damage calculation."""
 
-        # read in file and parameters
-        damage = self.get_input_dataset("damage").get_csv_reader()
-        damage_result = AnalysisUtil.get_csv_table_rows(damage, ignore_first_row=False)
+        # read in file and parameters, damage values are kept as text so the input columns are written unchanged
+        damage_dataset = self.get_input_dataset("damage")
+        damage = damage_dataset.get_dataframe_from_csv(as_text=True)
 
         dmg_ratio_csv = self.get_input_dataset("dmg_ratios").get_csv_reader()
         dmg_ratio_tbl = AnalysisUtil.get_csv_table_rows(dmg_ratio_csv)
 
-        # setting number of cpus to use
-        user_defined_cpu = 1
-        if (
-            not self.get_parameter("num_cpu") is None
-            and self.get_parameter("num_cpu") > 0
-        ):
-            user_defined_cpu = self.get_parameter("num_cpu")
-
-        num_workers = AnalysisUtil.determine_parallelism_locally(
-            self, len(damage_result), user_defined_cpu
+        results = self.mean_damage_dataframe(
+            damage,
+            dmg_ratio_tbl,
+            self.get_parameter("damage_interval_keys"),
+            ":bridgeDamage" in damage_dataset.data_type,
         )
 
-        avg_bulk_input_size = int(len(damage_result) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = damage_result
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        results = self.mean_damage_concurrent_future(
-            self.mean_damage_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(dmg_ratio_tbl),
+        # written a slice at a time, the rows are the result dicts of mean_damage
+        batches = (
+            (results.iloc[start : start + MeanDamage.CHUNK_SIZE].to_dict("records"),)
+            for start in range(0, len(results), MeanDamage.CHUNK_SIZE)
         )
-        self.set_result_csv_data(
-            "result", results, name=self.get_parameter("result_name")
+        result_format, _ = self.get_result_formats()
+        self.set_result_batches(
+            batches, [("result", self.get_parameter("result_name"), result_format)]
         )
         return True
 
-    def mean_damage_concurrent_future(self, function_name, parallelism, *args):
-        """Utilizes concurrent.future module.
+    @staticmethod
+    def mean_damage_dataframe(damage, dmg_ratio_tbl, damage_interval_keys, is_bridge):
+        """Calculates mean damage of all entities at once, column by column.
+
+        Gives the same values as mean_damage for every row of the damage table. The damage intervals are a float
+        matrix and each damage ratio weighs a whole column.
+
+        Args:
+            damage (pd.DataFrame): Damage analysis output with the damage intervals, one row per entity.
+            dmg_ratio_tbl (list): dmg ratio table.
+            damage_interval_keys (list): damage interval keys.
+            is_bridge (bool): a boolean to indicate if the inventory type is bridge.
+            Bridge has its own way of calculating mean damage.
+
+        Returns:
+            pd.DataFrame: The damage table with mean damage, deviation or expected damage state columns.
+
+        """
+        if len(damage_interval_keys) < 4:
+            raise ValueError("we only accept 4 damage or more than 4 interval keys!")
+
+        # empty intervals are missing values
+        intervals = (
+            damage[damage_interval_keys].replace("", np.nan).astype(float).to_numpy()
+        )
+
+        def ratios(column, rows):
+            return [float(dmg_ratio_tbl[row][column]) for row in rows]
+
+        # weighted sums add the intervals in key order, like the scalar calculation
+        if len(dmg_ratio_tbl) == 5:
+            weights = ratios("Best Mean Damage Ratio", range(1, 5))
+            mean_damage = MeanDamage.weighted_sum(intervals[:, :4], weights)
+        elif len(dmg_ratio_tbl) == 4:
+            weights = ratios("Mean Damage Factor", range(0, 4))
+            mean_damage = MeanDamage.weighted_sum(intervals[:, :4], weights)
+        elif len(dmg_ratio_tbl) == 6 and is_bridge:
+            weights = ratios("Best Mean Damage Ratio", range(1, 6))
+            spans = MeanDamage.get_bridge_spans(damage)
+            mean_damage = MeanDamage.weighted_sum(intervals[:, 1:4], weights[:3])
+            # collapse is split across the spans of bridges with 3 or more spans
+            mean_damage += np.where(
+                spans >= 3,
+                weights[4] / spans * intervals[:, 4],
+                weights[3] * intervals[:, 4],
+            )
+        else:
+            raise ValueError("We cannot handle this damage ratio format.")
+
+        results = damage.copy()
+        results["meandamage"] = mean_damage
+
+        # bridge doesn't calculates deviation
+        if not is_bridge:
+            # squares with math.pow like the scalar calculation, it can differ from x * x in the last digit
+            weights = [
+                math.pow(float(dmg_ratio_tbl[row]["Mean Damage Factor"]), 2)
+                + math.pow(float(dmg_ratio_tbl[row]["Deviation Damage Factor"]), 2)
+                for row in range(len(damage_interval_keys))
+            ]
+            mean_squared = np.array([math.pow(value, 2) for value in mean_damage])
+            with np.errstate(invalid="ignore"):
+                results["mdamagedev"] = np.sqrt(
+                    MeanDamage.weighted_sum(intervals, weights) - mean_squared
+                )
+        else:
+            results["expectval"] = MeanDamage.get_expected_damage(
+                mean_damage, dmg_ratio_tbl
+            )
+
+        return results
+
+    @staticmethod
+    def weighted_sum(values, weights):
+        """Sum of weighted columns, added in column order.
+
+        Args:
+            values (np.ndarray): (rows x columns) values.
+            weights (list): A weight per column.
+
+        Returns:
+            np.ndarray: Weighted sum of every row.
+
+        """
+        total = np.zeros(values.shape[0])
+        for column, weight in enumerate(weights):
+            total += weight * values[:, column]
+        return total
+
+    @staticmethod
+    def get_bridge_spans(damage):
+        """Number of spans of every bridge, 1 if unknown and at most 10.
+
+        Args:
+            damage (pd.DataFrame): Bridge damage with an optional spans column.
+
+        Returns:
+            np.ndarray: Bridge spans.
+
+        """
+        if "spans" not in damage.columns:
+            return np.ones(len(damage))
+
+        spans = damage["spans"].astype(str)
+        spans = np.where(
+            spans.str.isdigit(), pd.to_numeric(spans, errors="coerce"), 1
+        ).astype(float)
+        for guid in damage["guid"][spans > 10]:
+            print(
+                "A bridge was found with greater than 10 spans: "
+                + guid
+                + ". Default to 10 bridge spans."
+            )
+        return np.minimum(spans, 10)
+
+    @staticmethod
+    def get_expected_damage(mean_damage, dmg_ratios):
+        """Damage state of every mean damage from the bounds of the damage ratios.
 
         Args:
-            function_name (function): The function to be parallelized.
-            parallelism (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
+            mean_damage (np.ndarray): Mean damage values.
+            dmg_ratios (list): Damage ratios, descriptions and states.
 
         Returns:
-            list: A list of ordered dictionaries with building damage values and other data/metadata.
+            np.ndarray: Damage state names, the first state if no bounds contain the mean damage.
 
         """
-        output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for ret in executor.map(function_name, *args):
-                output.extend(ret)
-
-        return output
+        conditions = [
+            (float(dmg_ratios[idx]["Lower Bound"]) <= mean_damage)
+            & (mean_damage <= float(dmg_ratios[idx]["Upper Bound"]))
+            for idx in range(1, 6)
+        ]
+        states = [dmg_ratios[idx]["Damage State"] for idx in range(1, 6)]
+        return np.select(conditions, states, default=states[0])
 
     def mean_damage_bulk_input(self, damage, dmg_ratio_tbl):
         """Run analysis for mean damage calculation.
@@ -5,11 +5,12 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 import collections
-import concurrent.futures
+from decimal import Decimal
+
 import numpy as np
 
 from typing import List
-from pyincore import BaseAnalysis, AnalysisUtil
+from pyincore import BaseAnalysis, AnalysisUtil, SampleStates
 
 
 class MonteCarloLimitStateProbability(BaseAnalysis):
@@ -24,6 +25,9 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
 
     """
 
+    # maximum number of random numbers drawn at once by a worker
+    MAX_CHUNK_DRAWS = 4000000
+
     def __init__(self, incore_client):
         super(MonteCarloLimitStateProbability, self).__init__(incore_client)
 
@@ -53,6 +57,12 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
                     "description": "Number of cpus to request, when using parallel execution.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
                 {
                     "id": "num_samples",
                     "required": True,
@@ -77,6 +87,13 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
                     "description": "Initial seed for the probabilistic model.",
                     "type": int,
                 },
+                {
+                    "id": "sample_state_format",
+                    "required": False,
+                    "description": "Format of the sample state outputs, csv (default) or npy. npy writes a state matrix "
+                    "with a _index.json file next to it, read them with Dataset.get_sample_states.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
@@ -147,90 +164,53 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
             self, len(damage_result), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(damage_result) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = damage_result
-
+        # a seed per damage result, so the samples do not depend on the chunks
         seed = self.get_parameter("seed")
-        seed_list = []
         if seed is not None:
-            while count < len(inventory_list):
-                inventory_args.append(
-                    inventory_list[count : count + avg_bulk_input_size]
-                )
-                seed_list.append(
-                    [
-                        seed + i
-                        for i in range(count - 1, count + avg_bulk_input_size - 1)
-                    ]
-                )
-                count += avg_bulk_input_size
+            seed_list = [seed + i - 1 for i in range(len(damage_result))]
         else:
-            while count < len(inventory_list):
-                inventory_args.append(
-                    inventory_list[count : count + avg_bulk_input_size]
-                )
-                seed_list.append(
-                    [None for i in range(count - 1, count + avg_bulk_input_size - 1)]
-                )
-                count += avg_bulk_input_size
-
-        (
-            fs_results,
-            fp_results,
-            samples_results,
-        ) = self.monte_carlo_failure_probability_concurrent_future(
+            seed_list = [None] * len(damage_result)
+        inventory_args = self.get_chunks(num_workers, damage_result, seed_list)
+
+        fs_results = []
+        fp_results = []
+        samples_results = []
+        for fs_ret, fp_ret, samples_ret in self.map_parallel(
             self.monte_carlo_failure_probability_bulk_input,
-            num_workers,
             inventory_args,
-            seed_list,
-        )
-        self.set_result_csv_data(
+            num_workers,
+        ):
+            fs_results.append(fs_ret)
+            fp_results.extend(fp_ret)
+            samples_results.append(samples_ret)
+
+        sample_state_format = self.get_parameter("sample_state_format")
+        if sample_state_format is None:
+            sample_state_format = "csv"
+
+        self.set_result_sample_states(
             "sample_failure_state",
-            fs_results,
+            SampleStates.concat(fs_results),
             name=self.get_parameter("result_name") + "_failure_state",
+            sample_format=sample_state_format,
         )
         self.set_result_csv_data(
             "failure_probability",
             fp_results,
             name=self.get_parameter("result_name") + "_failure_probability",
         )
-        self.set_result_csv_data(
+        self.set_result_sample_states(
             "sample_damage_states",
-            samples_results,
+            SampleStates.concat(
+                samples_results,
+                self.get_parameter("damage_interval_keys"),
+                "sample_damage_states",
+            ),
             name=self.get_parameter("result_name") + "_sample_damage_states",
+            sample_format=sample_state_format,
         )
         return True
 
-    def monte_carlo_failure_probability_concurrent_future(
-        self, function_name, parallelism, *args
-    ):
-        """Utilizes concurrent future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            parallelism (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of dictionary with id/guid and failure state for N samples.
-            list: A list dictionary with failure probability and other data/metadata.
-
-        """
-        fs_output = []
-        fp_output = []
-        samples_output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for fs_ret, fp_ret, samples_ret in executor.map(function_name, *args):
-                fs_output.extend(fs_ret)
-                fp_output.extend(fp_ret)
-                samples_output.extend(samples_ret)
-
-        return fs_output, fp_output, samples_output
-
     def monte_carlo_failure_probability_bulk_input(self, damage, seed_list):
         """Run analysis for monte carlo failure probability calculation
 
@@ -239,8 +219,9 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
             seed_list (list): Random number generator seed per building for reproducibility.
 
         Returns:
-            fs_results (list): A list of dictionary with id/guid and failure state for N samples
+            fs_results (obj): SampleStates with the failure state for N samples
             fp_results (list): A list dictionary with failure probability and other data/metadata.
+            samples_output (obj): SampleStates with the damage states for N samples
 
         """
         damage_interval_keys = self.get_parameter("damage_interval_keys")
@@ -251,17 +232,84 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
         fp_result = []
         samples_output = []
 
-        i = 0
-        for dmg in damage:
-            fs, fp, samples_result = self.monte_carlo_failure_probability(
-                dmg, damage_interval_keys, failure_state_keys, num_samples, seed_list[i]
+        # sample a chunk of assets at a time to bound the size of the random number matrix
+        chunk_size = max(1, self.MAX_CHUNK_DRAWS // max(num_samples, 1))
+        for start in range(0, len(damage), chunk_size):
+            fs, fp, samples_result = self.monte_carlo_failure_probability_batch(
+                damage[start : start + chunk_size],
+                damage_interval_keys,
+                failure_state_keys,
+                num_samples,
+                seed_list[start : start + chunk_size],
             )
             fs_result.append(fs)
-            fp_result.append(fp)
+            fp_result.extend(fp)
             samples_output.append(samples_result)
-            i += 1
 
-        return fs_result, fp_result, samples_output
+        return (
+            SampleStates.concat(fs_result),
+            fp_result,
+            SampleStates.concat(samples_output),
+        )
+
+    def monte_carlo_failure_probability_batch(
+        self, damage, damage_interval_keys, failure_state_keys, num_samples, seeds
+    ):
+        """Calculates failure probability results for a chunk of entries at once. The damage states of all samples
+        are drawn as a matrix and the results are identical to calling monte_carlo_failure_probability per entry.
+
+        Args:
+            damage (list): Damage analysis outputs.
+            damage_interval_keys (list): A list of the name of the damage intervals.
+            failure_state_keys (list): A list of the name of the damage state that is considered as failed.
+            num_samples (int): Number of samples for mc simulation.
+            seeds (list): Random number generator seed per entry for reproducibility.
+
+        Returns:
+            obj: SampleStates with the failure state, 0 (failed) or 1 (not failed), of N samples per entry.
+            list: A list dictionary with failure probability and other data/metadata.
+            obj: SampleStates with the damage state of N samples per entry.
+
+        """
+        ds_indices, num_determined = self.sample_damage_interval_batch(
+            damage, damage_interval_keys, num_samples, seeds
+        )
+        failed = np.isin(np.array(damage_interval_keys), failure_state_keys)
+        # index past the last damage interval stands for an undetermined state
+        failed = np.append(failed, False)
+
+        # samples after the first undetermined state are dropped
+        dropped = np.arange(num_samples) >= num_determined[:, np.newaxis]
+        fs_states = np.where(failed[ds_indices], 0, 1).astype(np.uint8)
+        fs_states[dropped] = SampleStates.MISSING
+        ds_states = ds_indices.astype(np.uint8)
+        ds_states[dropped] = SampleStates.MISSING
+
+        num_failed = np.count_nonzero(fs_states == 0, axis=1)
+        fp_results = []
+        for i, dmg in enumerate(damage):
+            fp_result = collections.OrderedDict()
+            fp_result["guid"] = dmg["guid"]
+            fp_result["failure_probability"] = (
+                num_failed[i] / num_determined[i] if num_determined[i] else np.nan
+            )
+            fp_results.append(fp_result)
+
+        # copying guid/id column to the sample damage failure table
+        if len(damage) > 0 and "guid" in damage[0].keys():
+            id_column = "guid"
+        else:
+            id_column = "id"
+        ids = [dmg.get(id_column, "NA") for dmg in damage]
+
+        fs_results = SampleStates(
+            ids, fs_states, SampleStates.FAILURE_LABELS, "failure", id_column
+        )
+        samples_results = SampleStates(
+            ids, ds_states, damage_interval_keys, "sample_damage_states", id_column
+        )
+
+        return fs_results, fp_results, samples_results
 
     def monte_carlo_failure_probability(
         self, dmg, damage_interval_keys, failure_state_keys, num_samples, seed
@@ -348,6 +396,73 @@ class MonteCarloLimitStateProbability(BaseAnalysis):
 
         return ds
 
+    def sample_damage_interval_batch(
+        self, damage, damage_interval_keys, num_samples, seeds
+    ):
+        """Vectorized sample_damage_interval for a chunk of entries. Each entry with a seed draws the same random
+        numbers as sample_damage_interval; entries without a seed share one unseeded generator.
+
+        Args:
+            damage (list): Damage results that contains dmg interval values.
+            damage_interval_keys (list): Keys of the damage states.
+            num_samples (int): Number of simulation.
+            seeds (list): Random number generator seed per entry for reproducibility.
+
+        Returns:
+            np.ndarray: (entries x samples) indices into damage_interval_keys of the sampled damage states.
+            np.ndarray: Number of leading samples with a determined damage state per entry.
+
+        """
+        # upper bounds of the damage intervals; a sample falls in the first interval whose bound exceeds it
+        bounds = np.empty((len(damage), len(damage_interval_keys)))
+        for i, dmg in enumerate(damage):
+            bounds[i] = self._cumulative_bounds(dmg, damage_interval_keys)
+
+        rnd_nums = np.empty((len(damage), num_samples))
+        generator = None
+        for i, seed in enumerate(seeds):
+            if seed is None:
+                if generator is None:
+                    generator = np.random.default_rng()
+                rnd_nums[i] = generator.random(num_samples)
+            else:
+                rnd_nums[i] = np.random.RandomState(seed).uniform(0, 1, num_samples)
+
+        ds_indices = np.empty((len(damage), num_samples), dtype=np.intp)
+        for i in range(len(damage)):
+            ds_indices[i] = np.searchsorted(bounds[i], rnd_nums[i], side="right")
+
+        # sampling stops at the first sample that falls outside all damage intervals
+        undetermined = ds_indices >= len(damage_interval_keys)
+        num_determined = np.where(
+            undetermined.any(axis=1), undetermined.argmax(axis=1), num_samples
+        )
+        if (num_determined < num_samples).any():
+            print("cannot determine MC damage state!")
+
+        return ds_indices, num_determined
+
+    @staticmethod
+    def _cumulative_bounds(dmg, damage_interval_keys):
+        """Upper bounds of the damage intervals of an entry as floats. A float random number is below a bound exactly
+        when it is below the decimal cumulative probability used by sample_damage_interval, and the running maximum
+        keeps the bounds sorted without changing which interval is hit first.
+        """
+        bounds = []
+        prob_val = 0
+        bound = 0.0
+        for ds_name in damage_interval_keys:
+            interval = AnalysisUtil.float_to_decimal(dmg[ds_name])
+            if isinstance(interval, Decimal):
+                prob_val += interval
+                bound = float(prob_val)
+                if Decimal(bound) < prob_val:
+                    bound = np.nextafter(bound, np.inf)
+            # a missing interval can't be sampled, it repeats the previous bound
+            bounds.append(bound)
+
+        return np.maximum.accumulate(bounds)
+
     def calc_probability_failure_value(self, ds_sample, failure_state_keys):
         """
         Lisa Wang's approach to calculate a single value of failure probability.
@@ -7,8 +7,6 @@
 
 """ Buried Pipeline Damage Analysis with limit state calculation """
 
-import concurrent.futures
-from itertools import repeat
 
 from pyincore import (
     BaseAnalysis,
@@ -58,56 +56,43 @@ class PipelineDamage(BaseAnalysis):
         num_workers = AnalysisUtil.determine_parallelism_locally(
             self, dataset_size, user_defined_cpu
         )
-        avg_bulk_input_size = int(dataset_size / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(pipeline_dataset)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (results, damage_results) = self.pipeline_damage_concurrent_future(
-            self.pipeline_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
-
-        self.set_result_csv_data(
-            "result", results, name=self.get_parameter("result_name")
-        )
-        self.set_result_json_data(
-            "metadata",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
-        )
-        return True
+        inventory_args = self.get_chunks(num_workers, list(pipeline_dataset))
 
-    def pipeline_damage_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
+        # Get Fragility key
+        fragility_key = self.get_parameter("fragility_key")
+        if fragility_key is None:
+            fragility_key = (
+                "Non-Retrofit inundationDepth Fragility ID Code"
+                if hazard_type == "tsunami"
+                else "pgv"
+            )
+            self.set_parameter("fragility_key", fragility_key)
 
-        Returns:
-            dict: An ordered dictionaries with pipeline damage values.
-            dict: An ordered dictionaries with other pipeline data/metadata.
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), [fragility_key]
+        )
 
-        """
-        output_ds = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.pipeline_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", self.get_parameter("result_name"), result_format),
+                (
+                    "metadata",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
+        )
 
-        return output_ds, output_dmg
+        return True
 
     def pipeline_damage_analysis_bulk_input(
         self, pipelines, hazard, hazard_type, hazard_dataset_id
@@ -131,15 +116,7 @@ class PipelineDamage(BaseAnalysis):
             for item in self.hazardsvc.get_allowed_demands(hazard_type)
         ]
 
-        # Get Fragility key
         fragility_key = self.get_parameter("fragility_key")
-        if fragility_key is None:
-            fragility_key = (
-                "Non-Retrofit inundationDepth Fragility ID Code"
-                if hazard_type == "tsunami"
-                else "pgv"
-            )
-            self.set_parameter("fragility_key", fragility_key)
 
         # get fragility set
         fragility_sets = self.fragilitysvc.match_inventory(
@@ -291,6 +268,19 @@ class PipelineDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                    "additional info is written as json.",
+                    "type": str,
+                },
                 {
                     "id": "liquefaction_geology_dataset_id",
                     "required": False,
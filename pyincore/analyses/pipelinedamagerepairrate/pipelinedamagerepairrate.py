@@ -9,9 +9,7 @@
 
 """
 
-import concurrent.futures
 import math
-from itertools import repeat
 
 from pyincore import (
     BaseAnalysis,
@@ -62,57 +60,56 @@ class PipelineDamageRepairRate(BaseAnalysis):
             self, dataset_size, user_defined_cpu
         )
 
-        avg_bulk_input_size = int(dataset_size / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(pipeline_dataset)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, damage_results) = self.pipeline_damage_concurrent_future(
-            self.pipeline_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
+        inventory_args = self.get_chunks(num_workers, list(pipeline_dataset))
+
+        # Get Fragility key
+        fragility_key = self.get_parameter("fragility_key")
+        if fragility_key is None:
+            fragility_key = (
+                PipelineUtil.DEFAULT_TSU_FRAGILITY_KEY
+                if hazard_type == "tsunami"
+                else PipelineUtil.DEFAULT_EQ_FRAGILITY_KEY
+            )
+            self.set_parameter("fragility_key", fragility_key)
 
-        self.set_result_csv_data(
-            "result", ds_results, name=self.get_parameter("result_name")
+        # liquefaction sets are matched when a geology dataset is given
+        fragility_keys = [fragility_key]
+        if (
+            hazard_type == "earthquake"
+            and self.get_parameter("liquefaction_geology_dataset_id") is not None
+        ):
+            liquefaction_fragility_key = self.get_parameter(
+                "liquefaction_fragility_key"
+            )
+            if liquefaction_fragility_key is None:
+                liquefaction_fragility_key = PipelineUtil.LIQ_FRAGILITY_KEY
+            fragility_keys.append(liquefaction_fragility_key)
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), fragility_keys
         )
-        self.set_result_json_data(
-            "metadata",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
+
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.pipeline_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", self.get_parameter("result_name"), result_format),
+                (
+                    "metadata",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
         )
 
         return True
 
-    def pipeline_damage_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of ordered dictionaries with building damage values and other data/metadata.
-
-        """
-        output_ds = []
-        output_dmg = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
-
-        return output_ds, output_dmg
-
     def pipeline_damage_analysis_bulk_input(
         self, pipelines, hazard, hazard_type, hazard_dataset_id
     ):
@@ -128,15 +125,7 @@ class PipelineDamageRepairRate(BaseAnalysis):
             ds_results (list): A list of ordered dictionaries with pipeline damage values and other data/metadata.
             damage_results (list): A list of ordered dictionaries with pipeline damage metadata.
         """
-        # Get Fragility key
         fragility_key = self.get_parameter("fragility_key")
-        if fragility_key is None:
-            fragility_key = (
-                PipelineUtil.DEFAULT_TSU_FRAGILITY_KEY
-                if hazard_type == "tsunami"
-                else PipelineUtil.DEFAULT_EQ_FRAGILITY_KEY
-            )
-            self.set_parameter("fragility_key", fragility_key)
 
         # get fragility set
         fragility_sets = self.fragilitysvc.match_inventory(
@@ -455,6 +444,19 @@ class PipelineDamageRepairRate(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                    "additional info is written as json.",
+                    "type": str,
+                },
                 {
                     "id": "liquefaction_geology_dataset_id",
                     "required": False,
@@ -9,7 +9,7 @@ import numpy as np
 import pandas as pd
 from scipy.stats import poisson, bernoulli
 
-from pyincore import BaseAnalysis
+from pyincore import BaseAnalysis, SampleStates
 
 
 class PipelineFunctionality(BaseAnalysis):
@@ -52,11 +52,14 @@ class PipelineFunctionality(BaseAnalysis):
         (fs_results, fp_results) = self.pipeline_functionality(
             pipeline_dmg_df, num_samples
         )
-        self.set_result_csv_data(
+        sample_state_format = self.get_parameter("sample_state_format")
+        if sample_state_format is None:
+            sample_state_format = "csv"
+        self.set_result_sample_states(
             "sample_failure_state",
             fs_results,
             name=self.get_parameter("result_name") + "_failure_state",
-            source="dataframe",
+            sample_format=sample_state_format,
         )
         self.set_result_csv_data(
             "failure_probability",
@@ -74,7 +77,7 @@ class PipelineFunctionality(BaseAnalysis):
             pipeline_dmg_df (dataframe): dataframe of pipeline damage values and other data/metadata
             num_samples (int): number of samples
         Returns:
-            fs_results (list): A list of dictionary with id/guid and failure state for N samples
+            fs_results (obj): SampleStates with the guid and failure state for N samples
             fp_results (list): A list dictionary with failure probability and other data/metadata.
 
         """
@@ -97,12 +100,9 @@ class PipelineFunctionality(BaseAnalysis):
         fp_results = fs_results.copy(deep=True)
 
         # calculate sample failure
-        # concatenate all columns into one failure column
-        fs_results["failure"] = fs_results.astype(str).apply(",".join, axis=1)
-        fs_results = fs_results.filter(["failure"])
-        # set guid column
-        fs_results.reset_index(inplace=True)
-        fs_results = fs_results.rename(columns={"index": "guid"})
+        fs_results = SampleStates(
+            fs_results.index, fs_results[sampcols].to_numpy(dtype=np.uint8)
+        )
 
         # calculate failure probability
         # count of 0s divided by sample size
@@ -139,6 +139,13 @@ class PipelineFunctionality(BaseAnalysis):
                     "description": "Number of Monte Carlo simulation samples.",
                     "type": int,
                 },
+                {
+                    "id": "sample_state_format",
+                    "required": False,
+                    "description": "Format of the sample failure state output, csv (default) or npy. npy writes a state matrix "
+                    "with a _index.json file next to it, read them with Dataset.get_sample_states.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
@@ -4,8 +4,6 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import concurrent.futures
-
 from pyincore import AnalysisUtil
 from pyincore import BaseAnalysis
 
@@ -48,17 +46,13 @@ class PipelineRepairCost(BaseAnalysis):
             self, len(pipeline_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(pipeline_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(pipeline_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
+        inventory_args = self.get_chunks(num_workers, list(pipeline_set))
 
-        repair_costs = self.pipeline_repair_cost_concurrent_future(
-            self.pipeline_repair_cost_bulk_input, num_workers, inventory_args
-        )
+        repair_costs = []
+        for ret in self.map_parallel(
+            self.pipeline_repair_cost_bulk_input, inventory_args, num_workers
+        ):
+            repair_costs.extend(ret)
         self.set_result_csv_data(
             "result",
             repair_costs,
@@ -67,28 +61,6 @@ class PipelineRepairCost(BaseAnalysis):
 
         return True
 
-    def pipeline_repair_cost_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of ordered dictionaries with pipeline repair cost values and other data/metadata.
-
-        """
-
-        output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1 in executor.map(function_name, *args):
-                output.extend(ret1)
-
-        return output
-
     def pipeline_repair_cost_bulk_input(self, pipelines):
         """Run analysis for multiple pipelines.
 
@@ -203,6 +175,12 @@ class PipelineRepairCost(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
                 {
                     "id": "diameter",
                     "required": False,
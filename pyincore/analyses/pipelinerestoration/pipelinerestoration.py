@@ -6,7 +6,6 @@
 
 
 import collections
-import concurrent.futures
 import pandas as pd
 
 from pyincore import BaseAnalysis, AnalysisUtil, RestorationService
@@ -46,6 +45,12 @@ class PipelineRestoration(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
                 {
                     "id": "num_available_workers",
                     "required": True,
@@ -110,18 +115,21 @@ class PipelineRestoration(BaseAnalysis):
             self, len(damage_result), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(damage_result) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = damage_result
-
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
+        inventory_args = self.get_chunks(num_workers, damage_result)
 
-        restoration_results = self.pipeline_restoration_concurrent_future(
-            self.pipeline_restoration_bulk_input, num_workers, inventory_args
+        restoration_key = self.get_parameter("restoration_key")
+        if restoration_key is None:
+            restoration_key = "Restoration ID Code"
+            self.set_parameter("restoration_key", restoration_key)
+        self.restorationsvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), [restoration_key]
         )
+
+        restoration_results = []
+        for ret in self.map_parallel(
+            self.pipeline_restoration_bulk_input, inventory_args, num_workers
+        ):
+            restoration_results.extend(ret)
         self.set_result_csv_data(
             "pipeline_restoration",
             restoration_results,
@@ -129,27 +137,6 @@ class PipelineRestoration(BaseAnalysis):
         )
         return True
 
-    def pipeline_restoration_concurrent_future(self, function_name, parallelism, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            parallelism (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of dictionary with restoration details
-
-        """
-        res_output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallelism
-        ) as executor:
-            for res_ret in executor.map(function_name, *args):
-                res_output.extend(res_ret)
-
-        return res_output
-
     def pipeline_restoration_bulk_input(self, damage):
         """Run analysis for pipeline restoration calculation
 
@@ -164,8 +151,6 @@ class PipelineRestoration(BaseAnalysis):
         num_available_workers = self.get_parameter("num_available_workers")
 
         restoration_key = self.get_parameter("restoration_key")
-        if restoration_key is None:
-            restoration_key = "Restoration ID Code"
 
         restoration_sets = self.restorationsvc.match_list_of_dicts(
             self.get_input_dataset("dfr3_mapping_set"), damage, restoration_key
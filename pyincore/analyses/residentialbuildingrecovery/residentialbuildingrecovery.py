@@ -51,9 +51,6 @@ class ResidentialBuildingRecovery(BaseAnalysis):
             bool: True if successful, False otherwise.
 
         """
-        # TODO: Start using seed
-        # seed = self.get_parameter("seed")
-
         num_samples = self.get_parameter("num_samples")
         result_name = self.get_parameter("result_name")
 
@@ -127,11 +124,13 @@ class ResidentialBuildingRecovery(BaseAnalysis):
             dict: dictionary with id/guid and residential recovery for each quarter
 
         """
+        # all sampling steps draw from one seeded generator so the results are reproducible
+        rng = np.random.default_rng(self.get_parameter("seed"))
 
         start_household_income_prediction = time.process_time()
         household_income_prediction = (
             ResidentialBuildingRecovery.household_income_prediction(
-                socio_demographic_data, num_samples
+                socio_demographic_data, num_samples, rng
             )
         )
         end_start_household_income_prediction = time.process_time()
@@ -155,7 +154,7 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         )
 
         financing_delay = ResidentialBuildingRecovery.financing_delay(
-            household_aggregation, financial_resources
+            household_aggregation, financial_resources, rng
         )
         end_financing_delay = time.process_time()
         print(
@@ -165,7 +164,7 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         )
 
         total_delay = ResidentialBuildingRecovery.total_delay(
-            sample_damage_states, redi_delay_factors, financing_delay
+            sample_damage_states, redi_delay_factors, financing_delay, rng
         )
         end_total_delay = time.process_time()
         print(
@@ -174,7 +173,7 @@ class ResidentialBuildingRecovery(BaseAnalysis):
             + " secs"
         )
 
-        recovery = self.recovery_rate(buildings, sample_damage_states, total_delay)
+        recovery = self.recovery_rate(buildings, sample_damage_states, total_delay, rng)
         end_recovery = time.process_time()
         print(
             "Finished executing recovery_rate() in "
@@ -202,24 +201,27 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         return total_delay, recovery, time_stepping_recovery
 
     @staticmethod
-    def household_income_prediction(income_groups, num_samples):
+    def household_income_prediction(income_groups, num_samples, rng=None):
         """Get Income group prediction for each household
 
         Args:
             income_groups (pd.DataFrame): Socio-demographic data with household income group prediction.
             num_samples (int): Number of sample scenarios.
+            rng (np.random.Generator): Random number generator, a new unseeded generator if not provided.
 
         Returns:
             pd.DataFrame: Income group prediction for each household
 
         """
+        if rng is None:
+            rng = np.random.default_rng()
 
         blockid = income_groups.groupby("blockid")
-        prediction_results = pd.DataFrame()
+        prediction_results = []
+        colnames = ["sample_{}".format(i) for i in range(num_samples)]
 
         for name, group in blockid:
             # Prepare data for numpy processing
-            group_size = group.shape[0]
             group_hhinc_values = group["hhinc"].values
 
             # Compute normal distribution parameters from group data
@@ -239,29 +241,33 @@ class ResidentialBuildingRecovery(BaseAnalysis):
             if np.isnan(std):
                 std = 0
             # Directly compute the indices of NaN values in the hhinc vector
-            group_nan_idx = np.where(np.isnan(group_hhinc_values))
-            number_nan = len(group_nan_idx[0])
-
-            # Now, generate a numpy matrix to hold the samples for the group
-            group_samples = np.zeros((num_samples, group_size))
-
-            for i in range(num_samples):
-                # Note to Lisa that this is not the appropriate distribution. Since this case is discrete,
-                # the natural choice is a Bernoulli distribution parameterized as to approximate the
-                # corresponding normal.
-                sample = np.random.normal(mean, std, number_nan)
-                sample[np.where(sample > 5)] = 5
-                sample[np.where(sample < 1)] = 1
-                group_samples[i, :] = group_hhinc_values
-                group_samples[i, group_nan_idx[0]] = np.around(sample)
-                # Now reassemble into Pandas DataFrame
-                group["sample_{}".format(i)] = group_samples[i, :]
-
-            prediction_results = pd.concat(
-                [prediction_results, group], ignore_index=True
+            group_nan_idx = np.where(np.isnan(group_hhinc_values))[0]
+
+            # Note to Lisa that this is not the appropriate distribution. Since this case is discrete,
+            # the natural choice is a Bernoulli distribution parameterized as to approximate the
+            # corresponding normal.
+            # All samples of the group are drawn at once, one row per sample
+            sample = rng.normal(mean, std, (num_samples, len(group_nan_idx)))
+            group_samples = np.tile(group_hhinc_values.astype(float), (num_samples, 1))
+            group_samples[:, group_nan_idx] = np.around(np.clip(sample, 1, 5))
+
+            # Now reassemble into Pandas DataFrame
+            prediction_results.append(
+                pd.concat(
+                    [
+                        group,
+                        pd.DataFrame(
+                            group_samples.T, columns=colnames, index=group.index
+                        ),
+                    ],
+                    axis=1,
+                )
             )
 
-        return prediction_results
+        if len(prediction_results) == 0:
+            return pd.DataFrame()
+
+        return pd.concat(prediction_results, ignore_index=True)
 
     @staticmethod
     def household_aggregation(household_income_predictions):
@@ -278,45 +284,24 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         household_income_predictions_dropped = household_income_predictions.drop(
             columns=["huid", "blockid", "hhinc"]
         )
-        guid_group = household_income_predictions_dropped.groupby("guid")
 
         # Obtain sample column names
         colnames = list(household_income_predictions_dropped.columns[1:])
 
-        # Iterate over all groups
-        new_groups = []
-
-        for name, group in guid_group:
-            # Obtain guids
-            local_guids = group["guid"]
-
-            # Remove guids
-            no_guids = group.drop(columns=["guid"]).to_numpy()
-
-            # Compute the maxima of all columns
-            maxima = list(no_guids.max(axis=0))
-
-            # Generate a matrix to store the results efficiently
-            num_guids = no_guids.shape[0]
-            num_cols = len(colnames)
-            no_guids_maxima = np.zeros((num_guids, num_cols))
-
-            for i in range(0, num_cols):
-                no_guids_maxima[:, i] = maxima[i]
-
-            group_new = pd.DataFrame(
-                no_guids_maxima, columns=colnames, index=group.index
-            )
-            group_new.insert(0, "guid", local_guids)
-            new_groups.append(group_new.head(1))
-
-        # Construct a new DataFrame
-        household_aggregation_results = pd.concat(new_groups).reset_index(drop=True)
+        # Every building takes the maximum income group of its households, per sample
+        household_aggregation_results = (
+            household_income_predictions_dropped.groupby("guid")[colnames]
+            .max()
+            .astype(float)
+            .reset_index()
+        )
 
         return household_aggregation_results
 
     @staticmethod
-    def financing_delay(household_aggregated_income_groups, financial_resources):
+    def financing_delay(
+        household_aggregated_income_groups, financial_resources, rng=None
+    ):
         """Gets financing delay, the percentages calculated are the probabilities of housing units financed by
         different resources.
 
@@ -324,50 +309,57 @@ class ResidentialBuildingRecovery(BaseAnalysis):
             household_aggregated_income_groups (pd.DataFrame): Household aggregation of income groups at the building
                 level.
             financial_resources (pd.DataFrame): Financial resources by household income groups.
+            rng (np.random.Generator): Random number generator, a new unseeded generator if not provided.
 
         Returns:
             pd.DataFrame: Results of financial delay
         """
+        if rng is None:
+            rng = np.random.default_rng()
+
         colnames = list(household_aggregated_income_groups.columns)[1:]
 
         # Save guid's for later
         household_guids = household_aggregated_income_groups["guid"]
 
         # Convert household aggregated income to numpy
-        samples_np = household_aggregated_income_groups.drop(
-            columns=["guid"]
-        ).to_numpy()
-
-        # Number of guids
-        num_households = household_guids.shape[0]
-        num_samples = len(colnames)
+        samples_np = (
+            household_aggregated_income_groups.drop(columns=["guid"])
+            .to_numpy()
+            .astype(float)
+        )
 
         # Convert the sample matrix to numpy
         resources_np = financial_resources.to_numpy()
 
         # Also, convert financial resources to numpy to perform linear algebra
         hhinc = resources_np[0:5, 0]
-        sources = resources_np[:, 1:]
+        sources = resources_np[:, 1:].astype(float)
 
         # Give names to mean and sigma indices
         mean_idx = 5
         sigma_idx = 6
 
-        for household in range(0, num_households):
-            for sample in range(0, num_samples):
-                value = samples_np[household, sample]
-                idx = np.where(hhinc == value)
+        # Row of the financial resources that matches the income group of every household and sample
+        hhinc_rows = ResidentialBuildingRecovery._lookup_rows(hhinc, samples_np)
 
-                # 1. Sample the lognormal distribution vectorially
-                lognormal_vec = np.random.lognormal(
-                    np.log(sources[mean_idx, :]), sources[sigma_idx, :]
-                )
+        # Households are processed in blocks so the (households x samples x sources) draws stay bounded
+        block_size = BuildingUtil.get_block_size(samples_np.shape[1] * sources.shape[1])
+        for start in range(0, samples_np.shape[0], block_size):
+            rows = hhinc_rows[start : start + block_size]
 
-                # 2. Compute the delay using the dot product of the prior vector and sources for the current index,
-                # round to one significant figure
-                samples_np[household, sample] = np.round(
-                    np.dot(lognormal_vec, sources[idx, :].flatten()), 1
-                )
+            # 1. Sample the lognormal distribution vectorially
+            lognormal = rng.lognormal(
+                np.log(sources[mean_idx, :]),
+                sources[sigma_idx, :],
+                rows.shape + (sources.shape[1],),
+            )
+
+            # 2. Compute the delay using the dot product of the prior vector and sources for the current index,
+            # round to one significant figure
+            samples_np[start : start + block_size] = np.round(
+                np.einsum("hsk,hsk->hs", lognormal, sources[rows]), 1
+            )
 
         financing_delay = pd.DataFrame(
             samples_np, columns=colnames, index=household_aggregated_income_groups.index
@@ -377,7 +369,9 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         return financing_delay
 
     @staticmethod
-    def total_delay(sample_damage_states, redi_delay_factors, financing_delay):
+    def total_delay(
+        sample_damage_states, redi_delay_factors, financing_delay, rng=None
+    ):
         """Calculates total delay by combining financial delay and other factors from REDi framework
 
         Args:
@@ -386,10 +380,13 @@ class ResidentialBuildingRecovery(BaseAnalysis):
                 and government permit based on building's damage state.
             financing_delay (pd.DataFrame): Financing delay, the percentages calculated are the probabilities of housing
                 units financed by different resources.
+            rng (np.random.Generator): Random number generator, a new unseeded generator if not provided.
 
         Returns:
             pd.DataFrame: Total delay time of financial delay and other factors from REDi framework.
         """
+        if rng is None:
+            rng = np.random.default_rng()
 
         # Obtain the column names
         colnames = list(financing_delay.columns)[1:]
@@ -400,30 +397,32 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         # Obtain the guids
         merged_delay_guids = merged_delay["guid"]
 
-        # Obtain the damage states
-        merged_delay_damage_states = merged_delay["sample_damage_states"]
-
         # Convert to numpy
-        samples_np = merged_delay.drop(
-            columns=["guid", "sample_damage_states"]
-        ).to_numpy()
+        samples_np = (
+            merged_delay.drop(columns=["guid", "sample_damage_states"])
+            .to_numpy()
+            .astype(float)
+        )
         num_samples = len(colnames)
 
-        # First, we decompose redi_delay_factors into two dictionaries that can be used to compute vector operations
+        # Damage state of every household and sample, as a row index into the delay factors
         redi_idx = dict(
             zip(
                 redi_delay_factors["Building_specific_conditions"],
-                redi_delay_factors.index,
+                range(len(redi_delay_factors)),
             )
         )
+        dmg_state_idx = BuildingUtil.get_sample_damage_states(
+            merged_delay, num_samples, lambda label: redi_idx[label]
+        )
 
         # Next, we produce two intermediate numpy matrices: one for med and one for sdv
         redi_med = redi_delay_factors[
             ["Ins_med", "Enmo_med", "Como_med", "Per_med"]
-        ].to_numpy()
+        ].to_numpy(dtype=float)
         redi_sdv = redi_delay_factors[
             ["Ins_sdv", "Enmo_sdv", "Como_sdv", "Per_sdv"]
-        ].to_numpy()
+        ].to_numpy(dtype=float)
 
         # Define indices to facilitate interpretation of the code
         inspection_idx = 0
@@ -431,40 +430,33 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         contractor_idx = 2
         permit_idx = 3
 
-        for i, ds_list in enumerate(list(merged_delay_damage_states)):
-            samples_mcs = ds_list.split(",")
-
-            for j in range(num_samples):
-                # TODO: ask why there are many more damage states than samples
-                # Obtain the index for the corresponding damage state
-                dmg_state_idx = redi_idx[samples_mcs[j]]
-
-                # Use the index to select the appropriate mean and stdev vectors
-                mean_vec = redi_med[dmg_state_idx, :]
-                sdv_vec = redi_sdv[dmg_state_idx, :]
-
-                # Compute the delay vector
-                delay_vec = np.random.lognormal(np.log(mean_vec), sdv_vec)
-
-                # Compute the delay using that vector and financing delays, already computed in the prior step
-                samples_np[i, j] = np.round(
-                    delay_vec[inspection_idx]
-                    + np.max(
-                        [
-                            delay_vec[engineer_idx],
-                            samples_np[i, j],
-                            delay_vec[contractor_idx],
-                        ]
-                    )
-                    + delay_vec[permit_idx]
+        # Households are processed in blocks so the (households x samples x factors) draws stay bounded
+        block_size = BuildingUtil.get_block_size(num_samples * 4)
+        for start in range(0, samples_np.shape[0], block_size):
+            rows = dmg_state_idx[start : start + block_size]
+
+            # Compute the delay vectors of the damage state of every sample
+            delay = rng.lognormal(np.log(redi_med[rows]), redi_sdv[rows])
+
+            # Compute the delay using that vector and financing delays, already computed in the prior step
+            samples_np[start : start + block_size] = np.round(
+                delay[..., inspection_idx]
+                + np.maximum(
+                    np.maximum(
+                        delay[..., engineer_idx],
+                        samples_np[start : start + block_size],
+                    ),
+                    delay[..., contractor_idx],
                 )
+                + delay[..., permit_idx]
+            )
 
         total_delay = pd.DataFrame(samples_np, columns=colnames)
         total_delay.insert(0, "guid", merged_delay_guids)
 
         return total_delay
 
-    def recovery_rate(self, buildings, sample_damage_states, total_delay):
+    def recovery_rate(self, buildings, sample_damage_states, total_delay, rng=None):
         """Gets total time required for each building to receive full restoration. Determined by the combination of
         delay time and repair time
 
@@ -472,10 +464,13 @@ class ResidentialBuildingRecovery(BaseAnalysis):
             buildings (list): List of buildings
             sample_damage_states (pd.DataFrame): Samples' damage states
             total_delay (pd.DataFrame): Total delay time of financial delay and other factors from REDi framework.
+            rng (np.random.Generator): Random number generator, a new unseeded generator if not provided.
 
         Returns:
             pd.DataFrame: Recovery rates of all buildings for each sample
         """
+        if rng is None:
+            rng = np.random.default_rng()
 
         repair_key = self.get_parameter("repair_key")
         repair_sets = self.repairsvc.match_inventory(
@@ -498,54 +493,28 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         # Obtain the guids
         merged_delay_guids = merged_delay["guid"]
 
-        # Obtain the damage states
-        merged_delay_damage_states = merged_delay["sample_damage_states"]
-
         # Convert to numpy
-        samples_np = merged_delay.drop(
-            columns=["guid", "sample_damage_states"]
-        ).to_numpy()
+        samples_np = (
+            merged_delay.drop(columns=["guid", "sample_damage_states"])
+            .to_numpy()
+            .astype(float)
+        )
         num_samples = len(colnames)
-        num_households = samples_np.shape[0]
-
-        # Generate a long numpy matrix for combined N1, N2 samples
-        samples_n1_n2 = np.zeros((num_households, num_samples * num_samples))
-
-        # Now, we define an internal function to take care of the index for the prior case
-        # Now, we define an internal function to take care of the index for the prior case
-        def idx(x, y):
-            return x * num_samples + y
-
-        for household in range(0, num_households):
-            # Obtain the damage states
-            mapped_repair = repair_sets_by_guid[merged_delay_guids.iloc[household]]
-            samples_mcs = merged_delay_damage_states.iloc[household].split(",")
-
-            # Use a lambda to obtain the damage state in numeric form. Note that since damage states are single digits,
-            # it suffices to look at the last character and convert into an integer value. Do this computation once
-            # per household only.
-            extract_ds = lambda x: int(x[-1])  # noqa: E731
-            samples_mcs_ds = list(map(extract_ds, samples_mcs))
-
-            # Now, perform the two nested loops, using the indexing function to simplify the syntax.
-            for i in range(0, num_samples):
-                state = samples_mcs_ds[i]
-                percent_func = np.random.random(num_samples)
-                # NOTE: Even though the kwarg name is "repair_time", it actually takes  percent of functionality. DFR3
-                # system currently doesn't have a way to represent the name correctly when calculating the inverse.
-                repair_time = (
-                    mapped_repair.repair_curves[state].solve_curve_for_inverse(
-                        hazard_values={},
-                        curve_parameters=mapped_repair.curve_parameters,
-                        **{"repair_time": percent_func},
-                    )
-                    / 7
-                )
 
-                for j in range(0, num_samples):
-                    samples_n1_n2[household, idx(i, j)] = round(
-                        samples_np[household, i] + repair_time[j], 1
-                    )
+        # Damage state in numeric form. Note that since damage states are single digits, it suffices to look at the
+        # last character of each label and convert it into an integer value.
+        samples_mcs_ds = BuildingUtil.get_sample_damage_states(
+            merged_delay, num_samples, lambda label: int(label[-1])
+        )
+
+        # N1 x N2 outer sum of delay and repair time, sample_{i}_{j} is delay sample i plus repair draw j of percent
+        # of functionality
+        samples_n1_n2 = BuildingUtil.get_recovery_times(
+            [repair_sets_by_guid[guid] for guid in merged_delay_guids],
+            samples_mcs_ds,
+            samples_np,
+            rng,
+        )
 
         # Now, generate all the labels using list comprehension outside the loops
         colnames = [
@@ -558,6 +527,20 @@ class ResidentialBuildingRecovery(BaseAnalysis):
 
         return recovery_time
 
+    @staticmethod
+    def _lookup_rows(keys, values):
+        """Index of the first entry of keys equal to each value."""
+        rows = np.full(values.shape, -1, dtype=np.intp)
+        for i, key in reversed(list(enumerate(keys))):
+            rows[values == key] = i
+        if np.any(rows < 0):
+            raise ValueError(
+                "Household income group {} is not in the financial resources.".format(
+                    values[rows < 0][0]
+                )
+            )
+        return rows
+
     @staticmethod
     def time_stepping_recovery(recovery_results):
         """Converts results to a time frame. Currently gives results for 16 quarters over 4 year.
@@ -588,13 +571,11 @@ class ResidentialBuildingRecovery(BaseAnalysis):
         # Generate a numpy to hold the results as desired
         times_np = np.full((num_households, num_times), 1111.0)
 
-        for household in range(0, num_households):
-            for i in range(len(total_time)):
-                fun_state = (
-                    np.count_nonzero(samples_n1_n2[household, :] < total_time[i])
-                    / num_samples
-                )
-                times_np[household, i] = np.round(fun_state, 2)
+        for i in range(num_times):
+            fun_state = (
+                np.count_nonzero(samples_n1_n2 < total_time[i], axis=1) / num_samples
+            )
+            times_np[:, i] = np.round(fun_state, 2)
 
         colnames = [f"quarter_{i}" for i in range(0, num_times)]
 
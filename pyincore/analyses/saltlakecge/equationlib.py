@@ -7,6 +7,7 @@ from copy import deepcopy
 import pandas as pd
 import operator as op
 import math
+from pyomo.environ import ConstraintList, Param, Var
 
 
 class VarContainer:
@@ -33,6 +34,9 @@ class VarContainer:
         self.nvars = 0
         self.LO = []
         self.UP = []
+        self.paramlist = {}
+        self.paramVals = []
+        self.nparams = 0
 
     def add(self, name, rows=None, cols=None):
         """
@@ -70,18 +74,65 @@ class VarContainer:
 
         return ExprM(self, name=name, rows=rows, cols=cols)
 
-    def set_value(self, name, values, target):
+    def add_param(self, name, values):
+        """
+        Add a parameter, a constant of the model whose values can be changed between solves
+        without rebuilding the model, e.g. the capital stock that is shocked in the simulations
+
+        :param name: Name of the parameter in GAMS
+        :param values: a pandas DataFrame, pandas Series, int or float with the parameter values
+        :return: an ExprM of the parameter to be used in the equations
+        """
+        rows = values.index.tolist() if isinstance(values, (pd.DataFrame, pd.Series)) else None
+        cols = values.columns.tolist() if isinstance(values, pd.DataFrame) else None
+        if rows is not None and cols is not None:
+            size = len(rows) * len(cols)
+            self.paramlist[name] = {'nrows': len(rows), 'ncols': len(cols), 'rows': rows, 'cols': cols,
+                                    'start': self.nparams, 'size': size}
+        elif rows is not None:
+            size = len(rows)
+            self.paramlist[name] = {'nrows': len(rows), 'rows': rows, 'start': self.nparams, 'size': size}
+        else:
+            size = 1
+            self.paramlist[name] = {'start': self.nparams, 'size': 1}
+
+        self.paramVals.extend([None] * size)
+        self.nparams += size
+        self.set_param(name, values)
+
+        return ExprM(self, name=name, rows=rows, cols=cols, param=True)
+
+    def set_param(self, name, values, model=None):
+        """
+        Set the values of a parameter, and of its Pyomo Params if the model is given
+
+        :param name: Name of the parameter in GAMS
+        :param values: a pandas DataFrame, pandas Series, int or float with the parameter values
+        :param model: a Pyomo model built by to_pyomo
+        :return: None
+        """
+        self.set_value(name, values, self.paramVals, self.getParamIndex)
+        if model is not None:
+            info = self.paramlist[name]
+            for i in range(info['start'], info['start'] + info['size']):
+                model.p[i] = self.paramVals[i]
+
+    def set_value(self, name, values, target, getIndex=None):
         """
         An internal method for setting the initial values or UPs and LOs for variables
 
         :param name: Name of the variable in GAMS
         :param value: a pandas DataFrame, pandas Series, int or float with initial values
         :param target: target array to be set
+        :param getIndex: index lookup of the target array, getIndex by default
 
         :return: None
         """
+        if getIndex is None:
+            getIndex = self.getIndex
+
         if type(values) == int or type(values) == float:
-            info = self.namelist[name]
+            info = self.namelist[name] if getIndex == self.getIndex else self.paramlist[name]
             if 'nrows' in info and 'ncols' in info:
                 values = pd.DataFrame(index=info['rows'], columns=info['cols']).fillna(values)
             elif 'nrows' in info and 'ncols' not in info:
@@ -92,13 +143,13 @@ class VarContainer:
             cols = values.columns.tolist()
             for i in rows:
                 for j in cols:
-                    target[self.getIndex(name, row=i, col=j)] = float(values.loc[i][j])
+                    target[getIndex(name, row=i, col=j)] = float(values.loc[i][j])
         elif type(values) == pd.Series:
             rows = values.index.tolist()
             for i in rows:
-                target[self.getIndex(name, row=i)] = float(values.loc[i])
+                target[getIndex(name, row=i)] = float(values.loc[i])
         else:
-            target[self.getIndex(name)] = values
+            target[getIndex(name)] = values
 
     def init(self, name, initialValue):
         """
@@ -139,7 +190,21 @@ class VarContainer:
         :param col: column label of the position you want to look up index for(if it has column labels)
         :return: the index of the position in the array
         """
-        info = self.namelist[name]
+        return self.getPosition(self.namelist[name], row, col)
+
+    def getParamIndex(self, name, row=None, col=None):
+        """
+        Look up the index of a parameter by providing the parameter name and label information
+
+        :param name: name of GAMS parameter you want to look up
+        :param row: row label of the position you want to look up index for(if it has row labels)
+        :param col: column label of the position you want to look up index for(if it has column labels)
+        :return: the index of the position in the parameter array
+        """
+        return self.getPosition(self.paramlist[name], row, col)
+
+    @staticmethod
+    def getPosition(info, row=None, col=None):
         result = info['start']
         if row is not None and col is not None:
             result += info['rows'].index(row) * info['ncols'] + info['cols'].index(col)
@@ -260,6 +325,24 @@ class VarContainer:
                 f.write('model.x' + str(i) + ' = Var(bounds=(' + str(lower) + ',' + str(upper) + '),initialize=' +
                         str(value) + ')' + '\n')
 
+            if self.nparams > 0:
+                f.write('model.p = Param(range(' + str(self.nparams) + '), mutable=True, initialize='
+                        + str(dict(enumerate(self.paramVals))) + ')\n')
+
+    def to_pyomo(self, model):
+        """
+          Add the variables and parameters to a Pyomo model as the indexed components model.x and model.p,
+          and an empty constraint list model.equality for the equations
+
+          :param model: a Pyomo ConcreteModel
+          :return: None
+        """
+        lower = [-1e20 if i is None else i for i in self.LO]
+        upper = [1e20 if i is None else i for i in self.UP]
+        value = [0 if math.isnan(i) else i for i in self.initialVals]
+        model.x = Var(range(self.nvars), bounds=lambda m, i: (lower[i], upper[i]), initialize=lambda m, i: value[i])
+        model.p = Param(range(self.nparams), mutable=True, initialize=lambda m, i: self.paramVals[i])
+        model.equality = ConstraintList()
 
 class variable:
     """
@@ -295,6 +378,27 @@ class variable:
     def debug_test_str(self):
         return 'x[' + str(self.index) + ']'
 
+    def to_pyomo(self, model):
+        return model.x[self.index]
+
+
+class Parameter(variable):
+    """
+      A GAMS parameter, initialized by given the GAMS parameter and its label
+    """
+
+    def __init__(self, vars, name, row=None, col=None):
+        self.index = vars.getParamIndex(name, row, col)
+
+    def __str__(self):
+        return 'model.p[' + str(self.index) + ']'
+
+    def debug_test_str(self):
+        return 'p[' + str(self.index) + ']'
+
+    def to_pyomo(self, model):
+        return model.p[self.index]
+
 
 class ExprItem:
     '''
@@ -304,7 +408,7 @@ class ExprItem:
     def __init__(self, v, const=1):
         self.varList = []
         self.const = const
-        if type(v) == variable:
+        if isinstance(v, variable):
             self.varList.append(v)
         elif type(v) == int or type(v) == float:
             self.const = v
@@ -322,7 +426,7 @@ class ExprItem:
         copy = ExprItem(self)
         if type(rhs) == int or type(rhs) == float:
             copy.const = copy.const * rhs
-        elif type(rhs) == variable:
+        elif isinstance(rhs, variable):
             copy.varList.append(rhs)
         elif type(rhs) == ExprItem:
             copy.const *= rhs.const
@@ -360,6 +464,12 @@ class ExprItem:
             result += "*" + self.varList[i].debug_test_str()
         return result
 
+    def to_pyomo(self, model):
+        result = self.const
+        for v in self.varList:
+            result = result * v.to_pyomo(model)
+        return result
+
     def is_empty(self):
         if abs(self.const) < 0.00000001:
             return True
@@ -378,7 +488,7 @@ class Expr:
     def __init__(self, item):
         self.itemList = []
         self.isComposite = False
-        if type(item) == ExprItem or type(item) == variable or type(item) == int or type(item) == float:
+        if type(item) == ExprItem or isinstance(item, variable) or type(item) == int or type(item) == float:
             self.itemList.append(ExprItem(item))
         elif type(item) == Expr:
             self.itemList = [
@@ -418,7 +528,7 @@ class Expr:
             else:
                 rhscopy = Expr(rhs)
                 copy.itemList = copy.itemList + rhscopy.itemList
-        elif type(rhs) == ExprItem or type(rhs) == int or type(rhs) == float or type(rhs) == variable:
+        elif type(rhs) == ExprItem or type(rhs) == int or type(rhs) == float or isinstance(rhs, variable):
             copy.itemList.append(ExprItem(rhs))
         return copy
 
@@ -536,6 +646,24 @@ class Expr:
                 result = "(" + result + ")"
         return result
 
+    def to_pyomo(self, model):
+        """
+          Build the Pyomo expression of the Expr, the same expression as exec-ing its string
+
+          :param model: a Pyomo model built by VarContainer.to_pyomo
+          :return: Pyomo expression
+        """
+        if self.isComposite:
+            if self.operator == '/':
+                return self.first.to_pyomo(model) / self.second.to_pyomo(model)
+            return self.first.to_pyomo(model) ** self.second.to_pyomo(model)
+        if len(self.itemList) == 0:
+            return 0
+        result = self.itemList[0].to_pyomo(model)
+        for i in self.itemList[1:]:
+            result = result + i.to_pyomo(model)
+        return result
+
     def is_empty(self):
         if not self.isComposite and len(self.itemList) == 0:
             return True
@@ -569,14 +697,19 @@ class ExprM:
     2. Give it a pandas Series or DataFrame, it will create the Expression matrix
       with the content in the Series or DataFrame as constants
     3. Give it a ExprMatrix, will return a deep copy of it
+    With param set to True, the first way creates the Expression matrix from a parameter
+      added by VarContainer.add_param instead
     """
-    def __init__(self, vars, name=None, rows=None, cols=None, m=None, em=None):
+    def __init__(self, vars, name=None, rows=None, cols=None, m=None, em=None, param=False):
         self.vars = vars
         self.hasCondition = False
         if em is None:
             # if these are the variables, we need to create an Expression by the variable name
             if name is not None:
-                if self.vars.inList(name):
+                leaf = Parameter if param else variable
+                if param:
+                    self.info = deepcopy(self.vars.paramlist[name])
+                elif self.vars.inList(name):
                     self.info = deepcopy(self.vars.getInfo(name))
                 else:
                     print("Can't find this variable in the all variable list")
@@ -591,11 +724,11 @@ class ExprM:
                     self.info['height'] = len(rows)
 
                 if cols is not None:  # if it is a DataFrame
-                    self.m = [[Expr(variable(self.vars, name, i, j)) for j in cols] for i in rows]
+                    self.m = [[Expr(leaf(self.vars, name, i, j)) for j in cols] for i in rows]
                 elif rows is not None:  # if it is a Series
-                    self.m = [[Expr(variable(self.vars, name, i))] for i in rows]
+                    self.m = [[Expr(leaf(self.vars, name, i))] for i in rows]
                 else:  # if it is a variable
-                    self.m = [[Expr(variable(self.vars, name))]]
+                    self.m = [[Expr(leaf(self.vars, name))]]
 
             # otherwise these are just constants
             else:
@@ -842,9 +975,21 @@ class ExprM:
                     count[0] += 1
         f.close()
 
+    def to_pyomo(self, model):
+        """
+          Add the equations to the constraint list model.equality of a model built by VarContainer.to_pyomo
+
+          :param model: a Pyomo ConcreteModel
+          :return: None
+        """
+        for i in range(self.info['height']):
+            for j in range(self.info['width']):
+                if not self.hasCondition or self.hasCondition and self.mark[i][j]:
+                    model.equality.add(self.m[i][j].to_pyomo(model) == 0)
+
     def test(self, x):
         for i in range(self.info['height']):
             for j in range(self.info['width']):
                 if not self.hasCondition or self.hasCondition and self.mark[i][j]:
-                    fun = lambda x: eval(self.m[i][j].debug_test_str())
+                    fun = lambda x, p=self.vars.paramVals: eval(self.m[i][j].debug_test_str())
                     print(i, j, fun(x))
@@ -8,6 +8,7 @@
 import os
 from pyincore import globals as pyglobals
 from pyincore import BaseAnalysis
+from pyincore.utils.cgebatchrunner import CGEBatchRunner
 from pyincore.analyses.saltlakecge.equationlib import *
 from pyincore.analyses.saltlakecge.outputfunctions import *
 from pyincore.analyses.saltlakecge.saltlakeoutput import gams_to_dataframes
@@ -58,6 +59,15 @@ class SaltLakeCGEModel(BaseAnalysis):
         OUTCR = pd.read_csv(self.get_input_dataset("OUTCR").get_file_path('csv'), index_col=0)
         sector_shocks = pd.read_csv(self.get_input_dataset("sector_shocks").get_file_path('csv'), index_col=0)
 
+        # several shock columns are solved as a batch of scenarios
+        scenarios = CGEBatchRunner.get_scenarios(sector_shocks)
+        if len(scenarios) > 1:
+            data = {"SAM": SAM, "BB": BB, "JOBCR": JOBCR, "MISCH": MISCH, "EMPLOY": EMPLOY, "OUTCR": OUTCR}
+            scenarios = [(name, shocks.set_index("sector")) for name, shocks in scenarios]
+            num_cpu = self.get_parameter("num_cpu")
+            return CGEBatchRunner.run(self, data, scenarios, "scenario-results", "scenario-results",
+                                      num_cpu if num_cpu is not None else 0, self.get_result_formats()[0])
+
         self.salt_lake_city_cge(iNum, SAM, BB, JOBCR, MISCH, EMPLOY, OUTCR, sector_shocks)
 
     def salt_lake_city_cge(self, iNum, SAM, BB, JOBCR, MISCH, EMPLOY, OUTCR, sector_shocks):
@@ -76,6 +86,30 @@ class SaltLakeCGEModel(BaseAnalysis):
         Returns:
 
         """
+        simulate = self.build_simulation({"SAM": SAM, "BB": BB, "JOBCR": JOBCR, "MISCH": MISCH, "EMPLOY": EMPLOY,
+                                          "OUTCR": OUTCR})
+        outputs = simulate(sector_shocks)
+        for result_id, output in outputs.items():
+            self.set_result_csv_data(result_id, output, name=result_id, source="dataframe", index=True)
+
+    def build_simulation(self, data, require_optimal=True):
+        """Calibrate the model and build it once.
+
+        Args:
+            data (dict): SAM, BB, JOBCR, MISCH, EMPLOY and OUTCR DataFrames by input dataset id.
+            require_optimal (bool): Always true here, a scenario the solver does not solve to optimality raises a
+                ValueError.
+
+        Returns:
+            function: Solves one capital stock shock scenario, see simulate.
+
+        """
+        SAM = data["SAM"]
+        BB = data["BB"]
+        JOBCR = data["JOBCR"]
+        MISCH = data["MISCH"]
+        EMPLOY = data["EMPLOY"]
+        OUTCR = data["OUTCR"]
 
         def _(x):
             return ExprM(vars, m=x)
@@ -1151,21 +1185,14 @@ class SaltLakeCGEModel(BaseAnalysis):
         vars.lo('N', 0)
         vars.lo('CN', 0)
 
-        def set_variable(filname):
-
-            # clear the file before write the variables
-            with open(filename, 'w') as f:
-                f.write("")
-
-            vars.write(filename)
+        # the capital stock is shocked in the simulations, keep it a mutable parameter of the model
+        KSP = vars.add_param('KS0', KS0.loc[K, IG])
 
         # -------------------------------------------------------------------------------------------------------------
         # DEFINE EQUATIONS AND SET CONDITIONS
         # -------------------------------------------------------------------------------------------------------------
 
-        def set_equation(filename):
-
-            count = [0]
+        def set_equation(model):
 
             #   CPIEQ(H)..
             #   CPI(H)=E=
@@ -1177,7 +1204,7 @@ class SaltLakeCGEModel(BaseAnalysis):
 
             CPIEQ = (line1 / line2 - ~CPI.loc(H))
             print(CPIEQ.test(vars.initialVals))
-            CPIEQ.write(count, filename)
+            CPIEQ.to_pyomo(model)
 
             # YEQ(H).. Y(H) =E= SUM(L,  A(H,L) * HW(H) / SUM(H1, A(H1,L) * HW(H1) ) * (Y(L)-(CMIWAGE(L)*CMI(L))) * ( 1 - SUM(G, TAUFL(G,L))))
             #                + SUM(CM, A(H,CM)*(CMOWAGE(CM)*CMO(CM)))
@@ -1193,7 +1220,7 @@ class SaltLakeCGEModel(BaseAnalysis):
 
             YEQ = ((line1 + line2 + line4) - Y.loc(H))
             print(YEQ.test(vars.initialVals))
-            YEQ.write(count, filename)
+            YEQ.to_pyomo(model)
             # print(YEQ)
 
             #  YDEQ(H).. YD(H)          =E=   Y(H) + (PRIVRET(H) * HH(H))
@@ -1207,7 +1234,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line4 = ~(ExprM(vars, m=TAUH.loc[G, H]) * HH.loc(H)).sum(G)
 
             YDEQ = ((line1 + line2 - line3 - line4) - YD.loc(H))
-            YDEQ.write(count, filename)
+            YDEQ.to_pyomo(model)
             print(YDEQ.test(vars.initialVals))
             # print(YDEQ)
 
@@ -1224,7 +1251,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                 0)
 
             CHEQ = ((line1 * line2) - CH.loc(I, H))
-            CHEQ.write(count, filename)
+            CHEQ.to_pyomo(model)
             print(CHEQ.test(vars.initialVals))
             # print(CHEQ)
 
@@ -1233,7 +1260,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = YD.loc(H) - ~((P.loc(I) * CH.loc(I, H) * ExprM(vars, m=1 + TAUC.loc[GS, I].sum(0))).sum(I))
 
             SHEQ = (line - S.loc(H))
-            SHEQ.write(count, filename)
+            SHEQ.to_pyomo(model)
             print(SHEQ.test(vars.initialVals))
             # print(SHEQ)
 
@@ -1243,7 +1270,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                 (ExprM(vars, m=AD.loc[J, I]) * P.loc(J) * ExprM(vars, m=1 + TAUQ.loc[GS, J].sum(0))).sum(0))
 
             PVAEQ = (line - PVA.loc(I))
-            PVAEQ.write(count, filename)
+            PVAEQ.to_pyomo(model)
             print(PVAEQ.test(vars.initialVals))
             # print(PVAEQ)
 
@@ -1267,7 +1294,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                                                                                                                       I])
 
             PFEQ = (line - DS.loc(I))
-            PFEQ.write(count, filename)
+            PFEQ.to_pyomo(model)
             print(PFEQ.test(vars.initialVals))
             # print(PFEQ)
 
@@ -1296,7 +1323,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             FDEQ.setCondition(FD0.loc[F, I], 'INEQ', 0)
 
             # FDEQ.test(vars.initialVals)
-            FDEQ.write(count, filename)
+            FDEQ.to_pyomo(model)
             print(FDEQ.test(vars.initialVals))
             # print(FDEQ)
 
@@ -1305,7 +1332,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = (ExprM(vars, m=AD.loc[I, J]) * ~DS.loc(J)).sum(1)
 
             VEQ = (line - V.loc(I))
-            VEQ.write(count, filename)
+            VEQ.to_pyomo(model)
             print(VEQ.test(vars.initialVals))
             # print(VEQ)
 
@@ -1314,7 +1341,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = (R.loc(F, IG) * RA.loc(F) * FD.loc(F, IG)).sum(IG)
 
             YFEQL = (line - Y.loc(F))
-            YFEQL.write(count, filename)
+            YFEQL.to_pyomo(model)
             print(YFEQL.test(vars.initialVals))
             # print(YFEQL)
 
@@ -1323,7 +1350,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = (R.loc(['KAP'], IG) * RA.loc(['KAP']) * FD.loc(['KAP'], IG)).sum(IG)
 
             YFEQK = (line - Y.loc(['KAP']))
-            YFEQK.write(count, filename)
+            YFEQK.to_pyomo(model)
             print(YFEQK.test(vars.initialVals))
             # print(YFEQK)
 
@@ -1350,7 +1377,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = ExprM(vars, m=KFOR.loc[K]) * Y.loc(K)
 
             KAPFOR = (line - KPFOR.loc(K))
-            KAPFOR.write(count, filename)
+            KAPFOR.to_pyomo(model)
             print(KAPFOR.test(vars.initialVals))
             # print(KAPFOR)
 
@@ -1361,7 +1388,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             PW0.loc[I] * (1 + TAUQ.loc[GS, I].sum(0)))) ** ExprM(vars, m=ETAE.loc[I])
 
             XEQ = (line - CX.loc(I))
-            XEQ.write(count, filename)
+            XEQ.to_pyomo(model)
             print(XEQ.test(vars.initialVals))
             # print(XEQ)
 
@@ -1372,7 +1399,7 @@ class SaltLakeCGEModel(BaseAnalysis):
 
             DEQ = (line - D.loc(I))
             #  DEQ.setCondition(PWM0.loc[I])
-            DEQ.write(count, filename)
+            DEQ.to_pyomo(model)
             print(DEQ.test(vars.initialVals))
             # print(DEQ)
 
@@ -1381,7 +1408,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = (D.loc(I) * PD.loc(I) + (1 - D.loc(I)) * ExprM(vars, m=PWM0.loc[I]))
 
             PEQ = (line - P.loc(I))
-            PEQ.write(count, filename)
+            PEQ.to_pyomo(model)
             print(PEQ.test(vars.initialVals))
             # print(PEQ)
 
@@ -1390,7 +1417,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = (1 - D.loc(I)) * DD.loc(I)
 
             MEQ = (line - M.loc(I))
-            MEQ.write(count, filename)
+            MEQ.to_pyomo(model)
             print(MEQ.test(vars.initialVals))
             # print(MEQ)
 
@@ -1412,7 +1439,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line8 = (ExprM(vars, m=CMIWAGE.loc[L]) * CMI.loc(L)).sum(L)
 
             NKIEQ = ((line1 - line2 - line3 - line5 - line6 - line7 + line8) - NKI)
-            NKIEQ.write(count, filename)
+            NKIEQ.to_pyomo(model)
             print(NKIEQ.test(vars.initialVals))
             # print(NKIEQ)
 
@@ -1422,7 +1449,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                                                                                                                   K, I] * 0.1)
 
             NEQ = (line - N.loc(K, I))
-            NEQ.write(count, filename)
+            NEQ.to_pyomo(model)
             print(NEQ.test(vars.initialVals))
             # print(NEQ)
 
@@ -1433,16 +1460,16 @@ class SaltLakeCGEModel(BaseAnalysis):
             right = (ExprM(vars, m=B.loc[I, IG]) * N.loc(K, IG).sum(K)).sum(IG)
 
             CNEQ = (right - left)
-            CNEQ.write(count, filename)
+            CNEQ.to_pyomo(model)
             print(CNEQ.test(vars.initialVals))
             # print(CNEQ)
 
             #  KSEQ(K,IG).. KS(K,IG)    =E= KS0(K,IG) * ( 1 - DEPR) + N(K,IG) ;
             print('KSEQ(K,IG)')
-            line = ExprM(vars, m=KS0.loc[K, IG] * (1 - DEPR)) + N.loc(K, IG)
+            line = KSP.loc(K, IG) * (1 - DEPR) + N.loc(K, IG)
 
             KSEQ = (line - KS.loc(K, IG))
-            KSEQ.write(count, filename)
+            KSEQ.to_pyomo(model)
             print(KSEQ.test(vars.initialVals))
             # print(KSEQ)
 
@@ -1470,7 +1497,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                                 ExprM(vars, m=TAUH.loc[G, H]) * HH.loc(H)).sum(G))) ** ExprM(vars, m=ETAPIT.loc[H])
 
             LSEQ1 = ((line1 * line2 * line3 * line4) - HW.loc(H) / HH.loc(H))
-            LSEQ1.write(count, filename)
+            LSEQ1.to_pyomo(model)
             print(LSEQ1.test(vars.initialVals))
             # print(LSEQ1)
 
@@ -1480,7 +1507,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                         (ExprM(vars, m=EXWGEO.loc[CM1].sum(0)) / RA.loc(FW1)) ** (ExprM(vars, m=ECOMO.loc[CM1])))
 
             LSEQ2A = (line - CMO.loc(CM1))
-            LSEQ2A.write(count, filename)
+            LSEQ2A.to_pyomo(model)
             print(LSEQ2A.test(vars.initialVals))
             # print(LSEQ2A)
 
@@ -1490,7 +1517,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                         (ExprM(vars, m=EXWGEO.loc[CM2].sum(0)) / RA.loc(FW2)) ** (ExprM(vars, m=ECOMO.loc[CM2])))
 
             LSEQ2B = (line - CMO.loc(CM2))
-            LSEQ2B.write(count, filename)
+            LSEQ2B.to_pyomo(model)
             print(LSEQ2B.test(vars.initialVals))
             # print(LSEQ2B)
 
@@ -1500,7 +1527,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                         (ExprM(vars, m=EXWGEO.loc[CM3].sum(0)) / RA.loc(FW3)) ** (ExprM(vars, m=ECOMO.loc[CM3])))
 
             LSEQ2C = (line - CMO.loc(CM3))
-            LSEQ2C.write(count, filename)
+            LSEQ2C.to_pyomo(model)
             print(LSEQ2C.test(vars.initialVals))
             # print(LSEQ2C)
 
@@ -1510,7 +1537,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                         (ExprM(vars, m=EXWGEO.loc[CM4].sum(0)) / RA.loc(FW4)) ** (ExprM(vars, m=ECOMO.loc[CM4])))
 
             LSEQ2D = (line - CMO.loc(CM4))
-            LSEQ2D.write(count, filename)
+            LSEQ2D.to_pyomo(model)
             print(LSEQ2D.test(vars.initialVals))
             # print(LSEQ2D)
 
@@ -1519,7 +1546,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = ExprM(vars, m=CMI0.loc[L]) * ((RA.loc(L) / (CPI.loc(H).sum(H) / 8)) ** (ExprM(vars, m=ECOMI.loc[L])))
 
             LSEQ3 = (line - CMI.loc(L))
-            LSEQ3.write(count, filename)
+            LSEQ3.to_pyomo(model)
             print(LSEQ3.test(vars.initialVals))
             # print(LSEQ3)
 
@@ -1548,7 +1575,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line5 = (ExprM(vars, m=HN0.loc[H] / HH0.loc[H]) / (HN.loc(H) / HH.loc(H))) ** ExprM(vars, m=ETAU.loc[H])
 
             POPEQ = (line1 + line2 * line3 - line4 * line5 - HH.loc(H))
-            POPEQ.write(count, filename)
+            POPEQ.to_pyomo(model)
             print(POPEQ.test(vars.initialVals))
             # print(POPEQ)
 
@@ -1557,7 +1584,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = HH.loc(H) - HW.loc(H)
 
             ANEQ = (line - HN.loc(H))
-            ANEQ.write(count, filename)
+            ANEQ.to_pyomo(model)
             print(ANEQ.test(vars.initialVals))
             # print(ANEQ)
 
@@ -1609,7 +1636,7 @@ class SaltLakeCGEModel(BaseAnalysis):
 
             YGEQ = ((line1 + line2 + line3 + line4 + line5 + line6 + line7 + line8 + line9 + line10 + line11) - Y.loc(
                 GX))
-            YGEQ.write(count, filename)
+            YGEQ.to_pyomo(model)
             print(YGEQ.test(vars.initialVals))
             # print(YGEQ)
 
@@ -1617,7 +1644,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             print('YGEQ2')
             line = IGT.loc(GT, GX).sum(GX)
             YGEQ2 = (line - Y.loc(GT))
-            YGEQ2.write(count, filename)
+            YGEQ2.to_pyomo(model)
             print(YGEQ2.test(vars.initialVals))
             # print(YGEQ2)
 
@@ -1625,7 +1652,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             print('YGEQL(GNL)')
             line = ExprM(vars, m=TAXS1.loc[GNL]) * Y.loc(['CYGF'])
             YGEQ1 = (line - Y.loc(GNL))
-            YGEQ1.write(count, filename)
+            YGEQ1.to_pyomo(model)
             print(YGEQ1.test(vars.initialVals))
             # print(YGEQ1)
 
@@ -1634,7 +1661,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line = ExprM(vars, m=GFOR.loc[G]) * Y.loc(G)
 
             GOVFOR = (line - GVFOR.loc(G))
-            GOVFOR.write(count, filename)
+            GOVFOR.to_pyomo(model)
             print(GOVFOR.test(vars.initialVals))
             # print(GOVFOR)
 
@@ -1645,7 +1672,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             right = ExprM(vars, m=AG.loc[I, GN]) * (Y.loc(GN) + ExprM(vars, m=GFOR.loc[GN]) * Y.loc(GN))
 
             CGEQ = (right - left)
-            CGEQ.write(count, filename)
+            CGEQ.to_pyomo(model)
             print(CGEQ.test(vars.initialVals))
             # print(CGEQ)
 
@@ -1656,7 +1683,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             right = ExprM(vars, m=AG.loc[F, GN]) * (Y.loc(GN) + ExprM(vars, m=GFOR.loc[GN]) * Y.loc(GN))
 
             GFEQ = left - right
-            GFEQ.write(count, filename)
+            GFEQ.to_pyomo(model)
             print(GFEQ.test(vars.initialVals))
             # print(GFEQ)
 
@@ -1669,7 +1696,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line3 = (FD.loc(F, GN) * R.loc(F, GN) * RA.loc(F) * (1 + ExprM(vars, m=TAUFX_SUM.loc[F, GN]))).sum(F)
 
             GSEQL = ((line1 - ~line2 - ~line3) - S.loc(GN))
-            GSEQL.write(count, filename)
+            GSEQL.to_pyomo(model)
             print(GSEQL.test(vars.initialVals))
             # print(GSEQL)
 
@@ -1680,7 +1707,7 @@ class SaltLakeCGEModel(BaseAnalysis):
             line3 = IGT.loc(G, GX).sum(G)
 
             GSEQ = ((line1 - ~line2 - ~line3) - S.loc(GX))
-            GSEQ.write(count, filename)
+            GSEQ.to_pyomo(model)
             print(GSEQ.test(vars.initialVals))
             # print(GSEQ)
 
@@ -1692,7 +1719,7 @@ class SaltLakeCGEModel(BaseAnalysis):
 
             TDEQ = line - IGT.loc(G, GX)
             TDEQ.setCondition(IGTD.loc[G, GX], 'EQ', 1)
-            TDEQ.write(count, filename)
+            TDEQ.to_pyomo(model)
             print(TDEQ.test(vars.initialVals))
             # print(TDEQ)
 
@@ -1702,7 +1729,7 @@ class SaltLakeCGEModel(BaseAnalysis):
                         ExprM(vars, m=PRIVRET.loc[H]) * HH.loc(H)).sum(H)
 
             SPIEQ = (line - SPI)
-            SPIEQ.write(count, filename)
+            SPIEQ.to_pyomo(model)
             print(SPIEQ.test(vars.initialVals))
             # print(SPIEQ)
 
@@ -1713,14 +1740,14 @@ class SaltLakeCGEModel(BaseAnalysis):
             # right = FD.loc(['L1'], Z).sum(Z) + CMO.loc(CM1).sum(CM1)
 
             LMEQ1 = (right - left)
-            LMEQ1.write(count, filename)
+            LMEQ1.to_pyomo(model)
             print(LMEQ1.test(vars.initialVals))
             # print(LMEQ1)
 
             #  KMEQ(K,IG).. KS(K,IG)    =E= FD(K,IG);
             print('KMEQ(K,IG)')
             KMEQ = (FD.loc(K, IG) - KS.loc(K, IG))
-            KMEQ.write(count, filename)
+            KMEQ.to_pyomo(model)
             print(KMEQ.test(vars.initialVals))
             # print(KMEQ)
 
@@ -1734,14 +1761,14 @@ class SaltLakeCGEModel(BaseAnalysis):
             #  GMEQ(I).. DS(I)          =E= DD(I) + CX(I) - M(I);
             print('GMEQ(I)')
             GMEQ = (DD.loc(I) + CX.loc(I) - M.loc(I) - DS.loc(I))
-            GMEQ.write(count, filename)
+            GMEQ.to_pyomo(model)
             print(GMEQ.test(vars.initialVals))
             # print(GMEQ)
 
             #  DDEQ(I).. DD(I)          =E= V(I) + SUM(H, CH(I,H) ) + SUM(G, CG(I,G) ) + CN(I);
             print('DDEQ(I)')
             DDEQ = (V.loc(I) + CH.loc(I, H).sum(H) + CG.loc(I, G).sum(G) + CN.loc(I) - DD.loc(I))
-            DDEQ.write(count, filename)
+            DDEQ.to_pyomo(model)
             print(DDEQ.test(vars.initialVals))
             # print(DDEQ)
 
@@ -1749,20 +1776,20 @@ class SaltLakeCGEModel(BaseAnalysis):
             print('IGT.FX(G,GX)$(NOT IGT0(G,GX))=0')
             FX1 = IGT.loc(G, GX)
             FX1.setCondition(IGT0.loc[G, GX], 'EQ', 0)
-            FX1.write(count, filename)
+            FX1.to_pyomo(model)
             # print(FX1)
 
             # IGT.FX(G,GX)$(IGTD(G,GX) EQ 2)=IGT0(G,GX);
             print('IGT.FX(G,GX)$(IGTD(G,GX) EQ 2)=IGT0(G,GX)')
             FX2 = IGT.loc(G, GX) - ExprM(vars, m=IGT0.loc[G, GX])
             FX2.setCondition(IGTD.loc[G, GX], 'EQ', 2)
-            FX2.write(count, filename)
+            FX2.to_pyomo(model)
             # print(FX2)
 
             # R.FX(L,Z)=R0(L,Z);
             print('R.FX(L,Z)=R0(L,Z)')
             FX3 = R.loc(L, Z) - ExprM(vars, m=R0.loc[L, Z])
-            FX3.write(count, filename)
+            FX3.to_pyomo(model)
             # print(FX3)
 
             '''
@@ -1776,16 +1803,34 @@ class SaltLakeCGEModel(BaseAnalysis):
             # RA.FX(K)=RA0(K);
             print('RA.FX(K)=RA0(K)')
             FX5 = RA.loc(K) - ExprM(vars, m=RA0.loc[K])
-            FX5.write(count, filename)
+            FX5.to_pyomo(model)
             # print(FX5)
 
             print("Objective")
             obj = vars.getIndex('SPI')
+            model.obj = Objective(expr=-1 * model.x[obj])
+
+        def build_model():
+            model = ConcreteModel()
+            vars.to_pyomo(model)
+            set_equation(model)
+
+            ### Declare all suffixes
+
+            # Ipopt bound multipliers (obtained from solution)
+            model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
+            model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
 
-            with open(filename, 'a') as f:
-                f.write('model.obj = Objective(expr=-1*model.x' + str(obj) + ')')
+            # Ipopt bound multipliers (sent to solver)
+            model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
+            model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
+
+            # Obtain dual solutions from first solve and send to warm start
+            model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
+
+            return model
 
-        def run_solver(cons_filename, temp_file_name="tmp.py"):
+        def run_solver(model):
             solver = 'ipopt'
             solver_io = 'nl'
             stream_solver = True  # True prints solver output to screen
@@ -1805,29 +1850,10 @@ class SaltLakeCGEModel(BaseAnalysis):
                 print("")
                 exit(1)
 
-            ### Create the model
-            model = ConcreteModel()
-            set_variable(cons_filename)
-            set_equation(cons_filename)
-            ###
-
-            ### read the model
-            exec(open(cons_filename).read())
+            ### Update the shocked parameters, the variables keep the last solution as initial guess
+            vars.set_param('KS0', KS0.loc[K, IG], model)
             ###
 
-            ### Declare all suffixes
-
-            # Ipopt bound multipliers (obtained from solution)
-            model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
-            model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
-
-            # Ipopt bound multipliers (sent to solver)
-            model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
-            model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
-
-            # Obtain dual solutions from first solve and send to warm start
-            model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
-
             # opt.options['halt_on_ampl_error'] = 'yes'
             # opt.options['acceptable_tol'] = '1e-3'
             # Send the model to ipopt and collect the solution
@@ -1867,15 +1893,7 @@ class SaltLakeCGEModel(BaseAnalysis):
 
             if results.solver.status == SolverStatus.ok and results.solver.termination_condition == TerminationCondition.optimal:
 
-                x = [None for i in range(vars.nvars)]
-
-                with open(temp_file_name, 'w') as f:
-                    for i in range(vars.nvars):
-                        f.write('x[' + str(i) + ']=value(model.x' + str(i) + ')\n')
-
-                exec(open(temp_file_name).read())
-
-                soln.append(x[:])
+                soln.append([value(model.x[i]) for i in range(vars.nvars)])
 
                 return True
             elif results.solver.termination_condition == TerminationCondition.infeasible:
@@ -1890,82 +1908,93 @@ class SaltLakeCGEModel(BaseAnalysis):
         '''
 
         soln = []
-        # TODO: I am not sure this is needed here. We might want to leave the python version
-        # of the models out for now
-        filename = "ipopt_cons.py"
-        tmp = "tmp.py"
+        # the model is built once, the simulations only update its parameters
+        model = build_model()
         print("Calibration: ")
-        run_solver(filename, tmp)
+        run_solver(model)
 
-        # sys.exit()
+        # base capital stock, every scenario applies its shocks to it
+        KS00 = KS0.copy()
 
-        '''
-        Simulation code below:
-        In each simulation:
+        def simulate(sector_shocks):
+            """Solve one capital stock shock scenario, starting from the calibrated solution.
+
+            Args:
+                sector_shocks (pd.DataFrame): Capital stock shock (remaining fraction) of each sector, by sector.
+
+            Returns:
+                dict: Output DataFrames by result id.
+
+            """
+            nonlocal KS0
+            del soln[1:]
+            for i in range(vars.nvars):
+                model.x[i].value = soln[0][i]
+
+            # sys.exit()
+
+            '''
+            Simulation code below:
+            In each simulation:
         
-        1. Apply simulation code (for instance PI(I) = 1.02).
-        2. Rewrite all equations
-        3. Solve the new model with the result from last run as initial guess.
+            1. Apply simulation code (for instance PI(I) = 1.02).
+            2. Update the shocked parameters of the model
+            3. Solve the new model with the result from last run as initial guess.
         
-        '''
+            '''
 
-        '''
-        ######## The following is for individual shocks. ######## 
+            '''
+            ######## The following is for individual shocks. ######## 
         
-        iNum = 1 # dynamic model itterations
+            iNum = 1 # dynamic model itterations
         
-        for ittr in range(iNum):
-          print("Simulation: ", ittr+1)
-          if ittr == 0: # if it is the first simulation, apply the shock
+            for ittr in range(iNum):
+              print("Simulation: ", ittr+1)
+              if ittr == 0: # if it is the first simulation, apply the shock
         
-              #DELTA.loc[I] = 1.02 * DELTA.loc[I]
+                  #DELTA.loc[I] = 1.02 * DELTA.loc[I]
         
-              KS0.loc[K, I] = KS0.loc[K, I]*0.7
+                  KS0.loc[K, I] = KS0.loc[K, I]*0.7
         
-              #KS0.loc[K, ['HS1']] = KS0.loc[K, ['HS1']] * 0.675
-              #KS0.loc[K, ['HS2']] = KS0.loc[K, ['HS2']] * 0.739
-              #KS0.loc[K, ['HS3']] = KS0.loc[K, ['HS3']] * 0.958
-              #KS0.loc[K, ['GOODS']] = KS0.loc[K, ['GOODS']] * 0.658
-              #KS0.loc[K, ['TRADE']] = KS0.loc[K, ['TRADE']] * 0.961
-              #KS0.loc[K, ['OTHER']] = KS0.loc[K, ['OTHER']] * 0.673
+                  #KS0.loc[K, ['HS1']] = KS0.loc[K, ['HS1']] * 0.675
+                  #KS0.loc[K, ['HS2']] = KS0.loc[K, ['HS2']] * 0.739
+                  #KS0.loc[K, ['HS3']] = KS0.loc[K, ['HS3']] * 0.958
+                  #KS0.loc[K, ['GOODS']] = KS0.loc[K, ['GOODS']] * 0.658
+                  #KS0.loc[K, ['TRADE']] = KS0.loc[K, ['TRADE']] * 0.961
+                  #KS0.loc[K, ['OTHER']] = KS0.loc[K, ['OTHER']] * 0.673
         
         
-          else: # other simulations
+              else: # other simulations
         
-              #KS0 = KSNEW*(1-DEPR)+vars.get('N', x=soln[-1])
-              KS0 = vars.get('KS', x=soln[-1])
+                  #KS0 = KSNEW*(1-DEPR)+vars.get('N', x=soln[-1])
+                  KS0 = vars.get('KS', x=soln[-1])
         
-          run_solver(filename, tmp)
+              run_solver(model)
         
-        '''
+            '''
 
-        # The following is for random shocks. #
-        sims = sector_shocks
-        iNum = 1  # dynamic model itterations
-        # iNum = len(sims.columns)
-        KS00 = KS0.copy()
+            # The following is for random shocks. #
+            sims = sector_shocks
+            iNum = 1  # dynamic model itterations
+            # iNum = len(sims.columns)
 
-        solver_status = False
-        for num in range(iNum):
-            KS0.loc[K, I] = KS00.loc[K, I].mul(sims.iloc[:, num])
-            KS0 = KS0.fillna(0.0)
-            solver_status = run_solver(filename, tmp)
-
-        if solver_status:
-            domestic_supply, gross_income, household_count, pre_disaster_demand, post_disaster_demand = \
-                gams_to_dataframes(iNum, vars, H, L, soln)
-
-            self.set_result_csv_data("domestic-supply", domestic_supply, name="domestic-supply", source="dataframe",
-                                     index=True)
-            self.set_result_csv_data("pre-disaster-factor-demand", pre_disaster_demand,
-                                     name="pre-disaster-factor-demand", source="dataframe", index=True)
-            self.set_result_csv_data("post-disaster-factor-demand", post_disaster_demand,
-                                     name="post-disaster-factor-demand", source="dataframe", index=True)
-            self.set_result_csv_data("gross-income", gross_income, name="gross-income", source="dataframe", index=True)
-            self.set_result_csv_data("household-count", household_count, name="household-count", source="dataframe",
-                                     index=True)
-        else:
-            raise ValueError("Solution infeasible - no output to save")
+            solver_status = False
+            for num in range(iNum):
+                KS0.loc[K, I] = KS00.loc[K, I].mul(sims.iloc[:, num])
+                KS0 = KS0.fillna(0.0)
+                solver_status = run_solver(model)
+
+            if solver_status:
+                domestic_supply, gross_income, household_count, pre_disaster_demand, post_disaster_demand = \
+                    gams_to_dataframes(iNum, vars, H, L, soln)
+
+                return {"domestic-supply": domestic_supply, "pre-disaster-factor-demand": pre_disaster_demand,
+                        "post-disaster-factor-demand": post_disaster_demand, "gross-income": gross_income,
+                        "household-count": household_count}
+            else:
+                raise ValueError("Solution infeasible - no output to save")
+
+        return simulate
 
     def get_spec(self):
         return {
@@ -1984,6 +2013,19 @@ class SaltLakeCGEModel(BaseAnalysis):
                     'description': 'Path to ipopt package. If none is provided, it will default to your environment\'ts'
                                    'path to the package.',
                     'type': str
+                },
+                {
+                    'id': 'num_cpu',
+                    'required': False,
+                    'description': 'If using parallel execution, the number of cpus to request when sector_shocks '
+                                   'has several shock scenarios.',
+                    'type': int
+                },
+                {
+                    'id': 'result_format',
+                    'required': False,
+                    'description': 'Format of the scenario-results output, csv (default), jsonl or parquet.',
+                    'type': str
                 }
 
             ],
@@ -2083,6 +2125,13 @@ class SaltLakeCGEModel(BaseAnalysis):
                     'parent_type': '',
                     'description': 'A CSV file of household count.',
                     'type': 'incore:HouseholdCount'
+                },
+                {
+                    'id': 'scenario-results',
+                    'parent_type': '',
+                    'description': 'A CSV file of the results of every shock scenario in batch mode, one row per '
+                                   'scenario, output, row and column.',
+                    'type': 'incore:cgeScenarioResults'
                 }
             ]
         }
@@ -10,6 +10,7 @@ from pyomo.environ import *
 from pyomo.opt import SolverFactory
 
 from pyincore import BaseAnalysis
+from pyincore.utils.cgebatchrunner import CGEBatchRunner
 from pyincore.analyses.seasidecge.equationlib import *
 
 logger = pyglobals.LOGGER
@@ -51,6 +52,19 @@ class SeasideCGEModel(BaseAnalysis):
                     'description': 'Path to ipopt package. If none is provided, it will default to your environment\'ts'
                                    'path to the package.',
                     'type': str
+                },
+                {
+                    'id': 'num_cpu',
+                    'required': False,
+                    'description': 'If using parallel execution, the number of cpus to request when sector_shocks '
+                                   'has several shock scenarios.',
+                    'type': int
+                },
+                {
+                    'id': 'result_format',
+                    'required': False,
+                    'description': 'Format of the scenario-results output, csv (default), jsonl or parquet.',
+                    'type': str
                 }
             ],
             'input_datasets': [
@@ -114,6 +128,13 @@ class SeasideCGEModel(BaseAnalysis):
                     'parent_type': '',
                     'description': 'CSV file of output of Seaside cge, containing changes in employment and supply.',
                     'type': 'incore:SeasideCGEEmployDS'
+                },
+                {
+                    'id': 'scenario-results',
+                    'parent_type': '',
+                    'description': 'CSV file of the results of every shock scenario in batch mode, one row per '
+                                   'scenario, output, row and column.',
+                    'type': 'incore:cgeScenarioResults'
                 }
             ]
         }
@@ -123,6 +144,39 @@ class SeasideCGEModel(BaseAnalysis):
     # ----------------------------------------------------------------
 
     def run(self):
+        data = {}
+        for dataset_id in ["SAM", "BB", "EMPLOY", "JOBCR", "HHTABLE"]:
+            data[dataset_id] = pd.read_csv(self.get_input_dataset(dataset_id).get_file_path('csv'), index_col=0)
+        sector_shocks = pd.read_csv(self.get_input_dataset("sector_shocks").get_file_path('csv'))
+
+        # several shock columns are solved as a batch of scenarios
+        scenarios = CGEBatchRunner.get_scenarios(sector_shocks)
+        if len(scenarios) > 1:
+            num_cpu = self.get_parameter("num_cpu")
+            return CGEBatchRunner.run(self, data, scenarios, "scenario-results", "scenario-results",
+                                      num_cpu if num_cpu is not None else 0, self.get_result_formats()[0])
+
+        simulate = self.build_simulation(data)
+        outputs = simulate(sector_shocks)
+        self.set_result_csv_data("Seaside_Sims", outputs["Seaside_Sims"], name="Seaside_Sims", source="dataframe")
+        self.set_result_csv_data("Seaside_output", outputs["Seaside_output"].reset_index(), name="Seaside_output",
+                                 source="dataframe")
+
+        return True
+
+    def build_simulation(self, data, require_optimal=False):
+        """Calibrate the model and build it once.
+
+        Args:
+            data (dict): SAM, BB, EMPLOY, JOBCR and HHTABLE DataFrames by input dataset id.
+            require_optimal (bool): Raise a ValueError for a scenario the solver does not solve to optimality,
+                instead of returning its outputs.
+
+        Returns:
+            function: Solves one capital stock shock scenario, see simulate.
+
+        """
+
         def _(x):
             return ExprM(vars, m=x)
 
@@ -363,10 +417,10 @@ class SeasideCGEModel(BaseAnalysis):
         # IMPORT ADDITIONAL DATA FILES
         # ----------------------------------------------------------------
 
-        SAM = pd.read_csv(self.get_input_dataset("SAM").get_file_path('csv'), index_col=0)
+        SAM = data["SAM"]
 
         # CAPITAL COMP
-        BB = pd.read_csv(self.get_input_dataset("BB").get_file_path('csv'), index_col=0)
+        BB = data["BB"]
 
         # MISC TABLES
 
@@ -378,9 +432,9 @@ class SeasideCGEModel(BaseAnalysis):
         MISC = pd.DataFrame(index=Z, columns=ETAMISC).fillna(0.0)
         MISCH = pd.DataFrame(index=H, columns=ETAMISCH).fillna(0.0)
 
-        EMPLOY = pd.read_csv(self.get_input_dataset("EMPLOY").get_file_path('csv'), index_col=0)
-        JOBCR = pd.read_csv(self.get_input_dataset("JOBCR").get_file_path('csv'), index_col=0)
-        HHTABLE = pd.read_csv(self.get_input_dataset("HHTABLE").get_file_path('csv'), index_col=0)
+        EMPLOY = data["EMPLOY"]
+        JOBCR = data["JOBCR"]
+        HHTABLE = data["HHTABLE"]
 
         # ----------------------------------------------------------------
         # PARAMETER DECLARATION
@@ -1171,19 +1225,14 @@ class SeasideCGEModel(BaseAnalysis):
         vars.lo('N', 0)
         vars.lo('CN', 0)
 
-        def set_variable(filename):
-            # clear the file before write the variables
-            with open(filename, 'w') as f:
-                f.write("")
-
-            vars.write(filename)
+        # the capital stock is shocked in the simulations, keep it a mutable parameter of the model
+        KSP = vars.add_param('KS0', KS0.loc[K, IG])
 
         # -------------------------------------------------------------------------------------------------------------
         # DEFINE EQUATIONS AND SET CONDITIONS
         # -------------------------------------------------------------------------------------------------------------
 
-        def set_equation(filename):
-            count = [0]
+        def set_equation(model):
 
             #   CPIEQ(H)..
             #   CPI(H)=E=
@@ -1195,7 +1244,7 @@ class SeasideCGEModel(BaseAnalysis):
 
             CPIEQ = (line1 / line2 - ~CPI.loc(H))
             logger.debug(CPIEQ.test(vars.initialVals))
-            CPIEQ.write(count, filename)
+            CPIEQ.to_pyomo(model)
 
             # YEQ(H).. Y(H)            =E= SUM(L,  A(H,L) * HW(H) / SUM(H1, A(H1,L) * HW(H1) )
             #                                * Y(L) * ( 1 - SUM(G, TAUFL(G,L))))
@@ -1214,7 +1263,7 @@ class SeasideCGEModel(BaseAnalysis):
 
             YEQ = ((line1 + line3 + line4) - Y.loc(H))
             logger.debug(YEQ.test(vars.initialVals))
-            YEQ.write(count, filename)
+            YEQ.to_pyomo(model)
             # logger.debug(YEQ)
 
             #  YDEQ(H).. YD(H)          =E=   Y(H) + (PRIVRET(H) * HH(H))
@@ -1228,7 +1277,7 @@ class SeasideCGEModel(BaseAnalysis):
             line4 = ~(ExprM(vars, m=TAUH.loc[G, H]) * HH.loc(H)).sum(G)
 
             YDEQ = ((line1 + line2 - line3 - line4) - YD.loc(H))
-            YDEQ.write(count, filename)
+            YDEQ.to_pyomo(model)
             logger.debug(YDEQ.test(vars.initialVals))
             # logger.debug(YDEQ)
 
@@ -1245,7 +1294,7 @@ class SeasideCGEModel(BaseAnalysis):
                 J, I])).prod(0)
 
             CHEQ = ((line1 * line2) - CH.loc(I, H))
-            CHEQ.write(count, filename)
+            CHEQ.to_pyomo(model)
             logger.debug(CHEQ.test(vars.initialVals))
             # logger.debug(CHEQ)
 
@@ -1254,7 +1303,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = YD.loc(H) - ~((P.loc(I) * CH.loc(I, H) * ExprM(vars, m=1 + TAUC.loc[GS, I].sum(0))).sum(I))
 
             SHEQ = (line - S.loc(H))
-            SHEQ.write(count, filename)
+            SHEQ.to_pyomo(model)
             logger.debug(SHEQ.test(vars.initialVals))
             # logger.debug(SHEQ)
 
@@ -1264,7 +1313,7 @@ class SeasideCGEModel(BaseAnalysis):
                 (ExprM(vars, m=AD.loc[J, I]) * P.loc(J) * ExprM(vars, m=1 + TAUQ.loc[GS, J].sum(0))).sum(0))
 
             PVAEQ = (line - PVA.loc(I))
-            PVAEQ.write(count, filename)
+            PVAEQ.to_pyomo(model)
             logger.debug(PVAEQ.test(vars.initialVals))
             # logger.debug(PVAEQ)
 
@@ -1273,7 +1322,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = ExprM(vars, m=DELTA.loc[I]) * ((FD.loc(F, I)) ** ExprM(vars, m=ALPHA.loc[F, I])).prod(F)
 
             PFEQ = (line - DS.loc(I))
-            PFEQ.write(count, filename)
+            PFEQ.to_pyomo(model)
             # logger.debug(PFEQ)
 
             # FDEQ(F,I).. R(F,I) * RA(F) * (1 + SUM(GF,TAUFX(GF,F,I) ) )* (FD(F,I))
@@ -1285,7 +1334,7 @@ class SeasideCGEModel(BaseAnalysis):
             FDEQ = (right - left)
 
             # FDEQ.test(vars.initialVals)
-            FDEQ.write(count, filename)
+            FDEQ.to_pyomo(model)
             # logger.debug(FDEQ)
 
             #   VEQ(I).. V(I) =E= SUM(J, AD(I,J) * DS(J) );
@@ -1293,7 +1342,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = (ExprM(vars, m=AD.loc[I, J]) * ~DS.loc(J)).sum(1)
 
             VEQ = (line - V.loc(I))
-            VEQ.write(count, filename)
+            VEQ.to_pyomo(model)
             logger.debug(VEQ.test(vars.initialVals))
             # logger.debug(VEQ)
 
@@ -1302,7 +1351,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = (R.loc(L, IG) * RA.loc(L) * FD.loc(L, IG)).sum(IG)
 
             YFEQL = (line - Y.loc(L))
-            YFEQL.write(count, filename)
+            YFEQL.to_pyomo(model)
             logger.debug(YFEQL.test(vars.initialVals))
             # logger.debug(YFEQL)
 
@@ -1311,7 +1360,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = (R.loc(['KAP'], IG) * RA.loc(['KAP']) * FD.loc(['KAP'], IG)).sum(IG)
 
             YFEQK = (line - Y.loc(['KAP']))
-            YFEQK.write(count, filename)
+            YFEQK.to_pyomo(model)
             logger.debug(YFEQK.test(vars.initialVals))
             # logger.debug(YFEQK)
 
@@ -1320,7 +1369,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = (R.loc(['LAND'], IG) * RA.loc(['LAND']) * FD.loc(['LAND'], IG)).sum(IG)
 
             YFEQLA = (line - Y.loc(['LAND']))
-            YFEQLA.write(count, filename)
+            YFEQLA.to_pyomo(model)
             logger.debug(YFEQLA.test(vars.initialVals))
             # logger.debug(YFEQLA)
 
@@ -1329,7 +1378,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = ExprM(vars, m=LFOR.loc[LA]) * Y.loc(LA)
 
             LANFOR = (line - LNFOR.loc(LA))
-            LANFOR.write(count, filename)
+            LANFOR.to_pyomo(model)
             logger.debug(LANFOR.test(vars.initialVals))
             # logger.debug(LANFOR)
 
@@ -1338,7 +1387,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = ExprM(vars, m=KFOR.loc[K]) * Y.loc(K)
 
             KAPFOR = (line - KPFOR.loc(K))
-            KAPFOR.write(count, filename)
+            KAPFOR.to_pyomo(model)
             logger.debug(KAPFOR.test(vars.initialVals))
             # logger.debug(KAPFOR)
 
@@ -1347,7 +1396,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = ExprM(vars, m=CX0.loc[I]) * ((PD.loc(I)) / ExprM(vars, m=PW0.loc[I])) ** ExprM(vars, m=ETAE.loc[I])
 
             XEQ = (line - CX.loc(I))
-            XEQ.write(count, filename)
+            XEQ.to_pyomo(model)
             logger.debug(XEQ.test(vars.initialVals))
             # logger.debug(XEQ)
 
@@ -1357,7 +1406,7 @@ class SeasideCGEModel(BaseAnalysis):
 
             DEQ = (line - D.loc(I))
             #  DEQ.setCondition(PWM0.loc[I])
-            DEQ.write(count, filename)
+            DEQ.to_pyomo(model)
             logger.debug(DEQ.test(vars.initialVals))
             # logger.debug(DEQ)
 
@@ -1366,7 +1415,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = (D.loc(I) * PD.loc(I) + (1 - D.loc(I)) * ExprM(vars, m=PWM0.loc[I]))
 
             PEQ = (line - P.loc(I))
-            PEQ.write(count, filename)
+            PEQ.to_pyomo(model)
             logger.debug(PEQ.test(vars.initialVals))
             # logger.debug(PEQ)
 
@@ -1375,7 +1424,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = (1 - D.loc(I)) * DD.loc(I)
 
             MEQ = (line - M.loc(I))
-            MEQ.write(count, filename)
+            MEQ.to_pyomo(model)
             logger.debug(MEQ.test(vars.initialVals))
             # logger.debug(MEQ)
 
@@ -1395,7 +1444,7 @@ class SeasideCGEModel(BaseAnalysis):
             line6 = GVFOR.loc(G).sum(G)
 
             NKIEQ = ((line1 - line2 - line3 - line4 - line5 - line6) - NKI)
-            NKIEQ.write(count, filename)
+            NKIEQ.to_pyomo(model)
             logger.debug(NKIEQ.test(vars.initialVals))
             # logger.debug(NKIEQ)
 
@@ -1405,7 +1454,7 @@ class SeasideCGEModel(BaseAnalysis):
                                                                                                       m=ETAIX.loc[K, I])
 
             NEQ = (line - N.loc(K, I))
-            NEQ.write(count, filename)
+            NEQ.to_pyomo(model)
             logger.debug(NEQ.test(vars.initialVals))
             # logger.debug(NEQ)
 
@@ -1416,16 +1465,16 @@ class SeasideCGEModel(BaseAnalysis):
             right = (ExprM(vars, m=B.loc[I, IG]) * N.loc(K, IG).sum(K)).sum(IG)
 
             CNEQ = (right - left)
-            CNEQ.write(count, filename)
+            CNEQ.to_pyomo(model)
             logger.debug(CNEQ.test(vars.initialVals))
             # logger.debug(CNEQ)
 
             #  KSEQ(K,IG).. KS(K,IG)    =E= KS0(K,IG) * ( 1 - DEPR) + N(K,IG) ;
             logger.debug('KSEQ(K,IG)')
-            line = ExprM(vars, m=KS0.loc[K, IG] * (1 - DEPR)) + N.loc(K, IG)
+            line = KSP.loc(K, IG) * (1 - DEPR) + N.loc(K, IG)
 
             KSEQ = (line - KS.loc(K, IG))
-            KSEQ.write(count, filename)
+            KSEQ.to_pyomo(model)
             logger.debug(KSEQ.test(vars.initialVals))
             # logger.debug(KSEQ)
 
@@ -1449,7 +1498,7 @@ class SeasideCGEModel(BaseAnalysis):
                         G))) ** ExprM(vars, m=ETAPIT.loc[H])
 
             LSEQ1 = ((line1 * line2 * line3 * line4) - HW.loc(H) / HH.loc(H))
-            LSEQ1.write(count, filename)
+            LSEQ1.to_pyomo(model)
             logger.debug(LSEQ1.test(vars.initialVals))
             # logger.debug(LSEQ1)
 
@@ -1460,7 +1509,7 @@ class SeasideCGEModel(BaseAnalysis):
                                                                                                                LA, I])
 
             LASEQ1 = (line - LAS.loc(LA, I))
-            LASEQ1.write(count, filename)
+            LASEQ1.to_pyomo(model)
             logger.debug(LASEQ1.test(vars.initialVals))
             # logger.debug(LASEQ1)
 
@@ -1480,7 +1529,7 @@ class SeasideCGEModel(BaseAnalysis):
             line5 = (ExprM(vars, m=HN0.loc[H] / HH0.loc[H]) / (HN.loc(H) / HH.loc(H))) ** ExprM(vars, m=ETAUO.loc[H])
 
             POPEQ = (line1 + line2 * line3 - line4 * line5 - HH.loc(H))
-            POPEQ.write(count, filename)
+            POPEQ.to_pyomo(model)
             logger.debug(POPEQ.test(vars.initialVals))
             # logger.debug(POPEQ)
 
@@ -1489,7 +1538,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = HH.loc(H) - HW.loc(H)
 
             ANEQ = (line - HN.loc(H))
-            ANEQ.write(count, filename)
+            ANEQ.to_pyomo(model)
             logger.debug(ANEQ.test(vars.initialVals))
             # logger.debug(ANEQ)
 
@@ -1541,7 +1590,7 @@ class SeasideCGEModel(BaseAnalysis):
 
             YGEQ = ((line1 + line2 + line3 + line4 + line5 + line6 + line7 + line8 + line9 + line10 + line11) - Y.loc(
                 GX))
-            YGEQ.write(count, filename)
+            YGEQ.to_pyomo(model)
             logger.debug(YGEQ.test(vars.initialVals))
             # logger.debug(YGEQ)
 
@@ -1550,7 +1599,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = IGT.loc(CF, GX).sum(GX)
             logger.debug('YGEQ2')
             YGEQ2 = (line - Y.loc(CF))
-            YGEQ2.write(count, filename)
+            YGEQ2.to_pyomo(model)
             logger.debug(YGEQ2.test(vars.initialVals))
             # logger.debug(YGEQ2)
 
@@ -1558,7 +1607,7 @@ class SeasideCGEModel(BaseAnalysis):
             logger.debug('YGEQ1(GNL)')
             line = ExprM(vars, m=TAXS1.loc[GNL]) * Y.loc(['CYGF'])
             YGEQ1 = (line - Y.loc(GNL))
-            YGEQ1.write(count, filename)
+            YGEQ1.to_pyomo(model)
             logger.debug(YGEQ1.test(vars.initialVals))
             # logger.debug(YGEQ1)
 
@@ -1567,7 +1616,7 @@ class SeasideCGEModel(BaseAnalysis):
             line = ExprM(vars, m=GFOR.loc[G]) * Y.loc(G)
 
             GOVFOR = (line - GVFOR.loc(G))
-            GOVFOR.write(count, filename)
+            GOVFOR.to_pyomo(model)
             logger.debug(GOVFOR.test(vars.initialVals))
             # logger.debug(GOVFOR)
 
@@ -1578,7 +1627,7 @@ class SeasideCGEModel(BaseAnalysis):
             right = ExprM(vars, m=AG.loc[I, GN]) * (Y.loc(GN) + ExprM(vars, m=GFOR.loc[GN]) * Y.loc(GN))
 
             CGEQ = (right - left)
-            CGEQ.write(count, filename)
+            CGEQ.to_pyomo(model)
             logger.debug(CGEQ.test(vars.initialVals))
             # logger.debug(CGEQ)
 
@@ -1589,7 +1638,7 @@ class SeasideCGEModel(BaseAnalysis):
             right = ExprM(vars, m=AG.loc[F, GN]) * (Y.loc(GN) + ExprM(vars, m=GFOR.loc[GN]) * Y.loc(GN))
 
             GFEQ = left - right
-            GFEQ.write(count, filename)
+            GFEQ.to_pyomo(model)
             logger.debug(GFEQ.test(vars.initialVals))
             # logger.debug(GFEQ)
 
@@ -1602,7 +1651,7 @@ class SeasideCGEModel(BaseAnalysis):
             line3 = (FD.loc(F, GN) * R.loc(F, GN) * RA.loc(F) * (1 + ExprM(vars, m=TAUFX_SUM.loc[F, GN]))).sum(F)
 
             GSEQL = ((line1 - ~line2 - ~line3) - S.loc(GN))
-            GSEQL.write(count, filename)
+            GSEQL.to_pyomo(model)
             logger.debug(GSEQL.test(vars.initialVals))
             # logger.debug(GSEQL)
 
@@ -1613,7 +1662,7 @@ class SeasideCGEModel(BaseAnalysis):
             line3 = IGT.loc(G, GX).sum(G)
 
             GSEQ = ((line1 - ~line2 - ~line3) - S.loc(GX))
-            GSEQ.write(count, filename)
+            GSEQ.to_pyomo(model)
             logger.debug(GSEQ.test(vars.initialVals))
             # logger.debug(GSEQ)
 
@@ -1625,14 +1674,14 @@ class SeasideCGEModel(BaseAnalysis):
 
             TDEQ = line - IGT.loc(G, GX)
             TDEQ.setCondition(IGTD.loc[G, GX], 'EQ', 1)
-            TDEQ.write(count, filename)
+            TDEQ.to_pyomo(model)
             logger.debug(TDEQ.test(vars.initialVals))
             # logger.debug(TDEQ)
 
             # GSEQJ1('CYGF').. S('CYGF')=E= Y('CYGF') -  Y('CYGF');
             logger.debug('GSEQJ1(\'CYGF\')')
             GSEQJ1 = S.loc(['CYGF']) - Y.loc(['CYGF']) + Y.loc(['CYGF'])
-            GSEQJ1.write(count, filename)
+            GSEQJ1.to_pyomo(model)
             logger.debug(GSEQJ1.test(vars.initialVals))
 
             #  SPIEQ.. SPI              =E= SUM(H, Y(H)) + SUM((H,G), TP(H,G)*HH(H)) + SUM(H, PRIVRET(H)*HH(H));
@@ -1641,7 +1690,7 @@ class SeasideCGEModel(BaseAnalysis):
                     ExprM(vars, m=PRIVRET.loc[H]) * HH.loc(H)).sum(H)
 
             SPIEQ = (line - SPI)
-            SPIEQ.write(count, filename)
+            SPIEQ.to_pyomo(model)
             logger.debug(SPIEQ.test(vars.initialVals))
             # logger.debug(SPIEQ)
 
@@ -1653,35 +1702,35 @@ class SeasideCGEModel(BaseAnalysis):
             # right = FD.loc(['L1'], Z).sum(Z) + CMO.loc(CM1).sum(CM1)
 
             LMEQ1 = (right - left)
-            LMEQ1.write(count, filename)
+            LMEQ1.to_pyomo(model)
             logger.debug(LMEQ1.test(vars.initialVals))
             # logger.debug(LMEQ1)
 
             #  KMEQ(K,IG).. KS(K,IG)    =E= FD(K,IG);
             logger.debug('KMEQ(K,IG)')
             KMEQ = (FD.loc(K, IG) - KS.loc(K, IG))
-            KMEQ.write(count, filename)
+            KMEQ.to_pyomo(model)
             logger.debug(KMEQ.test(vars.initialVals))
             # logger.debug(KMEQ)
 
             #  LAMEQ(LA,IG).. LAS(LA,IG)=E= FD(LA,IG);
             logger.debug('LAMEQ(LA,IG)')
             LAMEQ = (FD.loc(LA, IG) - LAS.loc(LA, IG))
-            LAMEQ.write(count, filename)
+            LAMEQ.to_pyomo(model)
             logger.debug(LAMEQ.test(vars.initialVals))
             # logger.debug(LAMEQ)
 
             #  GMEQ(I).. DS(I)          =E= DD(I) + CX(I) - M(I);
             logger.debug('GMEQ(I)')
             GMEQ = (DD.loc(I) + CX.loc(I) - M.loc(I) - DS.loc(I))
-            GMEQ.write(count, filename)
+            GMEQ.to_pyomo(model)
             logger.debug(GMEQ.test(vars.initialVals))
             # logger.debug(GMEQ)
 
             #  DDEQ(I).. DD(I)          =E= V(I) + SUM(H, CH(I,H) ) + SUM(G, CG(I,G) ) + CN(I);
             logger.debug('DDEQ(I)')
             DDEQ = (V.loc(I) + CH.loc(I, H).sum(H) + CG.loc(I, G).sum(G) + CN.loc(I) - DD.loc(I))
-            DDEQ.write(count, filename)
+            DDEQ.to_pyomo(model)
             logger.debug(DDEQ.test(vars.initialVals))
             # logger.debug(DDEQ)
 
@@ -1689,41 +1738,59 @@ class SeasideCGEModel(BaseAnalysis):
             logger.debug('IGT.FX(G,GX)$(NOT IGT0(G,GX))=0')
             FX1 = IGT.loc(G, GX)
             FX1.setCondition(IGT0.loc[G, GX], 'EQ', 0)
-            FX1.write(count, filename)
+            FX1.to_pyomo(model)
             # logger.debug(FX1)
 
             # IGT.FX(G,GX)$(IGTD(G,GX) EQ 2)=IGT0(G,GX);
             logger.debug('IGT.FX(G,GX)$(IGTD(G,GX) EQ 2)=IGT0(G,GX)')
             FX2 = IGT.loc(G, GX) - ExprM(vars, m=IGT0.loc[G, GX])
             FX2.setCondition(IGTD.loc[G, GX], 'EQ', 2)
-            FX2.write(count, filename)
+            FX2.to_pyomo(model)
             # logger.debug(FX2)
 
             # R.FX(L,Z)=R0(L,Z);
             logger.debug('R.FX(L,Z)=R0(L,Z)')
             FX3 = R.loc(L, Z) - ExprM(vars, m=R0.loc[L, Z])
-            FX3.write(count, filename)
+            FX3.to_pyomo(model)
             # logger.debug(FX3)
 
             # RA.FX(LA)=RA0(LA);
             logger.debug('RA.FX(LA)=RA0(LA)')
             FX4 = RA.loc(LA) - ExprM(vars, m=RA0.loc[LA])
-            FX4.write(count, filename)
+            FX4.to_pyomo(model)
             # logger.debug(FX4)
 
             # RA.FX(K)=RA0(K);
             logger.debug('RA.FX(K)=RA0(K)')
             FX5 = RA.loc(K) - ExprM(vars, m=RA0.loc[K])
-            FX5.write(count, filename)
+            FX5.to_pyomo(model)
             # logger.debug(FX5)
 
             logger.debug("Objective")
             obj = vars.getIndex('SPI')
+            model.obj = Objective(expr=-1 * model.x[obj])
+
+        def build_model():
+            model = ConcreteModel()
+            vars.to_pyomo(model)
+            set_equation(model)
+
+            ### Declare all suffixes
+
+            # Ipopt bound multipliers (obtained from solution)
+            model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
+            model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
+
+            # Ipopt bound multipliers (sent to solver)
+            model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
+            model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
 
-            with open(filename, 'a') as f:
-                f.write('model.obj = Objective(expr=-1*model.x' + str(obj) + ')')
+            # Obtain dual solutions from first solve and send to warm start
+            model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
+
+            return model
 
-        def run_solver(cons_filename, temp_file_name):
+        def run_solver(model, check_optimal=False):
 
             solver = 'ipopt'
             solver_io = 'nl'
@@ -1743,29 +1810,10 @@ class SeasideCGEModel(BaseAnalysis):
                              "using the %s interface" % (solver, solver_io))
                 exit(1)
 
-            ### Create the model
-            model = ConcreteModel()
-            set_variable(cons_filename)
-            set_equation(cons_filename)
+            ### Update the shocked parameters, the variables keep the last solution as initial guess
+            vars.set_param('KS0', KS0.loc[K, IG], model)
             ###
 
-            # read the model
-            exec(open(cons_filename).read())
-            ###
-
-            ### Declare all suffixes
-
-            # Ipopt bound multipliers (obtained from solution)
-            model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
-            model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
-
-            # Ipopt bound multipliers (sent to solver)
-            model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
-            model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
-
-            # Obtain dual solutions from first solve and send to warm start
-            model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
-
             # opt.options['halt_on_ampl_error'] = 'yes'
             # opt.options['acceptable_tol'] = '1e-3'
             ### Send the model to ipopt and collect the solution
@@ -1792,17 +1840,11 @@ class SeasideCGEModel(BaseAnalysis):
             # The solver plugin will scan the model for all active suffixes
             # valid for importing, which it will store into the results object
 
-            opt.solve(model, keepfiles=keepfiles, tee=stream_solver)
-
-            x = [None for i in range(vars.nvars)]
-
-            with open(temp_file_name, 'w') as f:
-                for i in range(vars.nvars):
-                    f.write('x[' + str(i) + ']=value(model.x' + str(i) + ')\n')
+            results = opt.solve(model, keepfiles=keepfiles, tee=stream_solver)
+            if check_optimal:
+                CGEBatchRunner.check_solver_results(results)
 
-            exec(open(temp_file_name).read())
-
-            soln.append(x[:])
+            soln.append([value(model.x[i]) for i in range(vars.nvars)])
 
             return None
 
@@ -1812,192 +1854,202 @@ class SeasideCGEModel(BaseAnalysis):
 
         soln = []
 
-        # create CGE tmp folder, solverconstatns
-        # TODO: we need to generate the "solverconstatnt" folder with username since it uses system tmp
-        # TODO: there is a situation that multiple users on system can run this together
-
-        filename = "ipopt_cons.py"
-        tmp = "tmp.py"
+        # the model is built once, the simulations only update its parameters
+        model = build_model()
         print("Calibration: ")
-        run_solver(filename, tmp)
-
-        '''
-        Simulation code below:
-        In each simulation:
+        run_solver(model)
 
-        1. Apply simulation code (for instance PI(I) = 1.02).
-        2. Rewrite all equations
-        3. Solve the new model with the result from last run as initial guess.
-
-        '''
-
-        # '''
-        # The following is for individual shocks.
-
-        iNum = 1  # dynamic model itterations
-
-        sector_shocks = pd.read_csv(self.get_input_dataset("sector_shocks").get_file_path('csv'))
-        # Order sector shocks by the variables set in KS0
-        sector_shocks = sector_shocks.set_index('sector')
-        headers = list((KS0.loc[K, I]).columns)
-        sector_shocks = sector_shocks.reindex(headers)
-
-        # The line below this can be used if we want to add the ability to do multiple simulations later, currently
-        # it changes nothing.
+        # base capital stock, every scenario applies its shocks to it
         KS00 = KS0.copy()
-        for ittr in range(iNum):
-            logger.debug("Simulation: ", ittr + 1)
-            if ittr == 0:  # if it is the first simulation, apply the shock
-                # The below line of code should take care of all of the multiplication necessary without having to name
-                # each sector individually.
-                # sector shocks need to be in the same order as K
-                KS0.loc[K, I] = KS00.loc[K, I].mul(sector_shocks["shock"].iloc[0])
-
-            else:  # other simulations
-                # KS0 = KSNEW*(1-DEPR)+vars.get('N', x=soln[-1])
-                KS0 = vars.get('KS', x=soln[-1])
-
-            run_solver(filename, tmp)
-        # Prepare simulations output
-        CH0 = vars.get('CH', x=soln[0])
-        CPI0 = vars.get('CPI', x=soln[0])
-        CX0 = vars.get('CX', x=soln[0])
-        D0 = vars.get('D', x=soln[0])
-        DS0 = vars.get('DS', x=soln[0])
-        FD0 = vars.get('FD', x=soln[0])
-        IGT0 = vars.get('IGT', x=soln[0])
-        KS0 = vars.get('KS', x=soln[0])
-        LAS0 = vars.get('LAS', x=soln[0])
-        HH0 = vars.get('HH', x=soln[0])
-        HN0 = vars.get('HN', x=soln[0])
-        HW0 = vars.get('HW', x=soln[0])
-        N0 = vars.get('N', x=soln[0])
-        P0 = vars.get('P', x=soln[0])
-        RA0 = vars.get('RA', x=soln[0])
-        R0 = vars.get('R', x=soln[0])
-        Y0 = vars.get('Y', x=soln[0])
-        YD0 = vars.get('YD', x=soln[0])
-
-        emplist = []
-        dsrlist = []
-        dsclist = []
-        hhinclist = []
-        miglist = []
-        simlist = []
-
-        for i in range(iNum):
-            DSL = vars.get('DS', x=soln[i + 1])
-            FDL = vars.get('FD', x=soln[i + 1])
-            HHL = vars.get('HH', x=soln[i + 1])
-            YL = vars.get('Y', x=soln[i + 1])
-            DFFD = FDL - FD0
-            DY = YL - Y0
-            DDS = DSL - DS0
-
-            s_name = 'Simulation ' + str(i + 1)
-
-            emp = DFFD[DFFD.index.isin(['L1', 'L2', 'L3', 'L4', 'L5'])].sum().sum()
-            dsr = DDS[DDS.index.isin(['HS1', 'HS2', 'HS3'])].sum()
-            dsc = DDS[DDS.index.isin(['CONST1', 'RETAIL1', 'SERV1', 'HC1', 'ACCOM1',
-                                      'REST1', 'AG2', 'CONST2', 'MANUF2', 'RETAIL2', 'SERV2', 'HC2', 'ACCOM2',
-                                      'REST2', 'AG3', 'UTIL', 'CONST3', 'RETAIL3', 'SERV3', 'HC3'])].sum()
-            hhinc = DY[DY.index.isin(['HH1', 'HH2', 'HH3', 'HH4', 'HH5'])].sum()
-            hhdiff = HHL - HH0
-            mig = hhdiff.sum()
-
-            emplist.append(emp)
-            dsrlist.append(dsr)
-            dsclist.append(dsc)
-            hhinclist.append(hhinc)
-            miglist.append(mig)
-            simlist.append(s_name)
-
-        cols = {'dsc': dsclist,
-                'dsr': dsrlist,
-                'mig': miglist,
-                'emp': emplist,
-                'hhinc': hhinclist}
-
-        sims_result = pd.DataFrame.from_dict(cols)
-        self.set_result_csv_data("Seaside_Sims", sims_result, name="Seaside_Sims", source="dataframe")
-
-        # Prepare cge output
-        total_employment_original = FD0.loc[L, I].sum(0).sum(0)
-        total_employment_change = vars.get('FD', x=soln[-1]).loc[L, I].sum(0).sum(0) - total_employment_original
-        total_employment_percentage = total_employment_change / total_employment_original
-
-        domestic_supply_original = DS0.sum(0)
-        domestic_supply_change = vars.get('DS', x=soln[-1]).sum(0) - domestic_supply_original
-        domestic_supply_percentage = domestic_supply_change / domestic_supply_original
-
-        DY = vars.get('Y', x=soln[-1]) - Y0
-        DY.loc[H] = pd.Series(vars.get('Y', x=soln[-1]).loc[H] / vars.get('CPI', x=soln[-1]).loc[H] - Y0.loc[H])
-
-        HH1_change = DY['HH1']
-        HH1_percentage = HH1_change / Y0.loc['HH1']
-
-        HH2_change = DY['HH2']
-        HH2_percentage = HH2_change / Y0.loc['HH2']
-
-        HH3_change = DY.loc['HH3']
-        HH3_percentage = HH3_change / Y0.loc['HH3']
-
-        HH4_change = DY.loc['HH4']
-        HH4_percentage = HH4_change / Y0.loc['HH4']
-
-        HH5_change = DY.loc['HH5']
-        HH5_percentage = HH5_change / Y0.loc['HH5']
-
-        HH_total_change = HH1_change + HH2_change + HH3_change + HH4_change + HH5_change
-        HH_total_original = Y0.loc[H].sum(0)
-        HH_total_percentage = HH_total_change / HH_total_original
-
-        LOCTAX_original = Y0.loc['LOCTAX']
-        LOCTAX_change = DY.loc['LOCTAX']
-        LOCTAX_percentage = LOCTAX_change / LOCTAX_original
-
-        PROPTX_original = Y0.loc['PROPTX']
-        PROPTX_change = DY.loc['PROPTX']
-        PROPTX_percentage = PROPTX_change / PROPTX_original
-
-        ACCTAX_original = Y0.loc['ACCTAX']
-        ACCTAX_change = DY.loc['ACCTAX']
-        ACCTAX_percentage = ACCTAX_change / ACCTAX_original
-
-        TAX_total_change = LOCTAX_change + PROPTX_change + ACCTAX_change
-        TAX_total_original = LOCTAX_original + PROPTX_original + ACCTAX_original
-        TAX_total_percentage = TAX_total_change / TAX_total_original
-
-        cge_output = pd.DataFrame({'Seaside': ['Total Employment', 'Domestic Supply($)',
-                                               'Real Household Income($)', 'HH1', 'HH2', 'HH3', 'HH4', 'HH5',
-                                               'Total',
-                                               'Local Tax Revenue($)', 'LOCTAX', 'PROPTX', 'ACCTAX',
-                                               'Total'],
-                                   'Amount of Change': ['{:.2f}'.format(total_employment_change),
-                                                        '{:.2f}'.format(domestic_supply_change), '',
-                                                        '{:.2f}'.format(HH1_change), '{:.2f}'.format(HH2_change),
-                                                        '{:.2f}'.format(HH3_change), '{:.2f}'.format(HH4_change),
-                                                        '{:.2f}'.format(HH5_change),
-                                                        '{:.2f}'.format(HH_total_change),
-                                                        '',
-                                                        '{:.2f}'.format(LOCTAX_change),
-                                                        '{:.2f}'.format(PROPTX_change),
-                                                        '{:.2f}'.format(ACCTAX_change),
-                                                        '{:.2f}'.format(TAX_total_change)],
-                                   'Percent Change': ['{:.2f}%'.format(total_employment_percentage * 100),
-                                                      '{:.2f}%'.format(domestic_supply_percentage * 100), '',
-                                                      '{:.2f}%'.format(HH1_percentage * 100),
-                                                      '{:.2f}%'.format(HH2_percentage * 100),
-                                                      '{:.2f}%'.format(HH3_percentage * 100),
-                                                      '{:.2f}%'.format(HH4_percentage * 100),
-                                                      '{:.2f}%'.format(HH5_percentage * 100),
-                                                      '{:.2f}%'.format(HH_total_percentage * 100), '',
-                                                      '{:.2f}%'.format(LOCTAX_percentage * 100),
-                                                      '{:.2f}%'.format(PROPTX_percentage * 100),
-                                                      '{:.2f}%'.format(ACCTAX_percentage * 100),
-                                                      '{:.2f}%'.format(TAX_total_percentage * 100)]
-                                   })
-
-        self.set_result_csv_data("Seaside_output", cge_output, name="Seaside_output", source="dataframe")
 
-        return True
+        def simulate(sector_shocks):
+            """Solve one capital stock shock scenario, starting from the calibrated solution.
+
+            Args:
+                sector_shocks (pd.DataFrame): Capital stock shock (remaining fraction) of each sector, with sector
+                    and shock columns.
+
+            Returns:
+                dict: Seaside_Sims and Seaside_output DataFrames.
+
+            """
+            nonlocal KS0
+            del soln[1:]
+            for i in range(vars.nvars):
+                model.x[i].value = soln[0][i]
+
+            '''
+            Simulation code below:
+            In each simulation:
+
+            1. Apply simulation code (for instance PI(I) = 1.02).
+            2. Update the shocked parameters of the model
+            3. Solve the new model with the result from last run as initial guess.
+
+            '''
+
+            # '''
+            # The following is for individual shocks.
+
+            iNum = 1  # dynamic model itterations
+
+            # Order sector shocks by the variables set in KS0
+            sector_shocks = sector_shocks.set_index('sector')
+            headers = list((KS0.loc[K, I]).columns)
+            sector_shocks = sector_shocks.reindex(headers)
+
+            for ittr in range(iNum):
+                logger.debug("Simulation: ", ittr + 1)
+                if ittr == 0:  # if it is the first simulation, apply the shock
+                    # The below line of code should take care of all of the multiplication necessary without having to
+                    # name each sector individually.
+                    # sector shocks need to be in the same order as K
+                    KS0.loc[K, I] = KS00.loc[K, I].mul(sector_shocks["shock"].iloc[0])
+
+                else:  # other simulations
+                    # KS0 = KSNEW*(1-DEPR)+vars.get('N', x=soln[-1])
+                    KS0 = vars.get('KS', x=soln[-1])
+
+                run_solver(model, require_optimal)
+            # Prepare simulations output
+            CH0 = vars.get('CH', x=soln[0])
+            CPI0 = vars.get('CPI', x=soln[0])
+            CX0 = vars.get('CX', x=soln[0])
+            D0 = vars.get('D', x=soln[0])
+            DS0 = vars.get('DS', x=soln[0])
+            FD0 = vars.get('FD', x=soln[0])
+            IGT0 = vars.get('IGT', x=soln[0])
+            KS0 = vars.get('KS', x=soln[0])
+            LAS0 = vars.get('LAS', x=soln[0])
+            HH0 = vars.get('HH', x=soln[0])
+            HN0 = vars.get('HN', x=soln[0])
+            HW0 = vars.get('HW', x=soln[0])
+            N0 = vars.get('N', x=soln[0])
+            P0 = vars.get('P', x=soln[0])
+            RA0 = vars.get('RA', x=soln[0])
+            R0 = vars.get('R', x=soln[0])
+            Y0 = vars.get('Y', x=soln[0])
+            YD0 = vars.get('YD', x=soln[0])
+
+            emplist = []
+            dsrlist = []
+            dsclist = []
+            hhinclist = []
+            miglist = []
+            simlist = []
+
+            for i in range(iNum):
+                DSL = vars.get('DS', x=soln[i + 1])
+                FDL = vars.get('FD', x=soln[i + 1])
+                HHL = vars.get('HH', x=soln[i + 1])
+                YL = vars.get('Y', x=soln[i + 1])
+                DFFD = FDL - FD0
+                DY = YL - Y0
+                DDS = DSL - DS0
+
+                s_name = 'Simulation ' + str(i + 1)
+
+                emp = DFFD[DFFD.index.isin(['L1', 'L2', 'L3', 'L4', 'L5'])].sum().sum()
+                dsr = DDS[DDS.index.isin(['HS1', 'HS2', 'HS3'])].sum()
+                dsc = DDS[DDS.index.isin(['CONST1', 'RETAIL1', 'SERV1', 'HC1', 'ACCOM1',
+                                          'REST1', 'AG2', 'CONST2', 'MANUF2', 'RETAIL2', 'SERV2', 'HC2', 'ACCOM2',
+                                          'REST2', 'AG3', 'UTIL', 'CONST3', 'RETAIL3', 'SERV3', 'HC3'])].sum()
+                hhinc = DY[DY.index.isin(['HH1', 'HH2', 'HH3', 'HH4', 'HH5'])].sum()
+                hhdiff = HHL - HH0
+                mig = hhdiff.sum()
+
+                emplist.append(emp)
+                dsrlist.append(dsr)
+                dsclist.append(dsc)
+                hhinclist.append(hhinc)
+                miglist.append(mig)
+                simlist.append(s_name)
+
+            cols = {'dsc': dsclist,
+                    'dsr': dsrlist,
+                    'mig': miglist,
+                    'emp': emplist,
+                    'hhinc': hhinclist}
+
+            sims_result = pd.DataFrame.from_dict(cols)
+
+            # Prepare cge output
+            total_employment_original = FD0.loc[L, I].sum(0).sum(0)
+            total_employment_change = vars.get('FD', x=soln[-1]).loc[L, I].sum(0).sum(0) - total_employment_original
+            total_employment_percentage = total_employment_change / total_employment_original
+
+            domestic_supply_original = DS0.sum(0)
+            domestic_supply_change = vars.get('DS', x=soln[-1]).sum(0) - domestic_supply_original
+            domestic_supply_percentage = domestic_supply_change / domestic_supply_original
+
+            DY = vars.get('Y', x=soln[-1]) - Y0
+            DY.loc[H] = pd.Series(vars.get('Y', x=soln[-1]).loc[H] / vars.get('CPI', x=soln[-1]).loc[H] - Y0.loc[H])
+
+            HH1_change = DY['HH1']
+            HH1_percentage = HH1_change / Y0.loc['HH1']
+
+            HH2_change = DY['HH2']
+            HH2_percentage = HH2_change / Y0.loc['HH2']
+
+            HH3_change = DY.loc['HH3']
+            HH3_percentage = HH3_change / Y0.loc['HH3']
+
+            HH4_change = DY.loc['HH4']
+            HH4_percentage = HH4_change / Y0.loc['HH4']
+
+            HH5_change = DY.loc['HH5']
+            HH5_percentage = HH5_change / Y0.loc['HH5']
+
+            HH_total_change = HH1_change + HH2_change + HH3_change + HH4_change + HH5_change
+            HH_total_original = Y0.loc[H].sum(0)
+            HH_total_percentage = HH_total_change / HH_total_original
+
+            LOCTAX_original = Y0.loc['LOCTAX']
+            LOCTAX_change = DY.loc['LOCTAX']
+            LOCTAX_percentage = LOCTAX_change / LOCTAX_original
+
+            PROPTX_original = Y0.loc['PROPTX']
+            PROPTX_change = DY.loc['PROPTX']
+            PROPTX_percentage = PROPTX_change / PROPTX_original
+
+            ACCTAX_original = Y0.loc['ACCTAX']
+            ACCTAX_change = DY.loc['ACCTAX']
+            ACCTAX_percentage = ACCTAX_change / ACCTAX_original
+
+            TAX_total_change = LOCTAX_change + PROPTX_change + ACCTAX_change
+            TAX_total_original = LOCTAX_original + PROPTX_original + ACCTAX_original
+            TAX_total_percentage = TAX_total_change / TAX_total_original
+
+            cge_output = pd.DataFrame({'Seaside': ['Total Employment', 'Domestic Supply($)',
+                                                   'Real Household Income($)', 'HH1', 'HH2', 'HH3', 'HH4', 'HH5',
+                                                   'Total',
+                                                   'Local Tax Revenue($)', 'LOCTAX', 'PROPTX', 'ACCTAX',
+                                                   'Total'],
+                                       'Amount of Change': ['{:.2f}'.format(total_employment_change),
+                                                            '{:.2f}'.format(domestic_supply_change), '',
+                                                            '{:.2f}'.format(HH1_change), '{:.2f}'.format(HH2_change),
+                                                            '{:.2f}'.format(HH3_change), '{:.2f}'.format(HH4_change),
+                                                            '{:.2f}'.format(HH5_change),
+                                                            '{:.2f}'.format(HH_total_change),
+                                                            '',
+                                                            '{:.2f}'.format(LOCTAX_change),
+                                                            '{:.2f}'.format(PROPTX_change),
+                                                            '{:.2f}'.format(ACCTAX_change),
+                                                            '{:.2f}'.format(TAX_total_change)],
+                                       'Percent Change': ['{:.2f}%'.format(total_employment_percentage * 100),
+                                                          '{:.2f}%'.format(domestic_supply_percentage * 100), '',
+                                                          '{:.2f}%'.format(HH1_percentage * 100),
+                                                          '{:.2f}%'.format(HH2_percentage * 100),
+                                                          '{:.2f}%'.format(HH3_percentage * 100),
+                                                          '{:.2f}%'.format(HH4_percentage * 100),
+                                                          '{:.2f}%'.format(HH5_percentage * 100),
+                                                          '{:.2f}%'.format(HH_total_percentage * 100), '',
+                                                          '{:.2f}%'.format(LOCTAX_percentage * 100),
+                                                          '{:.2f}%'.format(PROPTX_percentage * 100),
+                                                          '{:.2f}%'.format(ACCTAX_percentage * 100),
+                                                          '{:.2f}%'.format(TAX_total_percentage * 100)]
+                                       })
+
+            return {"Seaside_Sims": sims_result, "Seaside_output": cge_output.set_index('Seaside')}
+
+        return simulate
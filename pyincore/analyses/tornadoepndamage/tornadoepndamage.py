@@ -5,12 +5,13 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 import math
-import random
 import sys
 
 import networkx as nx
 import numpy
 from pyincore.utils.analysisutil import AnalysisUtil
+from scipy.sparse import csr_matrix
+from shapely import STRtree
 from shapely.geometry import shape, LineString, MultiLineString
 
 from pyincore import (
@@ -154,6 +155,12 @@ class TornadoEpnDamage(BaseAnalysis):
             self.fragilitysvc.get_dfr3_set(self.fragility_pole_id)
         )
         assert fragility_set_pole.id == self.fragility_pole_id
+        for fragility_set in [fragility_set_tower, fragility_set_pole]:
+            if not isinstance(fragility_set.fragility_curves[0], DFR3Curve):
+                raise ValueError(
+                    "One of the fragilities is in deprecated format. This should not happen. "
+                    "If you are seeing this please report the issue."
+                )
 
         # network test
         node_id_validation = NetworkUtil.validate_network_node_ids(
@@ -194,12 +201,6 @@ class TornadoEpnDamage(BaseAnalysis):
             connection_list.append(list(c))
             first_node_list.append(list(c)[0])
 
-        intersection_list = []
-        poly_list = []
-        totalcost2repair = []
-        totalpoles2repair = []
-        totaltime2repair = []
-
         # construct guid field
         guid_list = []
         nodenwid_list = []
@@ -224,299 +225,172 @@ class TornadoEpnDamage(BaseAnalysis):
                 )
             nodenwid_list.append(nodenwid_fld_val)
 
-        for z in range(self.nmcs):
-            nodedam = [
-                0
-            ] * self.nnode  # placeholder for recording number of damaged pole for each node
-            noderepair = [
-                0
-            ] * self.nnode  # placeholder for recording repair cost for each node
-            poles2repair = [
-                0
-            ] * self.nnode  # placeholder for recording total number of poles to repair
-            cost2repairpath = [
-                0
-            ] * self.nnode  # placeholder for recording total repair cost for the network
-            time2repairpath = [
-                0
-            ] * self.nnode  # placeholder for recording total repair time for the network
-            nodetimerep = [0] * self.nnode
-            hazardval = [[0]] * self.nnode  # placeholder for recording hazard values
-            demandtypes = [[""]] * self.nnode  # placeholder for recording demand types
-            demandunits = [[""]] * self.nnode  # placeholder for recording demand units
-
-            # iterate link
-            for line_feature in link_dataset:
-                ndamage = 0  # number of damaged poles in each link
-                repaircost = 0  # repair cost value
-                repairtime = 0  # repair time value
-                to_node_val = ""
-                linetype_val = ""
-                tor_hazard_values = [0]  # random wind speed in EF
-                demand_types = [""]
-                demand_units = [""]
-
-                if self.tonode_fld_name.lower() in line_feature["properties"]:
-                    to_node_val = line_feature["properties"][
-                        self.tonode_fld_name.lower()
-                    ]
-                elif self.tonode_fld_name in line_feature["properties"]:
-                    to_node_val = line_feature["properties"][self.tonode_fld_name]
-
-                if self.linetype_fld_name in line_feature["properties"]:
-                    linetype_val = line_feature["properties"][self.linetype_fld_name]
-                elif self.linetype_fld_name.lower() in line_feature["properties"]:
-                    linetype_val = line_feature["properties"][
-                        self.linetype_fld_name.lower()
-                    ]
-
-                line = shape(line_feature["geometry"])
-
-                # iterate tornado
-                for tornado_feature in tornado_dataset:
-                    resistivity_probability = (
-                        0  # resistivity value at the point of windSpeed
-                    )
-                    random_resistivity = 0  # random resistivity value between 0 and one
-
-                    sim_fld_val = ""
-                    ef_fld_val = ""
-
-                    # get EF rating and simulation number column
-                    if (
-                        self.tornado_sim_field_name.lower()
-                        in tornado_feature["properties"]
-                    ):
-                        sim_fld_val = int(
-                            tornado_feature["properties"][
-                                self.tornado_sim_field_name.lower()
-                            ]
-                        )
-                    elif self.tornado_sim_field_name in tornado_feature["properties"]:
-                        sim_fld_val = int(
-                            tornado_feature["properties"][self.tornado_sim_field_name]
-                        )
-
-                    if (
-                        self.tornado_ef_field_name.lower()
-                        in tornado_feature["properties"]
-                    ):
-                        ef_fld_val = tornado_feature["properties"][
-                            self.tornado_ef_field_name.lower()
-                        ]
-                    elif self.tornado_ef_field_name in tornado_feature["properties"]:
-                        ef_fld_val = tornado_feature["properties"][
-                            self.tornado_ef_field_name
-                        ]
-
-                    if sim_fld_val == "" or ef_fld_val == "":
-                        print(
-                            "unable to convert tornado simulation field value to integer"
-                        )
-                        sys.exit(0)
-
-                    # get Tornado EF polygon
-                    # assumes that the polygon is not a multipolygon
-                    poly = shape(tornado_feature["geometry"])
-                    poly_list.append(poly)
-
-                    # loop for ef ranges
-                    for f in range(self.tornado_ef_rate):
-                        npoles = 0  # number of poles in tornado ef box
-                        poleresist = 0  # pole's resistance value
-                        # setting EF rate value string to match in the tornado dataset's attribute table
-                        ef_content = "EF" + str(f)
-
-                        # compute the intersections between link line and ef polygon
-                        # also figure out the length of the line that ovelapped with EF box
-                        inter_length_meter = None
-                        # compute the intersection between tornado polygon and line
-                        if (
-                            sim_fld_val == z
-                            and ef_fld_val.lower() == ef_content.lower()
-                        ):
-                            if poly is not None and line is not None:
-                                if poly.intersects(line):
-                                    intersection = poly.intersection(line)
-                                    any_point = None
-                                    if intersection.length > 0:
-                                        # print(intersection.__class__.__name__)
-                                        # calculate the length of intersected line
-                                        # since this is a geographic, it has to be projected to meters to be calcuated
-                                        inter_length_meter = (
-                                            GeoUtil.calc_geog_distance_from_linestring(
-                                                intersection
-                                            )
-                                        )
-                                        if isinstance(intersection, MultiLineString):
-                                            intersection_list.append(intersection)
-                                            for inter_line in intersection.geoms:
-                                                any_point = inter_line.centroid
-                                                break
-                                        elif isinstance(intersection, LineString):
-                                            intersection_list.append(intersection)
-                                            any_point = intersection.centroid
-
-                                            # also, random point can be possible
-                                            # by changing the following lines value 0.5
-                                            # any_point = intersection.interpolate(0.5, normalized=True)
-
-                                    if any_point is not None:
-                                        # check if any_point is in the polygon
-                                        if poly.contains(any_point) is False:
-                                            # this is very hardly happen but should be needed just in case
-                                            any_point = poly.centroid
-
-                                    # check if the line is tower or transmission
-                                    if linetype_val.lower() == self.line_transmission:
-                                        fragility_set_used = fragility_set_tower
-                                    else:
-                                        fragility_set_used = fragility_set_pole
-
-                                    values_payload = [
-                                        {
-                                            "demands": [
-                                                x.lower()
-                                                for x in fragility_set_used.demand_types
-                                            ],
-                                            "units": [
-                                                x.lower()
-                                                for x in fragility_set_used.demand_units
-                                            ],
-                                            "loc": str(any_point.coords[0][1])
-                                            + ","
-                                            + str(any_point.coords[0][0]),
-                                        }
-                                    ]
-
-                                    h_vals = self.hazardsvc.post_tornado_hazard_values(
-                                        tornado_id,
-                                        values_payload,
-                                        self.get_parameter("seed"),
-                                    )
-                                    tor_hazard_values = (
-                                        AnalysisUtil.update_precision_of_lists(
-                                            h_vals[0]["hazardValues"]
-                                        )
-                                    )
-                                    demand_types = h_vals[0]["demands"]
-                                    demand_units = h_vals[0]["units"]
-                                    hval_dict = dict()
-                                    j = 0
-                                    for d in h_vals[0]["demands"]:
-                                        hval_dict[d] = tor_hazard_values[j]
-                                        j += 1
-                                    if isinstance(
-                                        fragility_set_used.fragility_curves[0],
-                                        DFR3Curve,
-                                    ):
-                                        inventory_args = fragility_set_used.construct_expression_args_from_inventory(
-                                            tornado_feature
-                                        )
-                                        resistivity_probability = fragility_set_used.calculate_limit_state(
-                                            hval_dict,
-                                            inventory_type=fragility_set_used.inventory_type,
-                                            **inventory_args
-                                        )
-                                    else:
-                                        raise ValueError(
-                                            "One of the fragilities is in deprecated format. This should not happen. "
-                                            "If you are seeing this please report the issue."
-                                        )
-
-                                    # randomly generated capacity of each poles ; 1 m/s is 2.23694 mph
-                                    poleresist = (
-                                        resistivity_probability.get("LS_0") * 2.23694
-                                    )
-                                    npoles = int(
-                                        round(inter_length_meter / self.pole_distance)
-                                    )
-                                    repairtime_list = []
-
-                                    mu = None
-                                    sigma = None
-                                    for k in range(npoles):
-                                        random_resistivity = random.uniform(0, 1)
-
-                                        if random_resistivity <= poleresist:
-                                            ndamage += 1
-                                            # following codes can't be converted from matlab to python
-                                            # however, the cross product <=3 or == 24 almost doesn't happen
-                                            # since the time and cost differs when it is pole or tower,
-                                            # this could be changed by see if it is tower or pole
-                                            # if numpy.cross(k, z) <= 3 or numpy.cross(k, z) == 24:
-                                            if (
-                                                linetype_val.lower()
-                                                == self.line_transmission
-                                            ):
-                                                mu = self.mut
-                                                sigma = self.sigmat
-                                                tmu = self.tmut
-                                                tsigma = self.tsigmat
-                                            else:
-                                                mu = self.mud
-                                                sigma = self.sigmad
-                                                tmu = self.tmud
-                                                tsigma = self.tsigmad
-
-                                            repairtime_list.append(
-                                                numpy.random.normal(tmu, tsigma)
-                                            )
-
-                                    for k in range(ndamage):
-                                        repaircost += numpy.random.lognormal(mu, sigma)
-
-                                    # max of the repair time among different poles is taken
-                                    # as the repair time for that line
-                                    if len(repairtime_list) > 0:
-                                        repairtime = max(repairtime_list)
-                noderepair[to_node_val - 1] = repaircost
-                nodedam[to_node_val - 1] = ndamage
-                nodetimerep[to_node_val - 1] = repairtime
-                hazardval[to_node_val - 1] = tor_hazard_values
-                demandtypes[to_node_val - 1] = demand_types
-                demandunits[to_node_val - 1] = demand_units
-
-            # Calculate damage and repair cost based on network
-            for i in range(len(first_node_list)):
-                for j in range(len(connection_list[i])):
-                    # print(connection_list[i][j], first_node_list[i])
-                    pathij = list(
-                        nx.all_simple_paths(
-                            graph, connection_list[i][j], first_node_list[i]
-                        )
-                    )
-                    poler = 0
-                    coster = 0
-                    timer = []
-                    # print(pathij)
-                    if len(pathij) > 0:
-                        for k in range(len(pathij)):
-                            for var1 in range(len(pathij[k])):
-                                poler = poler + nodedam[pathij[k][var1]]
-                                coster = coster + noderepair[pathij[k][var1]]
-                                # max of the time for different lines is taken as the repair time for that path.
-                                # -- path is constituted of different lines.
-                                timer.append(nodetimerep[pathij[k][var1]])
-                    poles2repair[connection_list[i][j]] = poler
-                    cost2repairpath[connection_list[i][j]] = coster
-                    if len(timer) > 0:
-                        time2repairpath[connection_list[i][j]] = max(timer)
-                    else:
-                        time2repairpath[connection_list[i][j]] = 0
-            totalcost2repair.append(cost2repairpath)
-            totalpoles2repair.append(poles2repair)
-            totaltime2repair.append(time2repairpath)
-
-        # create guid field from node dataset
+        # read the links and the tornado EF polygons once
+        to_node_list = []
+        linetype_list = []
+        line_list = []
+        for line_feature in link_dataset:
+            to_node_val = ""
+            linetype_val = ""
+            if self.tonode_fld_name.lower() in line_feature["properties"]:
+                to_node_val = line_feature["properties"][self.tonode_fld_name.lower()]
+            elif self.tonode_fld_name in line_feature["properties"]:
+                to_node_val = line_feature["properties"][self.tonode_fld_name]
+
+            if self.linetype_fld_name in line_feature["properties"]:
+                linetype_val = line_feature["properties"][self.linetype_fld_name]
+            elif self.linetype_fld_name.lower() in line_feature["properties"]:
+                linetype_val = line_feature["properties"][
+                    self.linetype_fld_name.lower()
+                ]
+
+            to_node_list.append(to_node_val)
+            linetype_list.append(linetype_val.lower())
+            line_list.append(shape(line_feature["geometry"]))
+        is_transmission = numpy.array(
+            [linetype == self.line_transmission for linetype in linetype_list],
+            dtype=bool,
+        )
+
+        tornado_features, sim_list = self.get_tornado_ef_polygons(tornado_dataset)
+        poly_list = [shape(feature["geometry"]) for feature in tornado_features]
+
+        # every link crossing an EF polygon of any simulation
+        intersections = self.get_link_intersections(line_list, poly_list)
+        pair_links = numpy.array([link for link, _, _, _ in intersections], dtype=int)
+        pair_sims = numpy.array(
+            [sim_list[poly] for _, poly, _, _ in intersections], dtype=int
+        )
+
+        # one hazard value request for all intersections
+        values_payload = []
+        for link, _, _, any_point in intersections:
+            # check if the line is tower or transmission
+            if is_transmission[link]:
+                fragility_set_used = fragility_set_tower
+            else:
+                fragility_set_used = fragility_set_pole
+            values_payload.append(
+                {
+                    "demands": [x.lower() for x in fragility_set_used.demand_types],
+                    "units": [x.lower() for x in fragility_set_used.demand_units],
+                    "loc": str(any_point.coords[0][1])
+                    + ","
+                    + str(any_point.coords[0][0]),
+                }
+            )
+        h_vals = []
+        if len(values_payload) > 0:
+            h_vals = self.hazardsvc.post_tornado_hazard_values(
+                tornado_id, values_payload, self.get_parameter("seed")
+            )
+
+        # pole resistance and number of poles of every intersection
+        poleresist = numpy.zeros(len(intersections))
+        npoles = numpy.zeros(len(intersections), dtype=int)
+        pair_hazard_values = []
+        for k, (link, poly, inter_length_meter, _) in enumerate(intersections):
+            if is_transmission[link]:
+                fragility_set_used = fragility_set_tower
+            else:
+                fragility_set_used = fragility_set_pole
+
+            tor_hazard_values = AnalysisUtil.update_precision_of_lists(
+                h_vals[k]["hazardValues"]
+            )
+            pair_hazard_values.append(tor_hazard_values)
+            hval_dict = dict(zip(h_vals[k]["demands"], tor_hazard_values))
+            inventory_args = (
+                fragility_set_used.construct_expression_args_from_inventory(
+                    tornado_features[poly]
+                )
+            )
+            resistivity_probability = fragility_set_used.calculate_limit_state(
+                hval_dict,
+                inventory_type=fragility_set_used.inventory_type,
+                **inventory_args
+            )
+
+            # randomly generated capacity of each poles ; 1 m/s is 2.23694 mph
+            poleresist[k] = resistivity_probability.get("LS_0") * 2.23694
+            npoles[k] = int(round(inter_length_meter / self.pole_distance))
+
+        # sample all poles of all simulations at once, a pole is damaged if its random resistivity is below
+        # the pole resistance. Damaged poles get a repair cost and time, lognormal and normal for towers or poles
+        rng = numpy.random.default_rng(self.get_parameter("seed"))
+        pole_pairs = numpy.repeat(numpy.arange(len(intersections)), npoles)
+        damaged_pairs = pole_pairs[
+            rng.uniform(0, 1, len(pole_pairs)) <= poleresist[pole_pairs]
+        ]
+        damaged_transmission = is_transmission[pair_links[damaged_pairs]]
+        repaircosts = rng.lognormal(
+            numpy.where(damaged_transmission, self.mut, self.mud),
+            numpy.where(damaged_transmission, self.sigmat, self.sigmad),
+        )
+        repairtimes = rng.normal(
+            numpy.where(damaged_transmission, self.tmut, self.tmud),
+            numpy.where(damaged_transmission, self.tsigmat, self.tsigmad),
+        )
+
+        # number of damaged poles, repair cost and repair time (max among its poles) of every link per simulation
+        damage_index = (pair_sims[damaged_pairs], pair_links[damaged_pairs])
+        link_damage = numpy.zeros((self.nmcs, len(line_list)))
+        link_repair = numpy.zeros((self.nmcs, len(line_list)))
+        link_time = numpy.full((self.nmcs, len(line_list)), -numpy.inf)
+        numpy.add.at(link_damage, damage_index, 1)
+        numpy.add.at(link_repair, damage_index, repaircosts)
+        numpy.maximum.at(link_time, damage_index, repairtimes)
+        link_time[numpy.isinf(link_time)] = 0
+
+        # each node takes the values of the last link leading to it
+        node_link = numpy.full(self.nnode, -1)
+        for link, to_node_val in enumerate(to_node_list):
+            node_link[to_node_val - 1] = link
+        has_link = node_link >= 0
+        nodedam = numpy.zeros((self.nmcs, self.nnode))
+        noderepair = numpy.zeros((self.nmcs, self.nnode))
+        nodetimerep = numpy.zeros((self.nmcs, self.nnode))
+        nodedam[:, has_link] = link_damage[:, node_link[has_link]]
+        noderepair[:, has_link] = link_repair[:, node_link[has_link]]
+        nodetimerep[:, has_link] = link_time[:, node_link[has_link]]
+
+        # hazard values of the last simulation, from the last EF polygon crossed by the link of the node
+        hazardval = [[0]] * self.nnode  # placeholder for recording hazard values
+        demandtypes = [[""]] * self.nnode  # placeholder for recording demand types
+        demandunits = [[""]] * self.nnode  # placeholder for recording demand units
+        link_pair = {}
+        for k, link in enumerate(pair_links):
+            if pair_sims[k] == self.nmcs - 1:
+                link_pair[link] = k
+        for node, link in enumerate(node_link):
+            if link in link_pair:
+                k = link_pair[link]
+                hazardval[node] = pair_hazard_values[k]
+                demandtypes[node] = h_vals[k]["demands"]
+                demandunits[node] = h_vals[k]["units"]
+
+        # Calculate damage and repair cost based on network, the paths do not change between simulations
+        path_counts = self.get_path_node_counts(
+            graph, connection_list, first_node_list, self.nnode
+        )
+        # total number of poles to repair and repair cost on the paths of every node, per simulation
+        totalpoles2repair = (path_counts @ nodedam.T).T
+        totalcost2repair = (path_counts @ noderepair.T).T
+        # max of the time for different lines is taken as the repair time for that path.
+        # -- path is constituted of different lines.
+        totaltime2repair = numpy.zeros((self.nmcs, self.nnode))
+        for node in range(self.nnode):
+            path_nodes = path_counts[node].indices
+            if len(path_nodes) > 0:
+                totaltime2repair[:, node] = nodetimerep[:, path_nodes].max(axis=1)
 
         # calculate mean and standard deviation
-        meanpoles = numpy.mean(numpy.asarray(totalpoles2repair), axis=0)
-        stdpoles = numpy.std(numpy.asarray(totalpoles2repair), axis=0)
-        meancost = numpy.mean(numpy.asarray(totalcost2repair), axis=0)
-        stdcost = numpy.std(numpy.asarray(totalcost2repair), axis=0)
-        meantime = numpy.mean(numpy.asarray(totaltime2repair), axis=0)
-        stdtime = numpy.std(numpy.asarray(totaltime2repair), axis=0)
+        meanpoles = numpy.mean(totalpoles2repair, axis=0)
+        stdpoles = numpy.std(totalpoles2repair, axis=0)
+        meancost = numpy.mean(totalcost2repair, axis=0)
+        stdcost = numpy.std(totalcost2repair, axis=0)
+        meantime = numpy.mean(totaltime2repair, axis=0)
+        stdtime = numpy.std(totaltime2repair, axis=0)
 
         # create result
         ds_results = []
@@ -550,6 +424,125 @@ class TornadoEpnDamage(BaseAnalysis):
 
         return ds_results, damage_results
 
+    def get_tornado_ef_polygons(self, tornado_dataset):
+        """Tornado EF polygons with their simulation number.
+
+        Args:
+            tornado_dataset (obj): Tornado dataset.
+
+        Returns:
+            list, list: Tornado features with an EF rating of the analysis and their simulation numbers.
+
+        """
+        ef_contents = ["ef" + str(f) for f in range(self.tornado_ef_rate)]
+        tornado_features = []
+        sim_list = []
+        for tornado_feature in tornado_dataset:
+            sim_fld_val = ""
+            ef_fld_val = ""
+
+            # get EF rating and simulation number column
+            if self.tornado_sim_field_name.lower() in tornado_feature["properties"]:
+                sim_fld_val = int(
+                    tornado_feature["properties"][self.tornado_sim_field_name.lower()]
+                )
+            elif self.tornado_sim_field_name in tornado_feature["properties"]:
+                sim_fld_val = int(
+                    tornado_feature["properties"][self.tornado_sim_field_name]
+                )
+
+            if self.tornado_ef_field_name.lower() in tornado_feature["properties"]:
+                ef_fld_val = tornado_feature["properties"][
+                    self.tornado_ef_field_name.lower()
+                ]
+            elif self.tornado_ef_field_name in tornado_feature["properties"]:
+                ef_fld_val = tornado_feature["properties"][self.tornado_ef_field_name]
+
+            if sim_fld_val == "" or ef_fld_val == "":
+                print("unable to convert tornado simulation field value to integer")
+                sys.exit(0)
+
+            # assumes that the polygon is not a multipolygon
+            if ef_fld_val.lower() in ef_contents and tornado_feature["geometry"]:
+                tornado_features.append(tornado_feature)
+                sim_list.append(sim_fld_val)
+
+        return tornado_features, sim_list
+
+    @staticmethod
+    def get_link_intersections(line_list, poly_list):
+        """Intersections of the links with the tornado EF polygons, found with an STRtree over the polygons.
+
+        Args:
+            line_list (list): Link lines.
+            poly_list (list): Tornado EF polygons.
+
+        Returns:
+            list: (link index, polygon index, intersection length in meters, point in the intersection) tuples, in
+                link and polygon order.
+
+        """
+        intersections = []
+        if len(line_list) == 0 or len(poly_list) == 0:
+            return intersections
+
+        link_indices, poly_indices = STRtree(poly_list).query(
+            line_list, predicate="intersects"
+        )
+        for link, poly_index in sorted(zip(link_indices, poly_indices)):
+            poly = poly_list[poly_index]
+            intersection = poly.intersection(line_list[link])
+            # links only touching a polygon have no poles in it
+            if intersection.length <= 0:
+                continue
+
+            if isinstance(intersection, MultiLineString):
+                any_point = intersection.geoms[0].centroid
+            elif isinstance(intersection, LineString):
+                # also, random point can be possible by interpolate(0.5, normalized=True)
+                any_point = intersection.centroid
+            else:
+                any_point = poly.centroid
+
+            # check if any_point is in the polygon
+            if poly.contains(any_point) is False:
+                # this is very hardly happen but should be needed just in case
+                any_point = poly.centroid
+
+            # since this is a geographic, it has to be projected to meters to be calcuated
+            inter_length_meter = GeoUtil.calc_geog_distance_from_linestring(
+                intersection
+            )
+            intersections.append(
+                (int(link), int(poly_index), inter_length_meter, any_point)
+            )
+
+        return intersections
+
+    @staticmethod
+    def get_path_node_counts(graph, connection_list, first_node_list, nnode):
+        """How often each node is on the simple paths from a node to the first node of its network.
+
+        Args:
+            graph (obj): Reversed network graph.
+            connection_list (list): Nodes of each connected network.
+            first_node_list (list): First node of each connected network.
+            nnode (int): Number of nodes.
+
+        Returns:
+            obj: (nodes x nodes) scipy csr matrix, row i counts the nodes on the paths of node i.
+
+        """
+        rows = []
+        cols = []
+        for connection, first_node in zip(connection_list, first_node_list):
+            for node in connection:
+                for path in nx.all_simple_paths(graph, node, first_node):
+                    rows.extend([node] * len(path))
+                    cols.extend(path)
+
+        return csr_matrix((numpy.ones(len(rows)), (rows, cols)), shape=(nnode, nnode))
+
     """
     align coordinate values in a list as a single pair in order
     """
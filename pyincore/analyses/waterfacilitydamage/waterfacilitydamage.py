@@ -7,9 +7,7 @@
 Water Facility Damage
 """
 
-import concurrent.futures
 import random
-from itertools import repeat
 
 from pyincore import (
     BaseAnalysis,
@@ -66,61 +64,62 @@ class WaterFacilityDamage(BaseAnalysis):
             self, len(inventory_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(inventory_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(inventory_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
-
-        (ds_results, damage_results) = self.waterfacility_damage_concurrent_futures(
-            self.waterfacilityset_damage_analysis_bulk_input,
-            num_workers,
-            inventory_args,
-            repeat(hazard),
-            repeat(hazard_type),
-            repeat(hazard_dataset_id),
-        )
-
-        self.set_result_csv_data(
-            "result", ds_results, name=self.get_parameter("result_name")
-        )
-        self.set_result_json_data(
-            "metadata",
-            damage_results,
-            name=self.get_parameter("result_name") + "_additional_info",
-        )
-
-        return True
-
-    def waterfacility_damage_concurrent_futures(
-        self, function_name, parallel_processes, *args
-    ):
-        """Utilizes concurrent.future module.
+        inventory_args = self.get_chunks(num_workers, list(inventory_set))
 
-        Args:
-            function_name (function): The function to be parallelized.
-            parallel_processes (int): Number of workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
+        # Obtain the fragility key
+        fragility_key = self.get_parameter("fragility_key")
 
-        Returns:
-            list: A list of ordered dictionaries with water facility damage values
-            list: A list of ordered dictionaries with other water facility data/metadata
+        if fragility_key is None:
+            if hazard_type == "tsunami":
+                fragility_key = self.DEFAULT_TSU_FRAGILITY_KEY
+            elif hazard_type == "earthquake":
+                fragility_key = self.DEFAULT_EQ_FRAGILITY_KEY
+            else:
+                raise ValueError(
+                    "Hazard type other than Earthquake and Tsunami are not currently supported."
+                )
 
+            self.set_parameter("fragility_key", fragility_key)
 
-        """
-        output_ds = []
-        output_dmg = []
+        fragility_keys = [fragility_key]
+        if (
+            hazard_type == "earthquake"
+            and self.get_parameter("use_liquefaction") is True
+        ):
+            liquefaction_fragility_key = self.get_parameter(
+                "liquefaction_fragility_key"
+            )
+            if liquefaction_fragility_key is None:
+                liquefaction_fragility_key = self.DEFAULT_LIQ_FRAGILITY_KEY
+                self.set_parameter(
+                    "liquefaction_fragility_key", liquefaction_fragility_key
+                )
+            fragility_keys.append(liquefaction_fragility_key)
+        self.fragilitysvc.prefetch_dfr3_sets(
+            self.get_input_dataset("dfr3_mapping_set"), fragility_keys
+        )
 
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=parallel_processes
-        ) as executor:
-            for ret1, ret2 in executor.map(function_name, *args):
-                output_ds.extend(ret1)
-                output_dmg.extend(ret2)
+        result_format, info_format = self.get_result_formats()
+        self.set_result_batches(
+            self.map_parallel(
+                self.waterfacilityset_damage_analysis_bulk_input,
+                inventory_args,
+                num_workers,
+                hazard,
+                hazard_type,
+                hazard_dataset_id,
+            ),
+            [
+                ("result", self.get_parameter("result_name"), result_format),
+                (
+                    "metadata",
+                    self.get_parameter("result_name") + "_additional_info",
+                    info_format,
+                ),
+            ],
+        )
 
-        return output_ds, output_dmg
+        return True
 
     def waterfacilityset_damage_analysis_bulk_input(
         self, facilities, hazard, hazard_type, hazard_dataset_id
@@ -150,21 +149,8 @@ class WaterFacilityDamage(BaseAnalysis):
         liquefaction_prob = None
         loc = None
 
-        # Obtain the fragility key
         fragility_key = self.get_parameter("fragility_key")
 
-        if fragility_key is None:
-            if hazard_type == "tsunami":
-                fragility_key = self.DEFAULT_TSU_FRAGILITY_KEY
-            elif hazard_type == "earthquake":
-                fragility_key = self.DEFAULT_EQ_FRAGILITY_KEY
-            else:
-                raise ValueError(
-                    "Hazard type other than Earthquake and Tsunami are not currently supported."
-                )
-
-            self.set_parameter("fragility_key", fragility_key)
-
         # Obtain the fragility set
         fragility_sets = self.fragilitysvc.match_inventory(
             self.get_input_dataset("dfr3_mapping_set"), facilities, fragility_key
@@ -444,6 +430,19 @@ class WaterFacilityDamage(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs, csv (default), jsonl or parquet. With csv the "
+                                   "additional info is written as json.",
+                    "type": str,
+                },
             ],
             "input_hazards": [
                 {
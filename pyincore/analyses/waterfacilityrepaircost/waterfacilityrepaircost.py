@@ -4,8 +4,6 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import concurrent.futures
-
 from pyincore import AnalysisUtil
 from pyincore import BaseAnalysis
 
@@ -50,17 +48,13 @@ class WaterFacilityRepairCost(BaseAnalysis):
             self, len(wf_set), user_defined_cpu
         )
 
-        avg_bulk_input_size = int(len(wf_set) / num_workers)
-        inventory_args = []
-        count = 0
-        inventory_list = list(wf_set)
-        while count < len(inventory_list):
-            inventory_args.append(inventory_list[count : count + avg_bulk_input_size])
-            count += avg_bulk_input_size
+        inventory_args = self.get_chunks(num_workers, list(wf_set))
 
-        repair_costs = self.wf_repair_cost_concurrent_future(
-            self.wf_repair_cost_bulk_input, num_workers, inventory_args
-        )
+        repair_costs = []
+        for ret in self.map_parallel(
+            self.wf_repair_cost_bulk_input, inventory_args, num_workers
+        ):
+            repair_costs.extend(ret)
         self.set_result_csv_data(
             "result",
             repair_costs,
@@ -69,28 +63,6 @@ class WaterFacilityRepairCost(BaseAnalysis):
 
         return True
 
-    def wf_repair_cost_concurrent_future(self, function_name, num_workers, *args):
-        """Utilizes concurrent.future module.
-
-        Args:
-            function_name (function): The function to be parallelized.
-            num_workers (int): Maximum number workers in parallelization.
-            *args: All the arguments in order to pass into parameter function_name.
-
-        Returns:
-            list: A list of ordered dictionaries with water facility repair cost values and other data/metadata.
-
-        """
-
-        output = []
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=num_workers
-        ) as executor:
-            for ret1 in executor.map(function_name, *args):
-                output.extend(ret1)
-
-        return output
-
     def wf_repair_cost_bulk_input(self, water_facilities):
         """Run analysis for multiple water facilities.
 
@@ -157,6 +129,12 @@ class WaterFacilityRepairCost(BaseAnalysis):
                     "description": "If using parallel execution, the number of cpus to request. Default is 1.",
                     "type": int,
                 },
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend, process (default), thread or serial.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
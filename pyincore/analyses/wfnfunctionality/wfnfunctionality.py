@@ -4,14 +4,18 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import copy
 import numpy as np
 import pandas as pd
-import networkx as nx
 
 from typing import List
-from pyincore import BaseAnalysis, NetworkDataset, NetworkUtil
-from pyincore.analyses.wfnfunctionality.wfnfunctionalityutil import WfnFunctionalityUtil
+from pyincore import (
+    AnalysisUtil,
+    BaseAnalysis,
+    NetworkDataset,
+    NetworkReachability,
+    NetworkUtil,
+    SampleStates,
+)
 
 
 class WfnFunctionality(BaseAnalysis):
@@ -63,30 +67,14 @@ class WfnFunctionality(BaseAnalysis):
         # Get water facility damage states
         wf_dmg_fs = self.get_input_dataset(
             "wf_sample_failure_state"
-        ).get_dataframe_from_csv()
-        wf_sample_df = pd.DataFrame(
-            np.array(
-                [
-                    np.array(wf_dmg_fs.failure.values[i].split(",")).astype("int")
-                    for i in np.arange(wf_dmg_fs.shape[0])
-                ]
-            ),
-            index=wf_dmg_fs.guid.values,
-        )
+        ).get_sample_states()
+        wf_sample_df = pd.DataFrame(wf_dmg_fs.to_values(), index=wf_dmg_fs.ids)
 
         # Get pipeline damage states
         pp_dmg_fs = self.get_input_dataset(
             "pp_sample_failure_state"
-        ).get_dataframe_from_csv()
-        pp_sample_df = pd.DataFrame(
-            np.array(
-                [
-                    np.array(pp_dmg_fs.failure.values[i].split(",")).astype("int")
-                    for i in np.arange(pp_dmg_fs.shape[0])
-                ]
-            ),
-            index=pp_dmg_fs.guid.values,
-        )
+        ).get_sample_states()
+        pp_sample_df = pd.DataFrame(pp_dmg_fs.to_values(), index=pp_dmg_fs.ids)
 
         # Get the sample number
         num_samples = wf_sample_df.shape[1]
@@ -113,6 +101,16 @@ class WfnFunctionality(BaseAnalysis):
             set(list(G_wfn.nodes)) - set(tank_nodes) - set(pumpstation_nodes)
         )
 
+        user_defined_cpu = 1
+        if (
+            not self.get_parameter("num_cpu") is None
+            and self.get_parameter("num_cpu") > 0
+        ):
+            user_defined_cpu = self.get_parameter("num_cpu")
+        num_workers = AnalysisUtil.determine_parallelism_locally(
+            self, num_samples, user_defined_cpu
+        )
+
         (fs_results, fp_results) = self.wfn_functionality(
             distribution_nodes,
             pumpstation_nodes,
@@ -121,13 +119,17 @@ class WfnFunctionality(BaseAnalysis):
             wf_sample_df1,
             pp_sample_df1,
             G_wfn,
+            num_workers,
         )
 
-        self.set_result_csv_data(
+        sample_state_format = self.get_parameter("sample_state_format")
+        if sample_state_format is None:
+            sample_state_format = "csv"
+        self.set_result_sample_states(
             "sample_failure_state",
             fs_results,
             name=self.get_parameter("result_name") + "_failure_state",
-            source="dataframe",
+            sample_format=sample_state_format,
         )
         self.set_result_csv_data(
             "failure_probability",
@@ -147,6 +149,7 @@ class WfnFunctionality(BaseAnalysis):
         wf_sample_df1,
         pp_sample_df1,
         G_wfn,
+        num_workers=1,
     ):
         """
         Run Water facility network functionality analysis.
@@ -159,36 +162,35 @@ class WfnFunctionality(BaseAnalysis):
             wf_sample_df1 (dataframe): water facility mcs failure sample dataframe
             pp_sample_df1 (dataframe): pipeline mcs failure sample dataframe
             G_wfn (networkx object): constructed network
+            num_workers (int): number of processes the samples are split across
 
         Returns:
-            fs_results (list): A list of dictionary with id/guid and failure state for N samples
+            fs_results (obj): SampleStates with the guid and failure state for N samples
             fp_results (list): A list dictionary with failure probability and other data/metadata.
 
         """
 
-        # a distance of M denotes disconnection
-        M = 9999
-
+        # a distribution node is functional if a pump station reaches it without passing a failed facility or pipe
+        reachability = NetworkReachability(G_wfn)
+        failed_nodes = reachability.node_failure_matrix(
+            wf_sample_df1["nodenwid"].values, wf_sample_df1[sampcols].to_numpy()
+        )
+        failed_edges = reachability.edge_failure_matrix(
+            list(zip(pp_sample_df1["fromnode"], pp_sample_df1["tonode"])),
+            pp_sample_df1[sampcols].to_numpy(),
+        )
         func_wf_df = pd.DataFrame(
-            np.zeros((len(distribution_nodes), num_samples)),
+            reachability.reachable_samples(
+                pumpstation_nodes,
+                distribution_nodes,
+                failed_nodes=failed_nodes,
+                failed_edges=failed_edges,
+                num_workers=num_workers,
+            ),
             index=distribution_nodes,
             columns=sampcols,
         )
 
-        for si, scol in enumerate(sampcols):
-            nodestate_wfn = wf_sample_df1.loc[:, ["nodenwid", scol]]
-            linkstate_wfn = pp_sample_df1.loc[:, ["fromnode", "tonode", scol]]
-            badlinks_wfn = WfnFunctionalityUtil.get_bad_edges(
-                G_wfn, nodestate_wfn, linkstate_wfn, scol
-            )
-            badlinkdict_wfn = {k: {"weight": M} for k in badlinks_wfn}
-            G1_wfn = copy.deepcopy(G_wfn)
-            nx.set_edge_attributes(G1_wfn, badlinkdict_wfn)
-            res_ep = WfnFunctionalityUtil.network_shortest_paths(
-                G1_wfn, pumpstation_nodes, distribution_nodes
-            )
-            func_wf_df.loc[distribution_nodes, scol] = (res_ep < M) * 1
-
         # Use nodenwid index to get its guid
         func_wf_df.index = func_wf_df.index.map(np.int64)
 
@@ -202,10 +204,9 @@ class WfnFunctionality(BaseAnalysis):
         fp_temp = fs_temp.copy(deep=True)
 
         # shape the dataframe into failure probability and failure samples
-        fs_temp["failure"] = fs_temp.astype(str).apply(",".join, axis=1)
-        fs_results = fs_temp.filter(["failure"])
-        fs_results.reset_index(inplace=True)
-        fs_results = fs_results.rename(columns={"index": "guid"})
+        fs_results = SampleStates(
+            fs_temp.index, fs_temp[sampcols].to_numpy(dtype=np.uint8)
+        )
 
         # calculate failure probability
         # count of 0s divided by sample size
@@ -245,6 +246,19 @@ class WfnFunctionality(BaseAnalysis):
                     "description": "List of pump station nodes within the network.",
                     "type": List[int],
                 },
+                {
+                    "id": "num_cpu",
+                    "required": False,
+                    "description": "If using parallel execution, the number of cpus to request. Default is 1.",
+                    "type": int,
+                },
+                {
+                    "id": "sample_state_format",
+                    "required": False,
+                    "description": "Format of the sample failure state output, csv (default) or npy. npy writes a state matrix "
+                    "with a _index.json file next to it, read them with Dataset.get_sample_states.",
+                    "type": str,
+                },
             ],
             "input_datasets": [
                 {
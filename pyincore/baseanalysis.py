@@ -5,6 +5,13 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 # TODO: exception handling for validation and set methods
+import collections
+import concurrent.futures
+import contextlib
+import decimal
+import functools
+import math
+
 from pyincore import (
     DataService,
     AnalysisUtil,
@@ -15,8 +22,23 @@ from pyincore import (
     Flood,
 )
 from pyincore.dataset import Dataset
+from pyincore.utils.resultsink import ResultSink, MemoryResultSink
 import typing
 
+# analysis and shared arguments of a worker process, shipped once by the pool initializer
+_worker_analysis = None
+_worker_shared_args = ()
+
+
+def _init_worker(analysis, shared_args):
+    global _worker_analysis, _worker_shared_args
+    _worker_analysis = analysis
+    _worker_shared_args = shared_args
+
+
+def _run_worker_chunk(function_name, *chunk):
+    return getattr(_worker_analysis, function_name)(*chunk, *_worker_shared_args)
+
 
 class BaseAnalysis:
     """Superclass that defines the specification for an IN-CORE analysis.
@@ -28,10 +50,16 @@ class BaseAnalysis:
 
     """
 
+    PARALLEL_BACKENDS = ["process", "thread", "serial"]
+    # chunks per worker, smaller chunks keep workers busy when some chunks take longer
+    CHUNKS_PER_WORKER = 4
+
     def __init__(self, incore_client):
         self.spec = self.get_spec()
         self.client = incore_client
         self.data_service = DataService(self.client)
+        # keep results in memory for the next analysis, see set_in_memory_outputs
+        self.in_memory_outputs = False
 
         # initialize parameters, input_datasets, output_datasets, etc
         self.parameters = {}
@@ -235,6 +263,19 @@ class BaseAnalysis:
             # TODO handle error message
             return False
 
+    def set_in_memory_outputs(self, in_memory=True):
+        """Keep the csv, jsonl, parquet and sample state outputs in memory instead of writing them to files.
+
+        An output passed to set_input_dataset of another analysis is read from memory. Its file is only written on
+        Dataset.export, when a reader needs a file path, or if the output is larger than MAX_IN_MEMORY_DATASET_SIZE.
+        Json outputs and csv outputs that store their index are still written to files.
+
+        Args:
+            in_memory (bool): Whether outputs are kept in memory.
+
+        """
+        self.in_memory_outputs = in_memory
+
     @staticmethod
     def validate_parameter_nested(parameter, parameter_spec):
         is_valid = True
@@ -397,13 +438,39 @@ class BaseAnalysis:
         dataset_type = self.output_datasets[result_id]["spec"]["type"]
         dataset = None
 
-        if source == "file":
+        if self.in_memory_outputs and source in ["file", "dataframe"] and not index:
+            dataset = Dataset.from_memory(result_data, name, dataset_type)
+        elif source == "file":
             dataset = Dataset.from_csv_data(result_data, name, dataset_type)
         elif source == "dataframe":
             dataset = Dataset.from_dataframe(result_data, name, dataset_type, index)
 
         self.set_output_dataset(result_id, dataset)
 
+    def set_result_sample_states(
+        self, result_id, sample_states, name, sample_format="csv"
+    ):
+        if name is None:
+            name = self.spec["name"] + "-result"
+
+        # csv keeps the comma joined sample strings for compatibility
+        if sample_format == "csv":
+            self.set_result_csv_data(
+                result_id, sample_states.to_dataframe(), name, source="dataframe"
+            )
+            return
+
+        if not name.endswith(".npy"):
+            name = name + ".npy"
+
+        dataset_type = self.output_datasets[result_id]["spec"]["type"]
+        if self.in_memory_outputs:
+            dataset = Dataset.from_memory(sample_states, name, dataset_type)
+        else:
+            dataset = Dataset.from_sample_states(sample_states, name, dataset_type)
+
+        self.set_output_dataset(result_id, dataset)
+
     def set_result_json_data(self, result_id, result_data, name, source="file"):
         if name is None:
             name = self.spec["name"] + "-result"
@@ -418,6 +485,200 @@ class BaseAnalysis:
 
         self.set_output_dataset(result_id, dataset)
 
+    def get_result_sink(self, result_id, name, result_format="csv"):
+        """Opens an incremental writer for a result; the output dataset is set once the sink is closed.
+
+        With in-memory outputs the results are collected into an in-memory dataset instead, except for json.
+
+        Args:
+            result_id (str): Output dataset id.
+            name (str): File name, the extension of the format is added if missing.
+            result_format (str): csv, json, jsonl or parquet, see ResultSink.
+
+        Returns:
+            obj: ResultSink.
+
+        """
+        if name is None:
+            name = self.spec["name"] + "-result"
+
+        extension = ResultSink.get_extension(result_format)
+        if not name.endswith(extension):
+            name = name + extension
+
+        dataset_type = self.output_datasets[result_id]["spec"]["type"]
+        if self.in_memory_outputs and result_format != "json":
+            return MemoryResultSink(
+                on_close=lambda results: self.set_output_dataset(
+                    result_id, Dataset.from_memory(results, name, dataset_type)
+                )
+            )
+        return ResultSink(
+            name,
+            result_format,
+            on_close=lambda file_path: self.set_output_dataset(
+                result_id, Dataset.from_file(file_path, dataset_type)
+            ),
+        )
+
+    def set_result_batches(self, batches, results):
+        """Writes the result batches of workers to their outputs as the batches arrive, without collecting them.
+
+        Args:
+            batches (iterable): A tuple per worker batch with a list of result dicts per output, e.g. the
+                (ds_results, damage_results) of a bulk input function.
+            results (list): (result_id, name, result_format) of each output, in the order of the batch tuples.
+
+        """
+        with contextlib.ExitStack() as stack:
+            sinks = [
+                stack.enter_context(self.get_result_sink(*result)) for result in results
+            ]
+            for batch in batches:
+                for sink, result_data in zip(sinks, batch):
+                    sink.write(result_data)
+
+    def get_chunks(self, num_workers, *sequences, chunk_size=None):
+        """Splits sequences into chunks for map_parallel, the same slices of every sequence go to one chunk.
+
+        Args:
+            num_workers (int): Number of workers in parallelization.
+            *sequences: Sequences of equal length, e.g. the inventory list and a seed per inventory item.
+            chunk_size (int): Items per chunk. Defaults to CHUNKS_PER_WORKER chunks per worker, or a single chunk
+                with one worker.
+
+        Returns:
+            list: A tuple of slices per chunk, in order.
+
+        """
+        num_items = len(sequences[0])
+        if num_items == 0:
+            return []
+        if chunk_size is None:
+            num_chunks = (
+                1 if num_workers <= 1 else num_workers * BaseAnalysis.CHUNKS_PER_WORKER
+            )
+            chunk_size = math.ceil(num_items / num_chunks)
+
+        return [
+            tuple(sequence[start : start + chunk_size] for sequence in sequences)
+            for start in range(0, num_items, chunk_size)
+        ]
+
+    def get_parallel_backend(self):
+        """Get the parallel backend of the analysis, the parallel_backend parameter if the analysis has one.
+
+        Returns:
+            str: process (default), thread or serial.
+
+        """
+        backend = None
+        if "parallel_backend" in self.parameters:
+            backend = self.get_parameter("parallel_backend")
+        if backend is None:
+            backend = "process"
+        if backend not in BaseAnalysis.PARALLEL_BACKENDS:
+            raise ValueError(
+                "Unsupported parallel backend "
+                + str(backend)
+                + ", use one of "
+                + ", ".join(BaseAnalysis.PARALLEL_BACKENDS)
+            )
+        return backend
+
+    def get_result_formats(self):
+        """Get the result formats of the analysis, from the result_format parameter if the analysis has one.
+
+        Csv results keep their additional info in json, the other formats write both outputs in that format.
+
+        Returns:
+            tuple: Format of the results and format of their additional info, csv (default), jsonl or parquet.
+
+        """
+        result_format = None
+        if "result_format" in self.parameters:
+            result_format = self.get_parameter("result_format")
+        if result_format is None:
+            result_format = "csv"
+        if result_format not in ResultSink.FORMATS:
+            raise ValueError(
+                "Unsupported result format "
+                + str(result_format)
+                + ", use one of "
+                + ", ".join(ResultSink.FORMATS)
+            )
+        return result_format, "json" if result_format == "csv" else result_format
+
+    def map_parallel(
+        self,
+        function,
+        chunks,
+        num_workers,
+        *shared_args,
+        max_pending=None,
+        backend=None
+    ):
+        """Maps a method of the analysis over chunks in parallel and yields the results in the order of the chunks.
+
+        Worker processes receive the analysis and the shared arguments once, when they start, and only the chunk
+        with each task. Chunks are handed out as workers become free.
+
+        Args:
+            function (function): A method of this analysis, called with the items of a chunk and the shared
+                arguments.
+            chunks (iterable): Tuples of arguments of each chunk, e.g. from get_chunks. Read lazily.
+            num_workers (int): Number of workers in parallelization.
+            *shared_args: Arguments passed to every chunk after the chunk arguments, e.g. the hazard.
+            max_pending (int): Maximum number of chunks submitted and not yet yielded, all chunks by default.
+            backend (str): process, thread or serial, the backend of get_parallel_backend by default.
+
+        Yields:
+            obj: Result of the function for each chunk, in the order of the chunks.
+
+        """
+        if backend is None:
+            backend = self.get_parallel_backend()
+        if backend == "serial":
+            for chunk in chunks:
+                yield function(*chunk, *shared_args)
+            return
+
+        if backend == "thread":
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=num_workers)
+            # decimal contexts are per thread, the threads round damage like this one
+            task = functools.partial(
+                BaseAnalysis._run_chunk,
+                decimal.getcontext().copy(),
+                function,
+                shared_args,
+            )
+        else:
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_worker,
+                initargs=(self, shared_args),
+            )
+            task = functools.partial(_run_worker_chunk, function.__name__)
+
+        pending = collections.deque()
+        with executor:
+            try:
+                for chunk in chunks:
+                    if max_pending is not None and len(pending) >= max_pending:
+                        yield pending.popleft().result()
+                    pending.append(executor.submit(task, *chunk))
+                while len(pending) > 0:
+                    yield pending.popleft().result()
+            finally:
+                # a failed chunk or an abandoned generator drops the chunks not started yet
+                for future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def _run_chunk(context, function, shared_args, *chunk):
+        with decimal.localcontext(context):
+            return function(*chunk, *shared_args)
+
     def run_analysis(self):
         """Validates and runs the analysis."""
         for dataset_spec in self.spec["input_datasets"]:
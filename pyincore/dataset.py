@@ -11,13 +11,21 @@ import json
 import os
 
 import fiona
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 import rasterio
 import warnings
+from rasterio.windows import Window
 from pyincore import DataService
+from pyincore.models.samplestates import SampleStates
+from pyincore.utils.resultsink import ResultSink
 from pathlib import Path
 import shutil
+import sys
+from decimal import Decimal
+
+from pyincore import globals as pyglobals
 
 
 warnings.filterwarnings("ignore", "", UserWarning)
@@ -44,8 +52,12 @@ class Dataset:
         self.id = metadata["id"]
         self.file_descriptors = metadata["fileDescriptors"]
         self.local_file_path = None
+        # result dicts, DataFrame, pyarrow Table or SampleStates of a dataset held in memory, see from_memory
+        self.data = None
 
         self.readers = {}
+        # raster blocks already read from disk, keyed by (block row, block col)
+        self.raster_blocks = {}
 
     @classmethod
     def from_data_service(cls, id: str, data_service: DataService):
@@ -133,6 +145,150 @@ class Dataset:
         dataframe.to_csv(name, index=index)
         return Dataset.from_file(name, data_type)
 
+    @classmethod
+    def from_memory(cls, data, name, data_type):
+        """Get Dataset from data held in memory, so the next analysis reads it without a file round trip.
+
+        The file is only written on export, when a reader needs a file path, or right away if the data is larger
+        than MAX_IN_MEMORY_DATASET_SIZE. Result dicts are kept as they are, the csv readers return the values their
+        csv file would hold and the DataFrame readers convert them like read_csv.
+
+        Args:
+            data (obj): Panda's DataFrame, pyarrow Table, SampleStates or a list of result dicts.
+            name (str): Filename on export, the extension picks the format (csv, jsonl, parquet or npy).
+            data_type (str): Incore data type, e.g. incore:xxxx or ergo:xxxx
+
+        Returns:
+            obj: Dataset in memory.
+
+        """
+        metadata = {
+            "dataType": data_type,
+            "format": "",
+            "fileDescriptors": [],
+            "id": name,
+        }
+        instance = cls(metadata)
+        instance.data = data
+        if Dataset._get_memory_size(data) > pyglobals.MAX_IN_MEMORY_DATASET_SIZE:
+            instance.export()
+            instance.data = None
+        return instance
+
+    @staticmethod
+    def get_dataframe_from_results(results):
+        """DataFrame of result dicts with the column types read_csv would give their csv file.
+
+        Decimal and numpy values become numbers, columns of numbers, numeric strings and missing values become
+        numeric columns, empty strings and None are missing.
+
+        Args:
+            results (list): Result dicts.
+
+        Returns:
+            obj: Panda's DataFrame.
+
+        """
+        dataframe = pd.DataFrame.from_records(results)
+        for column in dataframe.columns[dataframe.dtypes == object]:
+            values = dataframe[column].map(
+                lambda value: ResultSink.get_plain_value(value)
+                if isinstance(value, (Decimal, np.generic))
+                else value
+            )
+            missing = values.isna() | (values == "")
+            numeric = pd.to_numeric(values.mask(missing), errors="coerce")
+            if (numeric.notna() | missing).all():
+                dataframe[column] = numeric
+            else:
+                dataframe[column] = values.mask(missing)
+        return dataframe
+
+    @staticmethod
+    def _get_memory_size(data):
+        if isinstance(data, list):
+            # estimate of the dicts and their values, the keys are shared by every result
+            return sum(
+                sys.getsizeof(result)
+                + sum(sys.getsizeof(value) for value in result.values())
+                for result in data
+            )
+        if isinstance(data, pd.DataFrame):
+            return int(data.memory_usage(deep=True).sum())
+        if isinstance(data, SampleStates):
+            return data.states.nbytes
+        return data.nbytes
+
+    def export(self, file_path=None):
+        """Write an in-memory dataset to a file, it is still read from memory afterwards.
+
+        Args:
+            file_path (str): File path, the name the dataset was created with by default.
+
+        Returns:
+            str: File path of the dataset.
+
+        """
+        if self.data is None:
+            return self.local_file_path
+        if file_path is None:
+            file_path = self.id
+
+        if isinstance(self.data, SampleStates):
+            file_path = self.data.save(file_path)
+            self._set_sample_states_files(file_path)
+        elif isinstance(self.data, list):
+            # the same file the analysis would have written
+            result_format = "csv"
+            for extension_format in ["jsonl", "parquet"]:
+                if file_path.endswith(ResultSink.get_extension(extension_format)):
+                    result_format = extension_format
+            with ResultSink(file_path, result_format) as sink:
+                sink.write(self.data)
+        elif file_path.endswith(".parquet"):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError(
+                    "Parquet results require pyarrow, install it with: pip install pyarrow"
+                )
+            table = self.data
+            if isinstance(table, pd.DataFrame):
+                table = pyarrow.Table.from_pandas(table, preserve_index=False)
+            pyarrow.parquet.write_table(table, file_path)
+        else:
+            dataframe = self._get_memory_dataframe()
+            if file_path.endswith(".jsonl"):
+                dataframe.to_json(file_path, orient="records", lines=True)
+            else:
+                # quoted like the csv files of ResultSink
+                dataframe.to_csv(
+                    file_path, index=False, quoting=csv.QUOTE_ALL, lineterminator="\n"
+                )
+
+        self.local_file_path = file_path
+        return file_path
+
+    def is_in_memory(self):
+        """Whether the dataset is read from memory, see from_memory.
+
+        Returns:
+            bool: True if the dataset holds its data in memory.
+
+        """
+        return self.data is not None
+
+    def _get_memory_dataframe(self):
+        if isinstance(self.data, list):
+            return Dataset.get_dataframe_from_results(self.data)
+        if isinstance(self.data, SampleStates):
+            return self.data.to_dataframe()
+        if isinstance(self.data, pd.DataFrame):
+            # share the columns only if pandas copies them on write, analyses may change their inputs in place
+            return self.data.copy(deep=pd.options.mode.copy_on_write is not True)
+        return self.data.to_pandas()
+
     @classmethod
     def from_csv_data(cls, result_data, name, data_type):
         """Get Dataset from CSV data.
@@ -146,14 +302,8 @@ class Dataset:
             obj: Dataset from file.
 
         """
-        if len(result_data) > 0:
-            with open(name, "w") as csv_file:
-                # Write the parent ID at the top of the result data, if it is given
-                writer = csv.DictWriter(
-                    csv_file, dialect="unix", fieldnames=result_data[0].keys()
-                )
-                writer.writeheader()
-                writer.writerows(result_data)
+        with ResultSink(name, "csv") as sink:
+            sink.write(result_data)
         return Dataset.from_file(name, data_type)
 
     @classmethod
@@ -169,12 +319,51 @@ class Dataset:
             obj: Dataset from file.
 
         """
-        if len(result_data) > 0:
+        if isinstance(result_data, list):
+            # written item by item, without building the whole document in memory
+            with ResultSink(name, "json") as sink:
+                sink.write(result_data)
+        elif len(result_data) > 0:
             with open(name, "w") as json_file:
                 json_dumps_str = json.dumps(result_data, indent=4)
                 json_file.write(json_dumps_str)
         return Dataset.from_file(name, data_type)
 
+    @classmethod
+    def from_sample_states(cls, sample_states: SampleStates, name, data_type):
+        """Get Dataset from Monte Carlo sample states, saved as a .npy state matrix with a json index.
+
+        The dataset is the .npy file, the <name>_index.json file with the ids and labels is written next to it. Both
+        files are recorded in the file descriptors of the dataset.
+
+        Args:
+            sample_states (obj): SampleStates with the ids, state matrix and labels.
+            name (str): A .npy filename.
+            data_type (str): Incore data type, e.g. incore:sampleFailureState
+
+        Returns:
+            obj: Dataset from file.
+
+        """
+        file_path = sample_states.save(name)
+        dataset = Dataset.from_file(file_path, data_type)
+        dataset._set_sample_states_files(file_path)
+        return dataset
+
+    def _set_sample_states_files(self, file_path):
+        # the state matrix is only readable with its index, they are copied and uploaded together
+        self.file_descriptors[:] = [
+            {
+                "filename": os.path.basename(path),
+                "mimeType": mime_type,
+                "size": os.path.getsize(path),
+            }
+            for path, mime_type in [
+                (file_path, "application/octet-stream"),
+                (SampleStates.get_index_path(file_path), "application/json"),
+            ]
+        ]
+
     def cache_files(self, data_service: DataService):
         """Get the set of fragility data, curves.
 
@@ -216,6 +405,13 @@ class Dataset:
 
         """
         if "json" not in self.readers:
+            # in-memory, newline delimited json and parquet results are read as the list of results
+            if self.data is not None or self.get_result_format() in [
+                "jsonl",
+                "parquet",
+            ]:
+                return list(self.get_result_reader())
+
             filename = self.local_file_path
             if os.path.isdir(filename):
                 files = glob.glob(filename + "/*.json")
@@ -227,14 +423,11 @@ class Dataset:
 
         return self.readers["json"]
 
-    def get_raster_value(self, x, y):
-        """Utility method for reading different standard file formats: raster value.
+    def get_raster_reader(self):
+        """Utility method for reading different standard file formats: raster reader.
 
-        Args:
-            x (float): X coordinate.
-            y (float): Y coordinate.
         Returns:
-            numpy.array: Hazard values.
+            obj: A rasterio dataset reader. It is opened once and kept open for later reads.
 
         """
         if "raster" not in self.readers:
@@ -245,15 +438,91 @@ class Dataset:
                     filename = files[0]
             self.readers["raster"] = rasterio.open(filename)
 
-        hazard = self.readers["raster"]
-        row, col = hazard.index(x, y)
-        # assume that there is only 1 band
-        data = hazard.read(1)
-        xmin, ymin, xmax, ymax = hazard.bounds
-        if x < xmin or x > xmax or y < ymin or y > ymax:
+        return self.readers["raster"]
+
+    def get_raster_value(self, x, y):
+        """Utility method for reading different standard file formats: raster value.
+
+        Args:
+            x (float): X coordinate.
+            y (float): Y coordinate.
+        Returns:
+            numpy.array: Hazard values.
+
+        """
+        value = self.get_raster_values([x], [y])[0]
+        if np.isnan(value):
             return None
         # TODO check threshold
-        return float(data[row, col])
+        return float(value)
+
+    def get_raster_values(self, xs, ys):
+        """Sample the first raster band at many points in one call.
+
+        Pixel rows and columns are computed for all points at once, and only the raster blocks that contain
+        at least one point are read from disk. Blocks are cached on the dataset, so repeated calls that hit the
+        same area of the raster do not read it again.
+
+        Args:
+            xs (list, numpy.array): X coordinates.
+            ys (list, numpy.array): Y coordinates.
+
+        Returns:
+            numpy.array: Raster values as floats, NaN for points outside the raster bounds.
+
+        """
+        raster = self.get_raster_reader()
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        values = np.full(xs.shape, np.nan)
+
+        xmin, ymin, xmax, ymax = raster.bounds
+        inside = (xs >= xmin) & (xs <= xmax) & (ys >= ymin) & (ys <= ymax)
+        if not inside.any():
+            return values
+
+        rows, cols = rasterio.transform.rowcol(raster.transform, xs[inside], ys[inside])
+        # points lying exactly on the right or bottom edge belong to the last pixel
+        rows = np.clip(np.asarray(rows), 0, raster.height - 1)
+        cols = np.clip(np.asarray(cols), 0, raster.width - 1)
+
+        # assume that there is only 1 band
+        block_height, block_width = raster.block_shapes[0]
+        block_rows = rows // block_height
+        block_cols = cols // block_width
+        block_keys = block_rows * (raster.width // block_width + 1) + block_cols
+
+        sampled = np.empty(rows.shape)
+        for block_key in np.unique(block_keys):
+            in_block = block_keys == block_key
+            block_row = int(block_rows[in_block][0])
+            block_col = int(block_cols[in_block][0])
+            block = self._get_raster_block(
+                raster, block_row, block_col, block_height, block_width
+            )
+            sampled[in_block] = block[
+                rows[in_block] - block_row * block_height,
+                cols[in_block] - block_col * block_width,
+            ]
+
+        values[inside] = sampled
+        return values
+
+    def _get_raster_block(
+        self, raster, block_row, block_col, block_height, block_width
+    ):
+        """Read one block of the first raster band, or return it from the block cache."""
+        key = (block_row, block_col)
+        if key not in self.raster_blocks:
+            window = Window(
+                block_col * block_width,
+                block_row * block_height,
+                min(block_width, raster.width - block_col * block_width),
+                min(block_height, raster.height - block_row * block_height),
+            )
+            self.raster_blocks[key] = raster.read(1, window=window)
+
+        return self.raster_blocks[key]
 
     def get_csv_reader(self):
         """Utility method for reading different standard file formats: csv reader.
@@ -263,6 +532,22 @@ class Dataset:
 
         """
         if "csv" not in self.readers:
+            if isinstance(self.data, list):
+                return self._get_memory_csv_dicts()
+
+            # in-memory, newline delimited json and parquet results are read in their csv representation
+            if self.data is not None or self.get_result_format() in [
+                "jsonl",
+                "parquet",
+            ]:
+                return (
+                    {
+                        key: "" if value is None else str(value)
+                        for key, value in result.items()
+                    }
+                    for result in self.get_result_reader()
+                )
+
             filename = self.local_file_path
             if os.path.isdir(filename):
                 files = glob.glob(filename + "/*.csv")
@@ -282,6 +567,9 @@ class Dataset:
 
         """
         if "csv" not in self.readers:
+            if self.data is not None:
+                return self._get_memory_rows()
+
             filename = self.local_file_path
             if os.path.isdir(filename):
                 files = glob.glob(filename + "/*.csv")
@@ -293,9 +581,43 @@ class Dataset:
 
         return self.readers["csv"]
 
+    def _get_memory_csv_keys(self):
+        return list(self.data[0].keys()) if len(self.data) > 0 else []
+
+    def _get_memory_csv_dicts(self):
+        keys = self._get_memory_csv_keys()
+        for row in self._get_memory_csv_rows(keys):
+            yield dict(zip(keys, row))
+
+    def _get_memory_csv_rows(self, keys):
+        # values as csv.DictWriter writes them, so they read back like the csv file
+        for result in self.data:
+            yield [
+                "" if result.get(key) is None else str(result.get(key)) for key in keys
+            ]
+
+    def _get_memory_rows(self):
+        if isinstance(self.data, list):
+            keys = self._get_memory_csv_keys()
+            if len(keys) > 0:
+                yield keys
+            yield from self._get_memory_csv_rows(keys)
+            return
+
+        dataframe = self._get_memory_dataframe()
+        yield [str(column) for column in dataframe.columns]
+        for row in dataframe.itertuples(index=False, name=None):
+            yield ["" if Dataset._is_missing(value) else str(value) for value in row]
+
+    @staticmethod
+    def _is_missing(value):
+        return value is None or (isinstance(value, float) and np.isnan(value))
+
     def get_file_path(self, type="csv"):
         """Utility method for reading different standard file formats: file path.
 
+        An in-memory dataset is exported first, for readers that need a file.
+
         Args:
             type (str): A file type.
 
@@ -303,6 +625,9 @@ class Dataset:
             str: File name and path.
 
         """
+        if self.data is not None and self.local_file_path is None:
+            self.export()
+
         filename = self.local_file_path
         if os.path.isdir(filename):
             files = glob.glob(filename + "/*." + type)
@@ -311,35 +636,254 @@ class Dataset:
 
         return filename
 
-    def get_dataframe_from_csv(self, low_memory=True, delimiter=None):
+    def get_result_format(self):
+        """Format of an analysis result dataset, see ResultSink.
+
+        Returns:
+            str: jsonl, parquet, csv or json, None for any other file and for in-memory datasets.
+
+        """
+        if self.data is not None:
+            return None
+        for result_format in ["jsonl", "parquet", "csv", "json"]:
+            filename = self.get_file_path(result_format)
+            if filename.endswith("." + result_format) and os.path.isfile(filename):
+                return result_format
+        return None
+
+    def get_result_reader(self, batch_size=10000):
+        """Utility method for reading different standard file formats: analysis results, one at a time.
+
+        Csv, newline delimited json and parquet results are read lazily, a json array is loaded whole. Values of csv
+        results are strings, like get_csv_reader returns them.
+
+        Args:
+            batch_size (int): Number of parquet rows read at a time.
+
+        Yields:
+            dict: The next result.
+
+        """
+        if isinstance(self.data, list):
+            for result in self.data:
+                yield {
+                    key: ResultSink.get_plain_value(value)
+                    if isinstance(value, (Decimal, np.generic))
+                    else value
+                    for key, value in result.items()
+                }
+            return
+        if self.data is not None:
+            dataframe = self._get_memory_dataframe()
+            for start in range(0, len(dataframe), batch_size):
+                for result in dataframe[start : start + batch_size].to_dict(
+                    orient="records"
+                ):
+                    yield {
+                        key: None if Dataset._is_missing(value) else value
+                        for key, value in result.items()
+                    }
+            return
+
+        result_format = self.get_result_format()
+        if result_format is None:
+            raise ValueError(
+                "Dataset "
+                + str(self.id)
+                + " is not a csv, json, jsonl or parquet result"
+            )
+        filename = self.get_file_path(result_format)
+
+        if result_format == "csv":
+            with open(filename, "r") as f:
+                yield from csv.DictReader(f)
+        elif result_format == "json":
+            with open(filename, "r") as f:
+                yield from json.load(f)
+        elif result_format == "jsonl":
+            with open(filename, "r") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            for batch in Dataset._get_parquet_file(filename).iter_batches(batch_size):
+                yield from batch.to_pylist()
+
+    def iter_dataframes_from_results(self, chunk_size=10000):
+        """Utility method for reading different standard file formats: analysis results in chunks of DataFrames.
+
+        Only one chunk is held in memory at a time, except for json arrays which are loaded whole.
+
+        Args:
+            chunk_size (int): Number of results per chunk.
+
+        Yields:
+            obj: Panda's DataFrame of the next chunk of results.
+
+        """
+        if self.data is not None:
+            dataframe = self._get_memory_dataframe()
+            for start in range(0, len(dataframe), chunk_size):
+                yield dataframe[start : start + chunk_size].reset_index(drop=True)
+            return
+
+        result_format = self.get_result_format()
+        filename = self.get_file_path(result_format)
+        if result_format == "csv":
+            yield from pd.read_csv(filename, header="infer", chunksize=chunk_size)
+        elif result_format == "jsonl":
+            yield from pd.read_json(filename, lines=True, chunksize=chunk_size)
+        elif result_format == "parquet":
+            for batch in Dataset._get_parquet_file(filename).iter_batches(chunk_size):
+                yield batch.to_pandas()
+        else:
+            results = list(self.get_result_reader())
+            for start in range(0, len(results), chunk_size):
+                yield pd.DataFrame(results[start : start + chunk_size])
+
+    @staticmethod
+    def _get_parquet_file(filename):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "Parquet results require pyarrow, install it with: pip install pyarrow"
+            )
+        return pyarrow.parquet.ParquetFile(filename)
+
+    def get_sample_states(self, mmap_mode="r"):
+        """Utility method for reading different standard file formats: Monte Carlo sample states.
+
+        Args:
+            mmap_mode (str): Memory map mode of the state matrix of a .npy dataset, see numpy.load.
+
+        Returns:
+            obj: SampleStates with the ids, (items x samples) state matrix and labels. Csv sample datasets are parsed
+                into the same structure.
+
+        """
+        if isinstance(self.data, SampleStates):
+            return self.data
+        if self.data is not None:
+            return SampleStates.from_dataframe(self._get_memory_dataframe())
+
+        filename = self.get_file_path("npy")
+        if filename.endswith(".npy") and os.path.isfile(filename):
+            return SampleStates.load(filename, mmap_mode=mmap_mode)
+
+        return SampleStates.from_dataframe(
+            self.get_dataframe_from_csv(low_memory=False)
+        )
+
+    def iter_sample_states(self, chunk_size, labels=None, mmap_mode="r"):
+        """Utility method for reading different standard file formats: Monte Carlo sample states in chunks of items.
+
+        Only one chunk is held in memory at a time. Chunks of a .npy dataset are slices of the memory mapped state
+        matrix and chunks of a csv dataset are read with pandas chunked reader.
+
+        Args:
+            chunk_size (int): Number of items per chunk.
+            labels (list): Name of each state for csv datasets, collected per chunk if not provided.
+            mmap_mode (str): Memory map mode of the state matrix of a .npy dataset, see numpy.load.
+
+        Yields:
+            obj: SampleStates of the next chunk of items.
+
+        """
+        filename = None if self.data is not None else self.get_file_path("npy")
+        if isinstance(self.data, SampleStates) or (
+            filename is not None
+            and filename.endswith(".npy")
+            and os.path.isfile(filename)
+        ):
+            sample_states = (
+                self.data
+                if filename is None
+                else SampleStates.load(filename, mmap_mode=mmap_mode)
+            )
+            for start in range(0, len(sample_states.ids), chunk_size):
+                yield SampleStates(
+                    sample_states.ids[start : start + chunk_size],
+                    sample_states.states[start : start + chunk_size],
+                    sample_states.labels,
+                    sample_states.column,
+                    sample_states.id_column,
+                )
+            return
+
+        if self.data is not None:
+            for chunk in self.iter_dataframes_from_results(chunk_size):
+                yield SampleStates.from_dataframe(chunk, labels=labels)
+            return
+
+        filename = self.get_file_path("csv")
+        if os.path.isfile(filename):
+            for chunk in pd.read_csv(filename, header="infer", chunksize=chunk_size):
+                yield SampleStates.from_dataframe(chunk, labels=labels)
+
+    def get_dataframe_from_csv(self, low_memory=True, delimiter=None, as_text=False):
         """Utility method for reading different standard file formats: Pandas DataFrame from csv.
 
         Args:
             low_memory (bool): A flag to suppress warning. Pandas is guessing dtypes for each column
             if column dtype is not specified which is very memory demanding.
+            as_text (bool): Read every value as its csv text, missing values are empty strings. In-memory, newline
+                delimited json and parquet results are read in their csv representation, see get_csv_reader.
 
         Returns:
             obj: Panda's DataFrame.
 
         """
+        if as_text and (
+            self.data is not None or self.get_result_format() in ["jsonl", "parquet"]
+        ):
+            return pd.DataFrame(list(self.get_csv_reader()), dtype=str)
+
+        if self.data is not None:
+            return self._get_memory_dataframe()
+
+        # sample state datasets are read in their csv representation
+        if self.get_file_path("npy").endswith(".npy"):
+            return self.get_sample_states().to_dataframe()
+
+        if self.get_result_format() in ["jsonl", "parquet"]:
+            chunks = list(self.iter_dataframes_from_results())
+            return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
         filename = self.get_file_path("csv")
         df = pd.DataFrame()
         if os.path.isfile(filename):
-            df = pd.read_csv(
-                filename, header="infer", low_memory=low_memory, delimiter=delimiter
-            )
+            if as_text:
+                df = pd.read_csv(
+                    filename,
+                    header="infer",
+                    low_memory=low_memory,
+                    delimiter=delimiter,
+                    dtype=str,
+                    keep_default_na=False,
+                )
+            else:
+                df = pd.read_csv(
+                    filename,
+                    header="infer",
+                    low_memory=low_memory,
+                    delimiter=delimiter,
+                )
         return df
 
-    def get_dataframe_from_shapefile(self):
+    def get_dataframe_from_shapefile(self, ignore_geometry=False):
         """Utility method for reading different standard file formats: GeoDataFrame from shapefile.
 
+        Args:
+            ignore_geometry (bool): Read only the attributes into a DataFrame, much faster for large inventories.
+
         Returns:
-            obj: Geopanda's GeoDataFrame.
+            obj: Geopanda's GeoDataFrame, or Panda's DataFrame if the geometry is ignored.
 
         """
         # read shapefile directly by Geopandas.read_file()
         # It will preserve CRS information also
-        gdf = gpd.read_file(self.local_file_path)
+        gdf = gpd.read_file(self.local_file_path, ignore_geometry=ignore_geometry)
 
         return gdf
 
@@ -362,6 +906,7 @@ class Dataset:
     def close(self):
         for key in self.readers:
             self.readers[key].close()
+        self.raster_blocks = {}
 
     def __del__(self):
         self.close()
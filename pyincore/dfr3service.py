@@ -5,10 +5,21 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 
+import ast
+import json
+import operator
+import os
 import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 from typing import Dict, Optional
 
+import numpy
+import pandas as pd
+
 import pyincore.globals as pyglobals
 from pyincore.decorators import forbid_offline
 
@@ -21,6 +32,9 @@ from pyincore.utils import return_http_response
 
 logger = pyglobals.LOGGER
 
+# placeholder for inventory properties missing from the rule match cache key
+_MISSING = object()
+
 # add more types if needed
 known_types = {"java.lang.String": "str", "double": "float", "int": "int", "str": "str"}
 
@@ -37,6 +51,17 @@ known_operators = {
     "MATCHES": "",
 }
 
+# python equivalents of the comparison operators above
+COMPARISONS = {
+    "EQ": operator.eq,
+    "EQUALS": operator.eq,
+    "NEQUALS": operator.ne,
+    "GT": operator.gt,
+    "GE": operator.ge,
+    "LT": operator.lt,
+    "LE": operator.le,
+}
+
 
 class MappingSubject(object):
     def __init__(self):
@@ -64,8 +89,16 @@ class Dfr3Service:
 
     """
 
+    # maximum number of parsed dfr3 sets kept in memory per service
+    DFR3_SET_CACHE_SIZE = 512
+
+    # maximum number of concurrent requests when fetching dfr3 sets
+    MAX_FETCH_WORKERS = 8
+
     def __init__(self, client: IncoreClient):
         self.client = client
+        # parsed dfr3 set objects keyed by id; travels with the service when it is pickled to worker processes
+        self.dfr3_set_cache = OrderedDict()
         if self.client.internal:
             self.base_mapping_url = urljoin(
                 pyglobals.INCORE_INTERNAL_DFR3_API_URL, "dfr3/api/mappings/"
@@ -104,13 +137,23 @@ class Dfr3Service:
         """
         url = urljoin(self.base_dfr3_url, dfr3_id)
         r = self.client.delete(url, timeout=timeout, **kwargs)
+        response = return_http_response(r).json()
 
-        return return_http_response(r).json()
+        # the set is gone from the service, drop the copies cached by id
+        self.dfr3_set_cache.pop(dfr3_id, None)
+        cache_file = self._get_dfr3_cache_file(dfr3_id)
+        if cache_file is not None and os.path.isfile(cache_file):
+            os.remove(cache_file)
+
+        return response
 
     def batch_get_dfr3_set(self, dfr3_id_lists: list):
         """This method is intended to replace batch_get_dfr3_set in the future. It retrieve dfr3 sets
         from services using id and instantiate DFR3Curveset objects in bulk.
 
+        Sets already parsed by this service are reused, sets cached on disk are read locally and the
+        remaining unique ids are fetched concurrently.
+
         Args:
             dfr3_id_lists (list): A list of ids.
 
@@ -119,22 +162,130 @@ class Dfr3Service:
 
         """
         batch_dfr3_sets = {}
-        for id in dfr3_id_lists:
-            dfr3_set = self.get_dfr3_set(id)
-            instance = self.__class__.__name__
-            if instance == "FragilityService":
-                batch_dfr3_sets[id] = FragilityCurveSet(dfr3_set)
-            elif instance == "RepairService":
-                batch_dfr3_sets[id] = RepairCurveSet(dfr3_set)
-            elif instance == "RestorationService":
-                batch_dfr3_sets[id] = RestorationCurveSet(dfr3_set)
+        missing_ids = []
+        for id in dict.fromkeys(dfr3_id_lists):
+            if id in self.dfr3_set_cache:
+                self.dfr3_set_cache.move_to_end(id)
+                batch_dfr3_sets[id] = self.dfr3_set_cache[id]
             else:
-                raise ValueError(
-                    "Only fragility and repair services are currently supported"
+                missing_ids.append(id)
+
+        if len(missing_ids) > 1:
+            num_workers = min(self.MAX_FETCH_WORKERS, len(missing_ids))
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                dfr3_set_jsons = list(
+                    executor.map(self._get_cached_dfr3_set, missing_ids)
                 )
+        else:
+            dfr3_set_jsons = [self._get_cached_dfr3_set(id) for id in missing_ids]
+
+        for id, dfr3_set in zip(missing_ids, dfr3_set_jsons):
+            batch_dfr3_sets[id] = self._create_dfr3_set_object(dfr3_set)
+            self.dfr3_set_cache[id] = batch_dfr3_sets[id]
+            if len(self.dfr3_set_cache) > self.DFR3_SET_CACHE_SIZE:
+                self.dfr3_set_cache.popitem(last=False)
 
         return batch_dfr3_sets
 
+    def prefetch_dfr3_sets(
+        self, mapping: MappingSet, entry_keys: Optional[list] = None
+    ):
+        """Fetch the remote dfr3 sets of some entry keys of a mapping once, ahead of match_inventory. Analyses call
+        this in the parent process with the keys they match, so that worker processes receive the parsed sets with
+        the service cache instead of downloading them again.
+
+        Args:
+            mapping (obj): MappingSet Object that has the rules and entries.
+            entry_keys (None, list): Mapping entry keys to prefetch, None stands for the default key of the mapping.
+                All entry keys are prefetched if not provided, including retrofit keys the analysis may never match.
+
+        Returns:
+            dict: A dictionary of {"dfr3 set id": DFR3 curve set object}.
+
+        """
+        if entry_keys is not None:
+            entry_keys = [self._get_entry_key(mapping, key) for key in entry_keys]
+
+        dfr3_ids = []
+        for m in mapping.mappings:
+            for key, curve in m.entry.items():
+                if (entry_keys is None or key in entry_keys) and isinstance(curve, str):
+                    dfr3_ids.append(curve)
+
+        return self.batch_get_dfr3_set(dfr3_ids)
+
+    def clear_dfr3_set_cache(self):
+        """Clear the parsed dfr3 sets kept in memory by this service and the dfr3 set jsons cached on disk.
+
+        Cached sets are keyed by id. Sets cannot be changed on the service, only deleted, and delete_dfr3_set drops
+        the cached copies of a set, so this is only needed for sets deleted by other clients.
+
+        """
+        self.dfr3_set_cache.clear()
+
+        cache_dir = getattr(self.client, "hashed_svc_data_dir", "")
+        if cache_dir and os.path.isdir(os.path.join(cache_dir, "dfr3")):
+            try:
+                shutil.rmtree(os.path.join(cache_dir, "dfr3"))
+            except OSError as e:
+                logger.warning("Unable to clear the dfr3 set cache: " + str(e))
+
+    def _create_dfr3_set_object(self, dfr3_set: dict):
+        instance = self.__class__.__name__
+        if instance == "FragilityService":
+            return FragilityCurveSet(dfr3_set)
+        elif instance == "RepairService":
+            return RepairCurveSet(dfr3_set)
+        elif instance == "RestorationService":
+            return RestorationCurveSet(dfr3_set)
+        else:
+            raise ValueError(
+                "Only fragility and repair services are currently supported"
+            )
+
+    def _get_cached_dfr3_set(self, dfr3_id: str):
+        """Get the json of a dfr3 set from the local data cache, downloading and caching it on a miss.
+
+        Args:
+            dfr3_id (str): ID of the DFR3 set.
+
+        Returns:
+            dict: DFR3 set json.
+
+        """
+        cache_file = self._get_dfr3_cache_file(dfr3_id)
+        if cache_file is not None and os.path.isfile(cache_file):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                logger.warning("Ignoring unreadable cached dfr3 set " + cache_file)
+
+        dfr3_set = self.get_dfr3_set(dfr3_id)
+
+        if cache_file is not None:
+            try:
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                # write to a temporary file first so concurrent readers never see a partial file
+                fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(dfr3_set, f)
+                os.replace(tmp_file, cache_file)
+            except OSError:
+                logger.warning("Unable to cache dfr3 set " + dfr3_id)
+
+        return dfr3_set
+
+    def _get_dfr3_cache_file(self, dfr3_id: str):
+        cache_dir = getattr(self.client, "hashed_svc_data_dir", "")
+        if self.client.offline or not cache_dir:
+            return None
+        # ids are server generated object ids, guard against anything that is not a plain file name
+        if not re.fullmatch(r"[\w\-]+", dfr3_id):
+            return None
+
+        return os.path.join(cache_dir, "dfr3", dfr3_id + ".json")
+
     @forbid_offline
     def search_dfr3_sets(
         self,
@@ -201,133 +352,19 @@ class Dfr3Service:
         """
 
         dfr3_sets = {}
-        dfr3_sets_cache = {}
-
-        # find default mapping entry key if not provided
-        if entry_key is None:
-            for m in mapping.mappingEntryKeys:
-                if "defaultKey" in m and m["defaultKey"] is True:
-                    entry_key = m["name"]
-                    break
-        if entry_key is None:
-            raise ValueError(
-                "Entry key not provided and no default entry key found in the mapping!"
-            )
+        entry_key = self._get_entry_key(mapping, entry_key)
+        matcher = MappingMatcher(mapping)
 
         # loop through inventory to match the rules
-        matched_curve_ids = []
         for inventory in inventories:
-            if (
-                "occ_type" in inventory["properties"]
-                and inventory["properties"]["occ_type"] is None
-            ):
-                inventory["properties"]["occ_type"] = ""
-            if (
-                "efacility" in inventory["properties"]
-                and inventory["properties"]["efacility"] is None
-            ):
-                inventory["properties"]["efacility"] = ""
+            properties = inventory["properties"]
+            self._fill_empty_properties(properties)
 
-            # if retrofit key exist, use retrofit key otherwise use default key
-            retrofit_entry_key = (
-                inventory["properties"]["retrofit_k"]
-                if "retrofit_k" in inventory["properties"]
-                else None
-            )
-
-            cached_curve = self._check_cache(dfr3_sets_cache, inventory["properties"])
-
-            if cached_curve is not None:
-                dfr3_sets[inventory["id"]] = cached_curve
-
-            else:
-                for m in mapping.mappings:
-                    # for old format rule matching [[]]
-                    # [[ and ] or [ and ]]
-                    if isinstance(m.rules, list):
-                        if self._property_match_legacy(
-                            rules=m.rules, properties=inventory["properties"]
-                        ):
-                            if (
-                                retrofit_entry_key is not None
-                                and retrofit_entry_key in m.entry
-                            ):
-                                curve = m.entry[retrofit_entry_key]
-                            else:
-                                curve = m.entry[entry_key]
-
-                            dfr3_sets[inventory["id"]] = curve
-
-                            matched_properties_dict = self._convert_properties_to_dict(
-                                m.rules, inventory["properties"]
-                            )
-
-                            if retrofit_entry_key is not None:
-                                matched_properties_dict[
-                                    "retrofit_k"
-                                ] = retrofit_entry_key
-                            # Add the matched inventory properties so other matching inventory can avoid rule matching
-                            dfr3_sets_cache[curve] = matched_properties_dict
-
-                            # if it's string:id; then need to fetch it from remote and cast to dfr3curve object
-                            if (
-                                isinstance(curve, str)
-                                and curve not in matched_curve_ids
-                            ):
-                                matched_curve_ids.append(curve)
-
-                            # use the first match
-                            break
-
-                    # for new format rule matching {"AND/OR":[]}
-                    # {"AND": [xx, "OR": [yy, yy], "AND": {"OR":["zz", "zz"]]}
-                    elif isinstance(m.rules, dict):
-                        if self._property_match(
-                            rules=m.rules, properties=inventory["properties"]
-                        ):
-                            if (
-                                retrofit_entry_key is not None
-                                and retrofit_entry_key in m.entry
-                            ):
-                                curve = m.entry[retrofit_entry_key]
-                            else:
-                                curve = m.entry[entry_key]
-                            dfr3_sets[inventory["id"]] = curve
-
-                            matched_properties_dict = self._convert_properties_to_dict(
-                                m.rules, inventory["properties"]
-                            )
-                            # Add the matched inventory properties so other matching inventory can avoid rule matching
-                            dfr3_sets_cache[curve] = matched_properties_dict
-
-                            # if it's string:id; then need to fetch it from remote and cast to dfr3 curve object
-                            if (
-                                isinstance(curve, str)
-                                and curve not in matched_curve_ids
-                            ):
-                                matched_curve_ids.append(curve)
-
-                            # use the first match
-                            break
+            curve = matcher.match_entry(properties, entry_key)
+            if curve is not None:
+                dfr3_sets[inventory["id"]] = curve
 
-        batch_dfr3_sets = self.batch_get_dfr3_set(matched_curve_ids)
-
-        # replace the curve id in dfr3_sets to the dfr3 curve
-        for inventory_id, curve_item in dfr3_sets.items():
-            if (
-                isinstance(curve_item, FragilityCurveSet)
-                or isinstance(curve_item, RepairCurveSet)
-                or isinstance(curve_item, RestorationCurveSet)
-            ):
-                pass
-            elif isinstance(curve_item, str):
-                dfr3_sets[inventory_id] = batch_dfr3_sets[curve_item]
-            else:
-                raise ValueError(
-                    "Cannot realize dfr3_set entry. The entry has to be either remote id string; or dfr3curve object!"
-                )
-
-        return dfr3_sets
+        return self._realize_dfr3_sets(dfr3_sets)
 
     def match_list_of_dicts(
         self, mapping: MappingSet, inventories: list, entry_key: Optional[str] = None
@@ -345,7 +382,74 @@ class Dfr3Service:
 
         """
         dfr3_sets = {}
+        entry_key = self._get_entry_key(mapping, entry_key)
+        matcher = MappingMatcher(mapping)
+
+        # loop through inventory to match the rules
+        for inventory in inventories:
+            index = matcher.match(inventory)
+            if index is not None:
+                m = mapping.mappings[index]
+                # old format rules are keyed by id and new format rules by guid
+                if isinstance(m.rules, list):
+                    dfr3_sets[inventory["id"]] = m.entry[entry_key]
+                else:
+                    dfr3_sets[inventory["guid"]] = m.entry[entry_key]
+
+        return self._realize_dfr3_sets(dfr3_sets)
 
+    def match_dataframe(
+        self, mapping: MappingSet, inventory_df, entry_key: Optional[str] = None
+    ):
+        """Match the rows of an inventory (Geo)DataFrame to dfr3 sets. Rows sharing the same values for the
+        attributes used by the mapping rules are matched once.
+
+        Args:
+            mapping (obj): MappingSet Object that has the rules and entries.
+            inventory_df (pd.DataFrame): Inventory with one row per item and one column per property.
+            entry_key (None, str): Mapping Entry Key e.g. Non-retrofit Fragility ID Code, retrofit_method_1, etc.
+
+        Returns:
+            pd.Series: Matched dfr3 set id (or local dfr3 curve set object) of every row, aligned with the index of
+                inventory_df. Rows without a match are None.
+
+        """
+        entry_key = self._get_entry_key(mapping, entry_key)
+        matcher = MappingMatcher(mapping)
+
+        columns = [
+            key
+            for key in matcher.rule_keys + ["retrofit_k"]
+            if key in inventory_df.columns
+        ]
+        if not columns:
+            curve = matcher.match_entry({}, entry_key)
+            return pd.Series(
+                [curve] * len(inventory_df), index=inventory_df.index, dtype=object
+            )
+
+        # match each unique combination of the rule attributes once
+        properties_df = inventory_df[columns].astype(object)
+        properties_df = properties_df.where(properties_df.notna(), None)
+        unique_rows = {}
+        codes = [
+            unique_rows.setdefault(row, len(unique_rows))
+            for row in zip(*(properties_df[column].tolist() for column in columns))
+        ]
+
+        curves = numpy.empty(len(unique_rows), dtype=object)
+        for row, code in unique_rows.items():
+            properties = self._fill_empty_properties(dict(zip(columns, row)))
+            curves[code] = matcher.match_entry(properties, entry_key)
+
+        return pd.Series(
+            curves[numpy.asarray(codes, dtype=int)],
+            index=inventory_df.index,
+            dtype=object,
+        )
+
+    @staticmethod
+    def _get_entry_key(mapping: MappingSet, entry_key: Optional[str] = None):
         # find default mapping entry key if not provided
         if entry_key is None:
             for m in mapping.mappingEntryKeys:
@@ -356,37 +460,21 @@ class Dfr3Service:
             raise ValueError(
                 "Entry key not provided and no default entry key found in the mapping!"
             )
+        return entry_key
 
-        # loop through inventory to match the rules
-        matched_curve_ids = []
-        for inventory in inventories:
-            for m in mapping.mappings:
-                # for old format rule matching [[]]
-                if isinstance(m.rules, list):
-                    if self._property_match_legacy(rules=m.rules, properties=inventory):
-                        curve = m.entry[entry_key]
-                        dfr3_sets[inventory["id"]] = curve
-
-                        # if it's string:id; then need to fetch it from remote and cast to fragility3curve object
-                        if isinstance(curve, str) and curve not in matched_curve_ids:
-                            matched_curve_ids.append(curve)
-
-                        # use the first match
-                        break
-
-                # for new format rule matching {"AND/OR":[]}
-                elif isinstance(m.rules, dict):
-                    if self._property_match(rules=m.rules, properties=inventory):
-                        curve = m.entry[entry_key]
-                        dfr3_sets[inventory["guid"]] = curve
-
-                        # if it's string:id; then need to fetch it from remote and cast to fragility3curve object
-                        if isinstance(curve, str) and curve not in matched_curve_ids:
-                            matched_curve_ids.append(curve)
-
-                        # use the first match
-                        break
-
+    @staticmethod
+    def _fill_empty_properties(properties):
+        if "occ_type" in properties and properties["occ_type"] is None:
+            properties["occ_type"] = ""
+        if "efacility" in properties and properties["efacility"] is None:
+            properties["efacility"] = ""
+        return properties
+
+    def _realize_dfr3_sets(self, dfr3_sets: dict):
+        # if it's string:id; then need to fetch it from remote and cast to dfr3curve object
+        matched_curve_ids = [
+            curve for curve in dfr3_sets.values() if isinstance(curve, str)
+        ]
         batch_dfr3_sets = self.batch_get_dfr3_set(matched_curve_ids)
 
         # replace the curve id in dfr3_sets to the dfr3 curve
@@ -406,87 +494,6 @@ class Dfr3Service:
 
         return dfr3_sets
 
-    @staticmethod
-    def _check_cache(dfr3_sets_dict, properties):
-        """A method to see if we already have matched an inventory with the same properties to a fragility curve
-
-        Args:
-            dfr3_sets_dict (dict): {"fragility-curve-id-1": {"struct_typ": "W1", "no_stories": "2"}, etc.}
-            properties (obj): A fiona Properties object that contains properties of the inventory row.
-
-        Returns:
-            Fragility curve id if a match is found
-
-        """
-        if not dfr3_sets_dict:
-            return None
-
-        retrofit_entry_key = (
-            properties["retrofit_k"] if "retrofit_k" in properties else None
-        )
-        for entry_key in dfr3_sets_dict:
-            inventory_dict = {}
-            entry_dict = dfr3_sets_dict[entry_key]
-            for rule_key in entry_dict:
-                inventory_dict[rule_key] = properties[rule_key]
-
-            if retrofit_entry_key is not None:
-                inventory_dict["retrofit_k"] = retrofit_entry_key
-
-            if entry_dict == inventory_dict:
-                return entry_key
-
-    @staticmethod
-    def _convert_properties_to_dict(rules, properties):
-        """A method to convert properties to a dictionary with only the matched values in the rule set
-
-        Args:
-            rules (obj): [[A and B] or [C and D]]
-            properties (dict): A dictionary that contains properties of the inventory row.
-
-        Returns:
-            Dictionary of property values for the inventory object so the matched fragility can be cached
-
-        """
-        matched_properties = {}
-        # Handle legacy rules
-        if isinstance(rules, list):
-            # If the rules are empty, return the matched properties
-            if not rules or rules == [[]] or rules == [None]:
-                return matched_properties
-            for i, and_rules in enumerate(rules):
-                for j, rule in enumerate(and_rules):
-                    matched_properties.update(
-                        Dfr3Service._eval_property_from_inventory(rule, properties)
-                    )
-        elif isinstance(rules, dict):
-            # If the rules are empty, return the matched properties
-            if not rules or rules == [[]] or rules == [None]:
-                return matched_properties
-
-            # Handles new style of rules
-            boolean = list(rules.keys())[0]  # AND or OR
-            criteria = rules[boolean]
-
-            for criterion in criteria:
-                # Recursively parse and evaluate the rules with boolean
-                if isinstance(criterion, dict):
-                    for criteria in criterion:
-                        for rule_criteria in criterion[criteria]:
-                            matched_properties.update(
-                                Dfr3Service._eval_property_from_inventory(
-                                    rule_criteria, properties
-                                )
-                            )
-                elif isinstance(criterion, str):
-                    matched_properties.update(
-                        Dfr3Service._eval_property_from_inventory(criterion, properties)
-                    )
-                else:
-                    raise ValueError("Cannot evaluate criterion, unsupported format!")
-
-        return matched_properties
-
     @staticmethod
     def _property_match_legacy(rules, properties):
         """A method to determine whether current set of rules rules applied to the inventory row (legacy rule format).
@@ -557,25 +564,6 @@ class Dfr3Service:
             else:
                 raise ValueError("boolean " + boolean + " not supported!")
 
-    @staticmethod
-    def _eval_property_from_inventory(rule, properties):
-        """A method to evaluate individual rule and get the property from the inventory properties.
-
-        Args:
-            rule (str): # e.g. "int no_stories EQ 1",
-            properties (dict): dictionary of properties of an inventory item. e.g. {"guid":xxx,
-            "num_stories":xxx, ...}
-
-        Returns:
-             dictionary entry with the inventory property value that matched the rule
-
-        """
-        elements = rule.split(" ", 3)
-        property_key = elements[1]
-
-        matched_props = {property_key: properties[property_key]}
-        return matched_props
-
     @staticmethod
     def _eval_criterion(rule, properties):
         """A method to evaluate individual rule and see if it appies to a certain inventory row.
@@ -817,3 +805,251 @@ class Dfr3Service:
         r = self.client.delete(url, timeout=timeout, **kwargs)
 
         return return_http_response(r).json()
+
+
+class MappingMatcher:
+    """Rule matcher compiled once from a MappingSet. Rules are indexed on the attributes of their equality
+    criteria so that only candidate rules are evaluated, and the matched rule is cached per combination of rule
+    attribute values. The first matching rule in mapping order wins, as in a linear scan of the rules.
+
+    Args:
+        mapping (obj): MappingSet Object that has the rules and entries.
+
+    """
+
+    EQUALITY_OPERATORS = ("EQ", "EQUALS")
+
+    def __init__(self, mapping: MappingSet):
+        self.mapping = mapping
+        self.rule_keys = []
+        # {rule attribute: {value: [rule index, ...]}}
+        self.index = {}
+        # {rule attribute: python types the rules on that attribute expect}
+        self.rule_types = {}
+        # rules with range, OR or pattern criteria only, always evaluated
+        self.fallback = []
+        # rules compiled to predicates on the inventory properties
+        self.predicates = []
+        self.results = {}
+
+        for i, m in enumerate(mapping.mappings):
+            self.predicates.append(self._compile_rules(m.rules))
+            criteria = self._get_criteria(m.rules)
+            for criterion in criteria:
+                elements = criterion.split(" ", 3)
+                if elements[1] not in self.rule_keys:
+                    self.rule_keys.append(elements[1])
+                if elements[0] in known_types:
+                    self.rule_types.setdefault(elements[1], set()).add(
+                        eval(known_types[elements[0]])
+                    )
+
+            equality = self._get_equality_criterion(m.rules)
+            if equality is None:
+                self.fallback.append(i)
+                continue
+
+            rule_key, value = equality
+            self.index.setdefault(rule_key, {}).setdefault(value, []).append(i)
+
+    def match(self, properties):
+        """Find the first mapping whose rules apply to an inventory item.
+
+        Args:
+            properties (dict): A dictionary that contains properties of the inventory row.
+
+        Returns:
+            int: Index of the matched mapping in mapping.mappings, None if no mapping applies.
+
+        """
+        cache_key = tuple(
+            properties[key] if key in properties else _MISSING for key in self.rule_keys
+        )
+        try:
+            return self.results[cache_key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable property values can't be cached
+            return self._match(properties)
+
+        index = self._match(properties)
+        self.results[cache_key] = index
+        return index
+
+    def match_entry(self, properties, entry_key: str):
+        """Find the mapping entry of the first mapping whose rules apply to an inventory item. The retrofit entry
+        key of the item is used instead of entry_key if the mapping has that entry.
+
+        Args:
+            properties (dict): A dictionary that contains properties of the inventory row.
+            entry_key (str): Mapping Entry Key e.g. Non-retrofit Fragility ID Code, retrofit_method_1, etc.
+
+        Returns:
+            str or obj: Matched dfr3 set id or dfr3 curve set object, None if no mapping applies.
+
+        """
+        index = self.match(properties)
+        if index is None:
+            return None
+
+        entry = self.mapping.mappings[index].entry
+        retrofit_entry_key = properties.get("retrofit_k")
+        if retrofit_entry_key is not None and retrofit_entry_key in entry:
+            return entry[retrofit_entry_key]
+        return entry[entry_key]
+
+    def _match(self, properties):
+        for rule_key, rule_types in self.rule_types.items():
+            if rule_key in properties and not all(
+                isinstance(properties[rule_key], rule_type) for rule_type in rule_types
+            ):
+                # scan every rule so that mismatched datatypes are reported as before
+                return self._first_match(properties)
+
+        candidates = list(self.fallback)
+        for rule_key, values in self.index.items():
+            if rule_key in properties and properties[rule_key] in values:
+                candidates.extend(values[properties[rule_key]])
+
+        for i in sorted(candidates):
+            if self.predicates[i](properties):
+                return i
+
+        return None
+
+    def _first_match(self, properties):
+        for i in range(len(self.mapping.mappings)):
+            rules = self.mapping.mappings[i].rules
+            if isinstance(rules, list):
+                if Dfr3Service._property_match_legacy(
+                    rules=rules, properties=properties
+                ):
+                    return i
+            elif isinstance(rules, dict):
+                if Dfr3Service._property_match(rules=rules, properties=properties):
+                    return i
+
+        return None
+
+    @staticmethod
+    def _compile_rules(rules):
+        """Compile rules in either format into a predicate equivalent to _property_match_legacy and
+        _property_match for properties whose datatypes agree with the rules."""
+        if isinstance(rules, list):
+            if rules == [[]] or rules == [] or rules == [None]:
+                return lambda properties: True
+            or_rules = [
+                [MappingMatcher._compile_criterion(rule) for rule in and_rules]
+                for and_rules in rules
+            ]
+            return lambda properties: any(
+                all(criterion(properties) for criterion in and_rules)
+                for and_rules in or_rules
+            )
+
+        if rules == {}:
+            return lambda properties: True
+        boolean = list(rules.keys())[0]  # AND or OR
+        criteria = []
+        for criterion in rules[boolean]:
+            if isinstance(criterion, dict):
+                criteria.append(MappingMatcher._compile_rules(criterion))
+            elif isinstance(criterion, str):
+                criteria.append(MappingMatcher._compile_criterion(criterion))
+            else:
+                raise ValueError("Cannot evaluate criterion, unsupported format!")
+        if boolean.lower() == "and":
+            return lambda properties: all(c(properties) for c in criteria)
+        elif boolean.lower() == "or":
+            return lambda properties: any(c(properties) for c in criteria)
+        else:
+            raise ValueError("boolean " + boolean + " not supported!")
+
+    @staticmethod
+    def _compile_criterion(rule):
+        """Compile a single rule e.g. "int no_stories EQ 1" into a predicate. Rules that can't be compiled are
+        evaluated with _eval_criterion."""
+        elements = rule.split(" ", 3)
+        if (
+            len(elements) != 4
+            or elements[0] not in known_types
+            or elements[2] not in known_operators
+        ):
+            return lambda properties: Dfr3Service._eval_criterion(rule, properties)
+
+        rule_key = elements[1]
+        rule_operator = elements[2]
+        rule_value = elements[3].strip("'").strip('"')
+        if known_types[elements[0]] == "str":
+            if rule_operator in ("MATCHES", "NMATCHES"):
+                pattern = re.compile(rule_value)
+                expected = rule_operator == "MATCHES"
+                return lambda properties: rule_key in properties and (
+                    bool(pattern.search(properties[rule_key])) is expected
+                )
+        else:
+            try:
+                rule_value = ast.literal_eval(rule_value)
+            except (ValueError, SyntaxError):
+                return lambda properties: Dfr3Service._eval_criterion(rule, properties)
+            if isinstance(rule_value, str) or rule_operator not in COMPARISONS:
+                return lambda properties: Dfr3Service._eval_criterion(rule, properties)
+
+        compare = COMPARISONS[rule_operator]
+        return lambda properties: rule_key in properties and bool(
+            compare(properties[rule_key], rule_value)
+        )
+
+    @staticmethod
+    def _get_criteria(rules):
+        """Flatten the criteria strings of a rule set in either format."""
+        criteria = []
+        if isinstance(rules, list):
+            for and_rules in rules:
+                if and_rules:
+                    criteria.extend(and_rules)
+        elif isinstance(rules, dict):
+            for criterion in next(iter(rules.values()), []):
+                if isinstance(criterion, dict):
+                    criteria.extend(MappingMatcher._get_criteria(criterion))
+                else:
+                    criteria.append(criterion)
+        return criteria
+
+    @staticmethod
+    def _get_equality_criterion(rules):
+        """Find an equality criterion every match of the rules has to satisfy.
+
+        Returns:
+            tuple: (rule attribute, value), None if the rules have no such criterion.
+
+        """
+        if isinstance(rules, list):
+            if len(rules) != 1 or not rules[0]:
+                return None
+            criteria = rules[0]
+        elif isinstance(rules, dict) and len(rules) == 1:
+            boolean = list(rules.keys())[0]
+            # an OR of a single criterion is the same as an AND of it
+            if boolean.lower() != "and" and len(rules[boolean]) != 1:
+                return None
+            criteria = [c for c in rules[boolean] if isinstance(c, str)]
+        else:
+            return None
+
+        for criterion in criteria:
+            elements = criterion.split(" ", 3)
+            if len(elements) != 4 or elements[0] not in known_types:
+                continue
+            if elements[2] not in MappingMatcher.EQUALITY_OPERATORS:
+                continue
+            value = elements[3].strip("'").strip('"')
+            if known_types[elements[0]] == "str":
+                return elements[1], value
+            try:
+                return elements[1], float(value)
+            except ValueError:
+                continue
+
+        return None
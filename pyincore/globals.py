@@ -56,3 +56,6 @@ GLPK_PATH = shutil.which("glpsol")
 SCIP_PATH = shutil.which("scip")
 
 DAMAGE_PRECISION = 10
+
+# in-memory datasets larger than this many bytes are written to their file instead
+MAX_IN_MEMORY_DATASET_SIZE = 1024**3
@@ -13,6 +13,7 @@ import numpy
 import pyincore.globals as pyglobals
 from pyincore.decorators import forbid_offline
 from pyincore.utils import return_http_response
+from pyincore.utils.hazardvaluestransport import HazardValuesTransport
 from pyincore import IncoreClient
 
 logger = pyglobals.LOGGER
@@ -28,6 +29,7 @@ class HazardService:
 
     def __init__(self, client: IncoreClient):
         self.client = client
+        self.hazard_values_transport = HazardValuesTransport(client)
 
         if self.client.internal:
             self.base_earthquake_url = urljoin(
@@ -216,16 +218,11 @@ class HazardService:
                 payload = payload[:-1]
                 site_class_dataset_id = value["siteClassId"]
 
-        kwargs = {
-            "files": {
-                ("points", json.dumps(payload)),
-                ("amplifyHazard", json.dumps(amplify_hazard)),
-                ("siteClassId", site_class_dataset_id),
-            }
-        }
-        r = self.client.post(url, timeout=timeout, **kwargs)
-
-        return return_http_response(r).json()
+        fields = [
+            ("amplifyHazard", json.dumps(amplify_hazard)),
+            ("siteClassId", site_class_dataset_id),
+        ]
+        return self.hazard_values_transport.post(url, payload, fields, timeout)
 
     @forbid_offline
     def get_liquefaction_values(
@@ -561,16 +558,12 @@ class HazardService:
         url = urljoin(self.base_tornado_url, hazard_id + "/values")
 
         if seed is not None:
-            kwargs["files"] = {
-                ("points", json.dumps(payload)),
-                ("seed", json.dumps(seed)),
-            }
-        else:
-            kwargs["files"] = {("points", json.dumps(payload))}
-
-        r = self.client.post(url, timeout=timeout, **kwargs)
+            # the seeded random values depend on the whole payload, keep it in one request
+            return self.hazard_values_transport.post_chunk(
+                url, payload, [("seed", json.dumps(seed))], timeout
+            )
 
-        return return_http_response(r).json()
+        return self.hazard_values_transport.post(url, payload, timeout=timeout)
 
     @forbid_offline
     def create_tornado_scenario(
@@ -717,10 +710,7 @@ class HazardService:
 
         """
         url = urljoin(self.base_tsunami_url, hazard_id + "/values")
-        kwargs = {"files": {("points", json.dumps(payload))}}
-        r = self.client.post(url, timeout=timeout, **kwargs)
-
-        return return_http_response(r).json()
+        return self.hazard_values_transport.post(url, payload, timeout=timeout)
 
     @forbid_offline
     def create_tsunami_hazard(
@@ -892,10 +882,7 @@ class HazardService:
 
         """
         url = urljoin(self.base_hurricane_url, hazard_id + "/values")
-        kwargs = {"files": {("points", json.dumps(payload))}}
-        r = self.client.post(url, timeout=timeout, **kwargs)
-
-        return return_http_response(r).json()
+        return self.hazard_values_transport.post(url, payload, timeout=timeout)
 
     @forbid_offline
     def delete_hurricane(self, hazard_id: str, timeout=(30, 600), **kwargs):
@@ -1036,10 +1023,7 @@ class HazardService:
 
         """
         url = urljoin(self.base_flood_url, hazard_id + "/values")
-        kwargs = {"files": {("points", json.dumps(payload))}}
-        r = self.client.post(url, timeout=timeout, **kwargs)
-
-        return return_http_response(r).json()
+        return self.hazard_values_transport.post(url, payload, timeout=timeout)
 
     @forbid_offline
     def delete_flood(self, hazard_id: str, timeout=(30, 600), **kwargs):
@@ -15,7 +15,11 @@ logger = pyglobals.LOGGER
 
 
 class DFR3Curve:
-    """A class to represent a DFR3 curve."""
+    """A class to represent a DFR3 curve.
+
+    Rule conditions and expressions are compiled and validated once, when the curve is created.
+
+    """
 
     def __init__(self, curve_parameters):
         self.rules = curve_parameters["rules"]
@@ -25,78 +29,219 @@ class DFR3Curve:
             rule["expression"] = rule["expression"].replace("^", "**")
         self.description = curve_parameters["description"]
 
-    def solve_curve_expression(
-        self, hazard_values: dict, curve_parameters: dict, **kwargs
-    ):
-        """Evaluates expression of the curve.
+        self._compile()
+
+    def _compile(self):
+        self._compiled_rules = DFR3Curve._compile_rules(self.rules)
+        self._inverse_rules = None
+        self._compiled_inverse_rules = None
+        # (curve parameters, compiled curve parameters) of the last set of curve parameters solved with
+        self._compiled_parameters = (None, None)
+
+    def __getstate__(self):
+        # code objects can't be pickled; recompile on the other side
+        state = self.__dict__.copy()
+        for key in [
+            "_compiled_rules",
+            "_inverse_rules",
+            "_compiled_inverse_rules",
+            "_compiled_parameters",
+        ]:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    @staticmethod
+    def _compile_rules(rules):
+        """Compile the conditions and expression of every rule.
 
         Args:
-            hazard_values (dict): Hazard values. Only applicable to fragilities
-            curve_parameters (dict): Curve parameters.
-            **kwargs: Keyword arguments.
+            rules (list): Curve rules.
 
         Returns:
-            any: Result of the evaluated expression. Can be float, numpy.ndarray etc.
+            list: (compiled conditions or None, compiled expression) per rule.
 
         """
-        parameters = {}
-        mapped_demand_types = {}
-        # For all curve parameters:
-        # 1. Figure out if parameter name needs to be mapped (i.e. the name contains forbidden characters)
-        # 2. Fetch all parameters listed in the curve from kwargs and if there are not in kwargs, use default values
-        # from the curve.
-        for parameter in curve_parameters:
-            # if default exists, use default
-            if "expression" in parameter and parameter["expression"] is not None:
-                parameters[parameter["name"]] = evaluateexpression.evaluate(
-                    parameter["expression"], parameters
-                )
+        compiled_rules = []
+        for rule in rules:
+            if "condition" not in rule or rule["condition"] is None:
+                conditions = None
             else:
-                parameters[parameter["name"]] = None
+                conditions = [
+                    evaluateexpression.compile_expression(condition)
+                    for condition in rule["condition"]
+                ]
+            compiled_rules.append(
+                (conditions, evaluateexpression.compile_expression(rule["expression"]))
+            )
+        return compiled_rules
+
+    def _get_compiled_parameters(self, curve_parameters):
+        """Compile the default expressions of the curve parameters and build case-insensitive name lookups.
+
+        Fragility sets share one list of curve parameters across their curves and pass the same list on every
+        call, so the result is kept until a different list is passed.
+
+        Args:
+            curve_parameters (list): Curve parameters.
 
+        Returns:
+            dict: Compiled parameters and lookups.
+
+        """
+        if self._compiled_parameters[0] is not curve_parameters:
+            # (parameter name, compiled default expression, lower case name to look for in kwargs)
+            defaults = []
+            # lower case parameter name -> parameter names
+            name_lookup = {}
             # e.g. map point_two_sec_sa to its full name (0.2 Sec Sa)
-            if "fullName" in parameter and parameter["fullName"] is not None:
-                mapped_demand_types[parameter["fullName"]] = parameter["name"]
+            mapped_demand_types = {}
+            for parameter in curve_parameters:
+                if "expression" in parameter and parameter["expression"] is not None:
+                    code = evaluateexpression.compile_expression(
+                        parameter["expression"]
+                    )
+                else:
+                    code = None
 
-            # else overwrite with real values; make sure it handles case sensitivity
-            for kwargs_key, kwargs_value in kwargs.items():
                 if "fullName" in parameter and parameter["fullName"] is not None:
-                    if parameter["fullName"].lower() == kwargs_key.lower():
-                        parameters[parameter["name"]] = kwargs_value
-                elif parameter["name"].lower() == kwargs_key.lower():
-                    parameters[parameter["name"]] = kwargs_value
+                    mapped_demand_types[parameter["fullName"]] = parameter["name"]
+                    kwargs_key = parameter["fullName"].lower()
+                else:
+                    kwargs_key = parameter["name"].lower()
+
+                defaults.append((parameter["name"], code, kwargs_key))
+                name_lookup.setdefault(parameter["name"].lower(), []).append(
+                    parameter["name"]
+                )
+            evaluateexpression.validate_parameter_names(name for name, _, _ in defaults)
+
+            self._compiled_parameters = (
+                curve_parameters,
+                {
+                    "defaults": defaults,
+                    "name_lookup": name_lookup,
+                    "mapped_demand_types": mapped_demand_types,
+                },
+            )
+
+        return self._compiled_parameters[1]
+
+    def _get_compiled_inverse_rules(self):
+        """Build and compile the inverse (ppf for cdf) of every rule, once."""
+        if self._compiled_inverse_rules is None:
+            inverse_rules = []
+            for rule in self.rules:
+                if ".cdf(" in rule["expression"]:
+                    new_exp = rule["expression"].replace(".cdf(", ".ppf(")
+                    inverse_rules.append(
+                        {"condition": rule["condition"], "expression": new_exp}
+                    )
+                else:
+                    raise KeyError(
+                        "Inverse does not exist for the provided expression. exiting.."
+                    )
+            self._inverse_rules = inverse_rules
+            self._compiled_inverse_rules = DFR3Curve._compile_rules(inverse_rules)
+
+        return self._inverse_rules, self._compiled_inverse_rules
+
+    def _resolve_parameters(self, compiled_parameters, hazard_values, evaluate, kwargs):
+        """Fill in the curve parameters from their defaults, kwargs and hazard values.
+
+        Returns:
+            dict, bool: Parameters, and whether one of the hazard values is None.
+
+        """
+        kwargs_values = {}
+        for kwargs_key, kwargs_value in kwargs.items():
+            kwargs_values[kwargs_key.lower()] = kwargs_value
+
+        # For all curve parameters fetch them from kwargs and if there are not in kwargs, use default values
+        # from the curve. Defaults may refer to parameters that come before them.
+        parameters = {}
+        for name, code, kwargs_key in compiled_parameters["defaults"]:
+            parameters[name] = None if code is None else evaluate(code, parameters)
+            # else overwrite with real values; make sure it handles case sensitivity
+            if kwargs_key in kwargs_values:
+                parameters[name] = kwargs_values[kwargs_key]
 
         # use hazard values if present
         # consider case insensitive situation
+        missing_hazard = False
         for key, value in hazard_values.items():
-            if key in mapped_demand_types:
-                key = mapped_demand_types[key]
-            for parameter_key in parameters.keys():
-                if parameter_key.lower() == key.lower():
-                    if value is not None:
-                        parameters[parameter_key] = value
-                    else:
-                        # returning 0 even if a single demand value is None, assumes there is no hazard exposure. TBD
-                        return 0.0
+            for parameter_key in DFR3Curve._hazard_parameter_names(
+                compiled_parameters, key
+            ):
+                if value is not None:
+                    parameters[parameter_key] = value
+                else:
+                    missing_hazard = True
+
+        return parameters, missing_hazard
+
+    @staticmethod
+    def _hazard_parameter_names(compiled_parameters, demand_type):
+        """Names of the curve parameters that take the hazard value of a demand type."""
+        demand_type = compiled_parameters["mapped_demand_types"].get(
+            demand_type, demand_type
+        )
+        return compiled_parameters["name_lookup"].get(demand_type.lower(), [])
+
+    def solve_curve_expression(
+        self, hazard_values: dict, curve_parameters: dict, **kwargs
+    ):
+        """Evaluates expression of the curve.
+
+        Args:
+            hazard_values (dict): Hazard values. Only applicable to fragilities
+            curve_parameters (dict): Curve parameters.
+            **kwargs: Keyword arguments.
+
+        Returns:
+            any: Result of the evaluated expression. Can be float, numpy.ndarray etc.
+
+        """
+        return self._solve(
+            self.rules, self._compiled_rules, hazard_values, curve_parameters, **kwargs
+        )
+
+    def _solve(
+        self, rules, compiled_rules, hazard_values: dict, curve_parameters, **kwargs
+    ):
+        parameters, missing_hazard = self._resolve_parameters(
+            self._get_compiled_parameters(curve_parameters),
+            hazard_values,
+            evaluateexpression.evaluate_compiled,
+            kwargs,
+        )
+        if missing_hazard:
+            # returning 0 even if a single demand value is None, assumes there is no hazard exposure. TBD
+            return 0.0
 
         eval_result = None
-        for rule in self.rules:
-            if "condition" not in rule or rule["condition"] is None:
-                eval_result = evaluateexpression.evaluate(
-                    rule["expression"], parameters
+        for conditions, expression in compiled_rules:
+            if conditions is None:
+                eval_result = evaluateexpression.evaluate_compiled(
+                    expression, parameters
                 )
             else:
                 conditions_met = []
-                for condition in rule["condition"]:
-                    eval_result = evaluateexpression.evaluate(condition, parameters)
+                for condition in conditions:
+                    eval_result = evaluateexpression.evaluate_compiled(
+                        condition, parameters
+                    )
                     if not math.isnan(eval_result) and eval_result:
                         conditions_met.append(eval_result)
                     else:
                         conditions_met.append(False)
                         break
                 if all(conditions_met):
-                    eval_result = evaluateexpression.evaluate(
-                        rule["expression"], parameters
+                    eval_result = evaluateexpression.evaluate_compiled(
+                        expression, parameters
                     )
                     break
 
@@ -109,10 +254,10 @@ class DFR3Curve:
                 eval_result = 0.0
             if math.isnan(eval_result):
                 error_msg = "Unable to calculate limit state."
-                if self.rules:
+                if rules:
                     error_msg += (
                         " Evaluation failed for expression: \n"
-                        + json.dumps(self.rules)
+                        + json.dumps(rules)
                         + "\n"
                     )
                     error_msg += (
@@ -126,6 +271,161 @@ class DFR3Curve:
 
             return eval_result
 
+    def solve_curve_expression_batch(
+        self, hazard_values: dict, curve_parameters: dict, **kwargs
+    ):
+        """Evaluates expression of the curve for many inventory items at once.
+
+        Hazard values and keyword arguments may be numpy arrays of the same length (one entry per inventory item)
+        or scalars shared by all items. Expressions are evaluated once over the whole arrays; if an expression
+        can't be evaluated element-wise (e.g. it uses "and"/"or" on parameters), the curve falls back to solving
+        each item on its own.
+
+        Args:
+            hazard_values (dict): Hazard values. Only applicable to fragilities. NaN or None means no exposure.
+            curve_parameters (dict): Curve parameters.
+            **kwargs: Keyword arguments.
+
+        Returns:
+            numpy.ndarray: Result of the evaluated expression for every item.
+
+        """
+        return self._solve_batch(
+            self.rules, self._compiled_rules, hazard_values, curve_parameters, kwargs
+        )
+
+    def solve_curve_for_inverse_batch(
+        self, hazard_values: dict, curve_parameters: dict, **kwargs
+    ):
+        """Evaluates the inverse of the curve (ppf for cdf) for many items at once; the batch counterpart of
+        solve_curve_for_inverse.
+
+        Args:
+            hazard_values (dict): Hazard values. Only applicable to fragilities. NaN or None means no exposure.
+            curve_parameters (dict): Curve parameters.
+            **kwargs: Keyword arguments.
+
+        Returns:
+            numpy.ndarray: Result of the evaluated inverse expression for every item.
+
+        """
+        inverse_rules, compiled_inverse_rules = self._get_compiled_inverse_rules()
+        return self._solve_batch(
+            inverse_rules,
+            compiled_inverse_rules,
+            hazard_values,
+            curve_parameters,
+            kwargs,
+        )
+
+    def _solve_batch(
+        self, rules, compiled_rules, hazard_values: dict, curve_parameters, kwargs
+    ):
+        compiled_parameters = self._get_compiled_parameters(curve_parameters)
+        size = DFR3Curve._batch_size(hazard_values, kwargs)
+        hazard_arrays = {}
+        exposed = numpy.ones(size, dtype=bool)
+        for key, value in hazard_values.items():
+            if value is None:
+                value = numpy.nan
+            value = numpy.broadcast_to(numpy.asarray(value, dtype=float), (size,))
+            # a missing value only matters if the curve uses this demand type
+            if DFR3Curve._hazard_parameter_names(compiled_parameters, key):
+                exposed &= ~numpy.isnan(value)
+            hazard_arrays[key] = value
+
+        result = numpy.zeros(size)
+        if not exposed.any():
+            return result
+
+        try:
+            with numpy.errstate(all="ignore"):
+                result[exposed] = self._solve_array(
+                    compiled_rules,
+                    {key: value[exposed] for key, value in hazard_arrays.items()},
+                    curve_parameters,
+                    exposed.sum(),
+                    {
+                        key: DFR3Curve._take(value, exposed)
+                        for key, value in kwargs.items()
+                    },
+                )
+        except (TypeError, ValueError, NameError, AttributeError):
+            for index in numpy.flatnonzero(exposed):
+                result[index] = self._solve(
+                    rules,
+                    compiled_rules,
+                    {key: float(value[index]) for key, value in hazard_arrays.items()},
+                    curve_parameters,
+                    **{
+                        key: DFR3Curve._take(value, index)
+                        for key, value in kwargs.items()
+                    },
+                )
+            return result
+
+        if numpy.isnan(result).any():
+            error_msg = "Unable to calculate limit state."
+            if rules:
+                error_msg += (
+                    " Evaluation failed for expression: \n" + json.dumps(rules) + "\n"
+                )
+            raise ValueError(error_msg)
+
+        return result
+
+    def _solve_array(
+        self, compiled_rules, hazard_values, curve_parameters, size, kwargs
+    ):
+        parameters, _ = self._resolve_parameters(
+            self._get_compiled_parameters(curve_parameters),
+            hazard_values,
+            evaluateexpression.evaluate_array,
+            kwargs,
+        )
+
+        # rows whose value is settled by a conditional rule; later rules don't apply to them
+        resolved = numpy.zeros(size, dtype=bool)
+        result = numpy.zeros(size)
+        for conditions, expression in compiled_rules:
+            if conditions is None:
+                result[~resolved] = numpy.broadcast_to(
+                    evaluateexpression.evaluate_array(expression, parameters), (size,)
+                )[~resolved]
+            else:
+                conditions_met = ~resolved
+                for condition in conditions:
+                    value = numpy.broadcast_to(
+                        evaluateexpression.evaluate_array(condition, parameters),
+                        (size,),
+                    ).astype(float)
+                    met = ~numpy.isnan(value) & (value != 0)
+                    # like the scalar path, the result of the first failing condition is kept
+                    failed = conditions_met & ~met
+                    result[failed] = value[failed]
+                    conditions_met = conditions_met & met
+                if conditions_met.any():
+                    result[conditions_met] = numpy.broadcast_to(
+                        evaluateexpression.evaluate_array(expression, parameters),
+                        (size,),
+                    )[conditions_met]
+                resolved |= conditions_met
+
+        return result
+
+    @staticmethod
+    def _batch_size(hazard_values, kwargs):
+        for value in list(hazard_values.values()) + list(kwargs.values()):
+            if numpy.ndim(value) > 0:
+                return len(value)
+        return 1
+
+    @staticmethod
+    def _take(value, index):
+        if numpy.ndim(value) > 0:
+            return numpy.asarray(value)[index]
+        return value
+
     def solve_curve_for_inverse(
         self, hazard_values: dict, curve_parameters: dict, **kwargs
     ):
@@ -141,25 +441,14 @@ class DFR3Curve:
             any: Result of the evaluated inverse expression. Can be float, numpy.ndarray etc.
 
         """
-        inverse_rules = []
-        actual_rules = self.rules
-        for rule in self.rules:
-            if ".cdf(" in rule["expression"]:
-                new_exp = rule["expression"].replace(".cdf(", ".ppf(")
-                inverse_rules.append(
-                    {"condition": rule["condition"], "expression": new_exp}
-                )
-            else:
-                raise KeyError(
-                    "Inverse does not exist for the provided expression. exiting.."
-                )
-
-        self.rules = inverse_rules
-        inverse = self.solve_curve_expression(
-            hazard_values=hazard_values, curve_parameters=curve_parameters, **kwargs
+        inverse_rules, compiled_inverse_rules = self._get_compiled_inverse_rules()
+        return self._solve(
+            inverse_rules,
+            compiled_inverse_rules,
+            hazard_values,
+            curve_parameters,
+            **kwargs,
         )
-        self.rules = actual_rules  # swap the original rules back so further calculations are not affected
-        return inverse
 
     def get_building_period(self, curve_parameters, **kwargs):
         """
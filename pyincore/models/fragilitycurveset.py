@@ -5,7 +5,11 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 import json
+from decimal import Decimal
 
+import numpy
+
+from pyincore.globals import DAMAGE_PRECISION
 from pyincore.models.dfr3curve import DFR3Curve
 from pyincore.utils.analysisutil import AnalysisUtil
 
@@ -129,7 +133,142 @@ class FragilityCurveSet:
         """
         # Organize conceptually per LS-to-DS mapping , then by event, then by structure and by count
         # This may help keep track of scientific requirements also.
+        return self._get_ls_to_ds_method(hazard_type, inventory_type)(damage)
+
+    def calculate_limit_state_batch(
+        self, hazard_values: dict = {}, inventory_type: str = "building", **kwargs
+    ):
+        """Computes limit state probabilities of many inventory items that share this fragility set.
+
+        Args:
+            hazard_values (dict): Hazard values per demand type, as numpy arrays with one entry per item. NaN means
+                no hazard exposure.
+            inventory_type (str): An inventory type.
+            **kwargs: Keyword arguments, numpy arrays with one entry per item or scalars shared by all items.
+
+        Returns:
+            dict: Limit state probabilities, a numpy array per limit state. Values are rounded the same way as
+            calculate_limit_state rounds them.
 
+        """
+        size = DFR3Curve._batch_size(hazard_values, kwargs)
+        output = {
+            limit_state: numpy.zeros(size)
+            for limit_state in FragilityCurveSet._initialize_limit_states(
+                inventory_type
+            )
+        }
+        limit_state = list(output.keys())
+
+        if len(self.fragility_curves) <= 4:
+            for index, fragility_curve in enumerate(self.fragility_curves):
+                probabilities = fragility_curve.solve_curve_expression_batch(
+                    hazard_values, self.curve_parameters, **kwargs
+                )
+                output[limit_state[index]] = FragilityCurveSet._update_precision_array(
+                    probabilities
+                )
+        else:
+            raise ValueError(
+                "We can only handle fragility curves with less than 4 limit states."
+            )
+
+        return output
+
+    def calculate_damage_interval_batch(
+        self, damage, hazard_type="earthquake", inventory_type: str = "building"
+    ):
+        """Damage intervals of many inventory items at once; the batch counterpart of calculate_damage_interval.
+
+        Items whose limit states don't overlap are computed with element-wise Decimal arithmetic over the whole
+        arrays; items with overlapping limit states go through the same overlap adjustment as
+        calculate_damage_interval, one at a time. Results are identical to calling calculate_damage_interval
+        for every item.
+
+        Args:
+            damage (dict): Limit states, a numpy array per limit state.
+            hazard_type (str): A string describing the hazard being evaluated.
+            inventory_type (str): A string describing the type of element being evaluated.
+
+        Returns:
+            dict: Damage states, a numpy array of Decimal per damage state.
+
+        """
+        return FragilityCurveSet._ls_to_ds_batch(
+            damage, self._get_ls_to_ds_method(hazard_type, inventory_type)
+        )
+
+    @staticmethod
+    def _ls_to_ds_batch(damage, ls_to_ds):
+        """Apply an LS-to-DS mapping such as _3ls_to_4ds to many inventory items at once.
+
+        Args:
+            damage (dict): Limit states, a numpy array per limit state.
+            ls_to_ds (function): LS-to-DS mapping of a single item.
+
+        Returns:
+            dict: Damage states, a numpy array of Decimal per damage state.
+
+        """
+        limit_state_keys = list(damage.keys())
+        size = len(damage[limit_state_keys[0]]) if limit_state_keys else 0
+        limit_states = {
+            key: numpy.array(
+                [Decimal(str(value)) for value in damage[key].tolist()], dtype=object
+            )
+            for key in limit_state_keys
+        }
+
+        if ls_to_ds in (FragilityCurveSet._3ls_to_4ds, FragilityCurveSet._4ls_to_5ds):
+            # a limit state smaller than one of the limit states after it
+            overlap = numpy.zeros(size, dtype=bool)
+            for index, key in enumerate(limit_state_keys):
+                for later_key in limit_state_keys[index + 1 :]:
+                    overlap |= damage[key] < damage[later_key]
+
+            damage_states = {"DS_0": 1 - limit_states[limit_state_keys[0]]}
+            for index in range(1, len(limit_state_keys)):
+                damage_states["DS_" + str(index)] = (
+                    limit_states[limit_state_keys[index - 1]]
+                    - limit_states[limit_state_keys[index]]
+                )
+            damage_states["DS_" + str(len(limit_state_keys))] = limit_states[
+                limit_state_keys[-1]
+            ]
+        else:
+            overlap = numpy.ones(size, dtype=bool)
+            damage_states = None
+
+        for index in numpy.flatnonzero(overlap):
+            item_damage_states = ls_to_ds(
+                {key: damage[key][index].item() for key in limit_state_keys}
+            )
+            if damage_states is None:
+                damage_states = {
+                    key: numpy.empty(size, dtype=object) for key in item_damage_states
+                }
+            for key, value in item_damage_states.items():
+                damage_states[key][index] = value
+
+        return damage_states if damage_states is not None else {}
+
+    @staticmethod
+    def _update_precision_array(values, precision: int = DAMAGE_PRECISION):
+        """AnalysisUtil.update_precision for every value of an array; rounds with python's round so results
+        match the scalar path to the last digit."""
+        return numpy.array([round(value, precision) for value in values.tolist()])
+
+    def _get_ls_to_ds_method(self, hazard_type, inventory_type):
+        """Get the method that maps limit states to damage states for this fragility set.
+
+        Args:
+            hazard_type (str): A string describing the hazard being evaluated.
+            inventory_type (str): A string describing the type of element being evaluated.
+
+        Returns:
+            function: LS-to-DS mapping
+
+        """
         ls_ds_dspatcher = {
             # 1 LS to 4 DS
             ("hurricane", "building", 1): FragilityCurveSet._1ls_to_4ds,
@@ -177,7 +316,7 @@ class FragilityCurveSet:
 
         return ls_ds_dspatcher[
             (hazard_type, inventory_type, len(self.fragility_curves))
-        ](damage)
+        ]
 
     def construct_expression_args_from_inventory(self, inventory_unit: dict):
         """
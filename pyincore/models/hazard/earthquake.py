@@ -45,8 +45,23 @@ class Earthquake(Hazard):
 
         """
         if self.id and self.id != "" and hazard_service is not None:
-            return hazard_service.post_earthquake_hazard_values(
-                self.id, payload, **kwargs
+            # the site class is a trailing payload item, it applies to every point and is sent with each post
+            site_class = []
+            if len(payload) > 0 and "siteClassId" in payload[-1]:
+                site_class = payload[-1:]
+                payload = payload[:-1]
+
+            variant = "amplify={}|site={}".format(
+                kwargs.get("amplify_hazard", True),
+                site_class[0]["siteClassId"] if site_class else "",
+            )
+            return self.read_cached_hazard_values(
+                payload,
+                hazard_service,
+                lambda points: hazard_service.post_earthquake_hazard_values(
+                    self.id, points + site_class, **kwargs
+                ),
+                variant,
             )
         else:
             return self.read_local_raster_hazard_values(payload)
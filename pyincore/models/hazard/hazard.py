@@ -8,7 +8,10 @@
 import json
 import warnings
 
+import numpy
+
 from pyincore.models.units import Units
+from pyincore.models.hazard.hazardvaluecache import HazardValueCache
 from pyincore.dataset import Dataset
 
 warnings.filterwarnings("ignore", "", UserWarning)
@@ -61,24 +64,50 @@ class Hazard:
 
         return instance
 
+    def read_cached_hazard_values(
+        self, payload: list, hazard_service, post_hazard_values, variant: str = ""
+    ):
+        """Read hazard values from the hazard value cache of the client, posting only the uncached requests.
+
+        Args:
+            payload (list): Hazard value requests.
+            hazard_service (obj): Hazard service.
+            post_hazard_values (function): Posts a payload of this hazard to the hazard service.
+            variant (str): Request options that change the values.
+        Returns:
+            obj: Hazard values.
+
+        """
+        cache = HazardValueCache.from_client(hazard_service.client, self.id)
+        if cache is None:
+            return post_hazard_values(payload)
+        return cache.read_hazard_values(payload, post_hazard_values, variant)
+
     def read_local_raster_hazard_values(self, payload: list):
         """Read local hazard values from raster dataset
 
+        All locations requesting the same raster are sampled together with a single bulk read, so the cost
+        scales with the number of raster blocks touched rather than the number of locations.
+
         Args:
             payload (list):
         Returns:
             obj: Hazard values.
 
         """
-
-        response = []
+        xs = []
+        ys = []
+        hazard_values = []
+        # index of the hazard dataset -> list of (request index, demand index) reading from it
+        matched_requests = {}
 
         # match demand types with raster file
-        for req in payload:
-            hazard_values = []
+        for req_index, req in enumerate(payload):
+            xs.append(float(req["loc"].split(",")[1]))
+            ys.append(float(req["loc"].split(",")[0]))
+            hazard_values.append([-9999.2] * len(req["demands"]))  # invalid demand type
             for index, req_demand_type in enumerate(req["demands"]):
-                match = False
-                for hazard_dataset in self.hazardDatasets:
+                for dataset_index, hazard_dataset in enumerate(self.hazardDatasets):
                     if hazard_dataset.dataset is None or not isinstance(
                         hazard_dataset.dataset, Dataset
                     ):
@@ -101,41 +130,50 @@ class Hazard:
                             and period == hazard_dataset.period
                         )
                     ):
-                        raw_raster_value = hazard_dataset.dataset.get_raster_value(
-                            x=float(req["loc"].split(",")[1]),
-                            y=float(req["loc"].split(",")[0]),
+                        matched_requests.setdefault(dataset_index, []).append(
+                            (req_index, index)
                         )
-
-                        if raw_raster_value is None:
-                            converted_raster_value = raw_raster_value
-                        else:
-                            # some basic unit conversion
-                            converted_raster_value = Units.convert_hazard(
-                                raw_raster_value,
-                                original_demand_units=hazard_dataset.demand_units,
-                                requested_demand_units=req["units"][index],
-                            )
-
-                            # compare with threshold (optional)
-                            threshold_value = hazard_dataset.threshold_value
-                            threshold_unit = hazard_dataset.threshold_unit
-                            if threshold_value is not None:
-                                converted_threshold_value = Units.convert_hazard(
-                                    threshold_value,
-                                    original_demand_units=threshold_unit,
-                                    requested_demand_units=req["units"][index],
-                                )
-                                if converted_raster_value < converted_threshold_value:
-                                    converted_raster_value = None
-
-                        hazard_values.append(converted_raster_value)
-                        match = True
                         break
 
-                if not match:
-                    hazard_values.append(-9999.2)  # invalid demand type
+        xs = numpy.array(xs)
+        ys = numpy.array(ys)
+        for dataset_index, requests in matched_requests.items():
+            hazard_dataset = self.hazardDatasets[dataset_index]
+            req_indices = numpy.array([req_index for req_index, _ in requests])
+            raw_raster_values = hazard_dataset.dataset.get_raster_values(
+                xs[req_indices], ys[req_indices]
+            )
+
+            for (req_index, index), raw_raster_value in zip(
+                requests, raw_raster_values
+            ):
+                if numpy.isnan(raw_raster_value):
+                    converted_raster_value = None
+                else:
+                    # some basic unit conversion
+                    converted_raster_value = Units.convert_hazard(
+                        float(raw_raster_value),
+                        original_demand_units=hazard_dataset.demand_units,
+                        requested_demand_units=payload[req_index]["units"][index],
+                    )
+
+                    # compare with threshold (optional)
+                    threshold_value = hazard_dataset.threshold_value
+                    threshold_unit = hazard_dataset.threshold_unit
+                    if threshold_value is not None:
+                        converted_threshold_value = Units.convert_hazard(
+                            threshold_value,
+                            original_demand_units=threshold_unit,
+                            requested_demand_units=payload[req_index]["units"][index],
+                        )
+                        if converted_raster_value < converted_threshold_value:
+                            converted_raster_value = None
+
+                hazard_values[req_index][index] = converted_raster_value
 
-            req.update({"hazardValues": hazard_values})
+        response = []
+        for req, req_hazard_values in zip(payload, hazard_values):
+            req.update({"hazardValues": req_hazard_values})
             response.append(req)
 
         return response
@@ -3,6 +3,8 @@
 # This program and the accompanying materials are made available under the
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
+from shapely import STRtree
+
 from pyincore import Dataset
 
 
@@ -113,6 +115,27 @@ class TsunamiDataset(HazardDataset):
 class TornadoDataset(HazardDataset):
     def __init__(self, hazard_datasets_metadata):
         super().__init__(hazard_datasets_metadata)
+        # (dataset, EF zone GeoDataFrame, spatial index) of the last attached dataset
+        self._ef_zones = None
+
+    def get_ef_zones(self):
+        """Get the EF zone polygons of the tornado path with an STRtree index over their geometries.
+
+        The shapefile is read once per attached dataset; later calls return the cached frame and index.
+
+        Returns:
+            obj, obj: EF zone GeoDataFrame and its STRtree.
+
+        """
+        if self._ef_zones is None or self._ef_zones[0] is not self.dataset:
+            ef_zones = self.dataset.get_dataframe_from_shapefile()
+            self._ef_zones = (
+                self.dataset,
+                ef_zones,
+                STRtree(ef_zones.geometry.values),
+            )
+
+        return self._ef_zones[1], self._ef_zones[2]
 
 
 class FloodDataset(HazardDataset):
@@ -0,0 +1,197 @@
+# Copyright (c) 2024 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import contextlib
+import os
+import re
+import sqlite3
+
+from pyincore import globals as pyglobals
+
+logger = pyglobals.LOGGER
+
+
+class HazardValueCache:
+    """Persistent cache of the hazard values of one hazard, shared by every analysis using the hazard.
+
+    Values are stored in a sqlite file per hazard under the client's hashed_svc_data_dir/hazard_values, keyed by
+    rounded location, demand, unit and a variant string for request options that change the values, such as the
+    earthquake amplification and site class. Error codes (-9999.x) are never cached.
+
+    Args:
+        file_path (str): Path of the sqlite cache file.
+
+    """
+
+    # decimal places of the cached locations, about 1 cm
+    LOCATION_PRECISION = 7
+
+    # maximum number of keys per sqlite query
+    QUERY_SIZE = 500
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hazard_values (key TEXT PRIMARY KEY, value REAL) WITHOUT ROWID"
+            )
+
+    @classmethod
+    def from_client(cls, client, hazard_id: str):
+        """Cache of a remote hazard in the data cache of a client.
+
+        Args:
+            client (IncoreClient): Service client.
+            hazard_id (str): ID of the hazard.
+
+        Returns:
+            obj: HazardValueCache, None if the client has no data cache.
+
+        """
+        cache_dir = getattr(client, "hashed_svc_data_dir", "")
+        if getattr(client, "offline", False) or not cache_dir:
+            return None
+        # ids are server generated object ids, guard against anything that is not a plain file name
+        if not re.fullmatch(r"[\w\-]+", hazard_id):
+            return None
+
+        try:
+            os.makedirs(os.path.join(cache_dir, "hazard_values"), exist_ok=True)
+            return cls(os.path.join(cache_dir, "hazard_values", hazard_id + ".sqlite"))
+        except (OSError, sqlite3.Error):
+            logger.warning("Unable to open the hazard value cache of " + hazard_id)
+            return None
+
+    @staticmethod
+    def get_keys(request: dict, variant: str = ""):
+        """Cache keys of the demands of a hazard value request.
+
+        Args:
+            request (dict): A payload item with demands, units and loc, e.g. {"demands": ["PGA"], "units": ["g"],
+                "loc": "35.84,-89.90"}.
+            variant (str): Request options that change the values.
+
+        Returns:
+            list: A key per demand.
+
+        """
+        lat, lon = request["loc"].split(",")
+        location = "{:.{precision}f},{:.{precision}f}".format(
+            float(lat), float(lon), precision=HazardValueCache.LOCATION_PRECISION
+        )
+        amplify = request.get("amplifyHazards")
+        keys = []
+        for index, (demand, unit) in enumerate(
+            zip(request["demands"], request["units"])
+        ):
+            key = "|".join([location, demand.lower(), unit, variant])
+            if amplify is not None:
+                key += "|" + str(amplify[index])
+            keys.append(key)
+        return keys
+
+    def get(self, keys: list):
+        """Cached values of the keys.
+
+        Args:
+            keys (list): Cache keys.
+
+        Returns:
+            dict: Values of the cached keys, None for a cached missing value.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        values = {}
+        try:
+            with self._connect() as connection:
+                for start in range(0, len(keys), HazardValueCache.QUERY_SIZE):
+                    end = start + HazardValueCache.QUERY_SIZE
+                    query_keys = keys[start:end]
+                    values.update(
+                        connection.execute(
+                            "SELECT key, value FROM hazard_values WHERE key IN ("
+                            + ",".join("?" * len(query_keys))
+                            + ")",
+                            query_keys,
+                        ).fetchall()
+                    )
+        except sqlite3.Error:
+            logger.warning("Ignoring unreadable hazard value cache " + self.file_path)
+            return {}
+        return values
+
+    def put(self, values: dict):
+        """Store hazard values, error codes are skipped.
+
+        Args:
+            values (dict): Hazard value by cache key.
+
+        """
+        rows = [
+            (key, value)
+            for key, value in values.items()
+            if value is None or not str(value).startswith("-9999")
+        ]
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO hazard_values (key, value) VALUES (?, ?)",
+                    rows,
+                )
+        except sqlite3.Error:
+            logger.warning("Unable to write hazard value cache " + self.file_path)
+
+    def read_hazard_values(self, payload: list, post_hazard_values, variant: str = ""):
+        """Hazard values of a payload, posting only the requests with a demand that is not cached.
+
+        Args:
+            payload (list): Hazard value requests.
+            post_hazard_values (function): Posts a payload to the hazard service and returns its response.
+            variant (str): Request options that change the values.
+
+        Returns:
+            list: Hazard value response, the requests with their hazardValues, in payload order.
+
+        """
+        keys = [HazardValueCache.get_keys(request, variant) for request in payload]
+        cached = self.get([key for request_keys in keys for key in request_keys])
+
+        missing = [
+            index
+            for index, request_keys in enumerate(keys)
+            if any(key not in cached for key in request_keys)
+        ]
+        response = [None] * len(payload)
+        if len(missing) > 0:
+            posted = post_hazard_values([payload[index] for index in missing])
+            values = {}
+            for index, posted_request in zip(missing, posted):
+                response[index] = posted_request
+                values.update(zip(keys[index], posted_request["hazardValues"]))
+            self.put(values)
+
+        for index, request in enumerate(payload):
+            if response[index] is None:
+                response[index] = dict(request)
+                response[index]["hazardValues"] = [cached[key] for key in keys[index]]
+
+        return response
+
+    def clear(self):
+        """Remove every cached value of the hazard."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM hazard_values")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # analyses read hazard values from several worker processes, wait for the other writers
+        connection = sqlite3.connect(self.file_path, timeout=60)
+        try:
+            # commits or rolls back, the connection itself is closed below
+            with connection:
+                yield connection
+        finally:
+            connection.close()
@@ -46,8 +46,12 @@ class Hurricane(Hazard):
 
         """
         if self.id and self.id != "" and hazard_service is not None:
-            return hazard_service.post_hurricane_hazard_values(
-                self.id, payload, **kwargs
+            return self.read_cached_hazard_values(
+                payload,
+                hazard_service,
+                lambda points: hazard_service.post_hurricane_hazard_values(
+                    self.id, points, **kwargs
+                ),
             )
         else:
             return self.read_local_raster_hazard_values(payload)
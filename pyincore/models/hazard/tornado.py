@@ -9,6 +9,7 @@ from pyincore.models.hazard.hazarddataset import TornadoDataset
 from pyincore.models.units import Units
 
 from shapely.geometry import Point
+import numpy
 import random
 import time
 
@@ -97,6 +98,9 @@ class Tornado(Hazard):
     def calculate_wind_speed_uniform_random_dist(self, payload, seed=-1):
         """Read local hazard values from shapefile dataset
 
+        Locations requesting the same dataset are located in the EF zones with one bulk STRtree query. Each
+        location keeps its own random seed, so wind speeds do not depend on the other locations in the payload.
+
         Args:
             payload (list):
             seed: (None or int): Seed value for random values.
@@ -104,15 +108,19 @@ class Tornado(Hazard):
             obj: Hazard values.
 
         """
-
-        response = []
+        locations = []
+        hazard_values = []
+        # index of the hazard dataset -> list of (request index, demand index) reading from it
+        matched_requests = {}
 
         # match demand types with shapefile file
-        for req in payload:
-            hazard_values = []
+        for req_index, req in enumerate(payload):
+            x = float(req["loc"].split(",")[1])
+            y = float(req["loc"].split(",")[0])
+            locations.append(Point(x, y))
+            hazard_values.append([-9999.2] * len(req["demands"]))  # invalid demand type
             for index, req_demand_type in enumerate(req["demands"]):
-                match = False
-                for hazard_dataset in self.hazardDatasets:
+                for dataset_index, hazard_dataset in enumerate(self.hazardDatasets):
                     if hazard_dataset.dataset is None or not isinstance(
                         hazard_dataset.dataset, Dataset
                     ):
@@ -122,68 +130,105 @@ class Tornado(Hazard):
 
                     # find matching raster file (Dataset) to read value from
                     if req_demand_type.lower() == hazard_dataset.demand_type.lower():
-                        hazard_df = (
-                            hazard_dataset.dataset.get_dataframe_from_shapefile()
+                        matched_requests.setdefault(dataset_index, []).append(
+                            (req_index, index)
                         )
-                        ef_box = -1
-                        x = float(req["loc"].split(",")[1])
-                        y = float(req["loc"].split(",")[0])
-                        location = Point(x, y)
-
-                        for _, feature in hazard_df.iterrows():
-                            polygon = feature["geometry"]
-                            if location.within(polygon):
-                                ef_rating = feature[self.EF_RATING_FIELD]
-                                ef_box = Tornado.get_ef_rating(ef_rating)
-                                break
-
-                        if ef_box < 0:
-                            raw_wind_speed = None
-                        elif ef_box == 5:  # EF5
-                            bottom_speed = self.EF_WIND_SPEED[ef_box]
-                            top_speed = self.MAX_WIND_SPEED
-                            random.seed(self.get_random_seed(location, seed))
-                            raw_wind_speed = random.uniform(bottom_speed, top_speed)
-                        else:
-                            bottom_speed = self.EF_WIND_SPEED[ef_box]
-                            top_speed = self.EF_WIND_SPEED[ef_box + 1]
-                            random.seed(self.get_random_seed(location, seed))
-                            raw_wind_speed = random.uniform(bottom_speed, top_speed)
-
-                        if raw_wind_speed is None:
-                            converted_wind_speed = raw_wind_speed
-                        else:
-                            # some basic unit conversion
-                            converted_wind_speed = Units.convert_hazard(
-                                raw_wind_speed,
-                                original_demand_units=hazard_dataset.demand_units,
-                                requested_demand_units=req["units"][index],
-                            )
-
-                            # compare with threshold (optional)
-                            threshold_value = hazard_dataset.threshold_value
-                            threshold_unit = hazard_dataset.threshold_unit
-                            if threshold_value is not None:
-                                converted_threshold_value = Units.convert_hazard(
-                                    threshold_value,
-                                    original_demand_units=threshold_unit,
-                                    requested_demand_units=req["units"][index],
-                                )
-                                if converted_wind_speed < converted_threshold_value:
-                                    converted_wind_speed = None
-
-                        hazard_values.append(converted_wind_speed)
-                        match = True
                         break
 
-                if not match:
-                    hazard_values.append(-9999.2)  # invalid demand type
+        locations = numpy.array(locations, dtype=object)
+        for dataset_index, requests in matched_requests.items():
+            hazard_dataset = self.hazardDatasets[dataset_index]
+            req_indices = numpy.array([req_index for req_index, _ in requests])
+            raw_wind_speeds = self.get_wind_speeds(
+                hazard_dataset, locations[req_indices], seed
+            )
+
+            for (req_index, index), raw_wind_speed in zip(requests, raw_wind_speeds):
+                if numpy.isnan(raw_wind_speed):
+                    converted_wind_speed = None
+                else:
+                    # some basic unit conversion
+                    converted_wind_speed = Units.convert_hazard(
+                        float(raw_wind_speed),
+                        original_demand_units=hazard_dataset.demand_units,
+                        requested_demand_units=payload[req_index]["units"][index],
+                    )
+
+                    # compare with threshold (optional)
+                    threshold_value = hazard_dataset.threshold_value
+                    threshold_unit = hazard_dataset.threshold_unit
+                    if threshold_value is not None:
+                        converted_threshold_value = Units.convert_hazard(
+                            threshold_value,
+                            original_demand_units=threshold_unit,
+                            requested_demand_units=payload[req_index]["units"][index],
+                        )
+                        if converted_wind_speed < converted_threshold_value:
+                            converted_wind_speed = None
 
-            req.update({"hazardValues": hazard_values})
+                hazard_values[req_index][index] = converted_wind_speed
+
+        response = []
+        for req, req_hazard_values in zip(payload, hazard_values):
+            req.update({"hazardValues": req_hazard_values})
             response.append(req)
 
         return response
 
+    def get_wind_speeds(self, hazard_dataset, locations, seed=-1):
+        """Draw wind speeds for many locations from the EF zones of a tornado dataset.
+
+        Args:
+            hazard_dataset (obj): Tornado hazard dataset with the EF zone shapefile attached.
+            locations (numpy.array): Shapely points.
+            seed: (None or int): Seed value for random values.
+
+        Returns:
+            numpy.array: Wind speeds in the dataset units, NaN for locations outside every EF zone.
+
+        """
+        ef_zones, ef_zones_tree = hazard_dataset.get_ef_zones()
+        ef_boxes = numpy.array(
+            [
+                Tornado.get_ef_rating(ef_rating)
+                for ef_rating in ef_zones[self.EF_RATING_FIELD]
+            ],
+            dtype=int,
+        )
+
+        # a location takes the rating of the first EF zone (in file order) containing it
+        zone_indices = numpy.full(len(locations), len(ef_zones))
+        location_indices, tree_indices = ef_zones_tree.query(
+            locations, predicate="within"
+        )
+        numpy.minimum.at(zone_indices, location_indices, tree_indices)
+        in_zone = zone_indices < len(ef_zones)
+
+        location_ef_boxes = numpy.full(len(locations), -1)
+        location_ef_boxes[in_zone] = ef_boxes[zone_indices[in_zone]]
+        exposed = location_ef_boxes >= 0
+
+        wind_speed_bounds = numpy.append(self.EF_WIND_SPEED, self.MAX_WIND_SPEED)
+        bottom_speeds = wind_speed_bounds[location_ef_boxes[exposed]]
+        # EF5 is bounded by the maximum wind speed
+        top_speeds = wind_speed_bounds[
+            numpy.minimum(location_ef_boxes[exposed] + 1, len(wind_speed_bounds) - 1)
+        ]
+        # same draw as random.seed(s); random.uniform(bottom, top), seeded per location
+        uniform_draws = numpy.array(
+            [
+                random.Random(self.get_random_seed(location, seed)).random()
+                for location in locations[exposed]
+            ]
+        )
+
+        wind_speeds = numpy.full(len(locations), numpy.nan)
+        wind_speeds[exposed] = (
+            bottom_speeds + (top_speeds - bottom_speeds) * uniform_draws
+        )
+
+        return wind_speeds
+
     def get_random_seed(self, location, seed=-1):
         # Get seed from the model and override if no value specified
         if (
@@ -124,3 +124,54 @@ class RestorationCurveSet:
             )
 
         return output
+
+    def calculate_restoration_rates_batch(self, **kwargs):
+        """Restoration rates over many values at once; the batch counterpart of calculate_restoration_rates.
+
+        Args:
+            **kwargs: Keyword arguments, numpy arrays of the same length (e.g. a time grid) or scalars.
+
+        Returns:
+            dict: Limit state specific restoration rates, a numpy array per limit state.
+
+        """
+        output = {}
+        if len(self.restoration_curves) <= 5:
+            for restoration_curve in self.restoration_curves:
+                output[
+                    restoration_curve.return_type["description"]
+                ] = restoration_curve.solve_curve_expression_batch(
+                    hazard_values={}, curve_parameters=self.curve_parameters, **kwargs
+                )
+        else:
+            raise ValueError(
+                "We can only handle restoration curves with less than 5 damage states."
+            )
+
+        return output
+
+    def calculate_inverse_restoration_rates_batch(self, **kwargs):
+        """Inverse restoration rates over many values at once; the batch counterpart of
+        calculate_inverse_restoration_rates.
+
+        Args:
+            **kwargs: Keyword arguments, numpy arrays of the same length (e.g. a functionality grid) or scalars.
+
+        Returns:
+            dict: Limit state specific restoration times, a numpy array per limit state.
+
+        """
+        output = {}
+        if len(self.restoration_curves) <= 5:
+            for restoration_curve in self.restoration_curves:
+                output[
+                    restoration_curve.return_type["description"]
+                ] = restoration_curve.solve_curve_for_inverse_batch(
+                    hazard_values={}, curve_parameters=self.curve_parameters, **kwargs
+                )
+        else:
+            raise ValueError(
+                "We can only handle restoration curves with less than 5 damage states."
+            )
+
+        return output
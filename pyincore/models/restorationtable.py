@@ -0,0 +1,142 @@
+# Copyright (c) 2024 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import numpy
+
+
+class RestorationTable:
+    """Restoration rates of one restoration curve set, evaluated once over a time and a functionality grid.
+
+    Lookups on a grid point return the evaluated value, lookups between grid points are linearly interpolated.
+
+    Args:
+        restoration_curve_set (obj): Restoration curve set.
+        times (list): Time grid of the restoration rates.
+        pfs (list): Percentage of functionality grid of the inverse restoration rates (restoration times).
+
+    """
+
+    # restoration curves of the discretized restoration, after the undamaged state
+    DISCRETIZED_STATES = ["PF_0", "PF_1", "PF_2", "PF_3"]
+
+    def __init__(self, restoration_curve_set, times, pfs):
+        self.restoration_curve_set = restoration_curve_set
+        self.times = numpy.unique(numpy.asarray(times, dtype=float))
+        self.pfs = numpy.unique(numpy.asarray(pfs, dtype=float))
+        self.rates = restoration_curve_set.calculate_restoration_rates_batch(
+            time=self.times
+        )
+        self.inverse_rates = (
+            restoration_curve_set.calculate_inverse_restoration_rates_batch(
+                time=self.pfs
+            )
+        )
+
+    @staticmethod
+    def _lookup(grid, values, points):
+        """Values of a grid at points, exact on grid points and interpolated in between.
+
+        Args:
+            grid (numpy.ndarray): Sorted grid.
+            values (numpy.ndarray): Value per grid point.
+            points (numpy.ndarray): Points to look up.
+
+        Returns:
+            numpy.ndarray: Value per point.
+
+        """
+        if len(grid) == 0:
+            raise ValueError("Cannot look up restoration rates in an empty grid.")
+        index = numpy.clip(numpy.searchsorted(grid, points), 0, len(grid) - 1)
+        on_grid = grid[index] == points
+        result = numpy.empty(len(points))
+        # inverse rates reach inf at full functionality, interpolate only off grid
+        with numpy.errstate(invalid="ignore"):
+            result[~on_grid] = numpy.interp(points[~on_grid], grid, values)
+        result[on_grid] = values[index[on_grid]]
+        return result
+
+    def get_restoration_rates(self, times):
+        """Restoration rates at times.
+
+        Args:
+            times (list): Times.
+
+        Returns:
+            dict: Limit state specific restoration rates, a numpy array per limit state.
+
+        """
+        times = numpy.atleast_1d(numpy.asarray(times, dtype=float))
+        return {
+            key: RestorationTable._lookup(self.times, values, times)
+            for key, values in self.rates.items()
+        }
+
+    def get_inverse_restoration_rates(self, pfs):
+        """Restoration times at percentages of functionality.
+
+        Args:
+            pfs (list): Percentages of functionality.
+
+        Returns:
+            dict: Limit state specific restoration times, a numpy array per limit state.
+
+        """
+        pfs = numpy.atleast_1d(numpy.asarray(pfs, dtype=float))
+        return {
+            key: RestorationTable._lookup(self.pfs, values, pfs)
+            for key, values in self.inverse_rates.items()
+        }
+
+    def get_discretized_restoration(self, discretized_days):
+        """Discretized restoration matrix, the array counterpart of AnalysisUtil.get_discretized_restoration.
+
+        Args:
+            discretized_days (list): Days to compute discretized restoration (e.g. 1, 3, 7, 30, 90).
+
+        Returns:
+            numpy.ndarray: Functionality per day (rows) and damage state (columns), the undamaged state first,
+            e.g. [[1, 0.5, 0.09, 0.04, 0.03], ...].
+
+        """
+        rates = self.get_restoration_rates(discretized_days)
+        return numpy.column_stack(
+            [numpy.ones(len(discretized_days))]
+            + [rates[key] for key in RestorationTable.DISCRETIZED_STATES]
+        )
+
+
+class RestorationTableCache:
+    """Restoration tables over shared time and functionality grids, evaluated once per restoration curve set.
+
+    Args:
+        times (list): Time grid of the restoration rates.
+        pfs (list): Percentage of functionality grid of the inverse restoration rates.
+
+    """
+
+    def __init__(self, times, pfs):
+        self.times = times
+        self.pfs = pfs
+        self.tables = {}
+
+    def get_table(self, restoration_curve_set):
+        """Restoration table of a curve set, evaluated on first use.
+
+        Args:
+            restoration_curve_set (obj): Restoration curve set.
+
+        Returns:
+            obj: RestorationTable.
+
+        """
+        # curve sets without an id are not shared
+        key = restoration_curve_set.id or id(restoration_curve_set)
+        if key not in self.tables:
+            self.tables[key] = RestorationTable(
+                restoration_curve_set, self.times, self.pfs
+            )
+        return self.tables[key]
@@ -0,0 +1,267 @@
+# Copyright (c) 2019 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class SampleStates:
+    """Monte Carlo sample states of a set of items, e.g. failure states or damage states of buildings.
+
+    The states are kept as an (items x samples) uint8 matrix of indices into the list of state labels. Failure states
+    use the labels ["0", "1"] so the stored value is the failure state itself, 0 (failed) and 1 (not failed). Items
+    with fewer samples than the others are padded with MISSING.
+
+    Args:
+        ids (list): Id (usually guid) of each item.
+        states (np.ndarray): (items x samples) matrix of indices into labels.
+        labels (list): Name of each state, defaults to the failure states ["0", "1"].
+        column (str): Name of the sample column in the csv representation, e.g. failure, sample_damage_states.
+        id_column (str): Name of the id column in the csv representation.
+
+    """
+
+    MISSING = 255
+    FAILURE_LABELS = ["0", "1"]
+
+    def __init__(self, ids, states, labels=None, column="failure", id_column="guid"):
+        self.ids = list(ids)
+        self.states = states
+        self.labels = (
+            list(labels) if labels is not None else list(SampleStates.FAILURE_LABELS)
+        )
+        self.column = column
+        self.id_column = id_column
+
+    @property
+    def num_samples(self):
+        return self.states.shape[1]
+
+    @classmethod
+    def from_strings(
+        cls, ids, samples, labels=None, column="failure", id_column="guid"
+    ):
+        """Create sample states from comma joined sample strings such as "0,1,1,0".
+
+        Args:
+            ids (list): Id (usually guid) of each item.
+            samples (list): A comma joined string of sample states per item.
+            labels (list): Name of each state. Labels are collected from the samples if not provided.
+            column (str): Name of the sample column in the csv representation.
+            id_column (str): Name of the id column in the csv representation.
+
+        Returns:
+            obj: SampleStates.
+
+        """
+        rows = [
+            sample.split(",") if isinstance(sample, str) and sample != "" else []
+            for sample in samples
+        ]
+        if labels is None:
+            found = set(state for row in rows for state in row)
+            if found <= set(SampleStates.FAILURE_LABELS):
+                labels = list(SampleStates.FAILURE_LABELS)
+            else:
+                labels = sorted(found)
+        if len(labels) >= SampleStates.MISSING:
+            raise ValueError("Sample states support at most 254 distinct states.")
+
+        lookup = {label: i for i, label in enumerate(labels)}
+        num_samples = max((len(row) for row in rows), default=0)
+        states = np.full((len(rows), num_samples), SampleStates.MISSING, dtype=np.uint8)
+        for i, row in enumerate(rows):
+            states[i, : len(row)] = [lookup[state] for state in row]
+
+        return cls(ids, states, labels, column, id_column)
+
+    @classmethod
+    def from_dataframe(cls, dataframe, column=None, id_column=None, labels=None):
+        """Create sample states from a csv style DataFrame with an id column and a comma joined sample column.
+
+        Args:
+            dataframe (pd.DataFrame): Sample DataFrame, e.g. the sample failure state output of an analysis.
+            column (str): Name of the sample column. Detected if not provided.
+            id_column (str): Name of the id column, guid or id if not provided.
+            labels (list): Name of each state. Labels are collected from the samples if not provided.
+
+        Returns:
+            obj: SampleStates.
+
+        """
+        if id_column is None:
+            id_column = "guid" if "guid" in dataframe.columns else "id"
+        if column is None:
+            columns = [c for c in dataframe.columns if c != id_column]
+            column = "failure" if "failure" in columns else columns[0]
+
+        return cls.from_strings(
+            dataframe[id_column].tolist(),
+            dataframe[column].tolist(),
+            labels,
+            column,
+            id_column,
+        )
+
+    @classmethod
+    def concat(
+        cls, sample_states_list, labels=None, column="failure", id_column="guid"
+    ):
+        """Concatenate sample states of the same samples, e.g. the results of parallel workers.
+
+        States of items whose labels differ from the first item are remapped to the labels of the first item, labels
+        not in the first item are appended in order.
+
+        Args:
+            sample_states_list (list): A list of SampleStates.
+            labels (list): Name of each state of an empty list, defaults to the failure states.
+            column (str): Name of the sample column of an empty list.
+            id_column (str): Name of the id column of an empty list.
+
+        Returns:
+            obj: SampleStates, without items for an empty list.
+
+        """
+        if len(sample_states_list) == 0:
+            return cls([], np.zeros((0, 0), dtype=np.uint8), labels, column, id_column)
+
+        first = sample_states_list[0]
+        labels = list(first.labels)
+        lookup = {label: i for i, label in enumerate(labels)}
+        num_samples = max(s.num_samples for s in sample_states_list)
+        states = np.full(
+            (sum(len(s.ids) for s in sample_states_list), num_samples),
+            SampleStates.MISSING,
+            dtype=np.uint8,
+        )
+        ids = []
+        for s in sample_states_list:
+            chunk_states = s.states
+            if s.labels != labels:
+                codes = np.arange(SampleStates.MISSING + 1, dtype=np.uint8)
+                for i, label in enumerate(s.labels):
+                    if label not in lookup:
+                        if len(labels) + 1 >= SampleStates.MISSING:
+                            raise ValueError(
+                                "Sample states support at most 254 distinct states."
+                            )
+                        lookup[label] = len(labels)
+                        labels.append(label)
+                    codes[i] = lookup[label]
+                chunk_states = codes[np.asarray(chunk_states)]
+            states[len(ids) : len(ids) + len(s.ids), : s.num_samples] = chunk_states
+            ids.extend(s.ids)
+
+        return cls(ids, states, labels, first.column, first.id_column)
+
+    def to_values(self, dtype=int, missing=-1):
+        """Numeric value of the sample states, e.g. 0 (failed) and 1 (not failed) for failure states.
+
+        Args:
+            dtype (type): Data type of the values.
+            missing (int): Value of missing samples.
+
+        Returns:
+            np.ndarray: (items x samples) matrix of state values.
+
+        """
+        lookup = np.full(SampleStates.MISSING + 1, missing, dtype=dtype)
+        lookup[: len(self.labels)] = [float(label) for label in self.labels]
+        return lookup[self.states]
+
+    def to_strings(self):
+        """Comma joined sample states of each item, the csv representation of the samples.
+
+        Returns:
+            list: A comma joined string of sample states per item.
+
+        """
+        names = [str(label) + "," for label in self.labels]
+        fixed_width = len(set(len(name) for name in names)) == 1 and all(
+            name.isascii() for name in names
+        )
+        if fixed_width:
+            table = np.array(names, dtype="S{}".format(len(names[0])))
+        else:
+            table = np.array(names, dtype=object)
+
+        states = np.asarray(self.states)
+        if states.shape[1] == 0:
+            return [""] * len(states)
+        missing = states == SampleStates.MISSING
+        lengths = np.where(missing.any(axis=1), missing.argmax(axis=1), states.shape[1])
+
+        strings = []
+        for row, length in zip(states, lengths):
+            if length == 0:
+                strings.append("")
+            elif fixed_width:
+                strings.append(table[row[:length]].tobytes()[:-1].decode("ascii"))
+            else:
+                strings.append("".join(table[row[:length]].tolist())[:-1])
+
+        return strings
+
+    def to_dataframe(self):
+        """The csv representation of the samples, an id column and a comma joined sample column.
+
+        Returns:
+            pd.DataFrame: Sample DataFrame.
+
+        """
+        return pd.DataFrame({self.id_column: self.ids, self.column: self.to_strings()})
+
+    def save(self, file_path):
+        """Save the sample states as a .npy matrix next to a json index with the ids and labels.
+
+        Args:
+            file_path (str): Path of the .npy file.
+
+        Returns:
+            str: Path of the .npy file.
+
+        """
+        if not file_path.endswith(".npy"):
+            file_path = file_path + ".npy"
+        np.save(file_path, np.ascontiguousarray(self.states, dtype=np.uint8))
+        with open(SampleStates.get_index_path(file_path), "w") as f:
+            json.dump(
+                {
+                    "id_column": self.id_column,
+                    "column": self.column,
+                    "labels": self.labels,
+                    "ids": [
+                        i.item() if isinstance(i, np.generic) else i for i in self.ids
+                    ],
+                },
+                f,
+            )
+        return file_path
+
+    @classmethod
+    def load(cls, file_path, mmap_mode="r"):
+        """Load sample states saved by save.
+
+        Args:
+            file_path (str): Path of the .npy file.
+            mmap_mode (str): Memory map mode of the state matrix, see numpy.load. None reads it into memory.
+
+        Returns:
+            obj: SampleStates.
+
+        """
+        with open(SampleStates.get_index_path(file_path), "r") as f:
+            index = json.load(f)
+        states = np.load(file_path, mmap_mode=mmap_mode)
+        return cls(
+            index["ids"], states, index["labels"], index["column"], index["id_column"]
+        )
+
+    @staticmethod
+    def get_index_path(file_path):
+        return os.path.splitext(file_path)[0] + "_index.json"
@@ -757,3 +757,44 @@ class AnalysisUtil:
             class_restoration[time_key] = restoration
 
         return class_restoration
+
+    @staticmethod
+    def get_discretized_functionality(
+        damage_result, discretized_restoration, discretized_days
+    ):
+        """Discretized functionality of facilities, their damage state probabilities against their discretized
+        restoration.
+
+        Args:
+            damage_result (list): Damage rows with guid and DS_0 to DS_4.
+            discretized_restoration (dict): Discretized restoration matrix by guid, see
+                RestorationTable.get_discretized_restoration.
+            discretized_days (list): Days of the discretized restoration (e.g. 1, 3, 7, 30, 90).
+
+        Returns:
+            list: Functionality for each day, e.g. {"guid": ..., "day1": 0.8, "day3": 0.9, etc }. Rows without
+            damage only have the guid.
+
+        """
+        damage_states = ["DS_0", "DS_1", "DS_2", "DS_3", "DS_4"]
+        # Only compute if we have damage
+        damaged = [dmg for dmg in damage_result if dmg["DS_0"]]
+        restoration = np.array(
+            [discretized_restoration[dmg["guid"]] for dmg in damaged], dtype=float
+        ).reshape(len(damaged), len(discretized_days), len(damage_states))
+        probabilities = np.array(
+            [[float(dmg[state]) for state in damage_states] for dmg in damaged]
+        ).reshape(len(damaged), len(damage_states))
+
+        # the product is summed in damage state order, the order of the per facility sums
+        functionality = np.zeros((len(damaged), len(discretized_days)))
+        for state in range(len(damage_states)):
+            functionality += restoration[:, :, state] * probabilities[:, state, None]
+
+        day_keys = ["day" + str(time) for time in discretized_days]
+        rows = iter(functionality)
+        func_result = []
+        for dmg in damage_result:
+            result_dict = dict(zip(day_keys, next(rows))) if dmg["DS_0"] else {}
+            func_result.append({"guid": dmg["guid"], **result_dict})
+        return func_result
@@ -0,0 +1,182 @@
+# Copyright (c) 2024 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import concurrent.futures
+
+import pandas as pd
+from pyomo.opt import SolverStatus, TerminationCondition
+
+from pyincore import globals as pyglobals
+from pyincore import AnalysisUtil
+
+logger = pyglobals.LOGGER
+
+# simulation built by the initializer of each worker process, reused for every scenario the worker solves
+_worker_simulation = None
+
+
+class CGEBatchRunner:
+    """Runs a CGE analysis for a batch of capital stock shock scenarios.
+
+    The shock table has a sector column and one shock column per scenario, e.g. one per Monte Carlo damage sample
+    of CapitalShocks. The input data is read once. Every worker process builds and calibrates the model once and
+    then solves its scenarios one after another, each warm started from the calibrated solution. The results are
+    written to a single long format result (scenario, output, row, column, value) as the scenarios finish.
+
+    The analysis provides build_simulation(data, require_optimal), which returns a function solving one scenario
+    from a (sector, shock) DataFrame and returning its outputs by result id, with the row labels as index. With
+    require_optimal it raises a ValueError for a scenario that is not solved to optimality, see
+    check_solver_results, and the scenario is left out of the result.
+
+    """
+
+    COLUMNS = ["scenario", "output", "row", "column", "value"]
+
+    @staticmethod
+    def get_scenarios(sector_shocks):
+        """Split a shock table into one (sector, shock) DataFrame per scenario.
+
+        Args:
+            sector_shocks (pd.DataFrame): A sector column, or the index, and one shock column per scenario.
+
+        Returns:
+            list: (scenario name, shock DataFrame) tuples.
+
+        """
+        if "sector" not in sector_shocks.columns:
+            sector_shocks = sector_shocks.rename_axis("sector").reset_index()
+
+        return [
+            (
+                str(column),
+                pd.DataFrame(
+                    {"sector": sector_shocks["sector"], "shock": sector_shocks[column]}
+                ),
+            )
+            for column in sector_shocks.columns
+            if column != "sector"
+        ]
+
+    @staticmethod
+    def to_long_format(scenario, outputs):
+        """Stack the outputs of one scenario into the columns of the batch result.
+
+        Args:
+            scenario (str): Scenario name.
+            outputs (dict): Output DataFrames by result id, with the row labels as index.
+
+        Returns:
+            pd.DataFrame: One row per scenario, output, row and column.
+
+        """
+        frames = []
+        for output, frame in outputs.items():
+            frame = frame.rename_axis("row").reset_index()
+            frame["row"] = frame["row"].astype(str)
+            frame = frame.melt(id_vars="row", var_name="column", value_name="value")
+            frame.insert(0, "output", output)
+            frame.insert(0, "scenario", scenario)
+            frames.append(frame)
+
+        if len(frames) == 0:
+            return pd.DataFrame(columns=CGEBatchRunner.COLUMNS)
+        return pd.concat(frames, ignore_index=True)[CGEBatchRunner.COLUMNS]
+
+    @staticmethod
+    def check_solver_results(results):
+        """Raise a ValueError unless the solver stopped with an optimal solution.
+
+        Args:
+            results (obj): Pyomo SolverResults of a solve.
+
+        """
+        status = results.solver.status
+        termination_condition = results.solver.termination_condition
+        if (
+            status != SolverStatus.ok
+            or termination_condition != TerminationCondition.optimal
+        ):
+            raise ValueError(
+                "Solver status "
+                + str(status)
+                + ", termination condition "
+                + str(termination_condition)
+            )
+
+    @staticmethod
+    def run(
+        analysis,
+        data,
+        scenarios,
+        result_id,
+        result_name,
+        num_cpu=0,
+        result_format="csv",
+    ):
+        """Solve every scenario and stream the results to an output of the analysis.
+
+        Args:
+            analysis (obj): CGE analysis that provides build_simulation(data, require_optimal).
+            data (dict): Input data of build_simulation, read once by the analysis.
+            scenarios (list): (scenario name, shock DataFrame) tuples from get_scenarios.
+            result_id (str): Id of the output dataset.
+            result_name (str): Name of the output.
+            num_cpu (int): Number of worker processes, all available cpus if 0.
+            result_format (str): csv (default), jsonl or parquet, see ResultSink.
+
+        Returns:
+            bool: True if every scenario was solved.
+
+        """
+        num_workers = AnalysisUtil.determine_parallelism_locally(
+            analysis, len(scenarios), num_cpu
+        )
+
+        names = [name for name, _ in scenarios]
+        shocks = [shock for _, shock in scenarios]
+        if num_workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=CGEBatchRunner._init_worker,
+                initargs=(analysis, data),
+            ) as executor:
+                solved = CGEBatchRunner._write_results(
+                    executor.map(CGEBatchRunner._solve_scenario, names, shocks),
+                    analysis.get_result_sink(result_id, result_name, result_format),
+                )
+        else:
+            CGEBatchRunner._init_worker(analysis, data)
+            solved = CGEBatchRunner._write_results(
+                map(CGEBatchRunner._solve_scenario, names, shocks),
+                analysis.get_result_sink(result_id, result_name, result_format),
+            )
+
+        return solved == len(scenarios)
+
+    @staticmethod
+    def _write_results(results, sink):
+        # the rows of each scenario in scenario order as soon as they are solved
+        solved = 0
+        with sink:
+            for result in results:
+                if result is not None:
+                    sink.write(result.to_dict("records"))
+                    solved += 1
+        return solved
+
+    @staticmethod
+    def _init_worker(analysis, data):
+        global _worker_simulation
+        _worker_simulation = analysis.build_simulation(data, require_optimal=True)
+
+    @staticmethod
+    def _solve_scenario(scenario, sector_shocks):
+        try:
+            outputs = _worker_simulation(sector_shocks)
+        except ValueError as e:
+            logger.warning("Scenario " + scenario + " was not solved: " + str(e))
+            return None
+        return CGEBatchRunner.to_long_format(scenario, outputs)
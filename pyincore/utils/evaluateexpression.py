@@ -1,3 +1,4 @@
+import functools
 import math
 import scipy  # noqa: F401
 import numpy  # noqa: F401
@@ -17,15 +18,86 @@ INVALID_NAMES = [
 ]
 
 
-def evaluate(expression: str, parameters: dict = {}):
-    """Evaluate a math expression.
+def _array_min(*args):
+    values = args[0] if len(args) == 1 else args
+    return functools.reduce(numpy.minimum, values)
+
+
+def _array_max(*args):
+    values = args[0] if len(args) == 1 else args
+    return functools.reduce(numpy.maximum, values)
+
+
+class _ArrayMath:
+    """Stand-in for the math module that applies the numpy ufunc of the same name, so math.log(x) etc.
+    also work when x is an array. Names without a numpy counterpart fall back to the math module.
+    """
+
+    def __getattr__(self, name):
+        if hasattr(numpy, name):
+            return getattr(numpy, name)
+        return getattr(math, name)
+
+
+# TODO figure out a better way of doing this. Can we import the packages here directly?
+SAFE_GLOBALS = {
+    "__builtins__": {
+        "min": min,
+        "max": max,
+        "round": round,
+        "sum": sum,
+        "abs": abs,
+        "pow": pow,
+    },
+    "scipy": globals()["scipy"],
+    "numpy": globals()["numpy"],
+    "math": globals()["math"],
+    "decimal": globals()["decimal"],
+}
+
+ARRAY_SAFE_GLOBALS = {
+    "__builtins__": {
+        "min": _array_min,
+        "max": _array_max,
+        "round": numpy.round,
+        "sum": sum,
+        "abs": numpy.abs,
+        "pow": numpy.power,
+    },
+    "scipy": globals()["scipy"],
+    "numpy": globals()["numpy"],
+    "math": _ArrayMath(),
+    "decimal": globals()["decimal"],
+}
+
+
+def validate_parameter_names(parameters):
+    """Check that none of the parameter names is a forbidden name.
+
+    Args:
+        parameters (iterable): Parameter names.
+
+    Raises:
+        NameError: If a parameter name is not allowed.
+
+    """
+    for parameter in parameters:
+        if type(parameter) is str and ("__" in parameter or parameter in INVALID_NAMES):
+            raise NameError(f"Using '{parameter}' is not allowed.")
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_expression(expression: str):
+    """Compile a math expression and validate the names it uses. The result is cached per expression string.
 
     Args:
         expression (str):  Math expression.
-        parameters (dict): Expression parameters.
 
     Returns:
-        float: A result of expression evaluation.
+        code: Compiled expression.
+
+    Raises:
+        NameError: If the expression uses a name that is not allowed.
 
     """
     # Compile the expression
@@ -35,27 +107,59 @@ def evaluate(expression: str, parameters: dict = {}):
     for name in code.co_names:
         if "__" in name or name in INVALID_NAMES:
             raise NameError(f"The use of '{name}' is not allowed.")
-    for parameter in parameters:
-        if type(parameter) is str and ("__" in parameter or parameter in INVALID_NAMES):
-            raise NameError(f"Using '{parameter}' is not allowed.")
 
-    # TODO figure out a better way of doing this. Can we import the packages here directly?
-    safe_globals = {
-        "__builtins__": {
-            "min": min,
-            "max": max,
-            "round": round,
-            "sum": sum,
-            "abs": abs,
-            "pow": pow,
-        },
-        "scipy": globals()["scipy"],
-        "numpy": globals()["numpy"],
-        "math": globals()["math"],
-        "decimal": globals()["decimal"],
-    }
+    return code
+
+
+def evaluate_compiled(code, parameters: dict = {}):
+    """Evaluate a math expression compiled with compile_expression. Parameter names are not validated here;
+    callers are expected to have done so with validate_parameter_names.
+
+    Args:
+        code (code): Compiled expression.
+        parameters (dict): Expression parameters.
+
+    Returns:
+        float: A result of expression evaluation.
+
+    """
     try:
-        return eval(code, safe_globals, parameters)
+        return eval(code, SAFE_GLOBALS, parameters)
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         return math.nan
+
+
+def evaluate_array(code, parameters: dict = {}):
+    """Evaluate a compiled math expression whose parameters may be numpy arrays. Functions of the math module
+    and the min/max/round/abs/pow builtins are swapped for their element-wise numpy equivalents.
+
+    Args:
+        code (code): Compiled expression.
+        parameters (dict): Expression parameters, scalars or numpy arrays.
+
+    Returns:
+        numpy.ndarray: A result of expression evaluation.
+
+    Raises:
+        Exception: Any error raised by the expression, e.g. when it cannot be evaluated element-wise.
+
+    """
+    return numpy.asarray(eval(code, ARRAY_SAFE_GLOBALS, parameters))
+
+
+def evaluate(expression: str, parameters: dict = {}):
+    """Evaluate a math expression.
+
+    Args:
+        expression (str):  Math expression.
+        parameters (dict): Expression parameters.
+
+    Returns:
+        float: A result of expression evaluation.
+
+    """
+    code = compile_expression(expression)
+    validate_parameter_names(parameters)
+
+    return evaluate_compiled(code, parameters)
@@ -0,0 +1,160 @@
+# Copyright (c) 2024 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import concurrent.futures
+import gzip
+import json
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+from urllib3 import encode_multipart_formdata
+from urllib3.util.retry import Retry
+
+
+class HazardValuesTransport:
+    """Posts hazard value requests to the hazard service in chunks.
+
+    A payload is split into chunks of at most chunk_size points. The chunks are posted concurrently over the
+    session of the client and the responses are concatenated in payload order. The session gets a pooled adapter
+    for each hazard values url that retries failed connections and 429/5xx responses with exponential backoff. Hazard
+    value posts do not change anything on the server, so retrying them is safe. The adapter is only mounted on the
+    hazard values urls, the other requests of the session are not retried.
+
+    Args:
+        client (Client): Service client, its session is shared by every chunk.
+        chunk_size (int): Maximum number of points per request.
+        max_workers (int): Maximum number of concurrent requests.
+        retries (int): Number of retries of a failed request.
+        backoff_factor (float): Backoff factor of the retries, the n-th retry waits backoff_factor * 2^(n-1) seconds.
+        compress (bool): Gzip the request bodies, the service has to accept gzip Content-Encoding.
+
+    """
+
+    CHUNK_SIZE = 5000
+    MAX_WORKERS = 4
+    RETRIES = 3
+    BACKOFF_FACTOR = 0.5
+    RETRY_STATUS = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        client,
+        chunk_size: int = CHUNK_SIZE,
+        max_workers: int = MAX_WORKERS,
+        retries: int = RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        compress: bool = False,
+    ):
+        self.client = client
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.compress = compress
+        self.mounted = set()
+
+    def mount(self, url: str):
+        """Mount the pooled, retrying adapter on the session of the client, for a hazard values url only.
+
+        Args:
+            url (str): Hazard values url.
+
+        """
+        prefix = urlparse(url)._replace(query="", fragment="").geturl()
+        if prefix in self.mounted:
+            return
+
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUS,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry
+        )
+        self.client.session.mount(prefix, adapter)
+        self.mounted.add(prefix)
+
+    def get_chunks(self, payload: list):
+        """Split a payload into chunks of at most chunk_size points.
+
+        Args:
+            payload (list): Hazard value requests.
+
+        Returns:
+            list: Payload chunks, a single empty chunk for an empty payload.
+
+        """
+        if len(payload) == 0:
+            return [payload]
+        chunks = []
+        for start in range(0, len(payload), self.chunk_size):
+            end = start + self.chunk_size
+            chunks.append(payload[start:end])
+        return chunks
+
+    def post(self, url: str, payload: list, fields: list = None, timeout=(30, 600)):
+        """Post the hazard value requests of a payload and return the hazard values in payload order.
+
+        Args:
+            url (str): Hazard values url.
+            payload (list): Hazard value requests, sent as the points form field.
+            fields (list): Other (name, value) form fields, sent with every chunk.
+            timeout (tuple): Timeout of each request.
+
+        Returns:
+            list: Hazard values.
+
+        """
+        chunks = self.get_chunks(payload)
+        if len(chunks) == 1 or self.max_workers == 1:
+            results = [self.post_chunk(url, chunk, fields, timeout) for chunk in chunks]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(chunks))
+            ) as executor:
+                results = list(
+                    executor.map(
+                        lambda chunk: self.post_chunk(url, chunk, fields, timeout),
+                        chunks,
+                    )
+                )
+
+        hazard_values = []
+        for result in results:
+            hazard_values.extend(result)
+        return hazard_values
+
+    def post_chunk(self, url: str, chunk: list, fields: list = None, timeout=(30, 600)):
+        """Post one chunk of hazard value requests.
+
+        Args:
+            url (str): Hazard values url.
+            chunk (list): Hazard value requests.
+            fields (list): Other (name, value) form fields.
+            timeout (tuple): Timeout of the request.
+
+        Returns:
+            list: Hazard values of the chunk.
+
+        """
+        self.mount(url)
+        form = [("points", json.dumps(chunk))] + list(fields or [])
+        if not self.compress:
+            r = self.client.post(url, timeout=timeout, files=form)
+            return r.json()
+
+        # same parts as the uncompressed multipart body of requests
+        body, content_type = encode_multipart_formdata(
+            [(name, (name, value)) for name, value in form]
+        )
+        headers = {"Content-Type": content_type, "Content-Encoding": "gzip"}
+        r = self.client.post(
+            url, data=gzip.compress(body), headers=headers, timeout=timeout
+        )
+        return r.json()
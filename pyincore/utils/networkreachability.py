@@ -0,0 +1,231 @@
+# Copyright (c) 2019 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import concurrent.futures
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+
+
+class NetworkReachability:
+    """Reachability of network nodes from a set of source nodes under sampled node and link failures.
+
+    The adjacency of the graph is built once as a CSR matrix. For every sample the links of failed nodes and the
+    failed links are masked out of the static index arrays, so the graph is never copied, and the nodes connected to
+    any source are found with connected components (undirected) or a breadth first search (directed).
+
+    Args:
+        graph (obj): A networkx graph, e.g. from NetworkDataset.get_graph_networkx().
+
+    """
+
+    def __init__(self, graph):
+        self.nodes = list(graph.nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.num_nodes = len(self.nodes)
+        self.directed = graph.is_directed()
+
+        edges = np.array(
+            [(self.node_index[u], self.node_index[v]) for u, v in graph.edges()],
+            dtype=np.intp,
+        ).reshape(-1, 2)
+        self.edge_nodes = edges
+        self.edge_index = {}
+        for i, (u, v) in enumerate(graph.edges()):
+            self.edge_index[(u, v)] = i
+            if not self.directed:
+                self.edge_index[(v, u)] = i
+
+        # static csr arrays, every entry remembers the edge it belongs to
+        rows, cols, entry_edges = edges[:, 0], edges[:, 1], np.arange(len(edges))
+        if not self.directed:
+            rows, cols = np.r_[rows, cols], np.r_[cols, rows]
+            entry_edges = np.r_[entry_edges, entry_edges]
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order]
+        self.entry_edges = entry_edges[order]
+        self.indptr = np.searchsorted(rows[order], np.arange(self.num_nodes + 1))
+
+    def get_node_indices(self, nodes):
+        """Position of nodes in the reachability arrays, -1 for nodes not in the graph.
+
+        Args:
+            nodes (list): Node ids.
+
+        Returns:
+            np.ndarray: Node indices.
+
+        """
+        return np.array(
+            [self.node_index.get(node, -1) for node in nodes], dtype=np.intp
+        )
+
+    def get_edge_indices(self, edges):
+        """Position of edges in the reachability arrays, -1 for edges not in the graph.
+
+        Args:
+            edges (list): (from node, to node) tuples.
+
+        Returns:
+            np.ndarray: Edge indices.
+
+        """
+        return np.array(
+            [self.edge_index.get(tuple(edge), -1) for edge in edges], dtype=np.intp
+        )
+
+    def node_failure_matrix(self, nodes, states):
+        """Failed nodes per sample from sample states where 0 means failed.
+
+        Args:
+            nodes (list): Node ids, one per row of states.
+            states (np.ndarray): (nodes x samples) sample states.
+
+        Returns:
+            np.ndarray: (graph nodes x samples) boolean matrix, True if the node failed.
+
+        """
+        states = np.asarray(states)
+        failed = np.zeros((self.num_nodes, states.shape[1]), dtype=bool)
+        indices = self.get_node_indices(nodes)
+        found = indices >= 0
+        np.logical_or.at(failed, indices[found], states[found] == 0)
+        return failed
+
+    def edge_failure_matrix(self, edges, states):
+        """Failed edges per sample from sample states where 0 means failed.
+
+        Args:
+            edges (list): (from node, to node) tuples, one per row of states.
+            states (np.ndarray): (edges x samples) sample states.
+
+        Returns:
+            np.ndarray: (graph edges x samples) boolean matrix, True if the edge failed.
+
+        """
+        states = np.asarray(states)
+        failed = np.zeros((len(self.edge_nodes), states.shape[1]), dtype=bool)
+        indices = self.get_edge_indices(edges)
+        found = indices >= 0
+        # several rows may map to the same edge, e.g. parallel pipes
+        np.logical_or.at(failed, indices[found], states[found] == 0)
+        return failed
+
+    def reachable(self, sources, failed_nodes=None, failed_edges=None):
+        """Nodes connected to any of the sources by links that did not fail and do not touch a failed node.
+
+        Args:
+            sources (np.ndarray): Indices of the source nodes.
+            failed_nodes (np.ndarray): Boolean mask over the graph nodes, True if the node failed.
+            failed_edges (np.ndarray): Boolean mask over the graph edges, True if the edge failed.
+
+        Returns:
+            np.ndarray: Boolean mask over the graph nodes, True if the node is reachable.
+
+        """
+        sources = np.asarray(sources, dtype=np.intp)
+        sources = sources[sources >= 0]
+
+        edge_ok = np.ones(len(self.edge_nodes), dtype=bool)
+        if failed_edges is not None:
+            edge_ok &= ~failed_edges
+        if failed_nodes is not None:
+            edge_ok &= ~(
+                failed_nodes[self.edge_nodes[:, 0]]
+                | failed_nodes[self.edge_nodes[:, 1]]
+            )
+
+        keep = edge_ok[self.entry_edges]
+        kept = np.concatenate(([0], np.cumsum(keep)))
+        reached = np.zeros(self.num_nodes, dtype=bool)
+        if len(sources) == 0:
+            return reached
+
+        if not self.directed:
+            adjacency = csr_matrix(
+                (
+                    np.ones(kept[-1], dtype=np.int8),
+                    self.indices[keep],
+                    kept[self.indptr],
+                ),
+                shape=(self.num_nodes, self.num_nodes),
+            )
+            _, labels = connected_components(adjacency, directed=False)
+            return np.isin(labels, labels[sources])
+
+        # a virtual root linked to every source turns multi source search into a single breadth first search
+        root = self.num_nodes
+        adjacency = csr_matrix(
+            (
+                np.ones(kept[-1] + len(sources), dtype=np.int8),
+                np.r_[self.indices[keep], sources],
+                np.r_[kept[self.indptr], kept[-1] + len(sources)],
+            ),
+            shape=(self.num_nodes + 1, self.num_nodes + 1),
+        )
+        order = breadth_first_order(
+            adjacency, root, directed=True, return_predecessors=False
+        )
+        reached[order[order != root]] = True
+        return reached
+
+    def reachable_samples(
+        self, sources, sinks, failed_nodes=None, failed_edges=None, num_workers=1
+    ):
+        """Reachability of the sink nodes for every sample.
+
+        Args:
+            sources (list): Source node ids.
+            sinks (list): Sink node ids.
+            failed_nodes (np.ndarray): (graph nodes x samples) boolean matrix, True if the node failed.
+            failed_edges (np.ndarray): (graph edges x samples) boolean matrix, True if the edge failed.
+            num_workers (int): Number of worker processes the samples are split across.
+
+        Returns:
+            np.ndarray: (sinks x samples) uint8 matrix, 1 if the sink is reachable from any source and 0 if not.
+
+        """
+        num_samples = (
+            failed_nodes.shape[1] if failed_nodes is not None else failed_edges.shape[1]
+        )
+        if num_workers > 1 and num_samples > 1:
+            chunks = np.array_split(
+                np.arange(num_samples), min(num_workers, num_samples)
+            )
+            results = []
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=len(chunks)
+            ) as executor:
+                for ret in executor.map(
+                    self.reachable_samples,
+                    [sources] * len(chunks),
+                    [sinks] * len(chunks),
+                    [
+                        failed_nodes[:, chunk] if failed_nodes is not None else None
+                        for chunk in chunks
+                    ],
+                    [
+                        failed_edges[:, chunk] if failed_edges is not None else None
+                        for chunk in chunks
+                    ],
+                ):
+                    results.append(ret)
+            return np.concatenate(results, axis=1)
+
+        source_indices = self.get_node_indices(sources)
+        sink_indices = self.get_node_indices(sinks)
+        found = sink_indices >= 0
+
+        results = np.zeros((len(sinks), num_samples), dtype=np.uint8)
+        for s in range(num_samples):
+            reached = self.reachable(
+                source_indices,
+                failed_nodes[:, s] if failed_nodes is not None else None,
+                failed_edges[:, s] if failed_edges is not None else None,
+            )
+            results[found, s] = reached[sink_indices[found]]
+        return results
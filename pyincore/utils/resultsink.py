@@ -0,0 +1,235 @@
+# Copyright (c) 2024 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import csv
+import json
+from decimal import Decimal
+
+import numpy
+
+
+class ResultSink:
+    """Writes analysis results to a file incrementally, one batch of result dicts at a time.
+
+    Analyses write the batches of their workers as they finish instead of collecting every result first. The file
+    is opened on the first batch, so a sink without results leaves no file behind, like Dataset.from_csv_data.
+
+    Formats:
+        csv: One row per result, with the columns of the first result, written like Dataset.from_csv_data.
+        json: A pretty printed JSON array, the same file Dataset.from_json_data writes.
+        jsonl: Newline delimited JSON, one compact JSON object per line.
+        parquet: A Parquet file with a row group per batch, requires pyarrow. The schema is taken from the first
+            batch; columns that are empty in the first batch are stored as strings.
+
+    Args:
+        file_path (str): Path of the result file.
+        result_format (str): csv, json, jsonl or parquet.
+        on_close (function): Called with the file path once the sink is closed.
+
+    """
+
+    FORMATS = {"csv": ".csv", "json": ".json", "jsonl": ".jsonl", "parquet": ".parquet"}
+
+    def __init__(self, file_path, result_format="csv", on_close=None):
+        if result_format not in ResultSink.FORMATS:
+            raise ValueError(
+                "Unsupported result format "
+                + str(result_format)
+                + ", use one of "
+                + ", ".join(ResultSink.FORMATS)
+            )
+        self.file_path = file_path
+        self.result_format = result_format
+        self.on_close = on_close
+        self.count = 0
+        self.closed = False
+
+        self._file = None
+        self._writer = None
+
+    @staticmethod
+    def get_extension(result_format):
+        """File extension of a result format.
+
+        Args:
+            result_format (str): csv, json, jsonl or parquet.
+
+        Returns:
+            str: Extension with the leading dot.
+
+        """
+        if result_format not in ResultSink.FORMATS:
+            raise ValueError("Unsupported result format " + str(result_format))
+        return ResultSink.FORMATS[result_format]
+
+    @staticmethod
+    def get_plain_value(value):
+        """Decimal damage probabilities and numpy scalars as the plain Python numbers json and parquet store.
+
+        Args:
+            value (any): A result value.
+
+        Returns:
+            any: Float for a Decimal, the Python scalar for a numpy scalar, else the value itself.
+
+        """
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, numpy.generic):
+            return value.item()
+        raise TypeError(
+            "Object of type " + value.__class__.__name__ + " is not JSON serializable"
+        )
+
+    def write(self, results):
+        """Append a batch of results.
+
+        Args:
+            results (list): Result dicts.
+
+        """
+        if self.closed:
+            raise ValueError("Cannot write to a closed result sink.")
+        if len(results) == 0:
+            return
+
+        if self.result_format == "csv":
+            self._write_csv(results)
+        elif self.result_format == "json":
+            self._write_json(results)
+        elif self.result_format == "jsonl":
+            self._write_jsonl(results)
+        else:
+            self._write_parquet(results)
+        self.count += len(results)
+
+    def close(self):
+        """Finish the file and hand its path to on_close."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.result_format == "json" and self._file is not None:
+            self._file.write("\n]")
+        if self._writer is not None and self.result_format == "parquet":
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+        if self.on_close is not None:
+            self.on_close(self.file_path)
+
+    def _write_csv(self, results):
+        if self._file is None:
+            self._file = open(self.file_path, "w")
+            self._writer = csv.DictWriter(
+                self._file, dialect="unix", fieldnames=results[0].keys()
+            )
+            self._writer.writeheader()
+        self._writer.writerows(results)
+
+    def _write_json(self, results):
+        # each item of json.dumps(list, indent=4) is the item dumped on its own, indented one level
+        if self._file is None:
+            self._file = open(self.file_path, "w")
+            self._file.write("[")
+        else:
+            self._file.write(",")
+        self._file.write(
+            ",".join(
+                "\n    "
+                + json.dumps(
+                    result, indent=4, default=ResultSink.get_plain_value
+                ).replace("\n", "\n    ")
+                for result in results
+            )
+        )
+
+    def _write_jsonl(self, results):
+        if self._file is None:
+            self._file = open(self.file_path, "w")
+        self._file.write(
+            "".join(
+                json.dumps(result, default=ResultSink.get_plain_value) + "\n"
+                for result in results
+            )
+        )
+
+    def _write_parquet(self, results):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "Parquet results require pyarrow, install it with: pip install pyarrow"
+            )
+
+        results = [
+            {
+                key: ResultSink.get_plain_value(value)
+                if isinstance(value, (Decimal, numpy.generic))
+                else value
+                for key, value in result.items()
+            }
+            for result in results
+        ]
+        if self._writer is None:
+            table = pyarrow.Table.from_pylist(results)
+            schema = pyarrow.schema(
+                [
+                    field.with_type(pyarrow.string())
+                    if pyarrow.types.is_null(field.type)
+                    else field
+                    for field in table.schema
+                ]
+            )
+            self._writer = pyarrow.parquet.ParquetWriter(self.file_path, schema)
+        schema = self._writer.schema
+        table = pyarrow.Table.from_pylist(results).select(schema.names).cast(schema)
+        self._writer.write_table(table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # leave the output unset, the results are incomplete
+            self.on_close = None
+            self.close()
+
+
+class MemoryResultSink(ResultSink):
+    """Collects analysis results in memory instead of writing them, for outputs that are chained in memory.
+
+    Args:
+        on_close (function): Called with the list of result dicts once the sink is closed.
+
+    """
+
+    def __init__(self, on_close=None):
+        super().__init__(None, "csv", on_close)
+        self.results = []
+
+    def write(self, results):
+        """Append a batch of results.
+
+        Args:
+            results (list): Result dicts.
+
+        """
+        if self.closed:
+            raise ValueError("Cannot write to a closed result sink.")
+        self.results.extend(results)
+        self.count += len(results)
+
+    def close(self):
+        """Hand the collected results to on_close."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_close is not None:
+            self.on_close(self.results)
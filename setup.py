@@ -67,7 +67,8 @@ setup(
             "pycodestyle>=2.6.0",
             "pytest>=3.9.0",
             "python-jose>=3.0",
-        ]
+        ],
+        "parquet": ["pyarrow>=14.0.0"],
     },
     project_urls={
         "Bug Reports": "https://github.com/IN-CORE/pyincore/issues",
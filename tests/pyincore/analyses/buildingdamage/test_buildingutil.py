@@ -0,0 +1,40 @@
+import numpy as np
+
+from pyincore.analyses.buildingdamage.buildingutil import BuildingUtil
+
+
+class RepairCurve:
+    def __init__(self, weeks):
+        self.weeks = weeks
+
+    def solve_curve_for_inverse(self, hazard_values, curve_parameters, **kwargs):
+        return kwargs["repair_time"] * self.weeks * 7
+
+
+class RepairSet:
+    curve_parameters = []
+    repair_curves = [RepairCurve(weeks) for weeks in [1, 2, 4, 8, 16]]
+
+
+def test_recovery_times_blocks_match_whole(monkeypatch):
+    repair_set = RepairSet()
+    repair_sets = [repair_set, None, repair_set, repair_set, None]
+    damage_states = np.array([[0, 4, 2], [1, 1, 1], [3, 3, 0], [2, 4, 4], [0, 0, 0]])
+    delay = np.arange(15, dtype=float).reshape(5, 3)
+
+    whole = BuildingUtil.get_recovery_times(
+        repair_sets, damage_states, delay, np.random.default_rng(1), np.nan
+    )
+    # two buildings per block
+    monkeypatch.setattr(BuildingUtil, "MAX_BLOCK_DRAWS", 18)
+    blocks = BuildingUtil.get_recovery_times(
+        repair_sets, damage_states, delay, np.random.default_rng(1), np.nan
+    )
+
+    assert whole.shape == (5, 9)
+    np.testing.assert_array_equal(blocks, whole)
+    assert np.isnan(whole[[1, 4]]).all()
+
+    # column i * N2 + j is delay sample i plus repair draw j
+    percent_func = np.random.default_rng(1).random((5, 3, 3))
+    assert whole[0, 5] == round(delay[0, 1] + percent_func[0, 1, 2] * 16, 1)
@@ -0,0 +1,141 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyincore import IncoreClient, Dataset
+from pyincore.analyses.buildingfunctionality import BuildingFunctionality
+from pyincore.models.samplestates import SampleStates
+
+
+def create_samples(prefix, num_items, num_samples, short, rng):
+    """Failure samples with num_samples samples, the items in short have one sample less."""
+    guids = [prefix + str(i) for i in range(num_items)]
+    samples = []
+    for i in range(num_items):
+        length = num_samples - 1 if i in short else num_samples
+        samples.append(",".join(rng.choice(["0", "1"], length, p=[0.3, 0.7])))
+    return pd.DataFrame({"guid": guids, "failure": samples})
+
+
+def create_inputs(seed=1234):
+    rng = np.random.default_rng(seed)
+    # buildings, substations and poles have uneven sample lengths, the shortest sample list decides the count
+    buildings = create_samples("bldg-", 30, 10, [3, 11], rng)
+    substations = create_samples("ss-", 4, 10, [2], rng)
+    poles = create_samples("pole-", 6, 12, [5], rng)
+
+    # every 7th building is not in the interdependency table
+    interdependency = {
+        guid: {
+            "substations_guid": substations["guid"][i % 4],
+            "poles_guid": poles["guid"][i % 6],
+        }
+        for i, guid in enumerate(buildings["guid"])
+        if i % 7 != 0
+    }
+    return buildings, substations, poles, interdependency
+
+
+def run_building_by_building(buildings, substations, poles, interdependency):
+    bldg_func = BuildingFunctionality(IncoreClient(offline=True))
+    buildings_df = buildings.set_index("guid")
+    substations_df = substations.set_index("guid") if substations is not None else None
+    poles_df = poles.set_index("guid") if poles is not None else None
+    results = [
+        bldg_func.functionality(
+            guid, buildings_df, substations_df, poles_df, interdependency
+        )
+        for guid in buildings_df.index
+    ]
+    return (
+        [sample for _, sample, _ in results],
+        [probability for _, _, probability in results],
+    )
+
+
+@pytest.mark.parametrize(
+    "use_interdependency, use_substations, use_poles",
+    [
+        (False, False, False),
+        (True, False, False),
+        (True, True, False),
+        (True, False, True),
+        (True, True, True),
+    ],
+)
+def test_batch_matches_building_by_building(
+    use_interdependency, use_substations, use_poles
+):
+    buildings, substations, poles, interdependency = create_inputs()
+    substations = substations if use_substations else None
+    poles = poles if use_poles else None
+    interdependency = interdependency if use_interdependency else None
+
+    expected_samples, expected_probabilities = run_building_by_building(
+        buildings, substations, poles, interdependency
+    )
+    bldg_func = BuildingFunctionality(IncoreClient(offline=True))
+    fs_results, fp_results = bldg_func.functionality_batch(
+        SampleStates.from_dataframe(buildings),
+        SampleStates.from_dataframe(substations) if substations is not None else None,
+        SampleStates.from_dataframe(poles) if poles is not None else None,
+        interdependency,
+    )
+
+    assert fs_results["guid"].tolist() == buildings["guid"].tolist()
+    assert fs_results["failure"].tolist() == expected_samples
+    assert fp_results["probability"].tolist() == expected_probabilities
+    if use_interdependency:
+        assert expected_samples[0] == "NA" and expected_probabilities[0] == "NA"
+
+
+@pytest.mark.parametrize("file_format", ["csv", "npy"])
+def test_chunks_match_building_by_building(tmp_path, monkeypatch, file_format):
+    buildings, substations, poles, interdependency = create_inputs()
+    expected_samples, expected_probabilities = run_building_by_building(
+        buildings, substations, poles, interdependency
+    )
+
+    datasets = {}
+    for dataset_id, samples in [
+        ("building_damage_mcs_samples", buildings),
+        ("substations_damage_mcs_samples", substations),
+        ("poles_damage_mcs_samples", poles),
+    ]:
+        if file_format == "npy":
+            file_path = SampleStates.from_dataframe(samples).save(
+                str(tmp_path / dataset_id)
+            )
+        else:
+            file_path = str(tmp_path / (dataset_id + ".csv"))
+            samples.to_csv(file_path, index=False)
+        datasets[dataset_id] = Dataset.from_file(file_path, "incore:sampleFailureState")
+    interdependency_file = str(tmp_path / "interdependency.json")
+    with open(interdependency_file, "w") as f:
+        json.dump(interdependency, f)
+    datasets["interdependency_dictionary"] = Dataset.from_file(
+        interdependency_file, "incore:buildingInterdependencyDict"
+    )
+
+    # 30 buildings in chunks of 8, the last chunk is shorter
+    monkeypatch.setattr(BuildingFunctionality, "CHUNK_SIZE", 8)
+    bldg_func = BuildingFunctionality(IncoreClient(offline=True))
+    for dataset_id, dataset in datasets.items():
+        bldg_func.set_input_dataset(dataset_id, dataset)
+    bldg_func.set_parameter("result_name", str(tmp_path / "chunked"))
+    bldg_func.run_analysis()
+
+    fs_results = bldg_func.get_output_dataset(
+        "functionality_samples"
+    ).get_dataframe_from_csv(as_text=True)
+    fp_results = bldg_func.get_output_dataset(
+        "functionality_probability"
+    ).get_dataframe_from_csv(as_text=True)
+
+    assert fs_results["guid"].tolist() == buildings["guid"].tolist()
+    assert fs_results["failure"].tolist() == expected_samples
+    assert fp_results["probability"].tolist() == [
+        str(probability) for probability in expected_probabilities
+    ]
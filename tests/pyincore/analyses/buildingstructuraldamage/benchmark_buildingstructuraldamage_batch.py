@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+from pyincore import IncoreClient
+from pyincore.analyses.buildingstructuraldamage import BuildingStructuralDamage
+from pyincore.globals import LOGGER
+
+# times the fragility groups against building by building, test_buildingstructuraldamage_batch checks that they
+# give the same damage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conftest import create_synthetic_buildings  # noqa: E402
+
+logger = LOGGER
+
+
+def run_benchmark(num_buildings=500000):
+    bldg_dmg = BuildingStructuralDamage(IncoreClient(offline=True))
+    buildings, fragility_sets, bldg_hazard_inputs = create_synthetic_buildings(
+        num_buildings
+    )
+
+    start = time.time()
+    for b, bldg_hazard_input in zip(buildings, bldg_hazard_inputs):
+        bldg_dmg.building_damage(
+            b, fragility_sets[b["id"]], bldg_hazard_input, ["tornado"]
+        )
+    single_time = time.time() - start
+
+    start = time.time()
+    bldg_dmg.building_damage_by_fragility_group(
+        buildings, fragility_sets, bldg_hazard_inputs, ["tornado"]
+    )
+    batch_time = time.time() - start
+
+    logger.info(
+        f"{num_buildings} buildings - building by building: {single_time:.2f}s, "
+        f"grouped by fragility: {batch_time:.2f}s ({single_time / batch_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,156 @@
+import concurrent.futures
+import os
+import time
+from itertools import repeat
+
+import numpy as np
+
+from pyincore import (
+    IncoreClient,
+    FragilityCurveSet,
+    MappingSet,
+    Tornado,
+    Dataset,
+    Mapping,
+)
+from pyincore.analyses.buildingstructuraldamage import BuildingStructuralDamage
+import pyincore.globals as pyglobals
+
+
+def create_analysis(num_buildings, seed=1234):
+    """Joplin tornado building damage with the sample buildings copied around their locations."""
+    client = IncoreClient(offline=True)
+    tornado = Tornado.from_json_file(
+        os.path.join(pyglobals.TEST_DATA_DIR, "tornado_dataset.json")
+    )
+    tornado.hazardDatasets[0].from_file(
+        (os.path.join(pyglobals.TEST_DATA_DIR, "joplin_tornado/joplin_path_wgs84.shp")),
+        data_type="incore:tornadoWindfield",
+    )
+    # a fixed seed, the wind speeds would otherwise depend on the time of each chunk
+    tornado.tornado_parameters["randomSeed"] = seed
+
+    mappings = []
+    for archetype in [6, 7]:
+        fragility_set = FragilityCurveSet.from_json_file(
+            os.path.join(
+                pyglobals.TEST_DATA_DIR,
+                "fragility_curves/fragility_archetype_" + str(archetype) + ".json",
+            )
+        )
+        mappings.append(
+            Mapping(
+                {"Non-Retrofit Fragility ID Code": fragility_set},
+                {"OR": ["int archetype EQUALS " + str(archetype)]},
+            )
+        )
+    fragility_mapping_set = MappingSet(
+        {
+            "id": "N/A",
+            "name": "local joplin tornado fragility mapping object",
+            "hazardType": "tornado",
+            "inventoryType": "building",
+            "mappings": mappings,
+            "mappingType": "fragility",
+        }
+    )
+
+    sample = list(
+        Dataset.from_file(
+            os.path.join(
+                pyglobals.TEST_DATA_DIR, "building/joplin_commercial_bldg_v6_sample.shp"
+            ),
+            data_type="ergo:buildingInventoryVer6",
+        ).get_inventory_reader()
+    )
+    rng = np.random.default_rng(seed)
+    offsets = rng.uniform(-0.01, 0.01, (num_buildings, 2))
+    buildings = []
+    for index in range(num_buildings):
+        building = sample[index % len(sample)]
+        x, y = building["geometry"]["coordinates"]
+        buildings.append(
+            {
+                "id": str(index),
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": (x + offsets[index, 0], y + offsets[index, 1]),
+                },
+                "properties": {
+                    **dict(building["properties"]),
+                    "guid": "guid-" + str(index),
+                },
+            }
+        )
+
+    bldg_dmg = BuildingStructuralDamage(client)
+    bldg_dmg.set_input_dataset("dfr3_mapping_set", fragility_mapping_set)
+    bldg_dmg.set_parameter("fragility_key", "Non-Retrofit Fragility ID Code")
+    return bldg_dmg, buildings, tornado
+
+
+def run_even_slices(bldg_dmg, buildings, num_workers, *shared_args):
+    """The replaced pattern, one slice per worker and the analysis pickled with every task."""
+    avg_bulk_input_size = int(len(buildings) / num_workers)
+    inventory_args = []
+    count = 0
+    while count < len(buildings):
+        inventory_args.append(buildings[count : count + avg_bulk_input_size])
+        count += avg_bulk_input_size
+
+    ds_results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for ds_result, _ in executor.map(
+            bldg_dmg.building_damage_analysis_bulk_input,
+            inventory_args,
+            *[repeat(arg) for arg in shared_args],
+        ):
+            ds_results.extend(ds_result)
+    return ds_results
+
+
+def run_map_parallel(bldg_dmg, buildings, num_workers, *shared_args):
+    ds_results = []
+    for ds_result, _ in bldg_dmg.map_parallel(
+        bldg_dmg.building_damage_analysis_bulk_input,
+        bldg_dmg.get_chunks(num_workers, buildings),
+        num_workers,
+        *shared_args,
+    ):
+        ds_results.extend(ds_result)
+    return ds_results
+
+
+def run_benchmark(num_buildings=20000, max_workers=None):
+    bldg_dmg, buildings, tornado = create_analysis(num_buildings)
+    shared_args = ([tornado], ["tornado"], [tornado.id])
+    if max_workers is None:
+        max_workers = os.cpu_count()
+
+    expected = None
+    for num_workers in range(1, max_workers + 1):
+        start = time.time()
+        even_results = run_even_slices(bldg_dmg, buildings, num_workers, *shared_args)
+        even_time = time.time() - start
+
+        timings = []
+        for backend in BuildingStructuralDamage.PARALLEL_BACKENDS:
+            bldg_dmg.set_parameter("parallel_backend", backend)
+            start = time.time()
+            results = run_map_parallel(bldg_dmg, buildings, num_workers, *shared_args)
+            timings.append(f"{backend}: {time.time() - start:.2f}s")
+
+            if expected is None:
+                expected = even_results
+            assert results == expected
+
+        assert even_results == expected
+        print(
+            f"{num_buildings} buildings, {num_workers} workers - even slices: {even_time:.2f}s, "
+            + ", ".join(timings)
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,29 @@
+import pytest
+
+from pyincore import IncoreClient
+from pyincore.analyses.buildingstructuraldamage import BuildingStructuralDamage
+
+
+@pytest.mark.parametrize("ground_failure", [False, True])
+def test_fragility_groups_match_single_buildings(synthetic_buildings, ground_failure):
+    bldg_dmg = BuildingStructuralDamage(IncoreClient(offline=True))
+    buildings, fragility_sets, bldg_hazard_inputs = synthetic_buildings(
+        200, ground_failure=ground_failure
+    )
+
+    single_damages = [
+        bldg_dmg.building_damage(
+            b, fragility_sets[b["id"]], bldg_hazard_input, ["tornado"]
+        )
+        for b, bldg_hazard_input in zip(buildings, bldg_hazard_inputs)
+    ]
+    batch_damages = bldg_dmg.building_damage_by_fragility_group(
+        buildings, fragility_sets, bldg_hazard_inputs, ["tornado"]
+    )
+
+    assert batch_damages == single_damages
+    if ground_failure:
+        assert any(
+            bldg_hazard_input["ground_failure_prob"] is not None
+            for bldg_hazard_input in bldg_hazard_inputs
+        )
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from pyincore import IncoreClient
+from pyincore.analyses.combinedwindwavesurgebuildingdamage import (
+    CombinedWindWaveSurgeBuildingDamage,
+)
+
+
+def legacy_combined_damage(combined_df):
+    """The damage of the dominant hazard as it was selected before, row by row from a dict keyed by DS_3."""
+
+    def find_match(row, col_name):
+        max_finder = {
+            row["f_DS_3"]: "f_",
+            row["w_DS_3"]: "w_",
+            row["sw_DS_3"]: "sw_",
+        }
+
+        return row[max_finder[max(max_finder.keys())] + col_name]
+
+    combined_df = combined_df.copy()
+    for col_name in [
+        "LS_0",
+        "LS_1",
+        "LS_2",
+        "DS_0",
+        "DS_1",
+        "DS_2",
+        "DS_3",
+        "haz_expose",
+    ]:
+        combined_df[col_name] = combined_df.apply(
+            lambda x: find_match(x, col_name=col_name), axis=1
+        )
+    return combined_df[
+        ["guid", "LS_0", "LS_1", "LS_2", "DS_0", "DS_1", "DS_2", "DS_3", "haz_expose"]
+    ]
+
+
+def test_dominant_hazard_matches_row_by_row(synthetic_hazard_damage):
+    wind, surge_wave, flood = synthetic_hazard_damage(300)
+    combined_df = pd.merge(
+        pd.merge(
+            wind.add_prefix("w_"),
+            surge_wave.add_prefix("sw_"),
+            left_on="w_guid",
+            right_on="sw_guid",
+        ),
+        flood.add_prefix("f_"),
+        left_on="w_guid",
+        right_on="f_guid",
+    ).rename(columns={"w_guid": "guid"})
+    expected = legacy_combined_damage(combined_df)
+
+    combined_dmg = CombinedWindWaveSurgeBuildingDamage(IncoreClient(offline=True))
+    result = combined_dmg.get_combined_damage(
+        wind.copy(), surge_wave.copy(), flood.copy()
+    )
+
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+    ds_3 = pd.DataFrame(
+        {"w": wind["DS_3"], "sw": surge_wave["DS_3"], "f": flood["DS_3"]}
+    )
+    assert (ds_3["sw"] == ds_3["w"]).any() and (ds_3["w"] == ds_3["f"]).any()
+    assert (ds_3["sw"] == ds_3["f"]).any() and ds_3["f"].isna().any()
+
+
+def create_damage(guids, ds_3):
+    damage = pd.DataFrame({"guid": guids})
+    for state in ["LS_0", "LS_1", "LS_2", "DS_0", "DS_1", "DS_2"]:
+        damage[state] = ds_3
+    damage["DS_3"] = ds_3
+    damage["haz_expose"] = "yes"
+    return damage
+
+
+def test_ties_and_missing_flood_damage():
+    guids = ["tie-sw-w", "tie-w-f", "no-flood", "no-wind"]
+    wind = create_damage(guids, [0.3, 0.3, 0.9, np.nan])
+    surge_wave = create_damage(guids, [0.3, 0.1, 0.5, 0.2])
+    flood = create_damage(guids, [0.1, 0.3, np.nan, 0.1])
+    # tell the hazards apart by their DS_0, wind 1, surge-wave 2 and flood 3
+    wind["DS_0"] = 1.0
+    surge_wave["DS_0"] = 2.0
+    flood["DS_0"] = 3.0
+
+    combined_dmg = CombinedWindWaveSurgeBuildingDamage(IncoreClient(offline=True))
+    result = combined_dmg.get_combined_damage(wind, surge_wave, flood)
+
+    # surge-wave wins a tie over wind, wind over flood, and a missing flood DS_3 selects flood
+    assert result["DS_0"].tolist() == [2.0, 1.0, 3.0, 2.0]
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from pyincore import IncoreClient
+from pyincore.analyses.combinedwindwavesurgebuildingloss import (
+    CombinedWindWaveSurgeBuildingLoss,
+)
+
+
+def create_costs(num_archetypes, seed=1234):
+    """Content and structural cost ratios of every flood archetype."""
+    rng = np.random.default_rng(seed)
+    content_cost = pd.DataFrame(
+        np.sort(rng.random((num_archetypes, 3)), axis=1),
+        columns=["DS_0", "DS_1", "DS_2"],
+    )
+    content_cost.insert(0, "arch_flood", range(1, num_archetypes + 1))
+    structure_cost = pd.DataFrame(
+        rng.random((num_archetypes, 3)),
+        columns=["Roofing", "Flooring and Foundation", "Wood Framing"],
+    )
+    return content_cost, structure_cost
+
+
+def legacy_combined_loss(combined_df, content_cost, structure_cost):
+    """The losses as they were computed before, row by row."""
+    loss_df = combined_df[["guid"]].copy()
+
+    def cost(row, column):
+        return structure_cost.loc[int(row["arch_flood"] - 1), column]
+
+    def dot(row, prefix, weights):
+        return np.dot(
+            row[[prefix + "DS_" + str(state) for state in range(len(weights))]],
+            np.array(weights),
+        )
+
+    loss_df["cont_loss"] = combined_df.apply(
+        lambda row: np.dot(
+            row[["f_DS_0", "f_DS_1", "f_DS_2"]],
+            content_cost.iloc[int(row["arch_flood"] - 1), 1:4],
+        ),
+        axis=1,
+    )
+    loss_df["roof_loss"] = combined_df.apply(
+        lambda row: dot(row, "w_", [0.15, 0.5, 0.75, 1]) * cost(row, "Roofing"),
+        axis=1,
+    )
+    loss_df["ff_loss"] = combined_df.apply(
+        lambda row: dot(row, "sw_", [0.1, 0.5, 0.75, 1])
+        * cost(row, "Flooring and Foundation"),
+        axis=1,
+    )
+
+    def compute_frame_loss(row):
+        if row["w_DS_3"] >= row["sw_DS_3"]:
+            prefix = "w_"
+        elif row["sw_DS_3"] > row["w_DS_3"]:
+            prefix = "sw_"
+        elif pd.isnull(row["sw_DS_3"]) and pd.isnull(row["w_DS_3"]):
+            return 0
+        elif not pd.isnull(row["sw_DS_3"]):
+            prefix = "sw_"
+        else:
+            prefix = "w_"
+        return dot(row, prefix, [0.25, 0.5, 0.75, 1]) * cost(row, "Wood Framing")
+
+    loss_df["frame_loss"] = combined_df.apply(compute_frame_loss, axis=1)
+
+    loss_df.fillna(0, inplace=True)
+    loss_df["total_loss"] = loss_df.apply(
+        lambda row: row["cont_loss"]
+        + row["frame_loss"]
+        + row["roof_loss"]
+        + row["ff_loss"],
+        axis=1,
+    )
+    return loss_df
+
+
+def test_loss_matches_row_by_row(synthetic_hazard_damage):
+    wind, surge_wave, flood = synthetic_hazard_damage(300)
+    # building 17 has neither wind nor surge-wave damage and no frame loss
+    surge_wave.loc[17, ["DS_0", "DS_1", "DS_2", "DS_3"]] = np.nan
+    content_cost, structure_cost = create_costs(5)
+    buildings = pd.DataFrame(
+        {"guid": wind["guid"], "arch_flood": np.arange(len(wind)) % 5 + 1}
+    )
+
+    combined_df = pd.merge(
+        pd.merge(
+            pd.merge(
+                wind.add_prefix("w_"),
+                surge_wave.add_prefix("sw_"),
+                left_on="w_guid",
+                right_on="sw_guid",
+            ),
+            flood.add_prefix("f_"),
+            left_on="w_guid",
+            right_on="f_guid",
+        ).rename(columns={"w_guid": "guid"}),
+        buildings,
+        on="guid",
+    )
+    expected = legacy_combined_loss(combined_df, content_cost, structure_cost)
+
+    combined_loss = CombinedWindWaveSurgeBuildingLoss(IncoreClient(offline=True))
+    result = combined_loss.get_combined_loss(
+        wind.copy(),
+        surge_wave.copy(),
+        flood.copy(),
+        buildings,
+        content_cost,
+        structure_cost,
+    )
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    assert (result["frame_loss"] == 0).any()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from pyincore import IncoreClient
+from pyincore.analyses.buildingdamage.buildingutil import BuildingUtil
+from pyincore.analyses.commercialbuildingrecovery import CommercialBuildingRecovery
+
+
+def create_failures(buildings, seed=1234):
+    """Failure probabilities and hazard exposure of the buildings, a few of them outside the hazard."""
+    rng = np.random.default_rng(seed)
+    guids = [b["properties"]["guid"] for b in buildings]
+    mcs_failure = pd.DataFrame({"guid": guids, "failure": rng.random(len(guids))})
+    building_dmg = pd.DataFrame(
+        {
+            "guid": guids,
+            "haz_expose": rng.choice(["yes", "no"], len(guids), p=[0.9, 0.1]),
+        }
+    )
+    return mcs_failure, building_dmg
+
+
+def run_recovery(inputs, seed):
+    buildings, mapping_set, sample_damage_states, redi_delay_factors = inputs
+    mcs_failure, building_dmg = create_failures(buildings)
+    com_recovery = CommercialBuildingRecovery(IncoreClient(offline=True))
+    com_recovery.set_input_dataset("dfr3_mapping_set", mapping_set)
+    com_recovery.set_parameter("repair_key", BuildingUtil.DEFAULT_REPAIR_KEY)
+    com_recovery.set_parameter("seed", seed)
+    return com_recovery.commercial_recovery(
+        buildings,
+        sample_damage_states,
+        mcs_failure,
+        redi_delay_factors,
+        building_dmg,
+        20,
+    )
+
+
+def test_seed_gives_identical_recovery(synthetic_recovery_inputs, monkeypatch):
+    inputs = synthetic_recovery_inputs(50, 20)
+    results = run_recovery(inputs, 1238)
+
+    for expected, result in zip(results, run_recovery(inputs, 1238)):
+        pd.testing.assert_frame_equal(result, expected)
+    assert not results[0].equals(run_recovery(inputs, 1239)[0])
+
+    # the draws do not depend on the block size the buildings are processed in
+    monkeypatch.setattr(BuildingUtil, "MAX_BLOCK_DRAWS", 100)
+    for expected, result in zip(results, run_recovery(inputs, 1238)):
+        pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,328 @@
+import copy
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyincore import Dataset, FragilityCurveSet, MappingSet
+from pyincore.models.repaircurveset import RepairCurveSet
+from pyincore.models.restorationcurveset import RestorationCurveSet
+import pyincore.globals as pyglobals
+
+# Synthetic inputs and shared checks of the analyses whose batch paths are checked against their per-item paths. The
+# builders are plain functions so the benchmark scripts can import them, the fixtures hand them to the tests.
+
+
+def create_synthetic_buildings(num_buildings, seed=1234, ground_failure=False):
+    """Synthetic tornado building inventory mapped to two fragility sets, with hazard values already read.
+
+    With ground_failure, half of the buildings in the tornado path get liquefaction ground failure probabilities.
+    """
+    fragility_sets = [
+        FragilityCurveSet.from_json_file(
+            os.path.join(
+                pyglobals.TEST_DATA_DIR, "fragility_curves/fragility_archetype_6.json"
+            )
+        ),
+        FragilityCurveSet.from_json_file(
+            os.path.join(
+                pyglobals.TEST_DATA_DIR, "fragility_curves/fragility_archetype_7.json"
+            )
+        ),
+    ]
+
+    rng = np.random.default_rng(seed)
+    wind_speeds = rng.uniform(65, 250, num_buildings)
+    # about 5% of the buildings are outside the tornado path
+    wind_speeds[rng.random(num_buildings) < 0.05] = np.nan
+    archetypes = rng.integers(0, 2, num_buildings)
+    # like the liquefaction service, the first two ground failure probabilities are the same
+    ground_failure_probs = rng.uniform(0, 0.3, (num_buildings, 2))
+    has_ground_failure = ground_failure & (rng.random(num_buildings) < 0.5)
+
+    buildings = []
+    mapped_fragility_sets = {}
+    bldg_hazard_inputs = []
+    for index in range(num_buildings):
+        bldg_id = str(index)
+        buildings.append(
+            {
+                "id": bldg_id,
+                "properties": {"guid": bldg_id, "archetype": archetypes[index] + 6},
+            }
+        )
+        mapped_fragility_sets[bldg_id] = fragility_sets[archetypes[index]]
+        wind_speed = None if np.isnan(wind_speeds[index]) else float(wind_speeds[index])
+        ground_failure_prob = None
+        if has_ground_failure[index] and wind_speed is not None:
+            first, last = ground_failure_probs[index].tolist()
+            ground_failure_prob = [first, first, last]
+        bldg_hazard_inputs.append(
+            {
+                "hval_dict": {"wind": wind_speed},
+                "multihaz_vals": {"tornado": [wind_speed]},
+                "demands": {"tornado": ["wind"]},
+                "units": {"tornado": ["mph"]},
+                "hazard_values_errors": False,
+                "ground_failure_prob": ground_failure_prob,
+            }
+        )
+
+    return buildings, mapped_fragility_sets, bldg_hazard_inputs
+
+
+@pytest.fixture
+def synthetic_buildings():
+    return create_synthetic_buildings
+
+
+def create_synthetic_limit_states(file_name, guids, seed):
+    """Synthetic building damage output with decreasing limit states and a few buildings without fragility."""
+    rng = np.random.default_rng(seed)
+    limit_states = np.sort(rng.random((len(guids), 3)), axis=1)[:, ::-1]
+    damage = pd.DataFrame(limit_states, columns=["LS_0", "LS_1", "LS_2"])
+    damage.insert(0, "guid", guids)
+    damage["haz_expose"] = "yes"
+    damage = damage.astype(object)
+    damage.loc[rng.random(len(guids)) < 0.02, ["LS_0", "LS_1", "LS_2"]] = ""
+    damage.to_csv(file_name, index=False)
+
+
+@pytest.fixture
+def synthetic_limit_states():
+    return create_synthetic_limit_states
+
+
+def create_synthetic_damage_states(num_rows, num_states, bridge=False, seed=1234):
+    """Csv text of a synthetic damage output with damage state probabilities and a missing DS_1 every 97 rows.
+
+    Bridge damage also has a spans column, with a few bridges without spans.
+    """
+    rng = np.random.default_rng(seed)
+    probabilities = rng.dirichlet(np.ones(num_states), num_rows)
+    damage = pd.DataFrame(
+        probabilities, columns=["DS_" + str(i) for i in range(num_states)]
+    )
+    damage.insert(0, "guid", ["guid-" + str(i) for i in range(num_rows)])
+    damage["haz_expose"] = rng.choice(["yes", "no"], num_rows)
+    if bridge:
+        damage["spans"] = rng.choice(["1", "2", "3", "7", "12", ""], num_rows)
+    damage.loc[::97, "DS_1"] = np.nan
+    return damage.to_csv(index=False)
+
+
+@pytest.fixture
+def synthetic_damage_states():
+    return create_synthetic_damage_states
+
+
+FACILITY_CLASSES = ["ESS1", "ESS2", "ESS3", "ESS4", "ESS5", "ESS6"]
+
+
+def create_synthetic_restoration_sets():
+    """One copy of the test restoration set per facility class, each with a larger scale."""
+    with open(os.path.join(pyglobals.TEST_DATA_DIR, "restorationset.json")) as f:
+        metadata = json.load(f)
+
+    restoration_sets = []
+    for index in range(len(FACILITY_CLASSES)):
+        class_metadata = copy.deepcopy(metadata)
+        class_metadata["id"] = "restoration-" + str(index)
+        for curve in class_metadata["restorationCurves"]:
+            rule = curve["rules"][0]
+            rule["expression"] = rule["expression"].replace(
+                "scale=", "scale=" + str(1 + index / 10) + "*"
+            )
+        restoration_sets.append(RestorationCurveSet(class_metadata))
+    return restoration_sets
+
+
+def create_synthetic_facilities(num_facilities, seed=1234):
+    """Synthetic electric power facilities, their damage and a restoration mapping of the facility classes.
+
+    Every 97th facility has no DS_0, like a facility without fragility.
+    """
+    rng = np.random.default_rng(seed)
+    restoration_sets = create_synthetic_restoration_sets()
+    mapping_set = MappingSet(
+        {
+            "mappingType": "restoration",
+            "mappings": [
+                {
+                    "entry": {"Restoration ID Code": restoration_set},
+                    "rules": [["java.lang.String utilfcltyc EQUALS " + class_name]],
+                }
+                for class_name, restoration_set in zip(
+                    FACILITY_CLASSES, restoration_sets
+                )
+            ],
+        }
+    )
+
+    inventory_list = []
+    damage_result = []
+    probabilities = rng.dirichlet(np.ones(5), num_facilities)
+    for index in range(num_facilities):
+        guid = "guid-" + str(index)
+        inventory_list.append(
+            {
+                "id": str(index),
+                "properties": {
+                    "guid": guid,
+                    "utilfcltyc": rng.choice(FACILITY_CLASSES),
+                },
+            }
+        )
+        damage = {"guid": guid}
+        for state in range(5):
+            damage["DS_" + str(state)] = str(probabilities[index, state])
+        if index % 97 == 0:
+            damage["DS_0"] = ""
+        damage_result.append(damage)
+    return inventory_list, damage_result, mapping_set
+
+
+@pytest.fixture
+def synthetic_facilities():
+    return create_synthetic_facilities
+
+
+def create_synthetic_recovery_inputs(num_buildings, num_samples, seed=1234):
+    """Synthetic residential and commercial buildings with sample damage states, a local repair mapping of their
+    structure types and REDi delay factors of every damage state."""
+    rng = np.random.default_rng(seed)
+    with open(os.path.join(pyglobals.TEST_DATA_DIR, "repairset.json")) as f:
+        repair_set = RepairCurveSet(json.load(f))
+    mapping_set = MappingSet(
+        {
+            "mappingType": "repair",
+            "mappings": [
+                {
+                    "entry": {"Repair ID Code": repair_set},
+                    "rules": [["java.lang.String struct_typ EQUALS " + struct_typ]],
+                }
+                for struct_typ in ["W1", "W2"]
+            ],
+        }
+    )
+
+    guids = ["guid-" + str(i) for i in range(num_buildings)]
+    archetypes = rng.choice([1, 5, 6, 7, 15, 19], num_buildings)
+    struct_types = rng.choice(["W1", "W2"], num_buildings)
+    buildings = [
+        {
+            "id": str(i),
+            "properties": {
+                "guid": guid,
+                "archetype": int(archetypes[i]),
+                "struct_typ": struct_types[i],
+            },
+        }
+        for i, guid in enumerate(guids)
+    ]
+
+    damage_states = rng.choice(
+        ["DS_0", "DS_1", "DS_2", "DS_3"], (num_buildings, num_samples)
+    )
+    sample_damage_states = pd.DataFrame(
+        {
+            "guid": guids,
+            "sample_damage_states": [",".join(states) for states in damage_states],
+        }
+    )
+
+    redi_delay_factors = pd.DataFrame(
+        {"Building_specific_conditions": ["DS_0", "DS_1", "DS_2", "DS_3"]}
+    )
+    for i, factor in enumerate(["Ins", "Enmo", "Como", "Per", "Fin"]):
+        redi_delay_factors[factor + "_med"] = [0.5, 1.0 + i, 2.0 + i, 4.0 + 2 * i]
+        redi_delay_factors[factor + "_sdv"] = [0.3, 0.5, 0.6, 0.8]
+
+    return buildings, mapping_set, sample_damage_states, redi_delay_factors
+
+
+@pytest.fixture
+def synthetic_recovery_inputs():
+    return create_synthetic_recovery_inputs
+
+
+def check_cge_warm_start(cge, tmp_path):
+    """Solve the shocks of the sector_shocks input of a CGE analysis as the scenarios base, lower and base_again.
+
+    Every scenario is warm started from the calibrated solution of the same model, so base_again has the results of
+    base although lower was solved in between.
+    """
+    original = cge.get_input_dataset("sector_shocks")
+    shocks = pd.read_csv(original.get_file_path("csv"))
+    shocks = shocks.rename(columns={shocks.columns[0]: "sector"})
+    base = shocks[shocks.columns[1]]
+    file_name = str(tmp_path / "sector_shocks.csv")
+    pd.DataFrame(
+        {
+            "sector": shocks["sector"],
+            "base": base,
+            "lower": base * 0.9,
+            "base_again": base,
+        }
+    ).to_csv(file_name, index=False)
+
+    cge.set_input_dataset(
+        "sector_shocks", Dataset.from_file(file_name, original.data_type)
+    )
+    cge.set_parameter("num_cpu", 1)
+    cge.set_in_memory_outputs()
+    assert cge.run_analysis()
+
+    results = cge.get_output_dataset("scenario-results").get_dataframe_from_csv()
+    values = {
+        scenario: results.loc[results["scenario"] == scenario, "value"].to_numpy()
+        for scenario in ["base", "lower", "base_again"]
+    }
+    np.testing.assert_allclose(values["base_again"], values["base"], rtol=1e-5)
+    assert not np.allclose(values["lower"], values["base"], rtol=1e-5)
+
+
+@pytest.fixture
+def cge_warm_start():
+    return check_cge_warm_start
+
+
+def create_synthetic_hazard_damage(num_buildings, seed=1234):
+    """Synthetic wind, surge-wave and flood building damage with ties in DS_3 and buildings without damage.
+
+    Every 5th building has the same DS_3 for wind and surge-wave, every 7th for wind and flood and every 11th for
+    surge-wave and flood. Every 13th building has no flood damage, every 17th no wind and every 19th no surge-wave.
+    """
+    rng = np.random.default_rng(seed)
+    guids = ["guid-" + str(i) for i in range(num_buildings)]
+    damages = []
+    for _ in range(3):
+        probabilities = rng.dirichlet(np.ones(4), num_buildings)
+        damage = pd.DataFrame(probabilities, columns=["DS_" + str(i) for i in range(4)])
+        limit_states = 1 - np.cumsum(probabilities, axis=1)[:, :3]
+        for i in range(3):
+            damage.insert(i, "LS_" + str(i), limit_states[:, i])
+        damage.insert(0, "guid", guids)
+        damage["haz_expose"] = rng.choice(["yes", "no", "partial"], num_buildings)
+        damages.append(damage)
+    wind, surge_wave, flood = damages
+
+    for first, second, step in [
+        (wind, surge_wave, 5),
+        (wind, flood, 7),
+        (surge_wave, flood, 11),
+    ]:
+        second.loc[::step, "DS_3"] = first.loc[::step, "DS_3"]
+    for damage, step in [(flood, 13), (wind, 17), (surge_wave, 19)]:
+        damage.loc[::step, ["LS_0", "LS_1", "LS_2", "DS_0", "DS_1", "DS_2", "DS_3"]] = (
+            np.nan
+        )
+
+    return wind, surge_wave, flood
+
+
+@pytest.fixture
+def synthetic_hazard_damage():
+    return create_synthetic_hazard_damage
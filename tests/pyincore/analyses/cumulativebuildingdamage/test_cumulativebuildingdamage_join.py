@@ -0,0 +1,86 @@
+import csv
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyincore import IncoreClient, Dataset
+from pyincore.analyses.cumulativebuildingdamage import CumulativeBuildingDamage
+
+
+def run_building_by_building(analysis, eq_file, tsunami_file, result_file):
+    with open(eq_file) as eq, open(tsunami_file) as tsunami:
+        eq_damage_df = pd.DataFrame(list(csv.DictReader(eq)))
+        tsunami_damage_df = pd.DataFrame(list(csv.DictReader(tsunami)))
+    results = analysis.cumulative_building_damage_bulk_input(
+        eq_damage_df, tsunami_damage_df
+    )
+    # buildings without fragility have no limit or damage states, their columns stay empty
+    with open(result_file, "w") as f:
+        writer = csv.DictWriter(
+            f,
+            dialect="unix",
+            fieldnames=["guid", "LS_0", "LS_1", "LS_2"]
+            + ["DS_0", "DS_1", "DS_2", "DS_3", "hazard"],
+        )
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def test_join_matches_building_by_building(tmp_path, synthetic_limit_states):
+    rng = np.random.default_rng(1234)
+    guids = np.array(["guid-" + str(i) for i in range(300)])
+    eq_file = str(tmp_path / "eq_bldg_dmg.csv")
+    tsunami_file = str(tmp_path / "tsunami_bldg_dmg.csv")
+    synthetic_limit_states(eq_file, guids, 1)
+    # the tsunami damage lists the same buildings in another order
+    synthetic_limit_states(tsunami_file, rng.permutation(guids), 2)
+
+    analysis = CumulativeBuildingDamage(IncoreClient(offline=True))
+    run_building_by_building(
+        analysis, eq_file, tsunami_file, str(tmp_path / "single.csv")
+    )
+
+    analysis.set_input_dataset(
+        "eq_bldg_dmg", Dataset.from_file(eq_file, "ergo:buildingDamageVer6")
+    )
+    analysis.set_input_dataset(
+        "tsunami_bldg_dmg", Dataset.from_file(tsunami_file, "ergo:buildingDamageVer6")
+    )
+    analysis.set_parameter("result_name", str(tmp_path / "joined"))
+    analysis.run()
+
+    assert (tmp_path / "joined.csv").read_text() == (
+        tmp_path / "single.csv"
+    ).read_text()
+
+
+@pytest.mark.parametrize("result_format", ["jsonl", "memory"])
+def test_join_result_formats(tmp_path, synthetic_limit_states, result_format):
+    guids = np.array(["guid-" + str(i) for i in range(50)])
+    eq_file = str(tmp_path / "eq_bldg_dmg.csv")
+    tsunami_file = str(tmp_path / "tsunami_bldg_dmg.csv")
+    synthetic_limit_states(eq_file, guids, 3)
+    synthetic_limit_states(tsunami_file, guids, 4)
+
+    analysis = CumulativeBuildingDamage(IncoreClient(offline=True))
+    analysis.set_input_dataset(
+        "eq_bldg_dmg", Dataset.from_file(eq_file, "ergo:buildingDamageVer6")
+    )
+    analysis.set_input_dataset(
+        "tsunami_bldg_dmg", Dataset.from_file(tsunami_file, "ergo:buildingDamageVer6")
+    )
+    analysis.set_parameter("result_name", str(tmp_path / "joined"))
+    analysis.run()
+    expected = analysis.get_output_dataset("combined-result").get_dataframe_from_csv()
+
+    if result_format == "memory":
+        analysis.set_in_memory_outputs()
+    else:
+        analysis.set_parameter("result_format", result_format)
+    analysis.run()
+    result = analysis.get_output_dataset("combined-result")
+
+    assert result.is_in_memory() == (result_format == "memory")
+    assert len(expected) == len(guids)
+    pd.testing.assert_frame_equal(result.get_dataframe_from_csv(), expected)
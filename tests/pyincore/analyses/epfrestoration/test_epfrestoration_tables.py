@@ -0,0 +1,103 @@
+import numpy as np
+
+from pyincore import IncoreClient, AnalysisUtil
+from pyincore.analyses.epfrestoration import EpfRestoration
+
+
+def legacy_restoration(
+    inventory_list,
+    damage_result,
+    restoration_sets,
+    mapping_set,
+    end_time,
+    time_interval,
+    pf_interval,
+    discretized_days,
+):
+    inventory_class_map = {}
+    for inventory in inventory_list:
+        inventory_class_map[inventory["properties"]["guid"]] = (
+            AnalysisUtil.get_discretized_restoration(
+                restoration_sets[inventory["id"]], discretized_days
+            )
+        )
+
+    pf_results = []
+    time_results = []
+    for mapping in mapping_set.mappings:
+        restoration_curve_set = mapping.entry["Restoration ID Code"]
+        for t in np.arange(0, end_time + time_interval, time_interval):
+            pf_results.append(
+                {
+                    "restoration_id": restoration_curve_set.id,
+                    "time": t,
+                    **restoration_curve_set.calculate_restoration_rates(time=t),
+                }
+            )
+        for p in np.arange(0, 1 + pf_interval, pf_interval):
+            t_res = restoration_curve_set.calculate_inverse_restoration_rates(time=p)
+            time_results.append(
+                {
+                    "restoration_id": restoration_curve_set.id,
+                    "percentage_of_functionality": p,
+                    **{"time_" + key: value for key, value in t_res.items()},
+                }
+            )
+
+    func_result = []
+    for dmg in damage_result:
+        rest_dict = inventory_class_map[dmg["guid"]]
+        result_dict = {}
+        for day in discretized_days:
+            key = "day" + str(day)
+            if dmg["DS_0"]:
+                result_dict[key] = (
+                    rest_dict[key][0] * float(dmg["DS_0"])
+                    + rest_dict[key][1] * float(dmg["DS_1"])
+                    + rest_dict[key][2] * float(dmg["DS_2"])
+                    + rest_dict[key][3] * float(dmg["DS_3"])
+                    + rest_dict[key][4] * float(dmg["DS_4"])
+                )
+        func_result.append({"guid": dmg["guid"], **result_dict})
+
+    return pf_results, time_results, func_result
+
+
+def test_restoration_tables_match_per_facility_curves(synthetic_facilities):
+    inventory_list, damage_result, mapping_set = synthetic_facilities(200)
+    discretized_days = [1, 3, 7, 30, 90]
+
+    epf_rest = EpfRestoration(IncoreClient(offline=True))
+    epf_rest.set_input_dataset("dfr3_mapping_set", mapping_set)
+    restoration_sets = epf_rest.restorationsvc.match_inventory(
+        mapping_set, inventory_list, "Restoration ID Code"
+    )
+
+    legacy = legacy_restoration(
+        inventory_list,
+        damage_result,
+        restoration_sets,
+        mapping_set,
+        365.0,
+        1,
+        0.01,
+        discretized_days,
+    )
+    (
+        _,
+        pf_results,
+        time_results,
+        func_results,
+        _,
+    ) = epf_rest.electricpowerfacility_restoration(
+        inventory_list,
+        damage_result,
+        mapping_set,
+        "Restoration ID Code",
+        365.0,
+        1,
+        0.01,
+        discretized_days,
+    )
+
+    assert str((pf_results, time_results, func_results)) == str(legacy)
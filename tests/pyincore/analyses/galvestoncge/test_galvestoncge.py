@@ -1,3 +1,5 @@
+import pytest
+
 from pyincore import IncoreClient, Dataset
 from pyincore.analyses.galvestoncge import GalvestonCGEModel
 import pyincore.globals as pyglobals
@@ -6,10 +8,7 @@ import time
 # This script runs GalvestonCGEModel analysis with input files from
 # IN-CORE development services
 
-def run_base_analysis():
-    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
-    galveston_cge = GalvestonCGEModel(client)
-
+def load_input_datasets(galveston_cge):
     galveston_cge.set_parameter("model_iterations", 1)
     galveston_cge.load_remote_input_dataset("SAM", "6420c377b18d026e7c7dc327")
     galveston_cge.load_remote_input_dataset("BB", "6420c3d2b18d026e7c7dc328")
@@ -19,8 +18,20 @@ def run_base_analysis():
     galveston_cge.load_remote_input_dataset("OUTCR", "6420c511b18d026e7c7dc340")
     galveston_cge.load_remote_input_dataset("sector_shocks", "64219be5b18d026e7c7e1534")
 
+
+def run_base_analysis():
+    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
+    galveston_cge = GalvestonCGEModel(client)
+    load_input_datasets(galveston_cge)
     galveston_cge.run_analysis()
 
 
+@pytest.mark.skipif(pyglobals.IPOPT_PATH is None, reason="ipopt is not installed")
+def test_warm_start_scenarios(tmp_path, cge_warm_start):
+    galveston_cge = GalvestonCGEModel(pytest.client)
+    load_input_datasets(galveston_cge)
+    cge_warm_start(galveston_cge, tmp_path)
+
+
 if __name__ == '__main__':
     run_base_analysis()
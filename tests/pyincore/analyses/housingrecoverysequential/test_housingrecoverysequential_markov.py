@@ -0,0 +1,190 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyincore import IncoreClient, Dataset
+from pyincore.analyses.housingrecoverysequential import HousingRecoverySequential
+import pyincore.globals as pyglobals
+
+FIPS = ["29097010100", "29097010200", "29097010300", "29097010400", "29097010500"]
+
+
+def create_inputs(num_households, seed=1234):
+    """Synthetic households in every zone and a TPM in which the regression rate grows with the score."""
+    rng = np.random.default_rng(seed)
+    households_df = pd.DataFrame(
+        {
+            "guid": ["guid-" + str(i) for i in range(num_households)],
+            "huid": ["huid-" + str(i) for i in range(num_households)],
+            "blockid": [
+                int(FIPS[i % 5] + str(1000 + i % 7)) for i in range(num_households)
+            ],
+            "race": 1,
+            "hispan": 0,
+            "ownershp": 1,
+            "dislocated": rng.random(num_households) < 0.6,
+            "hhinc": rng.choice([1, 2, 3, 4, 5, np.nan], num_households),
+        }
+    )
+    sv_result = pd.DataFrame(
+        {
+            "FIPS": FIPS,
+            "zone": ["High Vulnerable (zone" + str(i + 1) + ")" for i in range(5)],
+        }
+    )
+
+    scores = np.round(np.arange(0, 1.001, 0.001), 3)
+    tpm = np.zeros((len(scores), 17))
+    tpm[:, 0] = scores
+    for stage in range(1, 5):
+        # moves to lower stages, staying and moving up, or staying in stage 4
+        regression = 0.02 + 0.5 * scores if stage > 1 else np.zeros(len(scores))
+        stay = (1 - regression) * 0.6 if stage < 4 else 1 - regression
+        probabilities = np.zeros((len(scores), 4))
+        probabilities[:, : stage - 1] = (regression / max(stage - 1, 1))[:, None]
+        probabilities[:, stage - 1] = stay
+        probabilities[:, stage:] = ((1 - regression - stay) / max(4 - stage, 1))[
+            :, None
+        ]
+        tpm[:, (stage - 1) * 4 + 1 : stage * 4 + 1] = probabilities
+    initial_prob = pd.DataFrame({"value": [0.3, 0.4, 0.3]})
+
+    return households_df, sv_result, tpm, initial_prob
+
+
+def legacy_recovery(hhrs, households_df, sv_result, zone_def, stages, tpm, initial):
+    """The Markov chain as it was computed before, household by household.
+
+    Returns the stage history and the rules that sent households to stage 5.
+    """
+    rng = np.random.RandomState(hhrs.get_parameter("seed"))
+    if sv_result is not None:
+        households_df = hhrs.compute_social_vulnerability_zones(
+            sv_result, households_df
+        )
+    else:
+        households_df = hhrs.compute_zones_by_household_income(households_df)
+    num_households = households_df.shape[0]
+    cumulative = initial["value"].cumsum()
+
+    sv_scores = np.zeros(num_households)
+    for household, zone in enumerate(households_df["Zone"]):
+        spin = rng.rand()
+        definition = zone_def[zone]
+        if sv_result is not None:
+            if spin < definition["threshold_0"]:
+                bound = "below"
+            elif "threshold_1" in definition and spin < definition["threshold_1"]:
+                bound = "middle"
+            else:
+                bound = "above"
+        else:
+            bound = "below" if spin < definition["threshold"] else "above"
+        sv_scores[household] = round(
+            rng.uniform(definition[bound + "_lower"], definition[bound + "_upper"]),
+            3,
+        )
+
+    markov_stages = np.zeros((stages, num_households))
+    for household in range(num_households):
+        if households_df["dislocated"].iat[household]:
+            spin = rng.rand()
+            if spin < cumulative[0]:
+                markov_stages[0][household] = 1.0
+            elif spin < cumulative[1]:
+                markov_stages[0][household] = 2.0
+            else:
+                markov_stages[0][household] = 3.0
+        else:
+            markov_stages[0][household] = 4.0
+
+    def regressions(household, lower, upper):
+        return sum(
+            markov_stages[t][household] < markov_stages[t - 1][household]
+            for t in range(lower, upper)
+        )
+
+    rules = set()
+    for t in range(1, stages):
+        spins = rng.rand(num_households)
+        for household in range(num_households):
+            stage_val = markov_stages[t - 1][household]
+            if stage_val == 5:
+                markov_stages[t][household] = 5
+                continue
+
+            mv_index = np.where(tpm[:, 0] == sv_scores[household])[0][0]
+            mv = tpm[mv_index, int((stage_val - 1) * 4 + 1) : int(stage_val * 4 + 1)]
+            markov_vector = [mv[0], sum(mv[0:2]), sum(mv[0:3])]
+            if spins[household] < markov_vector[0]:
+                markov_stages[t][household] = 1
+            elif spins[household] < markov_vector[1]:
+                markov_stages[t][household] = 2
+            elif spins[household] < markov_vector[2]:
+                markov_stages[t][household] = 3
+            else:
+                markov_stages[t][household] = 4
+
+            for rule, lower, limit in [
+                ("all", 1, 10),
+                ("12", t - 11, 4),
+                ("24", t - 23, 7),
+            ]:
+                if lower >= 1 and regressions(household, lower, t) > limit:
+                    markov_stages[t][household] = 5
+                    rules.add(rule)
+            if t == 85 and markov_stages[t][household] != 4:
+                markov_stages[t][household] = 5
+                rules.add("85")
+
+    return markov_stages.T, sv_scores, rules
+
+
+@pytest.mark.parametrize("zones_from_sv", [False, True])
+def test_stages_match_household_by_household(tmp_path, zones_from_sv):
+    households_df, sv_result, tpm, initial_prob = create_inputs(300)
+    zone_def_file = os.path.join(
+        pyglobals.TEST_DATA_DIR,
+        "zone_def_sv.json" if zones_from_sv else "zone_def_hhinc.json",
+    )
+    with open(zone_def_file) as f:
+        zone_def = json.load(f)
+
+    hhrs = HousingRecoverySequential(IncoreClient(offline=True))
+    hhrs.set_parameter("seed", 1234)
+    if zones_from_sv:
+        sv_file = str(tmp_path / "sv_result.csv")
+        sv_result.to_csv(sv_file, index=False)
+        hhrs.set_input_dataset(
+            "sv_result", Dataset.from_file(sv_file, "incore:socialVulnerabilityScore")
+        )
+        hhrs.set_input_dataset(
+            "zone_def_sv",
+            Dataset.from_file(
+                zone_def_file, "incore:zoneDefinitionsSocialVulnerability"
+            ),
+        )
+    else:
+        sv_result = None
+        hhrs.set_input_dataset(
+            "zone_def_hhinc",
+            Dataset.from_file(zone_def_file, "incore:zoneDefinitionsHouseholdIncome"),
+        )
+
+    # 90 stages reach the stage 85 rule
+    expected_stages, expected_scores, rules = legacy_recovery(
+        hhrs, households_df.copy(), sv_result, zone_def, 90, tpm, initial_prob.copy()
+    )
+    result = hhrs.housing_serial_recovery_model(
+        households_df.copy(), 1.0, 90.0, tpm, initial_prob.copy()
+    )
+
+    np.testing.assert_array_equal(result["SV"].to_numpy(), expected_scores)
+    np.testing.assert_array_equal(
+        result[[str(i) for i in range(1, 91)]].to_numpy(), expected_stages
+    )
+    # every rule that ends in stage 5 was taken
+    assert rules == {"all", "12", "24", "85"}
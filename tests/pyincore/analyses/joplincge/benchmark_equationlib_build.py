@@ -0,0 +1,33 @@
+import importlib
+import tempfile
+import time
+
+from pyincore.globals import LOGGER
+from test_equationlib import build_by_source, build_in_memory, create_synthetic_model
+
+# times the generated source build against the in-memory build, test_equationlib checks that they are the same model
+
+logger = LOGGER
+
+
+def run_benchmark(num_sectors=60, module="pyincore.analyses.joplincge.equationlib"):
+    vars, equations, _ = create_synthetic_model(
+        importlib.import_module(module), num_sectors
+    )
+
+    start = time.time()
+    _, num_constraints = build_by_source(vars, equations, tempfile.mkdtemp())
+    source_time = time.time() - start
+
+    start = time.time()
+    build_in_memory(vars, equations)
+    memory_time = time.time() - start
+
+    logger.info(
+        f"{vars.nvars} variables, {num_constraints} constraints - generated source: {source_time:.2f}s, "
+        f"in memory: {memory_time:.2f}s ({source_time / memory_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    run_benchmark()
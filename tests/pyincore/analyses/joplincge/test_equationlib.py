@@ -0,0 +1,143 @@
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyomo.environ import ConcreteModel, Constraint, Objective, Param, Var, value
+
+EQUATIONLIBS = [
+    "pyincore.analyses.joplincge.equationlib",
+    "pyincore.analyses.galvestoncge.equationlib",
+    "pyincore.analyses.saltlakecge.equationlib",
+    "pyincore.analyses.seasidecge.equationlib",
+]
+
+
+def create_synthetic_model(equationlib, num_sectors, seed=1234):
+    """Synthetic CGE style model with equations of the shapes used by the CGE analyses and a capital stock parameter."""
+    ExprM = equationlib.ExprM
+    rng = np.random.default_rng(seed)
+    sectors = ["S" + str(i) for i in range(num_sectors)]
+    factors = ["L", "K"]
+
+    shares = pd.DataFrame(
+        rng.uniform(0.01, 1, (num_sectors, num_sectors)), index=sectors, columns=sectors
+    )
+    alpha = pd.Series(rng.uniform(0.2, 0.8, num_sectors), index=sectors)
+    capital = pd.DataFrame(
+        rng.uniform(1, 10, (len(factors), num_sectors)), index=factors, columns=sectors
+    )
+
+    vars = equationlib.VarContainer()
+    P = vars.add("P", rows=sectors)
+    Y = vars.add("Y", rows=sectors)
+    V = vars.add("V", rows=sectors, cols=sectors)
+    FD = vars.add("FD", rows=factors, cols=sectors)
+    SPI = vars.add("SPI")
+    vars.init("P", 1.0)
+    vars.init("Y", pd.Series(rng.uniform(10, 100, num_sectors), index=sectors))
+    vars.init("V", shares * 10)
+    vars.init("FD", capital)
+    vars.init("SPI", float(num_sectors))
+    vars.lo("P", 0.001)
+    vars.up("P", 1000.0)
+    KS0 = vars.add_param("KS0", capital)
+
+    equations = [
+        (ExprM(vars, m=shares) * Y.loc(sectors)).sum(sectors)
+        - V.loc(sectors, sectors).sum(sectors),
+        ExprM(vars, m=alpha)
+        * (FD.loc(factors, sectors) ** ExprM(vars, m=alpha)).prod(factors)
+        - Y.loc(sectors),
+        KS0.loc(factors, sectors) * 0.95 - FD.loc(factors, sectors),
+        (P.loc(sectors) * Y.loc(sectors)).sum(sectors)
+        / (Y.loc(sectors).sum(sectors) + 1)
+        - SPI,
+    ]
+    return vars, equations, capital
+
+
+def get_index(vars, name, *labels):
+    # joplin names the index lookups get_index and get_param_index, the other models getIndex and getParamIndex
+    if hasattr(vars, "get_index"):
+        return vars.get_param_index(name, *labels) if labels else vars.get_index(name)
+    return vars.getParamIndex(name, *labels) if labels else vars.getIndex(name)
+
+
+def build_by_source(vars, equations, directory):
+    """The replaced build, the model is written as source and exec-ed."""
+    filename = os.path.join(directory, "ipopt_cons.py")
+    open(filename, "w").close()
+    vars.write(filename)
+    count = [0]
+    for equation in equations:
+        equation.write(count, filename)
+    with open(filename, "a") as f:
+        f.write(
+            "model.obj = Objective(expr=-1*model.x" + str(get_index(vars, "SPI")) + ")"
+        )
+
+    model = ConcreteModel()
+    with open(filename) as f:
+        exec(
+            f.read(),
+            {
+                "model": model,
+                "Var": Var,
+                "Param": Param,
+                "Constraint": Constraint,
+                "Objective": Objective,
+            },
+        )
+    return model, count[0]
+
+
+def build_in_memory(vars, equations):
+    model = ConcreteModel()
+    vars.to_pyomo(model)
+    for equation in equations:
+        equation.to_pyomo(model)
+    model.obj = Objective(expr=-1 * model.x[get_index(vars, "SPI")])
+    return model
+
+
+def assert_same_model(vars, source_model, num_constraints, memory_model):
+    assert len(memory_model.equality) == num_constraints
+    for i in range(num_constraints):
+        assert np.isclose(
+            value(getattr(source_model, "equality" + str(i)).body),
+            value(memory_model.equality[i + 1].body),
+        )
+    assert value(source_model.obj) == value(memory_model.obj)
+
+
+@pytest.mark.parametrize("module", EQUATIONLIBS)
+def test_to_pyomo_matches_generated_source(tmp_path, module):
+    equationlib = importlib.import_module(module)
+    vars, equations, capital = create_synthetic_model(equationlib, 6)
+
+    source_model, num_constraints = build_by_source(vars, equations, str(tmp_path))
+    memory_model = build_in_memory(vars, equations)
+
+    for i in range(vars.nvars):
+        source_x = getattr(source_model, "x" + str(i))
+        assert source_x.bounds == memory_model.x[i].bounds
+        assert source_x.value == memory_model.x[i].value
+    assert_same_model(vars, source_model, num_constraints, memory_model)
+
+    # a solve moves the variables away from their initial values
+    rng = np.random.default_rng(1)
+    for i in range(vars.nvars):
+        x = memory_model.x[i].value * rng.uniform(0.5, 1.5)
+        getattr(source_model, "x" + str(i)).value = x
+        memory_model.x[i].value = x
+    assert_same_model(vars, source_model, num_constraints, memory_model)
+
+    # a shocked capital stock updates the parameter in place
+    vars.set_param("KS0", capital * 0.7, source_model)
+    vars.set_param("KS0", capital * 0.7, memory_model)
+    assert_same_model(vars, source_model, num_constraints, memory_model)
+    assert value(memory_model.p[get_index(vars, "KS0", "K", "S1")]) == (
+        capital.loc["K", "S1"] * 0.7
+    )
@@ -1,3 +1,5 @@
+import pytest
+
 from pyincore import IncoreClient
 from pyincore.analyses.joplincge import JoplinCGEModel
 import pyincore.globals as pyglobals
@@ -7,10 +9,7 @@ import pyincore.globals as pyglobals
 # IN-CORE development services.
 
 
-def run_base_analysis():
-    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
-    joplin_cge = JoplinCGEModel(client)
-
+def load_input_datasets(joplin_cge):
     # SAM
     sam = "5cdc7b585648c4048fb53062"
 
@@ -44,8 +43,20 @@ def run_base_analysis():
     joplin_cge.load_remote_input_dataset("OUTCR", outcr)
     joplin_cge.load_remote_input_dataset("sector_shocks", sector_shocks)
 
+
+def run_base_analysis():
+    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
+    joplin_cge = JoplinCGEModel(client)
+    load_input_datasets(joplin_cge)
     joplin_cge.run_analysis()
 
 
+@pytest.mark.skipif(pyglobals.IPOPT_PATH is None, reason="ipopt is not installed")
+def test_warm_start_scenarios(tmp_path, cge_warm_start):
+    joplin_cge = JoplinCGEModel(pytest.client)
+    load_input_datasets(joplin_cge)
+    cge_warm_start(joplin_cge, tmp_path)
+
+
 if __name__ == '__main__':
     run_base_analysis()
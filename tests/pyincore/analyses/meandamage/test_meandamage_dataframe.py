@@ -0,0 +1,70 @@
+import csv
+import io
+
+import pandas as pd
+import pytest
+
+from pyincore import IncoreClient
+from pyincore.analyses.meandamage import MeanDamage
+
+BUILDING_RATIOS = [
+    {"Mean Damage Factor": "0.0", "Deviation Damage Factor": "0.0"},
+    {"Mean Damage Factor": "0.005", "Deviation Damage Factor": "0.003"},
+    {"Mean Damage Factor": "0.155", "Deviation Damage Factor": "0.065"},
+    {"Mean Damage Factor": "0.55", "Deviation Damage Factor": "0.2"},
+]
+
+BRIDGE_RATIOS = [
+    {
+        "Damage State": "ds-" + state,
+        "Best Mean Damage Ratio": ratio,
+        "Lower Bound": lower,
+        "Upper Bound": upper,
+    }
+    for state, ratio, lower, upper in [
+        ("none", "0", "0", "0.01"),
+        ("slight", "0.03", "0.01", "0.03"),
+        ("moderate", "0.08", "0.03", "0.08"),
+        ("extensive", "0.25", "0.08", "0.25"),
+        ("complete", "1.0", "0.25", "1.0"),
+        ("complete1", "2.0", "0.25", "1.0"),
+    ]
+]
+
+
+def write_rows(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, dialect="unix", fieldnames=rows[0].keys())
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def write_dataframe(results):
+    output = io.StringIO()
+    results.to_csv(
+        output, index=False, quoting=csv.QUOTE_ALL, lineterminator="\n", na_rep="nan"
+    )
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("is_bridge", [False, True])
+def test_column_wise_matches_per_row(synthetic_damage_states, is_bridge):
+    analysis = MeanDamage(IncoreClient(offline=True))
+    if is_bridge:
+        damage_csv = synthetic_damage_states(500, 5, bridge=True)
+        ratios = BRIDGE_RATIOS
+        keys = ["DS_0", "DS_1", "DS_2", "DS_3", "DS_4"]
+    else:
+        damage_csv = synthetic_damage_states(500, 4)
+        ratios = BUILDING_RATIOS
+        keys = ["DS_0", "DS_1", "DS_2", "DS_3"]
+
+    rows = [
+        analysis.mean_damage(dmg, ratios, keys, is_bridge)
+        for dmg in csv.DictReader(io.StringIO(damage_csv))
+    ]
+    damage = pd.read_csv(io.StringIO(damage_csv), dtype=str, keep_default_na=False)
+    results = MeanDamage.mean_damage_dataframe(damage, ratios, keys, is_bridge)
+
+    assert write_dataframe(results) == write_rows(rows)
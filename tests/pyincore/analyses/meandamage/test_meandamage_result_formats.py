@@ -0,0 +1,88 @@
+import csv
+
+import pytest
+
+from pyincore import Dataset, IncoreClient, ResultSink
+from pyincore.analyses.meandamage import MeanDamage
+
+DAMAGE = [
+    {
+        "guid": "guid-" + str(i),
+        "DS_0": 0.1 * i,
+        "DS_1": None if i == 3 else 0.05 * i,
+        "DS_2": 0.25,
+        "DS_3": 0.5 - 0.01 * i,
+        "haz_expose": "yes" if i % 2 else "no",
+    }
+    for i in range(6)
+]
+
+# the first row of a damage ratios table is skipped
+RATIOS = [
+    {"Mean Damage Factor": "", "Deviation Damage Factor": ""},
+    {"Mean Damage Factor": "0.0", "Deviation Damage Factor": "0.0"},
+    {"Mean Damage Factor": "0.005", "Deviation Damage Factor": "0.003"},
+    {"Mean Damage Factor": "0.155", "Deviation Damage Factor": "0.065"},
+    {"Mean Damage Factor": "0.55", "Deviation Damage Factor": "0.2"},
+]
+
+
+def run_mean_damage(tmp_path, result_format, output_format=None, in_memory=False):
+    damage_file = str(tmp_path / ("damage" + ResultSink.get_extension(result_format)))
+    with ResultSink(damage_file, result_format) as sink:
+        sink.write(DAMAGE[:4])
+        sink.write(DAMAGE[4:])
+
+    ratios_file = str(tmp_path / "ratios.csv")
+    with open(ratios_file, "w") as f:
+        writer = csv.DictWriter(f, dialect="unix", fieldnames=RATIOS[0].keys())
+        writer.writeheader()
+        writer.writerows(RATIOS)
+
+    md = MeanDamage(IncoreClient(offline=True))
+    md.set_input_dataset(
+        "damage", Dataset.from_file(damage_file, "ergo:buildingDamageVer6")
+    )
+    md.set_input_dataset(
+        "dmg_ratios", Dataset.from_file(ratios_file, "ergo:buildingDamageRatios")
+    )
+    md.set_parameter("result_name", str(tmp_path / ("mean_damage_" + result_format)))
+    md.set_parameter("damage_interval_keys", ["DS_0", "DS_1", "DS_2", "DS_3"])
+    md.set_parameter("result_format", output_format)
+    md.set_in_memory_outputs(in_memory)
+    md.run_analysis()
+    if output_format is not None or in_memory:
+        return md.get_output_dataset("result")
+
+    with open(md.get_output_dataset("result").get_file_path("csv")) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("result_format", ["jsonl", "parquet"])
+def test_chained_damage_formats_match_csv(tmp_path, result_format):
+    if result_format == "parquet":
+        pytest.importorskip("pyarrow")
+
+    assert run_mean_damage(tmp_path, result_format) == run_mean_damage(tmp_path, "csv")
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "parquet"])
+def test_mean_damage_output_formats(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+
+    result = run_mean_damage(tmp_path, "csv", output_format)
+    expected = run_mean_damage(tmp_path, "csv")
+
+    assert result.get_result_format() == output_format
+    assert result.get_file_path().endswith(ResultSink.get_extension(output_format))
+    assert list(result.get_csv_reader()) == list(csv.DictReader(expected.splitlines()))
+
+
+def test_mean_damage_in_memory_output(tmp_path):
+    result = run_mean_damage(tmp_path, "csv", in_memory=True)
+
+    assert result.is_in_memory()
+    assert list(result.get_csv_reader()) == list(
+        csv.DictReader(run_mean_damage(tmp_path, "csv").splitlines())
+    )
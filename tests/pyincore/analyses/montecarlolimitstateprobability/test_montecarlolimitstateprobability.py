@@ -2,6 +2,7 @@ from pyincore.client import IncoreClient
 from pyincore.analyses.montecarlolimitstateprobability import (
     MonteCarloLimitStateProbability,
 )
+from pyincore import Dataset
 import pyincore.globals as pyglobals
 
 
@@ -26,5 +27,29 @@ def run_with_base_class():
     mc.run_analysis()
 
 
+def test_empty_damage(tmp_path):
+    damage_file = str(tmp_path / "damage.csv")
+    with open(damage_file, "w") as f:
+        f.write("guid,DS_0,DS_1,DS_2,DS_3\n")
+
+    mc = MonteCarloLimitStateProbability(IncoreClient(offline=True))
+    mc.set_input_dataset(
+        "damage", Dataset.from_file(damage_file, "ergo:buildingDamageVer4")
+    )
+    mc.set_parameter("result_name", str(tmp_path / "building_damage"))
+    mc.set_parameter("num_samples", 10)
+    mc.set_parameter("damage_interval_keys", ["DS_0", "DS_1", "DS_2", "DS_3"])
+    mc.set_parameter("failure_state_keys", ["DS_1", "DS_2", "DS_3"])
+    assert mc.run_analysis()
+
+    # sample states are csv unless npy is asked for
+    samples = mc.get_output_dataset("sample_damage_states")
+    assert samples.get_file_path("csv").endswith(".csv")
+    assert list(samples.get_dataframe_from_csv().columns) == [
+        "guid",
+        "sample_damage_states",
+    ]
+
+
 if __name__ == "__main__":
     run_with_base_class()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from pyincore import IncoreClient
+from pyincore.analyses.buildingdamage.buildingutil import BuildingUtil
+from pyincore.analyses.residentialbuildingrecovery import ResidentialBuildingRecovery
+
+
+def create_households(buildings, seed=1234):
+    """Two households per building in a few blocks, some without household income group."""
+    rng = np.random.default_rng(seed)
+    guids = [b["properties"]["guid"] for b in buildings for _ in range(2)]
+    return pd.DataFrame(
+        {
+            "guid": guids,
+            "huid": ["huid-" + str(i) for i in range(len(guids))],
+            "blockid": rng.choice(
+                [290970101001, 290970101002, 290970102001], len(guids)
+            ),
+            "hhinc": rng.choice([1, 2, 3, 4, 5, np.nan], len(guids)),
+        }
+    )
+
+
+def create_financial_resources():
+    """Shares of the financing sources by household income group, then their mean and sigma."""
+    shares = np.array(
+        [
+            [0.1, 0.2, 0.3, 0.4],
+            [0.2, 0.2, 0.3, 0.3],
+            [0.3, 0.3, 0.2, 0.2],
+            [0.4, 0.3, 0.2, 0.1],
+            [0.5, 0.3, 0.1, 0.1],
+        ]
+    )
+    resources = pd.DataFrame(
+        np.vstack([shares, [6.0, 12.0, 4.0, 8.0], [0.5, 0.6, 0.4, 0.7]]),
+        columns=["Insurance", "SBA", "Private", "Savings"],
+    )
+    resources.insert(0, "hhinc", [1, 2, 3, 4, 5, np.nan, np.nan])
+    return resources
+
+
+def run_recovery(inputs, seed):
+    buildings, mapping_set, sample_damage_states, redi_delay_factors = inputs
+    res_recovery = ResidentialBuildingRecovery(IncoreClient(offline=True))
+    res_recovery.set_input_dataset("dfr3_mapping_set", mapping_set)
+    res_recovery.set_parameter("repair_key", BuildingUtil.DEFAULT_REPAIR_KEY)
+    res_recovery.set_parameter("seed", seed)
+    return res_recovery.residential_recovery(
+        buildings,
+        sample_damage_states,
+        create_households(buildings),
+        create_financial_resources(),
+        redi_delay_factors,
+        20,
+    )
+
+
+def test_seed_gives_identical_recovery(synthetic_recovery_inputs, monkeypatch):
+    inputs = synthetic_recovery_inputs(50, 20)
+    results = run_recovery(inputs, 1238)
+
+    for expected, result in zip(results, run_recovery(inputs, 1238)):
+        pd.testing.assert_frame_equal(result, expected)
+    assert not results[0].equals(run_recovery(inputs, 1239)[0])
+
+    # the draws do not depend on the block size the buildings are processed in
+    monkeypatch.setattr(BuildingUtil, "MAX_BLOCK_DRAWS", 100)
+    for expected, result in zip(results, run_recovery(inputs, 1238)):
+        pd.testing.assert_frame_equal(result, expected)
@@ -1,3 +1,5 @@
+import pytest
+
 from pyincore import IncoreClient, Dataset
 from pyincore.analyses.saltlakecge import SaltLakeCGEModel
 import pyincore.globals as pyglobals
@@ -6,10 +8,7 @@ import pyincore.globals as pyglobals
 # IN-CORE development services.
 
 
-def run_base_analysis():
-    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
-    saltlake_cge = SaltLakeCGEModel(client)
-
+def load_input_datasets(saltlake_cge):
     saltlake_cge.set_parameter("model_iterations", 1)
 
     saltlake_cge.load_remote_input_dataset("SAM", "640758d66121f943887299a2")
@@ -25,8 +24,20 @@ def run_base_analysis():
     # Bad shock data - should produce infeasible result and not write output files
     # saltlake_cge.load_remote_input_dataset("sector_shocks", "640b94348bec9f280fdf9164")
 
+
+def run_base_analysis():
+    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
+    saltlake_cge = SaltLakeCGEModel(client)
+    load_input_datasets(saltlake_cge)
     saltlake_cge.run_analysis()
 
 
+@pytest.mark.skipif(pyglobals.IPOPT_PATH is None, reason="ipopt is not installed")
+def test_warm_start_scenarios(tmp_path, cge_warm_start):
+    saltlake_cge = SaltLakeCGEModel(pytest.client)
+    load_input_datasets(saltlake_cge)
+    cge_warm_start(saltlake_cge, tmp_path)
+
+
 if __name__ == '__main__':
     run_base_analysis()
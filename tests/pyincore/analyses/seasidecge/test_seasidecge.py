@@ -1,12 +1,11 @@
+import pytest
+
 from pyincore import IncoreClient
 from pyincore.analyses.seasidecge import SeasideCGEModel
 import pyincore.globals as pyglobals
 
 
-def run_base_analysis():
-    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
-    seaside_cge = SeasideCGEModel(client)
-
+def load_input_datasets(seaside_cge):
     # SAM
     sam = "5f6127105060967d84ab0f99"
 
@@ -30,8 +29,20 @@ def run_base_analysis():
     seaside_cge.load_remote_input_dataset("SIMS", sims)
     seaside_cge.load_remote_input_dataset("sector_shocks", sector_shocks)
 
+
+def run_base_analysis():
+    client = IncoreClient(pyglobals.INCORE_API_DEV_URL)
+    seaside_cge = SeasideCGEModel(client)
+    load_input_datasets(seaside_cge)
     seaside_cge.run_analysis()
 
 
+@pytest.mark.skipif(pyglobals.IPOPT_PATH is None, reason="ipopt is not installed")
+def test_warm_start_scenarios(tmp_path, cge_warm_start):
+    seaside_cge = SeasideCGEModel(pytest.client)
+    load_input_datasets(seaside_cge)
+    cge_warm_start(seaside_cge, tmp_path)
+
+
 if __name__ == '__main__':
     run_base_analysis()
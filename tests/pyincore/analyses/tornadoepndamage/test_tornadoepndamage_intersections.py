@@ -0,0 +1,261 @@
+import json
+import math
+import os
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point, box
+
+from pyincore import Dataset, GeoUtil, IncoreClient, NetworkDataset
+from pyincore.analyses.tornadoepndamage import TornadoEpnDamage
+import pyincore.globals as pyglobals
+
+
+def test_link_intersections():
+    polys = [box(0, 0, 1, 1), box(2, 0, 3, 1)]
+    lines = [
+        # crosses the first polygon
+        LineString([(-0.5, 0.5), (1.5, 0.5)]),
+        # only touches the first polygon
+        LineString([(1, 0.5), (1.5, 0.5)]),
+        # crosses both polygons
+        LineString([(-0.5, 0.2), (3.5, 0.2)]),
+        # outside of both polygons
+        LineString([(-0.5, 2), (3.5, 2)]),
+        # leaves and enters the first polygon again
+        LineString([(-0.5, 0.8), (0.3, 0.8), (0.3, 1.5), (0.7, 1.5), (0.7, 0.8)]),
+    ]
+
+    intersections = TornadoEpnDamage.get_link_intersections(lines, polys)
+
+    assert [(link, poly) for link, poly, _, _ in intersections] == [
+        (0, 0),
+        (2, 0),
+        (2, 1),
+        (4, 0),
+    ]
+    for link, poly, length, point in intersections:
+        assert length == GeoUtil.calc_geog_distance_from_linestring(
+            polys[poly].intersection(lines[link])
+        )
+        assert polys[poly].contains(point)
+    assert TornadoEpnDamage.get_link_intersections(lines, []) == []
+
+
+def legacy_path_totals(graph, connection_list, first_node_list, node_values, nnode):
+    """Sums and max of the node values on the paths of every node, as they were computed before."""
+    totals = [0] * nnode
+    maxima = [0] * nnode
+    for i in range(len(first_node_list)):
+        for j in range(len(connection_list[i])):
+            pathij = list(
+                nx.all_simple_paths(graph, connection_list[i][j], first_node_list[i])
+            )
+            total = 0
+            values = []
+            for path in pathij:
+                for node in path:
+                    total = total + node_values[node]
+                    values.append(node_values[node])
+            totals[connection_list[i][j]] = total
+            maxima[connection_list[i][j]] = max(values) if len(values) > 0 else 0
+    return totals, maxima
+
+
+def test_path_node_counts():
+    # two networks, the first with two paths from node 4 to its first node 0
+    graph = nx.DiGraph([(1, 0), (2, 1), (3, 1), (4, 2), (4, 3), (5, 4), (7, 6), (8, 7)])
+    connection_list = [[0, 1, 2, 3, 4, 5], [6, 7, 8]]
+    first_node_list = [0, 6]
+    node_values = np.random.default_rng(1234).random(9)
+
+    path_counts = TornadoEpnDamage.get_path_node_counts(
+        graph, connection_list, first_node_list, 9
+    )
+    totals, maxima = legacy_path_totals(
+        graph, connection_list, first_node_list, node_values, 9
+    )
+
+    np.testing.assert_allclose(path_counts @ node_values, totals)
+    np.testing.assert_array_equal(
+        [node_values[path_counts[node].indices].max() for node in range(9)], maxima
+    )
+    # node 1 and the first node are on both paths of node 4
+    assert path_counts[4, 1] == 2 and path_counts[4, 0] == 2
+
+
+def create_network(tmp_path):
+    """Five nodes, a transmission line from node 1 to 2 and distribution lines from 2 to 3, 2 to 4 and 4 to 5."""
+    coords = [
+        (-94.51, 37.05),
+        (-94.5, 37.05),
+        (-94.5, 37.06),
+        (-94.49, 37.05),
+        (-94.48, 37.05),
+    ]
+    nodes = gpd.GeoDataFrame(
+        {"NODENWID": range(1, 6), "guid": ["node-" + str(i) for i in range(1, 6)]},
+        geometry=[Point(coord) for coord in coords],
+        crs="EPSG:4326",
+    )
+    link_nodes = [(1, 2), (2, 3), (2, 4), (4, 5)]
+    links = gpd.GeoDataFrame(
+        {
+            "FROMNODE": [from_node for from_node, _ in link_nodes],
+            "TONODE": [to_node for _, to_node in link_nodes],
+            "LINETYPE": [
+                "Transmission",
+                "Distribution",
+                "Distribution",
+                "Distribution",
+            ],
+        },
+        geometry=[
+            LineString([coords[from_node - 1], coords[to_node - 1]])
+            for from_node, to_node in link_nodes
+        ],
+        crs="EPSG:4326",
+    )
+    nodes.to_file(str(tmp_path / "nodes.shp"))
+    links.to_file(str(tmp_path / "links.shp"))
+    return NetworkDataset.from_files(
+        str(tmp_path / "nodes.shp"),
+        str(tmp_path / "links.shp"),
+        str(tmp_path / "graph.csv"),
+        "incore:epnNetwork",
+        "incore:epnLinkVer1",
+        "incore:epnNodeVer1",
+        "incore:epnGraph",
+    )
+
+
+def create_tornado(tmp_path):
+    """Simulation 0 crosses the transmission line, simulation 1 the last distribution line and touches the end of
+    the distribution line from 2 to 3."""
+    polys = [
+        box(-94.509, 37.049, -94.501, 37.051),
+        box(-94.489, 37.049, -94.481, 37.051),
+        box(-94.5, 37.06, -94.495, 37.065),
+    ]
+    tornado = gpd.GeoDataFrame(
+        {"SIMULATION": [0, 1, 1], "EF_RATING": ["EF1", "EF1", "EF0"]},
+        geometry=polys,
+        crs="EPSG:4326",
+    )
+    tornado.to_file(str(tmp_path / "tornado.shp"))
+    return (
+        Dataset.from_file(str(tmp_path / "tornado.shp"), "incore:tornadoWindfield"),
+        polys,
+    )
+
+
+def run_damage(tmp_path, monkeypatch, seed, repair_deviation=True):
+    tornado_dataset, _ = create_tornado(tmp_path)
+    tornado_epn_dmg = TornadoEpnDamage(IncoreClient(offline=True))
+    tornado_epn_dmg.set_parameter("seed", seed)
+    if not repair_deviation:
+        tornado_epn_dmg.sigmat = tornado_epn_dmg.sigmad = 0
+        tornado_epn_dmg.tsigmat = tornado_epn_dmg.tsigmad = 0
+
+    # the tower and pole fragilities are a local wind fragility, every intersection gets a wind speed that damages
+    # all poles
+    with open(
+        os.path.join(
+            pyglobals.TEST_DATA_DIR, "fragility_curves/fragility_archetype_6.json"
+        )
+    ) as f:
+        fragility = json.load(f)
+    monkeypatch.setattr(
+        tornado_epn_dmg.fragilitysvc,
+        "get_dfr3_set",
+        lambda fragility_id: dict(fragility, id=fragility_id),
+    )
+    requests = []
+
+    def post_tornado_hazard_values(tornado_id, values_payload, seed):
+        requests.append(values_payload)
+        return [
+            {"hazardValues": [100.0], "demands": ["wind"], "units": ["mps"]}
+            for _ in values_payload
+        ]
+
+    monkeypatch.setattr(
+        tornado_epn_dmg.hazardsvc,
+        "post_tornado_hazard_values",
+        post_tornado_hazard_values,
+    )
+
+    ds_results, _ = tornado_epn_dmg.get_damage(
+        create_network(tmp_path),
+        tornado_dataset.get_inventory_reader(),
+        "tornado-id",
+    )
+    # the hazard values of all intersections are read in one request
+    assert len(requests) == 1 and len(requests[0]) == 2
+    return tornado_epn_dmg, ds_results
+
+
+def test_repair_costs_and_times(tmp_path, monkeypatch):
+    tornado_epn_dmg, ds_results = run_damage(
+        tmp_path, monkeypatch, 1001, repair_deviation=False
+    )
+
+    # poles of the transmission line in simulation 0 and of the last distribution line in simulation 1
+    _, polys = create_tornado(tmp_path)
+    lines = [
+        LineString([(-94.51, 37.05), (-94.5, 37.05)]),
+        LineString([(-94.49, 37.05), (-94.48, 37.05)]),
+    ]
+    towers, poles = [
+        round(
+            GeoUtil.calc_geog_distance_from_linestring(poly.intersection(line))
+            / tornado_epn_dmg.pole_distance
+        )
+        for line, poly in zip(lines, polys)
+    ]
+    assert towers > 0 and poles > 0
+    tower_cost = math.exp(tornado_epn_dmg.mut)
+    pole_cost = math.exp(tornado_epn_dmg.mud)
+
+    # every node counts the damage of the lines on its path to node 1
+    assert [result["meanpoles"] for result in ds_results] == [
+        0,
+        towers / 2,
+        towers / 2,
+        towers / 2,
+        (towers + poles) / 2,
+    ]
+    np.testing.assert_allclose(
+        [result["meancost"] for result in ds_results],
+        [0]
+        + [towers * tower_cost / 2] * 3
+        + [(towers * tower_cost + poles * pole_cost) / 2],
+    )
+    # the repair time of a path is the longest repair time of its lines
+    np.testing.assert_allclose(
+        [result["meantime"] for result in ds_results],
+        [0]
+        + [tornado_epn_dmg.tmut / 2] * 3
+        + [(tornado_epn_dmg.tmut + tornado_epn_dmg.tmud) / 2],
+    )
+
+
+def test_seed_gives_identical_damage(tmp_path, monkeypatch):
+    _, ds_results = run_damage(tmp_path, monkeypatch, 1001)
+
+    assert run_damage(tmp_path, monkeypatch, 1001)[1] == ds_results
+    other_results = run_damage(tmp_path, monkeypatch, 1002)[1]
+    assert [result["meancost"] for result in other_results] != [
+        result["meancost"] for result in ds_results
+    ]
+    assert [result["guid"] for result in ds_results] == [
+        "node-" + str(i) for i in range(1, 6)
+    ]
+
+
+@pytest.mark.parametrize("num_lines", [0, 1])
+def test_no_intersections(num_lines):
+    lines = [LineString([(-0.5, 2), (3.5, 2)])] * num_lines
+    assert TornadoEpnDamage.get_link_intersections(lines, [box(0, 0, 1, 1)]) == []
@@ -1,6 +1,13 @@
+import os
+from decimal import Decimal
+
+import numpy as np
 import pandas as pd
 
+from pyincore import BaseAnalysis, IncoreClient
+from pyincore import globals as pyglobals
 from pyincore.dataset import Dataset
+from pyincore.models.samplestates import SampleStates
 
 
 def test_from_dataframe():
@@ -21,3 +28,148 @@ def test_from_json_data():
         result_data, "empty.json", "incore:buildingDamageSupplement"
     )
     assert dataset.data_type == "incore:buildingDamageSupplement"
+
+
+def test_get_raster_values():
+    dataset = Dataset.from_file(
+        os.path.join(pyglobals.TEST_DATA_DIR, "Wave_Raster.tif"),
+        "ncsa:deterministicHurricaneRaster",
+    )
+    xs = [-95.06, -95.05, -90.0]
+    ys = [29.22, 29.23, 29.22]
+    values = dataset.get_raster_values(xs, ys)
+
+    assert len(values) == 3
+    assert values[0] == dataset.get_raster_value(xs[0], ys[0])
+    assert values[1] == dataset.get_raster_value(xs[1], ys[1])
+    # out of raster bounds
+    assert np.isnan(values[2])
+    assert dataset.get_raster_value(xs[2], ys[2]) is None
+
+
+def test_from_sample_states(tmp_path):
+    samples = SampleStates.from_strings(
+        ["a", "b"],
+        ["DS_0,DS_2,DS_3", "DS_1,DS_1,DS_0"],
+        labels=["DS_0", "DS_1", "DS_2", "DS_3"],
+        column="sample_damage_states",
+    )
+    dataset = Dataset.from_sample_states(
+        samples, str(tmp_path / "samples"), "incore:sampleDamageState"
+    )
+    loaded = dataset.get_sample_states()
+    assert loaded.ids == ["a", "b"]
+    assert loaded.to_strings() == ["DS_0,DS_2,DS_3", "DS_1,DS_1,DS_0"]
+    assert [fd["filename"] for fd in dataset.file_descriptors] == [
+        "samples.npy",
+        "samples_index.json",
+    ]
+
+    # csv representation is still available to dataframe consumers
+    df = dataset.get_dataframe_from_csv()
+    assert list(df.columns) == ["guid", "sample_damage_states"]
+    assert df.sample_damage_states[1] == "DS_1,DS_1,DS_0"
+
+    failure = SampleStates.from_strings(["a", "b"], ["0,1,1", "1,0"])
+    assert failure.to_values().tolist() == [[0, 1, 1], [1, 0, -1]]
+    assert failure.to_strings() == ["0,1,1", "1,0"]
+
+
+def test_from_memory(tmp_path):
+    results = [
+        {"guid": "a", "DS_0": Decimal("0.25"), "haz_expose": "yes", "rate": ""},
+        {"guid": "b", "DS_0": np.float64(0.5), "haz_expose": "no", "rate": "1.5"},
+    ]
+    file_path = str(tmp_path / "damage.csv")
+    dataset = Dataset.from_memory(results, file_path, "ergo:buildingDamageVer6")
+    assert dataset.is_in_memory() and dataset.local_file_path is None
+
+    # read like the csv file of the same results
+    csv_dataset = Dataset.from_csv_data(
+        results, str(tmp_path / "expected.csv"), "ergo:buildingDamageVer6"
+    )
+    assert list(dataset.get_csv_reader()) == list(csv_dataset.get_csv_reader())
+    assert list(dataset.get_csv_reader_std()) == list(csv_dataset.get_csv_reader_std())
+    pd.testing.assert_frame_equal(
+        dataset.get_dataframe_from_csv(), csv_dataset.get_dataframe_from_csv()
+    )
+    # the results themselves, with plain numbers
+    assert dataset.get_json_reader()[0] == {**results[0], "DS_0": 0.25}
+    assert [len(chunk) for chunk in dataset.iter_dataframes_from_results(1)] == [1, 1]
+    assert not os.path.exists(file_path)
+
+    # written on export, or for readers that need a file
+    assert dataset.export() == file_path
+    assert dataset.get_file_path() == file_path
+    pd.testing.assert_frame_equal(
+        pd.read_csv(file_path), csv_dataset.get_dataframe_from_csv()
+    )
+
+
+def test_from_memory_csv_values(tmp_path):
+    results = [
+        {"guid": "a", "count": 1, "DS_0": Decimal("0.1000000000")},
+        {"guid": "b", "count": None, "DS_0": Decimal("0.9000000000")},
+    ]
+    dataset = Dataset.from_memory(
+        results, str(tmp_path / "counts.csv"), "ergo:buildingDamageVer6"
+    )
+    csv_dataset = Dataset.from_csv_data(
+        results, str(tmp_path / "expected.csv"), "ergo:buildingDamageVer6"
+    )
+
+    rows = list(dataset.get_csv_reader())
+    assert rows == list(csv_dataset.get_csv_reader())
+    assert int(rows[0]["count"]) == 1 and rows[1]["count"] == ""
+    assert rows[0]["DS_0"] == "0.1000000000"
+    pd.testing.assert_frame_equal(
+        dataset.get_dataframe_from_csv(), csv_dataset.get_dataframe_from_csv()
+    )
+
+    # exported to the same file
+    dataset.export()
+    assert (tmp_path / "counts.csv").read_text() == (
+        tmp_path / "expected.csv"
+    ).read_text()
+
+
+def test_from_memory_over_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(pyglobals, "MAX_IN_MEMORY_DATASET_SIZE", 1)
+    samples = SampleStates.from_strings(["a", "b"], ["0,1,1", "1,0,1"])
+    dataset = Dataset.from_memory(
+        samples, str(tmp_path / "samples.npy"), "incore:sampleFailureState"
+    )
+    assert not dataset.is_in_memory()
+    assert dataset.get_sample_states().to_strings() == ["0,1,1", "1,0,1"]
+
+
+def test_in_memory_outputs(tmp_path):
+    class ChainAnalysis(BaseAnalysis):
+        def get_spec(self):
+            return {
+                "name": "chain-analysis",
+                "description": "writes its results",
+                "input_parameters": [],
+                "input_datasets": [],
+                "output_datasets": [
+                    {"id": "result", "type": "ergo:buildingDamageVer6"},
+                    {"id": "samples", "type": "incore:sampleFailureState"},
+                ],
+            }
+
+    analysis = ChainAnalysis(IncoreClient(offline=True))
+    analysis.set_in_memory_outputs()
+    name = str(tmp_path / "result")
+    analysis.set_result_batches(
+        [([{"guid": "a", "DS_0": 0.25}],), ([{"guid": "b", "DS_0": 0.5}],)],
+        [("result", name, "parquet")],
+    )
+    samples = SampleStates.from_strings(["a", "b"], ["0,1", "1,1"])
+    analysis.set_result_sample_states("samples", samples, name, sample_format="npy")
+
+    result = analysis.get_output_dataset("result")
+    assert result.is_in_memory()
+    assert result.get_dataframe_from_csv().DS_0.tolist() == [0.25, 0.5]
+    # sample states are handed on without a copy
+    assert analysis.get_output_dataset("samples").get_sample_states() is samples
+    assert os.listdir(str(tmp_path)) == []
@@ -14,6 +14,7 @@ from pyincore import (
     RestorationCurveSet,
     AnalysisUtil,
 )
+from pyincore.models.restorationtable import RestorationTable
 import numpy as np
 
 
@@ -230,6 +231,50 @@ def test_calculate_pipeline_restoration_rates(restoration_set, args, expected):
         assert result["RT"] == expected
 
 
+def test_restoration_table():
+    restoration_set = get_restoration_set("restorationset.json")
+    table = RestorationTable(restoration_set, [0, 15, 30, 80], [0.25, 0.5, 0.99])
+
+    rates = table.get_restoration_rates([15, 80])
+    assert (
+        rates["PF_0"][0] == restoration_set.calculate_restoration_rates(time=15)["PF_0"]
+    )
+    assert rates["PF_0"][1] == 0.9943516689414926
+    # interpolated between grid points
+    assert table.get_restoration_rates([22.5])["PF_0"][0] == pytest.approx(
+        (rates["PF_0"][0] + table.get_restoration_rates([30])["PF_0"][0]) / 2
+    )
+
+    inverse_rates = table.get_inverse_restoration_rates([0.99])
+    expected = restoration_set.calculate_inverse_restoration_rates(time=0.99)
+    for key, value in expected.items():
+        assert inverse_rates[key][0] == value
+
+    discretized = table.get_discretized_restoration([15, 30])
+    expected = AnalysisUtil.get_discretized_restoration(restoration_set, [15, 30])
+    assert np.array_equal(discretized, [expected["day15"], expected["day30"]])
+
+
+def test_solve_curve_expression_batch():
+    fragility_set = get_fragility_set(
+        "fragility_curves/PeriodStandardFragilityCurve_refactored.json"
+    )
+    sa = np.array([0.1, 0.5, 1.2, 4.0, np.nan])
+    for fragility_curve in fragility_set.fragility_curves:
+        result = fragility_curve.solve_curve_expression_batch(
+            {"0.2 sec Sa": sa}, fragility_set.curve_parameters
+        )
+        expected = [
+            fragility_curve.solve_curve_expression(
+                {"0.2 sec Sa": value}, fragility_set.curve_parameters
+            )
+            for value in sa[:-1]
+        ]
+        assert np.allclose(result[:-1], expected)
+        # no hazard exposure
+        assert result[-1] == 0.0
+
+
 def test_fragility_eval():
     expression = "round(ffe_elev) == 0"
     parameters = {"ffe_elev": 0.1}
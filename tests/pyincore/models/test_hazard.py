@@ -1,5 +1,7 @@
 import pytest
 import os
+import sqlite3
+import tempfile
 from pyincore import (
     Dataset,
     HurricaneDataset,
@@ -11,6 +13,7 @@ from pyincore import (
     EarthquakeDataset,
     Tornado,
     TornadoDataset,
+    HazardValueCache,
 )
 
 from pyincore import globals as pyglobals
@@ -272,6 +275,31 @@ def test_create_tornado_from_local():
     assert values[0]["hazardValues"][0] < tornado.EF_WIND_SPEED[2]
 
 
+def test_tornado_local_bulk_matches_single_location():
+    tornado = Tornado.from_json_file(
+        os.path.join(pyglobals.TEST_DATA_DIR, "tornado_dataset.json")
+    )
+    tornado.hazardDatasets[0].from_file(
+        (os.path.join(pyglobals.TEST_DATA_DIR, "joplin_tornado/joplin_path_wgs84.shp")),
+        data_type="incore:tornadoWindfield",
+    )
+
+    locations = ["37.04, -94.37", "37.05, -94.50", "37.06, -94.47", "36.00, -94.00"]
+    payload = [
+        {"demands": ["wind"], "units": ["mph"], "loc": location}
+        for location in locations
+    ]
+    bulk_values = tornado.read_hazard_values(payload, seed=1234)
+
+    for location, bulk_value in zip(locations, bulk_values):
+        single_payload = [{"demands": ["wind"], "units": ["mph"], "loc": location}]
+        single_value = tornado.read_hazard_values(single_payload, seed=1234)
+        assert bulk_value["hazardValues"] == single_value[0]["hazardValues"]
+
+    # outside the tornado path
+    assert bulk_values[3]["hazardValues"] == [None]
+
+
 def test_read_hazard_values_from_remote():
     payload = [
         {
@@ -302,6 +330,54 @@ def test_read_hazard_values_from_remote():
     )
 
 
+def test_read_hazard_values_cached():
+    payload = [
+        {"demands": ["PGA", "PGV"], "units": ["g", "in/s"], "loc": "35.84,-89.90"},
+        {"demands": ["PGA"], "units": ["g"], "loc": "35.85,-89.91"},
+    ]
+    posted = []
+
+    def post_hazard_values(points):
+        posted.append(points)
+        values = {"35.84,-89.90": [0.25, -9999.2], "35.85,-89.91": [None]}
+        return [dict(point, hazardValues=values[point["loc"]]) for point in points]
+
+    cache = HazardValueCache(os.path.join(tempfile.mkdtemp(), "hazard.sqlite"))
+    values = cache.read_hazard_values(payload, post_hazard_values)
+    cached_values = cache.read_hazard_values(payload, post_hazard_values)
+
+    assert cached_values == values
+    assert values[0]["hazardValues"] == [0.25, -9999.2]
+    assert values[1]["hazardValues"] == [None]
+    # error codes are not cached, only the point with an error is posted again
+    assert len(posted) == 2 and posted[1] == payload[:1]
+    # values of another variant are not shared
+    cache.read_hazard_values(payload[1:], post_hazard_values, "amplify=False")
+    assert len(posted) == 3
+
+
+def test_hazard_value_cache_closes_connections(monkeypatch):
+    connections = []
+    connect = sqlite3.connect
+
+    def record_connect(*args, **kwargs):
+        connections.append(connect(*args, **kwargs))
+        return connections[-1]
+
+    monkeypatch.setattr(sqlite3, "connect", record_connect)
+    cache = HazardValueCache(os.path.join(tempfile.mkdtemp(), "hazard.sqlite"))
+    payload = [{"demands": ["PGA"], "units": ["g"], "loc": "35.84,-89.90"}]
+    cache.read_hazard_values(
+        payload, lambda points: [dict(p, hazardValues=[0.25]) for p in points]
+    )
+    cache.clear()
+
+    assert len(connections) > 0
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+
+
 def test_read_hazard_values_from_local():
     payload = [
         {
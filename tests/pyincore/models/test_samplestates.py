@@ -0,0 +1,27 @@
+from pyincore.models.samplestates import SampleStates
+
+
+def test_concat():
+    samples = SampleStates.concat(
+        [
+            SampleStates.from_strings(["a"], ["DS_0,DS_2"], labels=["DS_0", "DS_2"]),
+            SampleStates.from_strings(["b"], ["DS_2"], labels=["DS_0", "DS_2"]),
+        ]
+    )
+    assert samples.ids == ["a", "b"]
+    assert samples.to_strings() == ["DS_0,DS_2", "DS_2"]
+
+    # chunks with other labels are remapped to the labels of the first chunk
+    remapped = SampleStates.concat(
+        [
+            SampleStates.from_strings(["a"], ["DS_0,DS_2"], labels=["DS_0", "DS_2"]),
+            SampleStates.from_strings(["b"], ["DS_2,DS_1"], labels=["DS_1", "DS_2"]),
+        ]
+    )
+    assert remapped.labels == ["DS_0", "DS_2", "DS_1"]
+    assert remapped.to_strings() == ["DS_0,DS_2", "DS_2,DS_1"]
+
+    # no chunks for an empty input
+    empty = SampleStates.concat([], ["DS_0", "DS_1"], "sample_damage_states")
+    assert empty.ids == [] and empty.labels == ["DS_0", "DS_1"]
+    assert list(empty.to_dataframe().columns) == ["guid", "sample_damage_states"]
@@ -0,0 +1,107 @@
+import decimal
+import os
+
+import pytest
+
+from pyincore import BaseAnalysis, IncoreClient
+
+
+class ChunkAnalysis(BaseAnalysis):
+    def get_spec(self):
+        return {
+            "name": "chunk-analysis",
+            "description": "adds an offset to every item",
+            "input_parameters": [
+                {
+                    "id": "parallel_backend",
+                    "required": False,
+                    "description": "Parallel execution backend.",
+                    "type": str,
+                },
+                {
+                    "id": "result_format",
+                    "required": False,
+                    "description": "Format of the result outputs.",
+                    "type": str,
+                },
+            ],
+            "input_datasets": [],
+            "output_datasets": [],
+        }
+
+    def offset_bulk_input(self, items, seeds, offset):
+        if -1 in items:
+            raise ValueError("invalid item")
+        return (
+            [item + seed + offset for item, seed in zip(items, seeds)],
+            os.getpid(),
+            decimal.getcontext().prec,
+        )
+
+
+@pytest.fixture
+def analysis():
+    return ChunkAnalysis(IncoreClient(offline=True))
+
+
+def test_get_chunks(analysis):
+    items = list(range(16))
+    seeds = [10 * item for item in items]
+
+    chunks = analysis.get_chunks(2, items, seeds)
+    assert len(chunks) == 2 * BaseAnalysis.CHUNKS_PER_WORKER
+    assert [item for chunk in chunks for item in chunk[0]] == items
+    assert all([10 * item for item in chunk[0]] == list(chunk[1]) for chunk in chunks)
+
+    assert analysis.get_chunks(1, items) == [(items,)]
+    assert analysis.get_chunks(3, items, chunk_size=4) == [
+        (items[0:4],),
+        (items[4:8],),
+        (items[8:12],),
+        (items[12:],),
+    ]
+    assert analysis.get_chunks(4, []) == []
+
+
+@pytest.mark.parametrize("backend", ["process", "thread", "serial"])
+def test_map_parallel_keeps_order(analysis, backend):
+    analysis.set_parameter("parallel_backend", backend)
+    items = list(range(101))
+    chunks = analysis.get_chunks(3, items, [1] * len(items))
+
+    results = []
+    pids = set()
+    for result, pid, precision in analysis.map_parallel(
+        analysis.offset_bulk_input, chunks, 3, 100, max_pending=2
+    ):
+        results.extend(result)
+        pids.add(pid)
+        # damage is rounded alike in every backend
+        assert precision == decimal.getcontext().prec
+
+    assert results == [item + 101 for item in items]
+    if backend == "process":
+        assert os.getpid() not in pids
+    else:
+        assert pids == {os.getpid()}
+
+
+def test_map_parallel_raises_worker_errors(analysis):
+    chunks = analysis.get_chunks(2, [1, 2, 3, -1, 5, 6], [0] * 6)
+    with pytest.raises(ValueError):
+        list(analysis.map_parallel(analysis.offset_bulk_input, chunks, 2, 0))
+
+    analysis.set_parameter("parallel_backend", "cluster")
+    with pytest.raises(ValueError):
+        analysis.get_parallel_backend()
+
+
+def test_get_result_formats(analysis):
+    assert analysis.get_result_formats() == ("csv", "json")
+
+    analysis.set_parameter("result_format", "jsonl")
+    assert analysis.get_result_formats() == ("jsonl", "jsonl")
+
+    analysis.set_parameter("result_format", "xml")
+    with pytest.raises(ValueError):
+        analysis.get_result_formats()
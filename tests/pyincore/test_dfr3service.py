@@ -8,6 +8,7 @@ import ast
 import json
 import os
 
+import pandas as pd
 import pytest
 
 from pyincore import globals as pyglobals
@@ -45,6 +46,55 @@ def test_get_fragility_set(fragilitysvc):
     assert metadata["id"] == set_id
 
 
+def test_batch_get_fragility_sets_cached(fragilitysvc):
+    set_id = "5b47b2d7337d4a36187c61c9"
+    fragilitysvc.clear_dfr3_set_cache()
+    fragility_sets = fragilitysvc.batch_get_dfr3_set([set_id, set_id])
+
+    assert list(fragility_sets.keys()) == [set_id]
+    assert os.path.isfile(
+        os.path.join(fragilitysvc.client.hashed_svc_data_dir, "dfr3", set_id + ".json")
+    )
+
+    # the parsed set is reused from memory on the next call
+    assert fragilitysvc.batch_get_dfr3_set([set_id])[set_id] is fragility_sets[set_id]
+
+    fragilitysvc.clear_dfr3_set_cache()
+    assert set_id not in fragilitysvc.dfr3_set_cache
+    assert not os.path.isfile(
+        os.path.join(fragilitysvc.client.hashed_svc_data_dir, "dfr3", set_id + ".json")
+    )
+
+
+def test_prefetch_fragility_sets_of_entry_keys(fragilitysvc, monkeypatch):
+    mapping = MappingSet(
+        {
+            "mappingEntryKeys": [
+                {"name": "Non-Retrofit Fragility ID Code", "defaultKey": True},
+                {"name": "retrofit_method_1"},
+            ],
+            "mappings": [
+                {
+                    "entry": {
+                        "Non-Retrofit Fragility ID Code": "set-a",
+                        "retrofit_method_1": "set-b",
+                    },
+                    "rules": [],
+                },
+                {"entry": {"Non-Retrofit Fragility ID Code": "set-c"}, "rules": []},
+            ],
+            "mappingType": "fragility",
+        }
+    )
+    fetched = []
+    monkeypatch.setattr(fragilitysvc, "batch_get_dfr3_set", fetched.append)
+
+    fragilitysvc.prefetch_dfr3_sets(mapping, [None])
+    fragilitysvc.prefetch_dfr3_sets(mapping, ["retrofit_method_1"])
+
+    assert fetched == [["set-a", "set-c"], ["set-b"]]
+
+
 def test_search_fragility_sets(fragilitysvc):
     text = "Elnashai and Jeong"
     fragility_sets = fragilitysvc.search_dfr3_sets(text)
@@ -98,6 +148,26 @@ def test_match_fragilities_multiple_inventories_new_format(fragilitysvc):
     )
 
 
+def test_match_dataframe_new_format(fragilitysvc):
+    with open(
+        os.path.join(pyglobals.TEST_DATA_DIR, "multiple_inventory.json"), "r"
+    ) as file:
+        inventories = ast.literal_eval(file.read())
+    key = "Non-Retrofit Fragility ID Code"
+    mapping = MappingSet.from_json_file(
+        os.path.join(pyglobals.TEST_DATA_DIR, "local_mapping_new_format.json"),
+        "fragility",
+    )
+    inventory_df = pd.DataFrame(
+        [inventory["properties"] for inventory in inventories],
+        index=[inventory["id"] for inventory in inventories],
+    )
+    curve_ids = fragilitysvc.match_dataframe(mapping, inventory_df, key)
+
+    assert curve_ids.index.equals(inventory_df.index)
+    assert (curve_ids == "5b47b350337d4a36290769c7").all()
+
+
 def test_extract_inventory_class(restorationsvc):
     rules = [
         ["java.lang.String utilfcltyc EQUALS 'EESL'"],
@@ -161,9 +231,17 @@ def test_create_and_delete_fragility_set(fragilitysvc):
         fragility_set = json.load(f)
     created = fragilitysvc.create_dfr3_set(fragility_set)
     assert "id" in created.keys()
+    fragilitysvc.batch_get_dfr3_set([created["id"]])
 
     del_response = fragilitysvc.delete_dfr3_set(created["id"])
     assert del_response["id"] is not None
+    # the deleted set is no longer served from the caches
+    assert created["id"] not in fragilitysvc.dfr3_set_cache
+    assert not os.path.isfile(
+        os.path.join(
+            fragilitysvc.client.hashed_svc_data_dir, "dfr3", created["id"] + ".json"
+        )
+    )
 
 
 def test_create_and_delete_fragility_mapping(fragilitysvc):
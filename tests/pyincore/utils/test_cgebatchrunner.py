@@ -0,0 +1,124 @@
+# Copyright (c) 2024 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+import pandas as pd
+import pytest
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
+
+from pyincore import BaseAnalysis, CGEBatchRunner, IncoreClient
+
+
+def get_solver_results(status, termination_condition):
+    results = SolverResults()
+    results.solver.status = status
+    results.solver.termination_condition = termination_condition
+    return results
+
+
+class ScenarioAnalysis(BaseAnalysis):
+    """Scales the shocks of a scenario, the solver stops as infeasible for negative shocks."""
+
+    def get_spec(self):
+        return {
+            "name": "scenario-analysis",
+            "description": "scales sector shocks",
+            "input_parameters": [],
+            "input_datasets": [],
+            "output_datasets": [
+                {
+                    "id": "scenario-results",
+                    "parent_type": "",
+                    "description": "Results of every shock scenario.",
+                    "type": "incore:cgeScenarioResults",
+                }
+            ],
+        }
+
+    def build_simulation(self, data, require_optimal=False):
+        def simulate(sector_shocks):
+            shocks = sector_shocks.set_index("sector")["shock"]
+            results = get_solver_results(
+                SolverStatus.ok,
+                (
+                    TerminationCondition.infeasible
+                    if (shocks < 0).any()
+                    else TerminationCondition.optimal
+                ),
+            )
+            if require_optimal:
+                CGEBatchRunner.check_solver_results(results)
+            return {"output": pd.DataFrame({"scaled": shocks * data["scale"]})}
+
+        return simulate
+
+
+def test_get_scenarios():
+    sector_shocks = pd.DataFrame(
+        {"s0": [0.9, 0.8], "s1": [1.0, 0.5]}, index=pd.Index(["HS1", "GOODS"])
+    )
+    scenarios = CGEBatchRunner.get_scenarios(sector_shocks)
+
+    assert [name for name, _ in scenarios] == ["s0", "s1"]
+    assert scenarios[1][1].to_dict("list") == {
+        "sector": ["HS1", "GOODS"],
+        "shock": [1.0, 0.5],
+    }
+
+
+def test_to_long_format():
+    outputs = {
+        "domestic-supply": pd.DataFrame(
+            {"DS0": [1.0, 2.0], "DSL": [3.0, 4.0]},
+            index=pd.Index(["HS1", "GOODS"], name="Sectors"),
+        )
+    }
+    result = CGEBatchRunner.to_long_format("s0", outputs)
+
+    assert list(result.columns) == CGEBatchRunner.COLUMNS
+    assert result["row"].tolist() == ["HS1", "GOODS", "HS1", "GOODS"]
+    assert result["column"].tolist() == ["DS0", "DS0", "DSL", "DSL"]
+    assert result["value"].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_check_solver_results():
+    CGEBatchRunner.check_solver_results(
+        get_solver_results(SolverStatus.ok, TerminationCondition.optimal)
+    )
+
+    with pytest.raises(ValueError, match="infeasible"):
+        CGEBatchRunner.check_solver_results(
+            get_solver_results(SolverStatus.warning, TerminationCondition.infeasible)
+        )
+    with pytest.raises(ValueError, match="maxIterations"):
+        CGEBatchRunner.check_solver_results(
+            get_solver_results(SolverStatus.ok, TerminationCondition.maxIterations)
+        )
+
+
+@pytest.mark.parametrize("result_format", ["csv", "jsonl"])
+def test_run_skips_scenarios_not_solved(tmp_path, result_format):
+    analysis = ScenarioAnalysis(IncoreClient(offline=True))
+    sector_shocks = pd.DataFrame(
+        {"s0": [0.9, 0.8], "s1": [-1.0, 0.5], "s2": [1.0, 0.5]},
+        index=pd.Index(["HS1", "GOODS"]),
+    )
+
+    solved = CGEBatchRunner.run(
+        analysis,
+        {"scale": 2.0},
+        CGEBatchRunner.get_scenarios(sector_shocks),
+        "scenario-results",
+        str(tmp_path / "scenario-results"),
+        num_cpu=1,
+        result_format=result_format,
+    )
+    result = analysis.get_output_dataset("scenario-results")
+
+    assert not solved
+    assert result.get_file_path().endswith("." + result_format)
+    rows = result.get_dataframe_from_csv()
+    assert list(rows.columns) == CGEBatchRunner.COLUMNS
+    assert rows["scenario"].astype(str).tolist() == ["s0", "s0", "s2", "s2"]
+    assert rows["value"].tolist() == [1.8, 1.6, 2.0, 1.0]
@@ -0,0 +1,108 @@
+import gzip
+import json
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pyincore import Client
+from pyincore.utils.hazardvaluestransport import HazardValuesTransport
+
+
+class StubHazardValuesHandler(BaseHTTPRequestHandler):
+    """Answers hazard value posts with the point index as hazard value, the first post fails with a 503."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.posts += 1
+            fail = server.posts == 1
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+            server.compressed = True
+        message = BytesParser().parsebytes(
+            b"Content-Type: "
+            + self.headers["Content-Type"].encode()
+            + b"\r\n\r\n"
+            + body
+        )
+        form = {
+            part.get_param("name", header="content-disposition"): part.get_payload(
+                decode=True
+            ).decode()
+            for part in message.get_payload()
+        }
+        points = json.loads(form["points"])
+        with server.lock:
+            server.chunks.append(len(points))
+            server.fields.append(form.get("amplifyHazard"))
+        for point in points:
+            point["hazardValues"] = [point["index"]]
+
+        response = json.dumps(points).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHazardValuesHandler)
+    server.lock = threading.Lock()
+    server.posts = 0
+    server.chunks = []
+    server.fields = []
+    server.compressed = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_post_chunks_in_order(stub_server, compress):
+    url = "http://127.0.0.1:" + str(stub_server.server_port) + "/hazard/values"
+    payload = [
+        {"demands": ["PGA"], "units": ["g"], "loc": "35.0,-90.0", "index": i}
+        for i in range(25)
+    ]
+    transport = HazardValuesTransport(
+        Client(), chunk_size=4, max_workers=3, backoff_factor=0, compress=compress
+    )
+
+    values = transport.post(url, payload, [("amplifyHazard", "true")])
+
+    assert [value["hazardValues"] for value in values] == [[i] for i in range(25)]
+    # the failed first post is retried
+    assert stub_server.posts == 8
+    assert sorted(stub_server.chunks) == [1, 4, 4, 4, 4, 4, 4]
+    assert stub_server.fields == ["true"] * 7
+    assert stub_server.compressed == compress
+
+
+def test_retries_only_hazard_values_urls():
+    transport = HazardValuesTransport(Client())
+    url = "http://127.0.0.1/hazard/api/earthquakes/1/values"
+    transport.mount(url)
+
+    session = transport.client.session
+    assert session.get_adapter(url).max_retries.total == HazardValuesTransport.RETRIES
+    # creating datasets or hazards on the same host is never retried
+    for other_url in [
+        "http://127.0.0.1/data/api/datasets",
+        "http://127.0.0.1/hazard/api/earthquakes",
+    ]:
+        assert session.get_adapter(other_url).max_retries.total == 0
@@ -0,0 +1,43 @@
+# Copyright (c) 2019 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+import networkx as nx
+import numpy as np
+
+from pyincore import NetworkReachability
+
+
+def test_reachable_samples():
+    # 1 - 2 - 3 - 4 and a parallel path 1 - 5 - 4
+    graph = nx.Graph([(1, 2), (2, 3), (3, 4), (1, 5), (5, 4)])
+    reachability = NetworkReachability(graph)
+
+    # sample 0: nothing failed, sample 1: node 5 failed, sample 2: node 5 and link 2-3 failed
+    failed_nodes = reachability.node_failure_matrix([5], [[1, 0, 0]])
+    failed_edges = reachability.edge_failure_matrix([(3, 2)], [[1, 1, 0]])
+    result = reachability.reachable_samples(
+        [1], [2, 3, 4, 5], failed_nodes=failed_nodes, failed_edges=failed_edges
+    )
+
+    assert result.tolist() == [[1, 1, 1], [1, 1, 0], [1, 1, 0], [1, 0, 0]]
+
+
+def test_reachable_directed():
+    graph = nx.DiGraph([(1, 2), (2, 3), (4, 3)])
+    reachability = NetworkReachability(graph)
+    reached = reachability.reachable(reachability.get_node_indices([1]))
+
+    assert reached[reachability.get_node_indices([1, 2, 3, 4])].tolist() == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert np.all(
+        reachability.reachable_samples(
+            [4], [3], failed_nodes=np.zeros((4, 2), dtype=bool)
+        )
+        == 1
+    )
@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+from decimal import Decimal
+
+import pytest
+
+from pyincore import Dataset, ResultSink
+
+RESULTS = [
+    {
+        "guid": "guid-" + str(i),
+        "DS_0": Decimal("0.25"),
+        "DS_1": 0.75 * i,
+        "haz_expose": "yes" if i % 2 else "no",
+        "hazardval": {"earthquake": [0.1 * i, None]},
+    }
+    for i in range(7)
+]
+
+
+def write_batches(file_path, result_format, batches):
+    closed = []
+    with ResultSink(file_path, result_format, on_close=closed.append) as sink:
+        for batch in batches:
+            sink.write(batch)
+    assert closed == [file_path]
+    return Dataset.from_file(file_path, "incore:buildingDamageVer6")
+
+
+def test_csv_and_json_match_whole_writes(tmp_path):
+    batches = [RESULTS[:3], [], RESULTS[3:]]
+
+    write_batches(str(tmp_path / "batches.csv"), "csv", batches)
+    with open(str(tmp_path / "whole.csv"), "w") as f:
+        writer = csv.DictWriter(f, dialect="unix", fieldnames=RESULTS[0].keys())
+        writer.writeheader()
+        writer.writerows(RESULTS)
+    assert (tmp_path / "batches.csv").read_text() == (
+        tmp_path / "whole.csv"
+    ).read_text()
+
+    json_results = [{**result, "DS_0": 0.25} for result in RESULTS]
+    write_batches(
+        str(tmp_path / "batches.json"), "json", [json_results[:2], json_results[2:]]
+    )
+    assert (tmp_path / "batches.json").read_text() == json.dumps(json_results, indent=4)
+
+
+def test_empty_sink_writes_no_file(tmp_path):
+    file_path = str(tmp_path / "empty.jsonl")
+    write_batches(file_path, "jsonl", [[], []])
+    assert not os.path.exists(file_path)
+
+
+def test_failed_run_leaves_output_unset(tmp_path):
+    closed = []
+    with pytest.raises(RuntimeError):
+        with ResultSink(
+            str(tmp_path / "failed.csv"), "csv", on_close=closed.append
+        ) as sink:
+            sink.write(RESULTS)
+            raise RuntimeError("worker failed")
+    assert closed == []
+
+
+@pytest.mark.parametrize("result_format", ["jsonl", "parquet"])
+def test_read_results_lazily(tmp_path, result_format):
+    if result_format == "parquet":
+        pytest.importorskip("pyarrow")
+    file_path = str(tmp_path / ("results" + ResultSink.get_extension(result_format)))
+    dataset = write_batches(file_path, result_format, [RESULTS[:4], RESULTS[4:]])
+
+    assert dataset.get_result_format() == result_format
+    results = list(dataset.get_result_reader(batch_size=3))
+    assert [result["guid"] for result in results] == [
+        result["guid"] for result in RESULTS
+    ]
+    assert results[3]["DS_0"] == 0.25
+    assert results[3]["hazardval"]["earthquake"] == [pytest.approx(0.3), None]
+
+    # read in their csv representation by the analyses that take csv results
+    rows = list(dataset.get_csv_reader())
+    assert rows[1]["DS_1"] == "0.75" and rows[1]["haz_expose"] == "yes"
+    assert len(dataset.get_dataframe_from_csv()) == len(RESULTS)
+    assert [len(chunk) for chunk in dataset.iter_dataframes_from_results(5)] == [5, 2]
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        ResultSink(str(tmp_path / "results.xml"), "xml")